@@ -5,6 +5,7 @@ from typing import Dict, Any, Optional, List, Union
 from datetime import datetime
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query, Header, Body, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from jwt import PyJWTError
 import httpx
@@ -33,10 +34,21 @@ from utils.mcp_clients import ( # Updated import for all new clients
     get_mcp_market_analysis,
     get_mcp_reasoning,
     get_mcp_specialist_strategy,
-    get_mcp_portfolio_optimization
+    get_mcp_portfolio_optimization,
+    mcp_registry
 )
 from utils.t2l_auditor_engine import T2LAuditorEngine # Import the new Auditor Engine
 from utils.layer2_trading import Layer2GasEstimator, Layer2Liquidation, Layer2TradingOptimizer # Import L2 components
+from utils.gas_oracle import gas_oracle
+from utils.market_events import market_event_bus
+from utils.shared_market_state import shared_market_state
+from utils.pipeline_tracing import pipeline_tracer
+from utils.llm_client import llm_client
+from utils.llm_cache import llm_response_cache
+from utils.local_models import latency_budget_policy, local_models
+from utils.fan_out import Source, fan_out
+from utils.llm_telemetry import llm_telemetry
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 # Consolidated routers and services
 # from api_routers import companions_router, mcp_router # Assuming this was an incomplete refactor
@@ -200,9 +212,27 @@ async def startup_event():
         except Exception as e:
             logger.error(f"Failed to initialize provider for chain {chain_id}: {str(e)}")
 
+    # Keep gas prices fresh in the background so lookups are served from memory
+    await market_event_bus.start()
+    await gas_oracle.start()
+    # Keep the MCP service map warm so client calls never wait on the registry
+    await mcp_registry.start()
+    # Mirror market updates into shared memory for out-of-process bots
+    try:
+        shared_market_state.start()
+    except OSError as e:
+        logger.error(f"Could not create shared market state segment: {e}")
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup WebSocket connections on shutdown."""
+    await gas_oracle.stop()
+    await mcp_registry.stop()
+    shared_market_state.stop()
+    await market_event_bus.stop()
+    pipeline_tracer.flush()
+    await llm_client.aclose()
+    await arbitrage_service.supervisor.stop_all()
     await ws_server.stop()
 
 # Authentication Models
@@ -1057,6 +1087,11 @@ async def health_check():
         "message": "API is operational" if core_modules_active else "One or more core modules are not available"
     }
 
+@app.get("/api/mcp/registry/stats")
+async def mcp_registry_stats():
+    """Cached MCP service map, pooled clients and circuit breaker states."""
+    return {**mcp_registry.get_stats(), "timestamp": datetime.now().isoformat()}
+
 @app.get("/")
 async def root():
     """Root path for health check and API info"""
@@ -1333,6 +1368,21 @@ async def get_gas_prices():
         logger.error(f"Error getting gas prices: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/gas/oracle")
+async def get_gas_oracle_status():
+    """Get freshness of the background gas oracle per network."""
+    return gas_oracle.get_status()
+
+@app.get("/api/market/events")
+async def get_market_event_stats():
+    """Get reactive opportunity-detection stats (events, coalescing, detection latency)."""
+    return market_event_bus.get_stats()
+
+@app.get("/api/market/shared-state")
+async def get_shared_market_state_stats():
+    """Get the shared-memory market state segment that bot processes read from."""
+    return shared_market_state.get_stats()
+
 @app.get("/api/gas/network/{network_id}")
 async def get_network_gas_price(network_id: str):
     """Get gas price for a specific network."""
@@ -1430,6 +1480,21 @@ async def get_arbitrage_bot(bot_id: str):
         logger.error(f"Error getting arbitrage bot {bot_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/arbitrage/bots/{bot_id}/logs")
+async def get_arbitrage_bot_logs(bot_id: str, stream: str = "stdout", lines: int = 50):
+    """Get recent output of an arbitrage bot process."""
+    if stream not in ("stdout", "stderr"):
+        raise HTTPException(status_code=400, detail="stream must be 'stdout' or 'stderr'")
+    logs = arbitrage_service.get_bot_logs(bot_id, stream, lines)
+    if "error" in logs:
+        raise HTTPException(status_code=404, detail=logs["error"])
+    return {"success": True, **logs}
+
+@app.get("/api/arbitrage/runtime")
+async def get_arbitrage_bot_runtime():
+    """Get bot runtime mode and per-bot CPU/memory usage."""
+    return {"success": True, **arbitrage_service.get_runtime_status()}
+
 @app.post("/api/arbitrage/bots/{bot_id}/start")
 async def start_arbitrage_bot(bot_id: str, config: Optional[Dict[str, Any]] = Body(None)):
     """Start an arbitrage bot."""
@@ -1831,6 +1896,19 @@ async def get_pipeline_status():
         logger.error(f"Error getting pipeline status: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/rehoboam/pipeline/latency")
+async def get_pipeline_latency():
+    """Get per-stage latency histograms (stage, queue wait, LLM and RPC spans) for both pipelines."""
+    return {"histograms": pipeline_tracer.get_stage_latency(), "tracer": pipeline_tracer.get_stats()}
+
+@app.get("/api/rehoboam/pipeline/traces/{trace_id}")
+async def get_pipeline_trace(trace_id: str):
+    """Get the recently recorded spans of one opportunity trace."""
+    spans = pipeline_tracer.get_trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return {"trace_id": trace_id, "spans": spans}
+
 @app.post("/api/rehoboam/pipeline/start")
 async def start_unified_pipeline():
     """Start the Rehoboam unified pipeline system."""
@@ -2434,6 +2512,95 @@ async def advanced_reasoning(prompt: str, task_type: str = "general", complexity
         logger.error(f"Error in advanced_reasoning endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=f"An internal error occurred during reasoning: {str(e)}")
 
+async def reasoning_events(prompt: str, task_type: str = "general", complexity: int = 5):
+    """Reasoning events (start, token, fallback, done/error) for the streaming endpoints.
+    
+    Streams from the local orchestrator so first tokens arrive as soon as the provider
+    produces them; the MCP service only returns whole responses, so it is used as a
+    single ``done`` event when the local orchestrator is unavailable.
+    """
+    if reasoning_orchestrator:
+        from utils.advanced_reasoning import ModelRequest
+        request = ModelRequest(prompt=prompt, task_type=task_type, complexity=complexity)
+        async for event in reasoning_orchestrator.stream_request(request):
+            yield {**event, "source": "local_reasoning_orchestrator"}
+        return
+    
+    mcp_reasoning_response = await get_mcp_reasoning(prompt, task_type, complexity)
+    if mcp_reasoning_response:
+        yield {"event": "done", "source": "mcp_reasoning_orchestrator", "mcp_response_data": mcp_reasoning_response}
+    else:
+        yield {"event": "error", "error": "Reasoning services (MCP and local) unavailable."}
+
+@app.api_route("/api/ai/reason/stream", methods=["GET", "POST"])
+async def advanced_reasoning_stream(prompt: str, task_type: str = "general", complexity: int = 5):
+    """Server-Sent Events variant of /api/ai/reason that streams tokens as they are generated."""
+    async def event_stream():
+        try:
+            async for event in reasoning_events(prompt, task_type, complexity):
+                yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+        except Exception as e:
+            logger.error(f"Error in advanced_reasoning_stream: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'event': 'error', 'error': str(e)})}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/ws/ai/reason")
+async def reasoning_websocket(websocket: WebSocket):
+    """WebSocket endpoint streaming reasoning tokens for {"action": "reason", "prompt": ...} messages."""
+    client_id = str(id(websocket))
+    if await ws_server.connect(websocket, client_id):
+        try:
+            while True:
+                message = await websocket.receive_json()
+                if message.get('action') == 'reason' and message.get('prompt'):
+                    async for event in reasoning_events(message['prompt'], message.get('task_type', 'general'),
+                                                        message.get('complexity', 5)):
+                        await websocket.send_json({
+                            'type': f"reasoning_{event['event']}",
+                            'data': event,
+                            'timestamp': datetime.now().isoformat()
+                        })
+                else:
+                    await ws_server.handle_message(client_id, message)
+        except WebSocketDisconnect:
+            await ws_server.disconnect(client_id)
+        except Exception as e:
+            logger.error(f"Error in reasoning websocket: {str(e)}")
+            await ws_server.disconnect(client_id)
+
+@app.get("/api/ai/providers/stats")
+async def ai_provider_stats():
+    """Provider performance, hedging, pooled client, response cache and local model stats."""
+    if not reasoning_orchestrator:
+        raise HTTPException(status_code=503, detail="Local reasoning orchestrator unavailable")
+    return {
+        "providers": reasoning_orchestrator.get_provider_stats(),
+        "latency_p90": {
+            provider: reasoning_orchestrator.performance_tracker.latency_percentile(provider, 0.9)
+            for provider in reasoning_orchestrator.model_configs
+        },
+        "hedging": reasoning_orchestrator.get_hedge_stats(),
+        "client": llm_client.get_stats(),
+        "cache": llm_response_cache.get_stats(),
+        "local_models": {**local_models.get_stats(), "budget_policy": latency_budget_policy.get_stats()},
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/ai/llm/telemetry")
+async def llm_call_telemetry():
+    """LLM calls, latency percentiles, tokens, cost, cache hits and hedges per calling code path."""
+    return {
+        "callers": llm_telemetry.get_summary(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (LLM telemetry, WebSocket and alert metrics)."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/api/ai/market-intelligence/{token}")
 async def get_market_intelligence(token: str):
     """Get comprehensive market intelligence, prioritizing MCP services."""
@@ -2445,9 +2612,18 @@ async def get_market_intelligence(token: str):
     }
 
     try:
-        # 1. Fetch Market Analysis
-        logger.info(f"Attempting to fetch market analysis for {token} from MCP.")
-        mcp_intel = await get_mcp_market_analysis(token)
+        # 1. Fetch MCP market analysis and market emotions concurrently
+        logger.info(f"Attempting to fetch market analysis and emotions for {token} from MCP.")
+        # Note: get_mcp_market_emotions() is general. If a token-specific sentiment from MCP is needed,
+        # the client/service might need to support passing 'token' or 'intelligence_data'.
+        fetched = await fan_out([
+            Source("mcp_market_analysis", lambda: get_mcp_market_analysis(token), timeout=10),
+            Source("mcp_market_emotions", get_mcp_market_emotions, timeout=10),
+        ])
+        source_status = fetched.status_map()
+        mcp_intel = fetched["mcp_market_analysis"]
+        mcp_emotions = fetched["mcp_market_emotions"]
+
         if mcp_intel:
             intelligence_data = mcp_intel
             sources["market_analysis"] = "mcp_market_analyzer"
@@ -2469,12 +2645,7 @@ async def get_market_intelligence(token: str):
             logger.error(f"Could not retrieve market analysis for {token} from any source.")
             raise HTTPException(status_code=503, detail=f"Market analysis for {token} is currently unavailable from all sources.")
 
-        # 2. Fetch Consciousness Sentiment
-        logger.info(f"Attempting to fetch market emotions/sentiment for {token} context from MCP.")
-        # Note: get_mcp_market_emotions() is general. If a token-specific sentiment from MCP is needed,
-        # the client/service might need to support passing 'token' or 'intelligence_data'.
-        # For now, we call it generally, or one could create a new client for context-specific sentiment.
-        mcp_emotions = await get_mcp_market_emotions()
+        # 2. Consciousness Sentiment (local fallback needs the market analysis as context)
         if mcp_emotions:
             consciousness_sentiment_data = mcp_emotions # Or a specific field like mcp_emotions.get("token_sentiment")
             sources["consciousness_sentiment"] = "mcp_consciousness_layer"
@@ -2484,7 +2655,7 @@ async def get_market_intelligence(token: str):
             if rehoboam: # Local rehoboam instance for sentiment
                 try:
                     # Local sentiment analysis can be more context-aware
-                    consciousness_sentiment_data = await rehoboam.analyze_sentiment(token, intelligence_data)
+                    consciousness_sentiment_data = await rehoboam.analyze_sentiment_async(token, intelligence_data)
                     sources["consciousness_sentiment"] = "local_rehoboam_ai"
                     logger.info(f"Successfully used local Rehoboam AI for sentiment on {token}.")
                 except Exception as e_local_sentiment:
@@ -2507,6 +2678,7 @@ async def get_market_intelligence(token: str):
             "token": token,
             "data": final_response_data,
             "sources": sources,
+            "source_status": source_status,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -9,6 +9,8 @@ import requests
 import json
 from datetime import datetime
 
+from utils.arbitrage_scanner import arbitrage_scanner, QuoteRequest
+
 class ImmediateArbitrageFinder:
     def __init__(self):
         self.eth_wallet = "0x9b9C9e713d8EFf874fACA1f1CCf0cfee7d631Ae8"
@@ -72,12 +74,8 @@ class ImmediateArbitrageFinder:
             if not coingecko_id:
                 return None
                 
-            url = f"https://api.coingecko.com/api/v3/simple/price?ids={coingecko_id}&vs_currencies=usd"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data[coingecko_id]['usd']
+            # Shared scanner: cached, pooled CoinGecko lookups instead of a blocking request per call
+            return await arbitrage_scanner.get_quote(QuoteRequest('coingecko', coingecko_id))
                 
         except Exception as e:
             print(f"CoinGecko error: {e}")
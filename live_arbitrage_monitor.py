@@ -7,14 +7,17 @@ Executes trades on Sepolia testnet with LLM-powered decision making.
 
 import asyncio
 import aiohttp
+import contextlib
 import time
 from datetime import datetime
 import json
 import os
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional
 from dotenv import load_dotenv
 from web3 import Web3
 
+from utils.bot_runtime import BotContext, BotStrategy
+
 # Load environment variables
 load_dotenv()
 
@@ -42,21 +45,38 @@ TRADING_PAIRS = [
 class ConsciousnessArbitrageMonitor:
     """Enhanced arbitrage monitor with consciousness integration"""
     
-    def __init__(self):
+    def __init__(self, w3_mainnet: Optional[Web3] = None, w3_sepolia: Optional[Web3] = None,
+                 session_getter: Optional[Callable[[], Awaitable[aiohttp.ClientSession]]] = None,
+                 wait: Optional[Callable[[float], Awaitable[Optional[bool]]]] = None,
+                 on_opportunity: Optional[Callable[[Dict], None]] = None):
         self.opportunities_found = 0
         self.total_potential_profit = 0
         self.consciousness_level = 1
         self.executed_trades = 0
         
+        # Standalone runs open their own connections; the bot runtime passes its shared ones
+        self.session_getter = session_getter
+        self.wait = wait or asyncio.sleep
+        self.on_opportunity = on_opportunity
+        
         # Initialize Web3 connections
-        self.w3_mainnet = Web3(Web3.HTTPProvider(MAINNET_RPC)) if ALCHEMY_API_KEY else None
-        self.w3_sepolia = Web3(Web3.HTTPProvider(SEPOLIA_RPC)) if ALCHEMY_API_KEY else None
+        self.w3_mainnet = w3_mainnet or (Web3(Web3.HTTPProvider(MAINNET_RPC)) if ALCHEMY_API_KEY else None)
+        self.w3_sepolia = w3_sepolia or (Web3(Web3.HTTPProvider(SEPOLIA_RPC)) if ALCHEMY_API_KEY else None)
         
         print(f"🧠 Consciousness Arbitrage Monitor Initialized")
         print(f"💰 Profit Wallet: {PROFIT_WALLET}")
         print(f"🔗 Sepolia Contract: {SEPOLIA_CONTRACT}")
         print(f"🌐 Backend API: {BACKEND_API_URL}")
         
+    @contextlib.asynccontextmanager
+    async def http_session(self):
+        """The runtime's shared session when hosted, else a short-lived one"""
+        if self.session_getter:
+            yield await self.session_getter()
+        else:
+            async with aiohttp.ClientSession() as session:
+                yield session
+        
     async def consciousness_analysis(self, opportunity: Dict) -> Dict:
         """Use LLM to analyze arbitrage opportunity with consciousness"""
         try:
@@ -70,7 +90,7 @@ class ConsciousnessArbitrageMonitor:
                 }
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with self.http_session() as session:
                 async with session.post(
                     f"{BACKEND_API_URL}/api/consciousness/analyze-arbitrage",
                     json=analysis_payload,
@@ -113,7 +133,7 @@ class ConsciousnessArbitrageMonitor:
             print(f"💰 Spread: {opportunity['spread']}%")
             print(f"🎯 Confidence: {analysis.get('confidence', 0)}%")
             
-            async with aiohttp.ClientSession() as session:
+            async with self.http_session() as session:
                 async with session.post(
                     f"{BACKEND_API_URL}/api/arbitrage/execute-sepolia",
                     json=execution_payload,
@@ -151,7 +171,7 @@ class ConsciousnessArbitrageMonitor:
         """
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with self.http_session() as session:
                 async with session.post(UNISWAP_V3_URL, json={"query": query}) as response:
                     data = await response.json()
                     if data.get("data", {}).get("pools"):
@@ -246,6 +266,8 @@ class ConsciousnessArbitrageMonitor:
                         print(f"📊 Buy on: {opp['buy_dex']}")
                         print(f"📊 Sell on: {opp['sell_dex']}")
                         print(f"⏰ Time: {opp['timestamp']}")
+                        if self.on_opportunity:
+                            self.on_opportunity(opp)
                         
                         # Consciousness analysis and execution
                         print(f"🧠 Analyzing with consciousness...")
@@ -272,15 +294,38 @@ class ConsciousnessArbitrageMonitor:
                 else:
                     print("📊 No profitable opportunities found this scan")
                 
-                # Wait 30 seconds before next scan
-                await asyncio.sleep(30)
+                # Wait 30 seconds before next scan; a hosted monitor's wait returns True on stop
+                if await self.wait(30):
+                    break
                 
             except KeyboardInterrupt:
                 print("\n🛑 Monitor stopped by user")
                 break
             except Exception as e:
                 print(f"❌ Error in monitoring loop: {e}")
-                await asyncio.sleep(10)
+                if await self.wait(10):
+                    break
+
+
+class LiveArbitrageMonitorStrategy(BotStrategy):
+    """Runs the monitor in the bot runtime on its shared HTTP session, Web3 connections and stop signal"""
+
+    async def run(self, context: BotContext):
+        if ALCHEMY_API_KEY:
+            context.resources.rpc_urls.setdefault("ethereum", MAINNET_RPC)
+            context.resources.rpc_urls.setdefault("sepolia", SEPOLIA_RPC)
+        monitor = ConsciousnessArbitrageMonitor(
+            w3_mainnet=context.get_web3("ethereum") if ALCHEMY_API_KEY else None,
+            w3_sepolia=context.get_web3("sepolia") if ALCHEMY_API_KEY else None,
+            session_getter=context.resources.get_session,
+            wait=context.sleep,
+            on_opportunity=lambda opp: context.emit("opportunity", **opp),
+        )
+        await monitor.monitor_opportunities()
+
+
+# Picked up by utils.bot_runtime.ScriptBotStrategy in worker mode
+BOT_STRATEGY = LiveArbitrageMonitorStrategy
 
 async def main():
     """Main function"""
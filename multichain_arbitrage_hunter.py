@@ -15,9 +15,10 @@ import os
 import sys
 from datetime import datetime
 from web3 import Web3
-import requests
 from typing import Dict, List, Optional
 
+from utils.arbitrage_scanner import arbitrage_scanner, QuoteRequest
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -168,38 +169,39 @@ class MultiChainArbitrageHunter:
                 except Exception as e:
                     logger.error(f"❌ Connection failed for {network_config['name']}: {e}")
     
+    @staticmethod
+    def coingecko_request(token_symbol: str) -> QuoteRequest:
+        """Scanner request for a token's CoinGecko price"""
+        symbol_map = {
+            'USDC': 'usd-coin',
+            'USDT': 'tether', 
+            'WETH': 'ethereum',
+            'MATIC': 'matic-network',
+            'BNB': 'binancecoin'
+        }
+        return QuoteRequest('coingecko', symbol_map.get(token_symbol, token_symbol.lower()), symbol=token_symbol)
+    
     async def get_token_price_from_coingecko(self, token_symbol: str) -> Optional[float]:
         """Get token price from CoinGecko"""
         try:
-            symbol_map = {
-                'USDC': 'usd-coin',
-                'USDT': 'tether', 
-                'WETH': 'ethereum',
-                'MATIC': 'matic-network',
-                'BNB': 'binancecoin'
-            }
-            
-            coin_id = symbol_map.get(token_symbol, token_symbol.lower())
-            url = f"https://api.coingecko.com/api/v3/simple/price?ids={coin_id}&vs_currencies=usd"
-            
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if coin_id in data:
-                    price = data[coin_id]['usd']
-                    logger.debug(f"CoinGecko price for {token_symbol}: ${price}")
-                    return price
+            # Shared scanner: one batched, cached CoinGecko call serves every DEX/network lookup
+            price = await arbitrage_scanner.get_quote(self.coingecko_request(token_symbol))
+            if price:
+                logger.debug(f"CoinGecko price for {token_symbol}: ${price}")
+                return price
                     
         except Exception as e:
             logger.debug(f"CoinGecko error for {token_symbol}: {e}")
             
         return None
     
-    async def get_dex_price_simulation(self, token: str, network: str, dex: str) -> Optional[float]:
-        """Simulate DEX prices with realistic variations"""
+    async def get_dex_price_simulation(self, token: str, network: str, dex: str,
+                                       base_price: Optional[float] = None) -> Optional[float]:
+        """Simulate DEX prices with realistic variations around a (prefetched) CoinGecko price"""
         try:
             # Get base price from CoinGecko
-            base_price = await self.get_token_price_from_coingecko(token)
+            if base_price is None:
+                base_price = await self.get_token_price_from_coingecko(token)
             if not base_price:
                 return None
                 
@@ -230,6 +232,10 @@ class MultiChainArbitrageHunter:
         
         logger.info("🔍 Scanning MULTI-CHAIN arbitrage opportunities...")
         
+        # One scanner round for every token's base price instead of a request per token
+        requests = {token_symbol: self.coingecko_request(token_symbol) for token_symbol in self.tokens}
+        quotes = await arbitrage_scanner.get_quotes(requests.values())
+        
         for token_symbol in self.tokens.keys():
             try:
                 # Get prices from all networks and DEXs
@@ -242,7 +248,8 @@ class MultiChainArbitrageHunter:
                         # Get prices from all DEXs on this network
                         if network_name in self.dexes:
                             for dex_name in self.dexes[network_name].keys():
-                                price = await self.get_dex_price_simulation(token_symbol, network_name, dex_name)
+                                price = await self.get_dex_price_simulation(
+                                    token_symbol, network_name, dex_name, quotes.get(requests[token_symbol]))
                                 if price:
                                     network_prices[f"{network_name}_{dex_name}"] = price
                         
@@ -0,0 +1,138 @@
+import asyncio
+
+from utils.arbitrage_scanner import (
+    ArbitrageScanner,
+    CoinGeckoSource,
+    CrossVenueSpreadStrategy,
+    PriceSource,
+    QuoteRequest,
+)
+from utils.market_events import MarketEventBus
+
+
+class CountingSource(PriceSource):
+    name = "fake"
+    ttl = 60.0
+
+    def __init__(self, prices, delay=0.0):
+        self.prices = prices
+        self.delay = delay
+        self.batches = []
+
+    async def fetch(self, requests, resources):
+        self.batches.append(sorted(r.token + r.venue for r in requests))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return {r: self.prices.get((r.token, r.venue)) for r in requests}
+
+
+PRICES = {("eth", "uni"): 100.0, ("eth", "sushi"): 101.0, ("btc", "uni"): 200.0, ("btc", "sushi"): 198.0}
+
+
+def _strategy(name, tokens):
+    legs = {t: [(venue, QuoteRequest("fake", t, venue=venue)) for venue in ("uni", "sushi")] for t in tokens}
+    return CrossVenueSpreadStrategy(name, legs, trade_amount_usd=1000, min_profit_usd=1.0)
+
+
+def test_overlapping_strategies_share_one_batch():
+    scanner = ArbitrageScanner()
+    source = CountingSource(PRICES)
+    scanner.register_source(source)
+    scanner.register_strategy(_strategy("eth_only", ["eth"]))
+    scanner.register_strategy(_strategy("eth_btc", ["eth", "btc"]))
+
+    results = asyncio.run(scanner.scan_once())
+
+    assert len(source.batches) == 1
+    assert len(source.batches[0]) == 4
+    assert results["eth_only"][0]["buy_from"] == "uni"
+    assert {o["token"] for o in results["eth_btc"]} == {"eth", "btc"}
+    stats = scanner.get_stats()
+    assert stats["quotes_requested"] == 6 and stats["quotes_unique"] == 4
+
+
+def test_cached_quotes_are_not_refetched():
+    scanner = ArbitrageScanner()
+    source = CountingSource(PRICES)
+    scanner.register_source(source)
+    scanner.register_strategy(_strategy("eth_only", ["eth"]))
+
+    async def run():
+        await scanner.scan_once()
+        await scanner.scan_once()
+
+    asyncio.run(run())
+    assert len(source.batches) == 1
+    assert scanner.get_stats()["cache_hits"] == 2
+
+
+def test_concurrent_requests_join_in_flight_fetch():
+    scanner = ArbitrageScanner()
+    source = CountingSource(PRICES, delay=0.05)
+    scanner.register_source(source)
+    request = QuoteRequest("fake", "eth", venue="uni")
+
+    async def run():
+        return await asyncio.gather(*(scanner.get_quote(request) for _ in range(5)))
+
+    assert asyncio.run(run()) == [100.0] * 5
+    assert len(source.batches) == 1
+
+
+def test_scheduler_invokes_callbacks():
+    scanner = ArbitrageScanner()
+    scanner.register_source(CountingSource(PRICES))
+    strategy = _strategy("eth_only", ["eth"])
+    strategy.interval = 0.01
+    scanner.register_strategy(strategy)
+    seen = []
+
+    async def on_opportunities(name, opportunities):
+        seen.append((name, len(opportunities)))
+
+    scanner.on_opportunities(on_opportunities)
+
+    async def run():
+        await scanner.start()
+        await asyncio.sleep(0.05)
+        await scanner.stop()
+
+    asyncio.run(run())
+    assert seen and seen[0] == ("eth_only", 1)
+
+
+def test_coingecko_keeps_solana_mint_case():
+    mint = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+    calls = []
+
+    class Resources:
+        async def get_json(self, url, params):
+            calls.append(params["contract_addresses"])
+            if url.endswith("/solana"):
+                return {mint: {"usd": 1.0}}
+            return {"0xabc": {"usd": 2.0}}
+
+    requests = [QuoteRequest("coingecko", mint, network="solana"), QuoteRequest("coingecko", "0xABC", network="ethereum")]
+    results = asyncio.run(CoinGeckoSource().fetch(requests, Resources()))
+
+    assert results == {requests[0]: 1.0, requests[1]: 2.0}
+    assert sorted(calls) == ["0xabc", mint]
+
+
+def test_price_events_are_published_under_token_symbols():
+    bus = MarketEventBus()
+    scanner = ArbitrageScanner(event_bus=bus)
+    scanner.register_source(CountingSource({("ethereum", ""): 3000.0, ("0xabc", ""): 1.0}))
+    usdc = QuoteRequest("fake", "0xabc", network="arbitrum", symbol="USDC")
+    events = []
+    bus.subscribe(events.append)
+
+    async def run():
+        await bus.start()
+        await scanner.get_quotes([QuoteRequest("fake", "ethereum"), usdc])
+        await bus.stop()
+
+    asyncio.run(run())
+
+    assert sorted((e.topics[0], e.payload["token"]) for e in events) == [("price:eth", "ETH"), ("price:usdc", "USDC")]
+    assert usdc == QuoteRequest("fake", "0xabc", network="arbitrum")  # the symbol is not part of the key
@@ -0,0 +1,93 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+from utils.arbitrage_service import ArbitrageBotStatus
+from utils.bot_orchestrator import BotMode, BotOrchestrator
+
+
+def _orchestrator(monkeypatch, running=True):
+    service = sys.modules["utils.arbitrage_service"].arbitrage_service
+    status = ArbitrageBotStatus.RUNNING if running else ArbitrageBotStatus.STOPPED
+    monkeypatch.setattr(service, "bots", {"executor_a": SimpleNamespace(status=status)})
+    orchestrator = BotOrchestrator()
+    orchestrator.rebalance_interval = 3600  # dispatch must not depend on maintenance
+    orchestrator.active_bots = {"executor_a"}
+    orchestrator.bot_modes["executor_a"] = BotMode.AUTONOMOUS
+    orchestrator._sync_bot_states()
+    return orchestrator
+
+
+async def _until(predicate, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0)
+
+
+def test_submit_is_dispatched_without_waiting_for_interval(monkeypatch):
+    orchestrator = _orchestrator(monkeypatch)
+    executed = []
+
+    async def execute(task):
+        executed.append(task.task_id)
+
+    orchestrator._execute_task = execute
+
+    async def run():
+        await orchestrator.start()
+        task_id = await orchestrator.submit_opportunity({"token_pair": "ETH/USDC"}, priority=9)
+        await _until(lambda: executed)
+        await orchestrator.stop()
+        return task_id
+
+    task_id = asyncio.run(run())
+    assert executed == [task_id]
+    latency = orchestrator._dispatch_latency_stats()
+    assert orchestrator.orchestration_metrics["dispatched_tasks"] == 1
+    assert latency["dispatch_latency_p50_ms"] is not None and latency["dispatch_latency_p50_ms"] < 100
+
+
+def test_completion_frees_slot_for_next_task(monkeypatch):
+    orchestrator = _orchestrator(monkeypatch)
+    orchestrator.max_concurrent_tasks = 1
+    started = []
+
+    async def execute_arbitrage(opportunity, amount):
+        started.append(opportunity["token_pair"])
+        return {"success": True}
+
+    service = sys.modules["utils.arbitrage_service"].arbitrage_service
+    monkeypatch.setattr(service, "execute_arbitrage", execute_arbitrage)
+
+    async def run():
+        await orchestrator.start()
+        await orchestrator.submit_opportunity({"token_pair": "ETH/USDC"})
+        await orchestrator.submit_opportunity({"token_pair": "WBTC/USDC"})
+        await _until(lambda: len(orchestrator.completed_tasks) == 2)
+        await orchestrator.stop()
+
+    asyncio.run(run())
+    assert started == ["ETH/USDC", "WBTC/USDC"]
+    assert [task.status for task in orchestrator.completed_tasks] == ["completed", "completed"]
+
+
+def test_bot_start_event_dispatches_queued_task(monkeypatch):
+    orchestrator = _orchestrator(monkeypatch, running=False)
+    executed = []
+
+    async def execute(task):
+        executed.append(task.bot_id)
+
+    orchestrator._execute_task = execute
+
+    async def run():
+        await orchestrator.start()
+        await orchestrator.submit_opportunity({"token_pair": "ETH/USDC"})
+        await _until(lambda: executed, timeout=0.05)
+        assert not executed
+        orchestrator._on_bot_event("bot_started", {"bot_id": "executor_a"})
+        await _until(lambda: executed)
+        await orchestrator.stop()
+
+    asyncio.run(run())
+    assert executed == ["executor_a"]
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+
+from utils.bot_runtime import BotContext, BotRuntime, BotStrategy, ScriptBotStrategy
+from utils.bot_supervisor import BotProcessSupervisor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class BusyBot(BotStrategy):
+    """Burns CPU in short slices, partly inside a child task."""
+
+    async def run(self, context):
+        async def burn():
+            end = time.thread_time() + 0.01
+            while time.thread_time() < end:
+                pass
+
+        for _ in range(10):
+            await asyncio.gather(burn(), burn())
+            await asyncio.sleep(0)
+        context.emit("opportunity", pair="ETH/USDC")
+
+
+class IdleBot(BotStrategy):
+    async def run(self, context):
+        while not await context.sleep(10):
+            pass
+
+
+class StubbornBot(BotStrategy):
+    async def run(self, context):
+        await asyncio.sleep(60)
+
+
+def _recorder():
+    events = []
+    return events, lambda bot_id, event_type, data: events.append((bot_id, event_type, data))
+
+
+def test_runtime_charges_cpu_to_each_bot():
+    events, on_event = _recorder()
+    runtime = BotRuntime(on_event=on_event, scanner=MagicMock(), trace_memory=False)
+
+    async def run():
+        await runtime.start("busy", BusyBot())
+        await runtime.start("idle", IdleBot())
+        await runtime.bots["busy"].task
+        await runtime.stop("idle")
+
+    asyncio.run(run())
+    usage = runtime.get_usage()
+    # 10 rounds x 2 child tasks x 10ms, all charged to the busy bot
+    assert usage["busy"]["cpu_seconds"] >= 0.15
+    assert usage["idle"]["cpu_seconds"] < 0.05
+    assert ("busy", "output", {"event": "opportunity", "pair": "ETH/USDC"}) in events
+    exits = {bot_id: data for bot_id, kind, data in events if kind == "exited"}
+    assert exits["busy"]["returncode"] == 0 and not exits["busy"]["stopping"]
+    assert exits["idle"]["stopping"] is True
+
+
+def test_stop_cancels_bot_that_ignores_stop_request():
+    events, on_event = _recorder()
+    runtime = BotRuntime(on_event=on_event, scanner=MagicMock(), stop_timeout=0.05)
+
+    async def run():
+        await runtime.start("stubborn", StubbornBot())
+        await asyncio.sleep(0)
+        started = time.monotonic()
+        await runtime.stop("stubborn")
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 1.0
+    assert not runtime.is_running("stubborn")
+    assert [data["returncode"] for _, kind, data in events if kind == "exited"] == [-1]
+
+
+def test_worker_hosts_scripts_and_tags_their_output(tmp_path):
+    script = tmp_path / "demo_bot.py"
+    script.write_text(
+        "class DemoArbitrageMonitor:\n"
+        "    async def monitor_opportunities(self):\n"
+        "        print('🚀 OPPORTUNITY #1')\n"
+        "        print('scanning')\n"
+    )
+    events, on_event = _recorder()
+    supervisor = BotProcessSupervisor(on_event=on_event, max_restarts=0)
+
+    async def run():
+        await supervisor.start("bot_runtime", [sys.executable, "-m", "utils.bot_runtime"],
+                               env=os.environ.copy(), cwd=PROJECT_ROOT)
+        for bot_id in ("demo_a", "demo_b"):
+            command = {"cmd": "start", "bot_id": bot_id, "script_path": str(script)}
+            assert await supervisor.send("bot_runtime", json.dumps(command))
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline and \
+                sum(1 for _, kind, d in events if kind == "output" and d["event"] == "bot_exited") < 2:
+            await asyncio.sleep(0.05)
+        await supervisor.send("bot_runtime", json.dumps({"cmd": "usage"}))
+        await asyncio.sleep(0.2)
+        await supervisor.send("bot_runtime", json.dumps({"cmd": "shutdown"}))
+        await supervisor.stop("bot_runtime")
+
+    asyncio.run(run())
+    outputs = [d for _, kind, d in events if kind == "output"]
+    opportunities = sorted(d["bot_id"] for d in outputs if d["event"] == "opportunity" and "bot_id" in d)
+    assert opportunities == ["demo_a", "demo_b"]
+    assert "[demo_a] scanning" in supervisor.tail("bot_runtime", lines=100)
+    usage = [d for d in outputs if d["event"] == "usage"][-1]
+    assert set(usage["usage"]) == {"demo_a", "demo_b"}
+    assert usage["process"]["bots"] == 2
+
+
+def test_script_bot_ignores_config_its_class_does_not_take():
+    strategy = ScriptBotStrategy(os.path.join(PROJECT_ROOT, "live_arbitrage_monitor_testnet.py"))
+    context = BotContext("demo", {"min_profit": 5, "pairs": "ETH/USDC"}, MagicMock(), lambda *args: None)
+
+    async def run():
+        try:
+            await asyncio.wait_for(strategy.run(context), timeout=0.5)  # main() scans until stopped
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(run())
+    assert type(strategy.instance).__name__ == "DemoArbitrageMonitor" and strategy.instance.demo_mode
+
+
+class _Response:
+    status = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    async def json(self):
+        return self.payload
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _SharedSession:
+    def __init__(self):
+        self.urls = []
+
+    def post(self, url, **kwargs):
+        self.urls.append(url)
+        if "thegraph" in url:
+            return _Response({"data": {"pools": [{"token0Price": "2.0", "liquidity": "1000"}]}})
+        return _Response({"decision": "SKIP", "reasoning": "test"})
+
+
+def test_live_monitor_runs_on_the_runtime_session_and_stop_signal(monkeypatch):
+    import aiohttp
+
+    def own_session(*args, **kwargs):
+        raise AssertionError("hosted monitor opened its own HTTP session")
+
+    monkeypatch.setattr(aiohttp, "ClientSession", own_session)
+    session = _SharedSession()
+    scanner = MagicMock()
+    scanner.resources.rpc_urls = {}
+
+    async def get_session():
+        return session
+
+    scanner.resources.get_session = get_session
+    strategy = ScriptBotStrategy(os.path.join(PROJECT_ROOT, "live_arbitrage_monitor.py"))
+    events = []
+
+    def emitter(bot_id, event_type, data):
+        events.append(data)
+        context.stop_requested.set()
+
+    context = BotContext("live", {}, scanner, emitter)
+
+    async def run():
+        await asyncio.wait_for(strategy.run(context), timeout=5)  # returns once stop is requested
+
+    asyncio.run(run())
+    assert type(strategy.delegate).__name__ == "LiveArbitrageMonitorStrategy"
+    assert {event["pair"] for event in events} == {"COMP/WETH", "WETH/USDC"}
+    assert all(event["event"] == "opportunity" for event in events)
+    assert any("thegraph" in url for url in session.urls)
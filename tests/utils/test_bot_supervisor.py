@@ -0,0 +1,89 @@
+import asyncio
+import sys
+import time
+
+from utils.bot_supervisor import BotProcessSupervisor, parse_output_line
+
+
+def _python(code):
+    return [sys.executable, "-c", code]
+
+
+def _recorder():
+    events = []
+    return events, lambda bot_id, event_type, data: events.append((event_type, data))
+
+
+async def _wait_until(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+
+def test_parse_output_line_structured_and_status_lines():
+    assert parse_output_line('{"event": "trade_executed", "profit_usd": 12.5}') == \
+        {"event": "trade_executed", "profit_usd": 12.5}
+    assert parse_output_line("🚀 OPPORTUNITY #3") == {"event": "opportunity", "count": 3.0}
+    assert parse_output_line("🎯 Est. Profit: $1,234.50") == {"event": "estimated_profit", "profit_usd": 1234.5}
+    assert parse_output_line("scanning pairs...") is None
+    assert parse_output_line("{not json") is None
+
+
+def test_chatty_bot_does_not_block_and_output_is_bounded():
+    events, on_event = _recorder()
+    supervisor = BotProcessSupervisor(on_event=on_event, buffer_lines=100, max_restarts=0)
+    # Far more output than an OS pipe buffer holds, on both streams
+    code = ("import sys\n"
+            "for i in range(50000):\n"
+            "    print('line', i)\n"
+            "    if i % 1000 == 0: print('err', i, file=sys.stderr)\n"
+            "print('🚀 OPPORTUNITY #1')\n")
+
+    async def run():
+        await supervisor.start("chatty", _python(code))
+        await _wait_until(lambda: any(e == "exited" for e, _ in events))
+
+    asyncio.run(run())
+    assert supervisor.tail("chatty", lines=1) == ["🚀 OPPORTUNITY #1"]
+    assert len(supervisor.tail("chatty", lines=1000)) == 100
+    assert supervisor.tail("chatty", "stderr", 1) == ["err 49000"]
+    exited = [data for e, data in events if e == "exited"]
+    assert exited[0]["returncode"] == 0
+    assert [data["event"] for e, data in events if e == "output"] == ["opportunity"]
+
+
+def test_crashing_bot_is_restarted_with_backoff_then_given_up():
+    events, on_event = _recorder()
+    supervisor = BotProcessSupervisor(on_event=on_event, max_restarts=2, backoff_initial=0.01)
+    code = "import sys; print('boom', file=sys.stderr); sys.exit(3)"
+
+    async def run():
+        await supervisor.start("crashy", _python(code))
+        await _wait_until(lambda: any(e == "gave_up" for e, _ in events))
+
+    asyncio.run(run())
+    kinds = [e for e, _ in events]
+    assert kinds.count("started") == 3 and kinds.count("exited") == 3
+    delays = [data["delay_seconds"] for e, data in events if e == "restarting"]
+    assert delays == [0.01, 0.02]
+    assert events[-1] == ("gave_up", {"returncode": 3, "restarts": 2})
+    assert supervisor.get_status("crashy")["last_exit_code"] == 3
+
+
+def test_stop_terminates_process_group_and_skips_restart():
+    events, on_event = _recorder()
+    supervisor = BotProcessSupervisor(on_event=on_event, stop_timeout=2.0)
+
+    async def run():
+        pid = await supervisor.start("sleepy", _python("import time; print('up', flush=True); time.sleep(60)"))
+        await _wait_until(lambda: supervisor.tail("sleepy"))
+        started = time.monotonic()
+        returncode = await supervisor.stop("sleepy")
+        return pid, returncode, time.monotonic() - started
+
+    pid, returncode, elapsed = asyncio.run(run())
+    assert pid and returncode is not None and returncode != 0
+    assert elapsed < 2.0
+    assert not supervisor.is_running("sleepy")
+    assert "restarting" not in [e for e, _ in events]
+    assert events[-1][1]["stopping"] is True
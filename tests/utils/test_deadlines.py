@@ -0,0 +1,126 @@
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import utils.arbitrage_service  # noqa: F401
+from utils.conscious_arbitrage_engine import ConsciousArbitrageEngine
+from utils.deadlines import Deadline, DeadlineExceeded
+from utils.rehoboam_pipeline import RehoboamPipeline
+
+
+def test_deadline_stamps_opportunities_and_cancels_slow_work():
+    opportunity = {"id": "a", "ttl_seconds": 0.05}
+    deadline = Deadline.for_opportunity(opportunity)
+    assert opportunity["expires_at"] == deadline.expires_at
+    assert Deadline.for_opportunity(opportunity) == deadline
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded) as info:
+        asyncio.run(deadline.run(slow(), "analysis"))
+    assert info.value.stage == "analysis"
+    assert cancelled and time.monotonic() - started < 1
+    with pytest.raises(DeadlineExceeded):
+        deadline.check("execution")
+
+
+def test_engine_cancels_analysis_that_outlives_the_deadline():
+    engine = ConsciousArbitrageEngine()
+    engine.consciousness_state = MagicMock(awareness_level=0.8)
+    engine._consciousness_analysis = AsyncMock(return_value={"overall": 0.9})
+    engine._reasoning_synthesis = AsyncMock(return_value={"confidence": 0.8})
+
+    async def slow_ai(opportunity, budget=None):
+        await asyncio.sleep(5)
+
+    engine._ai_analysis = slow_ai
+    opportunity = {"id": "stale", "net_profit_usd": 50.0, "risk_score": 0.9, "profit_potential": 0.9,
+                   "complexity": 0.1, "ttl_seconds": 0.05}
+
+    decision = asyncio.run(engine.analyze_opportunity_with_consciousness(opportunity))
+
+    assert decision.recommended_action == "reject" and "ai_analysis" in decision.reasoning
+    engine._reasoning_synthesis.assert_not_awaited()
+    assert engine.performance_metrics["expired_opportunities"] == 1
+    assert engine.performance_metrics["expired_opportunities_by_stage"] == {"ai_analysis": 1}
+    result = asyncio.run(engine.execute_conscious_arbitrage(
+        MagicMock(recommended_action="execute"), {"expires_at": time.time() - 1}))
+    assert result["status"] == "expired"
+
+
+def test_engine_deadlines_run_from_discovery_without_touching_the_callers_dict():
+    engine = ConsciousArbitrageEngine()
+    engine.prefilter_opportunities = AsyncMock(side_effect=RuntimeError("stop after stamping"))
+    opportunity = {"id": "mine", "net_profit_usd": 50.0}
+    with pytest.raises(RuntimeError):
+        asyncio.run(engine.analyze_opportunity_with_consciousness(opportunity))
+    assert opportunity == {"id": "mine", "net_profit_usd": 50.0}
+
+    discovered = datetime.now() - timedelta(seconds=600)
+    engine.arbitrage_service = MagicMock(get_opportunities=AsyncMock(return_value=[
+        {"id": "old", "timestamp": discovered, "ttl_seconds": 30}]))
+    engine.analyze_opportunities = AsyncMock(return_value=[])
+    asyncio.run(engine.get_conscious_opportunities())
+    stamped = engine.analyze_opportunities.await_args.args[0][0]
+    assert stamped["expires_at"] == pytest.approx(discovered.timestamp() + 30)
+    assert Deadline.for_opportunity(stamped).expired
+
+
+def test_pipeline_never_executes_stale_opportunities(monkeypatch):
+    pipeline = RehoboamPipeline()
+    pipeline.middleware = []
+    ai = MagicMock()
+    ai.generate_text_async = AsyncMock(return_value="[1.0]")  # the stale opportunity never reaches the prompt
+    pipeline._rehoboam_ai = ai
+    pipeline._market_sentiments = AsyncMock(side_effect=lambda pairs: {p: {"overall_sentiment": "neutral"} for p in pairs})
+    pipeline._assess_risks = AsyncMock(side_effect=lambda opportunities: [{"overall_risk": 0.5}] * len(opportunities))
+    execute = AsyncMock(return_value={"success": True})
+    service = sys.modules["utils.arbitrage_service"].arbitrage_service
+    monkeypatch.setattr(service, "execute_arbitrage", execute)
+    opportunities = [
+        {"id": "stale", "net_profit_usd": 150.0, "risk_score": 0.1, "expires_at": time.time() - 1},
+        {"id": "fresh", "net_profit_usd": 150.0, "risk_score": 0.1},
+    ]
+
+    results = asyncio.run(pipeline.process_batch(opportunities))
+
+    assert results[0]["expired"] and "consciousness" in results[0]["error"]
+    assert results[1]["success"] and results[1]["decision"]["type"] == "execute"
+    assert execute.await_count == 1
+    assert "expires_at" not in opportunities[1] and results[1]["opportunity"]["expires_at"] > time.time()
+    single = asyncio.run(pipeline.process({"id": "late", "expires_at": time.time() - 1}))
+    assert single["expired"] and not single["success"]
+    metrics = pipeline.get_metrics()
+    assert metrics["expired"] == 2 and metrics["expired_by_stage"] == {"consciousness": 2}
+    assert metrics["processed"] == 3 and metrics["successful"] == 1
+
+
+def test_arbitrage_pipeline_drops_expired_execution_messages(monkeypatch):
+    import utils.rehoboam_arbitrage_pipeline  # noqa: F401
+    module = sys.modules["utils.rehoboam_arbitrage_pipeline"]
+    pipeline = module.rehoboam_arbitrage_pipeline
+    handler = AsyncMock()
+    monkeypatch.setattr(pipeline, "stage_handlers", {module.PipelineStage.EXECUTION: handler})
+    monkeypatch.setattr(pipeline, "active_executions", {"exec_1": {"status": "prepared"}})
+    monkeypatch.setitem(pipeline.pipeline_metrics, "expired_opportunities", 0)
+    message = module.PipelineMessage(
+        stage=module.PipelineStage.EXECUTION, timestamp=None, source="agent",
+        data={"execution_id": "exec_1", "opportunity": {"id": "x", "expires_at": time.time() - 1}},
+    )
+
+    asyncio.run(pipeline._process_message(message))
+
+    handler.assert_not_awaited()
+    assert pipeline.active_executions == {}
+    assert pipeline.pipeline_metrics["expired_opportunities"] == 1
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import utils.trading_orchestrator as trading_orchestrator_module
+from utils.fan_out import Source, fan_out
+from utils.llm_cache import LLMResponseCache
+from utils.trading_orchestrator import AITradingOrchestrator
+
+
+async def _after(delay, value):
+    await asyncio.sleep(delay)
+    return value
+
+
+def test_sources_run_concurrently():
+    sources = [Source(f"s{i}", lambda i=i: _after(0.1, i)) for i in range(5)]
+
+    started = time.monotonic()
+    result = asyncio.run(fan_out(sources))
+    elapsed = time.monotonic() - started
+
+    assert [result[f"s{i}"] for i in range(5)] == list(range(5))
+    assert result.all_ok and elapsed < 0.3  # slowest source, not the 0.5s sum
+    assert result.status_map()["s0"]["status"] == "ok"
+
+
+def test_failures_yield_defaults_and_status():
+    def failing():
+        raise RuntimeError("down")
+
+    def blocking():
+        time.sleep(0.05)
+        return threading.current_thread() is not threading.main_thread()
+
+    result = asyncio.run(fan_out([
+        Source("slow", lambda: _after(1, "late"), timeout=0.05, default={}),
+        Source("broken", failing, default={}),
+        Source("missing", lambda: _after(0, None), default={}),
+        Source("chain", blocking, blocking=True),
+    ]))
+
+    assert result["slow"] == {} and result["broken"] == {} and result["missing"] == {}
+    assert result["chain"] is True  # ran off the event loop thread
+    status = result.status_map()
+    assert {name: entry["status"] for name, entry in status.items()} == {
+        "slow": "timeout", "broken": "error", "missing": "empty", "chain": "ok"}
+    assert status["broken"]["error"] == "down"
+    assert result.any_ok and not result.all_ok
+
+
+def _orchestrator(monkeypatch, network_insights):
+    analyzer = MagicMock(analyze_token=AsyncMock(return_value={"price": 1.0}),
+                         get_cross_network_insights=AsyncMock(**network_insights))
+    monkeypatch.setattr(trading_orchestrator_module, "market_analyzer", analyzer)
+    models = MagicMock(analyze_market=AsyncMock(return_value={"direction": "up"}))
+    monkeypatch.setattr(trading_orchestrator_module, "model_orchestrator", models)
+
+    orchestrator = AITradingOrchestrator()
+    orchestrator.market_data, orchestrator.last_analysis_time = {}, {}
+    orchestrator.analysis_refresh_interval = 300
+    return orchestrator
+
+
+def test_market_conditions_return_partial_results_without_caching(monkeypatch):
+    orchestrator = _orchestrator(monkeypatch, {"side_effect": RuntimeError("rpc down")})
+    orchestrator.rehoboam = MagicMock(get_market_emotions=MagicMock(return_value={"mood": "calm"}))
+    combined = []
+    orchestrator._combine_market_insights = lambda *args: combined.append(args) or {"token": args[0]}
+
+    analysis = asyncio.run(orchestrator.analyze_market_conditions("ETH"))
+
+    assert combined[0] == ("ETH", {"market_emotions": {"mood": "calm"}}, {"direction": "up"}, {"price": 1.0}, {})
+    network = analysis["source_status"]["network"]
+    assert network["status"] == "error" and network["error"] == "rpc down"
+    assert analysis["source_status"]["market"]["status"] == "ok"
+    assert orchestrator.market_data == {}  # partial results are not cached
+
+
+def test_market_conditions_are_cached_once_every_source_answers(monkeypatch):
+    orchestrator = _orchestrator(monkeypatch, {"return_value": {"gas_prices": {"arbitrum": 0.1}}})
+    orchestrator.rehoboam.api_key = None  # the real RehoboamAI, on its rule-based emotions
+    orchestrator.rehoboam.response_cache = LLMResponseCache()
+    orchestrator._combine_market_insights = lambda token, rehoboam, *rest: {"token": token, "rehoboam": rehoboam}
+
+    analysis = asyncio.run(orchestrator.analyze_market_conditions("ETH"))
+
+    assert analysis["source_status"]["rehoboam"]["status"] == "ok"
+    assert analysis["rehoboam"]["market_emotions"]["provider"] == "fallback-system"
+    assert orchestrator.market_data["market_analysis_ETH"] is analysis
@@ -0,0 +1,97 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils.gas_oracle import GasOracle
+
+
+def _make_web3(block_number=100):
+    web3 = MagicMock()
+    web3.eth.block_number = block_number
+    web3.eth.fee_history.return_value = {
+        'oldestBlock': block_number - 2,
+        'baseFeePerGas': [10 * 10**9, 11 * 10**9, 12 * 10**9, 13 * 10**9],
+        'reward': [[1 * 10**9, 2 * 10**9, 5 * 10**9]] * 3,
+        'gasUsedRatio': [0.4, 0.5, 0.6],
+    }
+    web3.eth.contract.return_value.functions.l1BaseFee.return_value.call.return_value = 20 * 10**9
+    return web3
+
+
+def test_refresh_builds_snapshot_from_fee_history():
+    oracle = GasOracle(token_price_fetcher=lambda token: 2000.0)
+    oracle.register_network('optimism', _make_web3())
+
+    snapshot = oracle.refresh('optimism')
+
+    assert snapshot.block_number == 100
+    assert snapshot.base_fee == 13.0
+    assert snapshot.priority_fees == {10: 1.0, 50: 2.0, 90: 5.0}
+    assert snapshot.l1_base_fee == 20.0
+    assert oracle.get_fee_history('optimism') == [10.0, 11.0, 12.0]
+
+    gas_price = oracle.get_gas_price('optimism')
+    assert gas_price['max_fee'] == pytest.approx(13.0 * 1.2 + 2.0)
+    assert gas_price['usd_cost'] > 0
+
+
+def test_refresh_happens_only_on_new_block():
+    web3 = _make_web3()
+    oracle = GasOracle(token_price_fetcher=lambda token: 2000.0)
+    oracle.register_network('arbitrum', web3)
+
+    assert oracle._poll_new_block('arbitrum') is True
+    assert oracle._poll_new_block('arbitrum') is False
+    assert web3.eth.fee_history.call_count == 1
+
+    web3.eth.block_number = 101
+    assert oracle._poll_new_block('arbitrum') is True
+    assert web3.eth.fee_history.call_count == 2
+
+
+def test_reads_do_not_touch_rpc():
+    web3 = _make_web3()
+    oracle = GasOracle(token_price_fetcher=lambda token: 2000.0)
+    oracle.register_network('base', web3)
+    assert oracle.get_gas_price('base') is None
+
+    oracle.refresh('base')
+    web3.eth.fee_history.reset_mock()
+    for _ in range(100):
+        oracle.get_gas_price('base')
+    web3.eth.fee_history.assert_not_called()
+
+
+def test_background_watcher_populates_snapshots():
+    async def run():
+        oracle = GasOracle(token_price_fetcher=lambda token: 2000.0)
+        oracle.register_network('zksync', _make_web3())
+        await oracle.start()
+        assert oracle.running
+        for _ in range(50):
+            if oracle.get_snapshot('zksync'):
+                break
+            await asyncio.sleep(0.01)
+        await oracle.stop()
+        return oracle
+
+    oracle = asyncio.run(run())
+    assert oracle.get_snapshot('zksync').block_number == 100
+    assert not oracle.running
+
+
+def test_gas_updates_are_published_only_when_fees_move():
+    web3 = _make_web3()
+    bus = MagicMock()
+    oracle = GasOracle(token_price_fetcher=lambda token: 2000.0, event_bus=bus)
+    oracle.register_network('arbitrum', web3)
+
+    oracle.refresh('arbitrum', 100)
+    oracle.refresh('arbitrum', 101)  # same fees
+    assert bus.publish.call_count == 1
+
+    web3.eth.fee_history.return_value['baseFeePerGas'][-1] = 14 * 10**9
+    oracle.refresh('arbitrum', 102)
+    assert bus.publish.call_count == 2
+    assert bus.publish.call_args.kwargs['base_fee'] == 14.0
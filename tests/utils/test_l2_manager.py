@@ -252,3 +252,38 @@ async def test_execute_arbitrage_buy_leg_calculations(l2_arbitrage_helper_fixtur
     assert buy_call_args.kwargs['from_token_address'] == "0xUSDCAddressBuy"
     assert buy_call_args.kwargs['to_token_address'] == "0xWETHAddressBuy"
     assert buy_call_args.kwargs['wallet_address'] == "0xTestWalletAddress"
+
+
+@pytest.mark.asyncio
+async def test_started_helper_serves_quotes_from_pool_cache(mock_l2_manager_for_helper, tmp_path):
+    import asyncio
+    import json
+    config = {"test_net": {
+        "dexs": {"sushiswap": {"router_address": "0xRouter", "type": "uniswap_v2",
+                               "pairs": {"WETH/USDC": "0xPair"}}},
+        "tokens": {"WETH": {"address": "0x1000000000000000000000000000000000000001", "decimals": 18},
+                   "USDC": {"address": "0x2000000000000000000000000000000000000002", "decimals": 6}},
+    }}
+    path = tmp_path / "l2_dex_config.json"
+    path.write_text(json.dumps(config))
+    helper = L2ArbitrageHelper(mock_l2_manager_for_helper.network_config, mock_l2_manager_for_helper,
+                               dex_config_path=str(path))
+    w3 = MagicMock()
+    w3.eth.block_number = 100
+    w3.to_checksum_address = lambda addr: addr
+    w3.eth.contract.return_value.functions.getReserves.return_value.call.return_value = (10 * 10**18, 30000 * 10**6, 0)
+    helper.pool_cache.web3_getter = lambda network: w3
+
+    await helper.start()
+    try:
+        for _ in range(100):
+            if helper.pool_cache.stats.refreshes:
+                break
+            await asyncio.sleep(0.01)
+        price = await helper.get_real_dex_price("test_net", "sushiswap", "WETH", "USDC", Decimal("1"))
+    finally:
+        await helper.stop()
+
+    assert price is not None and Decimal("2700") < price < Decimal("2750")  # 1 WETH into a 10 WETH pool
+    assert helper.pool_cache.get_stats()["quotes_served"] == 1
+    assert helper.pool_cache._poll_task is None
@@ -0,0 +1,93 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import utils.trading_orchestrator as trading_orchestrator_module
+from utils.advanced_reasoning import ModelResponse, MultimodalOrchestrator
+from utils.trading_orchestrator import AITradingOrchestrator
+
+
+def _orchestrator(answer):
+    """Orchestrator whose model answers each prompt's items with ``answer(prompt, items)``."""
+    orchestrator = MultimodalOrchestrator()
+    prompts = []
+
+    async def process_request(prompt, provider=None, **kwargs):
+        prompts.append(prompt)
+        items = orchestrator._extract_json_array(prompt) or []
+        content = answer(prompt, items)
+        return ModelResponse("r", content, "openai", "gpt", 0.1, content is not None)
+
+    orchestrator.process_request = process_request
+    return orchestrator, prompts
+
+
+def test_batch_maps_answers_back_by_index():
+    def answer(prompt, items):
+        # Out of order, with prose around the array
+        return "Sure: " + json.dumps([{"index": item["index"], "score": item["value"] * 2} for item in reversed(items)])
+
+    orchestrator, prompts = _orchestrator(answer)
+    orchestrator.max_batch_size = 2
+    items = [{"value": v} for v in (1, 2, 3)]
+
+    results = asyncio.run(orchestrator.process_batch("Double each value.", items, {"score": "number"}))
+
+    assert results == [{"score": 2}, {"score": 4}, {"score": 6}]
+    assert len(prompts) == 2 and "exactly 2 objects" in prompts[0]
+    assert orchestrator.batch_stats["batches"] == 2 and orchestrator.batch_stats["fallback_items"] == 0
+
+
+def test_missing_batch_answers_fall_back_with_bounded_concurrency():
+    in_flight, peak = [0], [0]
+    orchestrator = MultimodalOrchestrator()
+    orchestrator.batch_fallback_concurrency = 2
+
+    async def process_request(prompt, provider=None, **kwargs):
+        if "JSON array" in prompt:
+            return ModelResponse("r", '[{"index": 0, "ok": true}]', "openai", "gpt", 0.1, True)
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        return ModelResponse("r", '{"ok": "single"}', "openai", "gpt", 0.1, True)
+
+    orchestrator.process_request = process_request
+    results = asyncio.run(orchestrator.process_batch("Check.", [{"n": n} for n in range(5)], {"ok": "bool"}))
+
+    assert results[0] == {"ok": True} and all(r == {"ok": "single"} for r in results[1:])
+    assert peak[0] == 2
+    assert orchestrator.batch_stats["fallback_items"] == 4
+
+
+def test_scan_for_arbitrage_uses_two_round_trips(monkeypatch):
+    def answer(prompt, items):
+        if "arbitrage opportunity" in prompt:
+            return json.dumps([{"index": item["index"], "risk_level": "low", "confidence": 0.9 - item["index"] / 10,
+                                "recommendation": "execute", "key_risks": []} for item in items])
+        return json.dumps([{"index": item["index"], "direction": "up", "confidence": 0.8} for item in items])
+
+    model_orchestrator, prompts = _orchestrator(answer)
+    monkeypatch.setattr(trading_orchestrator_module, "model_orchestrator", model_orchestrator)
+    analyzer = MagicMock(analyze_token=AsyncMock(return_value={"sentiment": {"mood": "optimistic"}, "price": 1.0}),
+                         get_cross_network_insights=AsyncMock(return_value={}))
+    monkeypatch.setattr(trading_orchestrator_module, "market_analyzer", analyzer)
+
+    orchestrator = AITradingOrchestrator()
+    orchestrator.rehoboam = MagicMock(get_market_emotions=MagicMock(return_value={}))
+    orchestrator.network_config = MagicMock(networks=[])
+    orchestrator.web_data = MagicMock()
+    orchestrator.market_data, orchestrator.last_analysis_time = {}, {}
+    orchestrator.analysis_refresh_interval = 300
+    orchestrator.l2_arbitrage = MagicMock(get_arbitrage_strategies=MagicMock(return_value=[
+        {"symbol": "ETH", "estimated_profit": 10.0, "routes": [{"buy_network": "arbitrum", "sell_network": "base"}]},
+        {"symbol": "ETH", "estimated_profit": 5.0},
+        {"symbol": "BTC", "estimated_profit": 8.0},
+    ]))
+
+    results = asyncio.run(orchestrator.scan_for_arbitrage(["ETH", "BTC"]))
+
+    assert len(prompts) == 2  # one token analysis batch, one enhancement batch
+    assert analyzer.analyze_token.await_count == 2  # once per unique token
+    assert [r["ai_confidence"] for r in results] == [0.9, 0.7, 0.8]
+    assert all(r["price_forecast"] == "up" and r["market_sentiment"] == "optimistic" for r in results)
@@ -0,0 +1,82 @@
+import time
+
+from utils.llm_cache import LLMResponseCache, normalize_prompt
+from utils.rehoboam_ai import RehoboamAI
+
+PAIR = "0xB4e16d0168e52d35CaCD2c6185b44281Ec28C9Dc"
+
+
+def test_prompts_differing_only_in_live_values_share_a_key():
+    first = f"ETH at 3012.40 on 2024-05-01T12:00:00Z, risk 0.853, pool {PAIR}, ts 1715000000, gpt-4o"
+    second = f"ETH at 3009.95 on 2024-05-02 13:00:01, risk 0.849, pool {PAIR}, ts 1715000999, gpt-4o"
+    assert normalize_prompt(first) == normalize_prompt(second)
+    assert PAIR in normalize_prompt(first) and "gpt-4o" in normalize_prompt(first)
+    assert normalize_prompt("ETH at 3012") != normalize_prompt("ETH at 3712")
+    assert normalize_prompt("ETH at 3012", significant_digits=4) != normalize_prompt("ETH at 3013", significant_digits=4)
+
+    cache = LLMResponseCache()
+    cache.set("ns", first, {"answer": 1})
+    assert cache.get("ns", second) == {"answer": 1}
+    assert cache.get("other", second) is None
+    assert cache.hit_rate("ns") == 1.0 and cache.hit_rate() == 0.5
+
+
+def test_lru_eviction_and_ttl_expiry():
+    cache = LLMResponseCache(max_entries=2)
+    cache.set("ns", "a", "A")
+    cache.set("ns", "b", "B")
+    assert cache.get("ns", "a") == "A"  # a becomes most recently used
+    cache.set("ns", "c", "C")
+    assert cache.get("ns", "b") is None and cache.get("ns", "a") == "A"
+    cache.set("ns", "d", "D", ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("ns", "d") is None
+    stats = cache.get_stats()
+    assert stats["evictions"] == 2 and stats["expirations"] == 1 and len(cache) == 1
+
+
+def test_entries_persist_across_restarts(tmp_path):
+    path = str(tmp_path / "cache" / "llm.sqlite")
+    cache = LLMResponseCache(path=path, max_entries=2)
+    cache.set("ns", "ETH at 3012", {"score": 0.7})
+    cache.set("ns", "stale", "x", ttl=0.01)
+    cache.set("ns", "BTC at 61000", "y")
+    cache.set("ns", "SOL at 150", "z")  # evicts the ETH entry from memory and disk
+    cache.close()
+    time.sleep(0.02)
+
+    reloaded = LLMResponseCache(path=path)
+    assert reloaded.get_stats()["loaded"] == 2 and reloaded.get_stats()["persistent"]
+    assert reloaded.get("ns", "BTC at 61200") == "y"
+    assert reloaded.get("ns", "ETH at 3010") is None and reloaded.get("ns", "stale") is None
+    reloaded.close()
+
+
+def test_rehoboam_generate_text_hits_the_shared_cache(monkeypatch):
+    ai = RehoboamAI(provider="deepseek", model="deepseek-chat")
+    ai.api_key = "test-key"
+    ai.response_cache = LLMResponseCache()
+    calls = []
+    monkeypatch.setattr(ai, "_apply_rate_limit", lambda: None)
+    monkeypatch.setattr(ai, "_call_deepseek_api_for_text", lambda prompt, max_tokens: calls.append(prompt) or "ok")
+
+    assert ai.generate_text("Rate ETH at 3012.4 (2024-05-01T12:00:00)") == "ok"
+    assert ai.generate_text("Rate ETH at 3011.9 (2024-05-01T12:00:09)") == "ok"
+    assert len(calls) == 1 and ai.response_cache.hit_rate() == 0.5
+
+
+def test_exact_keys_skip_normalization(monkeypatch):
+    cache = LLMResponseCache()
+    first = '{"amount": 1.04, "price": 3012.4}'
+    second = '{"amount": 0.996, "price": 2960}'
+    assert cache.key("trading_decision", first) == cache.key("trading_decision", second)
+    cache.set("trading_decision", first, {"action": "buy"}, exact=True)
+    assert cache.get("trading_decision", second, exact=True) is None
+    assert cache.get("trading_decision", first, exact=True) == {"action": "buy"}
+
+    ai = RehoboamAI(provider="deepseek", model="deepseek-chat")
+    ai.api_key = None
+    ai.response_cache = cache
+    monkeypatch.setattr(ai, "_fallback_market_emotions", lambda: {"day": "first"})
+    ai._cache_set(("market_emotions", "2000-01-01"), {"day": "old"}, exact=True)
+    assert ai.get_market_emotions() == {"day": "first"}  # an earlier day's entry is not reused
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+import utils.advanced_reasoning as advanced_reasoning
+from utils.advanced_reasoning import ModelRequest, MultimodalOrchestrator
+from utils.llm_cache import LLMResponseCache
+from utils.llm_client import AsyncLLMClient, LLMClientError, ProviderConfig
+
+
+def _chat_reply(text):
+    return {"choices": [{"message": {"content": text}}]}
+
+
+def test_complete_builds_provider_requests_on_pooled_clients():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        if request.url.host == "gemini.test":
+            return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": "g"}]}}]})
+        return httpx.Response(200, json=_chat_reply("o"))
+
+    client = AsyncLLMClient(providers={
+        "openai": ProviderConfig("https://openai.test/v1", "TEST_OPENAI_KEY", 6000),
+        "gemini": ProviderConfig("https://gemini.test/v1", "TEST_GEMINI_KEY", 6000),
+    }, transport=httpx.MockTransport(handler))
+
+    async def run():
+        first = await client.complete("openai", "hi", "gpt", api_key="k1", system="be brief")
+        pooled = client._client("openai")
+        second = await client.complete("openai", "again", "gpt", api_key="k1")
+        assert client._client("openai") is pooled
+        gemini = await client.complete("gemini", "hi", "gem", api_key="k2", max_tokens=10)
+        await client.aclose()
+        return first, second, gemini
+
+    assert asyncio.run(run()) == ("o", "o", "g")
+    assert seen[0].url.path == "/v1/chat/completions"
+    assert seen[0].headers["authorization"] == "Bearer k1"
+    assert [m["role"] for m in json.loads(seen[0].content)["messages"]] == ["system", "user"]
+    assert seen[2].url.path == "/v1/models/gem:generateContent"
+    assert seen[2].headers["x-goog-api-key"] == "k2" and "key=" not in str(seen[2].url)
+    assert json.loads(seen[2].content)["generationConfig"]["maxOutputTokens"] == 10
+    assert client.get_stats()["providers"]["openai"]["requests"] == 2
+
+
+def test_error_status_and_missing_key_raise():
+    client = AsyncLLMClient(providers={"openai": ProviderConfig("https://openai.test/v1", "UNSET_TEST_KEY", 6000)},
+                            transport=httpx.MockTransport(lambda request: httpx.Response(429, text="slow down")))
+    with pytest.raises(LLMClientError) as info:
+        asyncio.run(client.complete("openai", "hi", "gpt", api_key="k"))
+    assert info.value.status == 429 and "slow down" in str(info.value)
+    with pytest.raises(LLMClientError):
+        asyncio.run(client.complete("openai", "hi", "gpt"))
+    stats = client.get_stats()["providers"]["openai"]
+    assert stats["failures"] == 1 and stats["status_codes"] == {429: 1}
+
+
+def test_token_bucket_and_slow_requests_do_not_block_the_loop():
+    async def handler(request):
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json=_chat_reply("late"))
+
+    # Burst of one at 600/min: the second request waits ~0.1s for a token
+    client = AsyncLLMClient(providers={"openai": ProviderConfig("https://openai.test/v1", "K", 600, burst=1)},
+                            transport=httpx.MockTransport(handler))
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def run():
+        tick_task = asyncio.create_task(ticker())
+        started = time.monotonic()
+        first = asyncio.create_task(client.complete("openai", "a", "gpt", api_key="k"))
+        second = asyncio.create_task(client.complete("openai", "b", "gpt", api_key="k"))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert await second == "late"
+        elapsed = time.monotonic() - started
+        tick_task.cancel()
+        return elapsed
+
+    elapsed = asyncio.run(run())
+    assert 0.25 <= elapsed < 1.0
+    assert len(ticks) > 15  # the loop kept running while requests were in flight
+    stats = client.get_stats()["providers"]["openai"]
+    assert stats["cancelled"] == 1 and stats["requests"] == 2
+
+
+def test_orchestrator_routes_model_requests_through_async_client(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.host)
+        if request.url.host == "deepseek.test":
+            return httpx.Response(500, text="down")
+        return httpx.Response(200, json=_chat_reply('{"confidence": 0.9}'))
+
+    client = AsyncLLMClient(providers={
+        "deepseek": ProviderConfig("https://deepseek.test/v1", "K", 6000),
+        "openai": ProviderConfig("https://openai.test/v1", "K", 6000),
+    }, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(advanced_reasoning, "llm_client", client)
+    orchestrator = MultimodalOrchestrator()
+    orchestrator.response_cache = LLMResponseCache()
+    orchestrator.api_keys = {"deepseek": "d", "gemini": None, "openai": "o"}
+    monkeypatch.setattr(orchestrator.performance_tracker, "get_fallback_provider", lambda provider: "openai")
+
+    request = ModelRequest(prompt="Analyze this arbitrage", provider="deepseek", task_type="analysis",
+                           complexity=8, timeout=5)
+    response = asyncio.run(orchestrator.process_request(request))
+
+    assert calls == ["deepseek.test", "openai.test"]
+    assert response.success and response.provider == "openai"
+    assert response.content == '{"confidence": 0.9}'
+    cached = asyncio.run(orchestrator.process_request("Analyze this arbitrage"))
+    assert (cached.provider, cached.content, cached.request_id) == ("openai", response.content, response.request_id)
+    assert calls == ["deepseek.test", "openai.test"]
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import utils.advanced_reasoning as advanced_reasoning
+from utils.advanced_reasoning import ModelPerformanceTracker, ModelRequest, MultimodalOrchestrator
+from utils.llm_cache import LLMResponseCache
+from utils.llm_client import AsyncLLMClient, ProviderConfig
+
+
+def _orchestrator(monkeypatch, delays):
+    """Orchestrator whose providers answer after ``delays[provider]`` seconds."""
+    cancelled = []
+
+    async def handler(request):
+        provider = request.url.host.split(".")[0]
+        try:
+            await asyncio.sleep(delays[provider])
+        except asyncio.CancelledError:
+            cancelled.append(provider)
+            raise
+        return httpx.Response(200, json={"choices": [{"message": {"content": provider}}]})
+
+    client = AsyncLLMClient(providers={
+        name: ProviderConfig(f"https://{name}.test/v1", "K", 6000) for name in ("deepseek", "openai")
+    }, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(advanced_reasoning, "llm_client", client)
+    orchestrator = MultimodalOrchestrator()
+    orchestrator.response_cache = LLMResponseCache()
+    orchestrator.api_keys = {"deepseek": "d", "gemini": None, "openai": "o"}
+    tracker = orchestrator.performance_tracker
+    monkeypatch.setattr(tracker, "get_fallback_provider", lambda provider: "openai")
+    for _ in range(tracker.min_latency_samples):
+        tracker.record_latency("deepseek", 0.05)
+    return orchestrator, cancelled
+
+
+def _request():
+    return ModelRequest(prompt="Explain gas", provider="deepseek", task_type="explanation", complexity=3)
+
+
+def test_percentile_falls_back_to_average_until_enough_samples():
+    tracker = ModelPerformanceTracker()
+    assert tracker.latency_percentile("openai") == tracker.performance_data["openai"]["avg_latency"] * 1.5
+    for latency in range(1, 21):
+        tracker.record_latency("openai", latency / 10)
+    assert tracker.latency_percentile("openai", 0.9) == pytest.approx(1.81)
+
+
+def test_slow_primary_is_hedged_and_loser_cancelled(monkeypatch):
+    orchestrator, cancelled = _orchestrator(monkeypatch, {"deepseek": 2.0, "openai": 0.05})
+
+    started = time.monotonic()
+    response = asyncio.run(orchestrator.process_request(_request()))
+
+    assert time.monotonic() - started < 1.0
+    assert response.success and response.provider == "openai" and response.content == "openai"
+    assert cancelled == ["deepseek"]
+    stats = orchestrator.get_hedge_stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1 and stats["losers_cancelled"] == 1
+    assert stats["hedge_rate"] == 1.0 and stats["hedge_cost_usd"] > 0
+    # The cancelled primary leaves a lower-bound latency sample behind
+    assert orchestrator.performance_tracker.latency_samples["deepseek"][-1] >= 0.05
+
+
+def test_primary_that_finishes_after_hedge_starts_can_still_win(monkeypatch):
+    orchestrator, cancelled = _orchestrator(monkeypatch, {"deepseek": 0.15, "openai": 2.0})
+
+    response = asyncio.run(orchestrator.process_request(_request()))
+
+    assert response.provider == "deepseek"
+    assert cancelled == ["openai"]
+    assert orchestrator.get_hedge_stats()["primary_wins"] == 1
+
+
+def test_caps_stop_hedging(monkeypatch):
+    orchestrator, cancelled = _orchestrator(monkeypatch, {"deepseek": 0.15, "openai": 0.01})
+    orchestrator.hedge_budget_usd_per_hour = 0.0
+
+    response = asyncio.run(orchestrator.process_request(_request()))
+
+    assert response.provider == "deepseek" and not cancelled
+    stats = orchestrator.get_hedge_stats()
+    assert stats["skipped_budget"] == 1 and stats["hedged"] == 0
+
+    orchestrator.hedge_budget_usd_per_hour = 100.0
+    orchestrator.max_hedge_rate = 0.0
+    asyncio.run(orchestrator.process_request(_request(), force_refresh=True))
+    assert orchestrator.get_hedge_stats()["skipped_rate_cap"] == 1
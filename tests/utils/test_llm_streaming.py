@@ -0,0 +1,105 @@
+import asyncio
+import json
+import time
+
+import httpx
+
+import utils.advanced_reasoning as advanced_reasoning
+from utils.advanced_reasoning import ModelRequest, MultimodalOrchestrator
+from utils.llm_cache import LLMResponseCache
+from utils.llm_client import AsyncLLMClient, LLMClientError, ProviderConfig
+
+
+def _sse(chunks, delay=0.0):
+    async def body():
+        for chunk in chunks:
+            yield f"data: {json.dumps(chunk) if isinstance(chunk, dict) else chunk}\n\n".encode()
+            await asyncio.sleep(delay)
+    return body()
+
+
+def _delta(text):
+    return {"choices": [{"delta": {"content": text}}]}
+
+
+def test_stream_yields_deltas_before_the_completion_finishes():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        if request.url.host == "gemini.test":
+            return httpx.Response(200, content=_sse([{"candidates": [{"content": {"parts": [{"text": t}]}}]}
+                                                     for t in ("g1", "g2")]))
+        return httpx.Response(200, content=_sse([_delta("Gas "), {"choices": [{"delta": {}}]}, _delta("is"),
+                                                 _delta(" fee"), "[DONE]"], delay=0.1))
+
+    client = AsyncLLMClient(providers={
+        "openai": ProviderConfig("https://openai.test/v1", "K", 6000),
+        "gemini": ProviderConfig("https://gemini.test/v1", "K", 6000),
+    }, transport=httpx.MockTransport(handler))
+
+    async def run():
+        started, arrivals = time.monotonic(), []
+        async for text in client.stream("openai", "Explain gas", "gpt", api_key="k"):
+            arrivals.append((text, time.monotonic() - started))
+        gemini = [text async for text in client.stream("gemini", "hi", "gem", api_key="k")]
+        return arrivals, gemini
+
+    arrivals, gemini = asyncio.run(run())
+    assert [text for text, _ in arrivals] == ["Gas ", "is", " fee"]
+    assert arrivals[0][1] < 0.1 <= arrivals[-1][1]  # first token well before the last
+    assert gemini == ["g1", "g2"]
+    assert json.loads(seen[0].content)["stream"] is True
+    assert seen[1].url.path == "/v1/models/gem:streamGenerateContent" and seen[1].url.params["alt"] == "sse"
+    stats = client.get_stats()["providers"]["openai"]
+    assert stats["streams"] == 1 and 0 < stats["avg_first_token_latency"] < 0.1
+
+
+def test_stream_error_status_raises():
+    client = AsyncLLMClient(providers={"openai": ProviderConfig("https://openai.test/v1", "K", 6000)},
+                            transport=httpx.MockTransport(lambda request: httpx.Response(503, text="busy")))
+
+    async def run():
+        try:
+            async for _ in client.stream("openai", "hi", "gpt", api_key="k"):
+                pass
+        except LLMClientError as e:
+            return e
+
+    error = asyncio.run(run())
+    assert error.status == 503 and "busy" in str(error)
+    assert client.get_stats()["providers"]["openai"]["failures"] == 1
+
+
+def test_orchestrator_stream_falls_back_then_caches(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.host)
+        if request.url.host == "deepseek.test":
+            return httpx.Response(500, text="down")
+        return httpx.Response(200, content=_sse([_delta("a"), _delta("b"), "[DONE]"]))
+
+    client = AsyncLLMClient(providers={
+        name: ProviderConfig(f"https://{name}.test/v1", "K", 6000) for name in ("deepseek", "openai")
+    }, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(advanced_reasoning, "llm_client", client)
+    orchestrator = MultimodalOrchestrator()
+    orchestrator.response_cache = LLMResponseCache()
+    orchestrator.api_keys = {"deepseek": "d", "gemini": None, "openai": "o"}
+    monkeypatch.setattr(orchestrator.performance_tracker, "get_fallback_provider", lambda provider: "openai")
+
+    async def collect(prompt):
+        return [event async for event in orchestrator.stream_request(prompt)]
+
+    request = ModelRequest(prompt="Explain gas", provider="deepseek", task_type="explanation", complexity=3)
+    events = asyncio.run(collect(request))
+
+    assert [e["event"] for e in events] == ["start", "fallback", "token", "token", "done"]
+    assert events[1]["provider"] == "openai"
+    assert events[-1]["response"]["content"] == "ab" and events[-1]["response"]["provider"] == "openai"
+    assert orchestrator.get_response_history(1)[0]["success"]
+
+    cached = asyncio.run(collect("Explain gas"))
+    assert [e["event"] for e in cached] == ["start", "token", "done"] and cached[1]["text"] == "ab"
+    assert cached[0]["cached"] and calls == ["deepseek.test", "openai.test"]
@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from prometheus_client import CollectorRegistry, generate_latest
+
+import utils.advanced_reasoning as advanced_reasoning
+import utils.llm_client as llm_client_module
+from utils.advanced_reasoning import ModelRequest, MultimodalOrchestrator
+from utils.llm_cache import LLMResponseCache
+from utils.llm_client import AsyncLLMClient, LLMClientError, ProviderConfig
+from utils.llm_telemetry import LLMTelemetry
+
+
+@pytest.fixture
+def telemetry(monkeypatch):
+    telemetry = LLMTelemetry(registry=CollectorRegistry())
+    monkeypatch.setattr(llm_client_module, "llm_telemetry", telemetry)
+    monkeypatch.setattr(advanced_reasoning, "llm_telemetry", telemetry)
+    return telemetry
+
+
+def _sample(telemetry, name, **labels):
+    return telemetry.registry.get_sample_value(name, labels) or 0.0
+
+
+def test_client_calls_are_recorded_by_caller(telemetry):
+    def handler(request):
+        if request.url.host == "openai.test":
+            return httpx.Response(503, text="busy")
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}],
+                                         "usage": {"prompt_tokens": 120, "completion_tokens": 30}})
+
+    client = AsyncLLMClient(providers={
+        name: ProviderConfig(f"https://{name}.test/v1", "K", 6000) for name in ("deepseek", "openai")
+    }, transport=httpx.MockTransport(handler))
+
+    async def run():
+        await client.complete("deepseek", "hi", "chat", api_key="k", caller="rehoboam_ai.sentiment")
+        await client.complete("deepseek", "x" * 400, "chat", api_key="k")
+        with pytest.raises(LLMClientError):
+            await client.complete("openai", "hi", "gpt", api_key="k", caller="rehoboam_ai.sentiment")
+
+    asyncio.run(run())
+
+    labels = {"caller": "rehoboam_ai.sentiment", "provider": "deepseek"}
+    assert _sample(telemetry, "llm_requests_total", outcome="success", **labels) == 1
+    assert _sample(telemetry, "llm_tokens_total", kind="prompt", **labels) == 120
+    assert _sample(telemetry, "llm_tokens_total", kind="completion", **labels) == 30
+    assert _sample(telemetry, "llm_request_latency_seconds_count", **labels) == 1
+    assert _sample(telemetry, "llm_estimated_cost_usd_total", **labels) == pytest.approx(0.15 * 0.002)
+    assert _sample(telemetry, "llm_errors_total", caller="rehoboam_ai.sentiment", provider="openai",
+                   error_type="http_503") == 1
+    assert _sample(telemetry, "llm_requests_total", caller="llm_client", provider="deepseek",
+                   outcome="success") == 1
+
+    summary = telemetry.get_summary()
+    assert summary["rehoboam_ai.sentiment"]["providers"]["openai"]["error"] == 1
+    assert summary["llm_client"]["providers"]["deepseek"]["prompt_tokens"] == 120  # usage beats the estimate
+    assert b'llm_requests_total{caller="rehoboam_ai.sentiment"' in generate_latest(telemetry.registry)
+
+
+def test_streams_are_recorded_with_estimated_tokens(telemetry):
+    def handler(request):
+        body = b"".join(f"data: {json.dumps({'choices': [{'delta': {'content': t}}]})}\n\n".encode()
+                        for t in ("abcd", "efgh")) + b"data: [DONE]\n\n"
+        return httpx.Response(200, content=body)
+
+    client = AsyncLLMClient(providers={"openai": ProviderConfig("https://openai.test/v1", "K", 6000)},
+                            transport=httpx.MockTransport(handler))
+
+    async def run():
+        return [text async for text in client.stream("openai", "p" * 40, "gpt", api_key="k", caller="stream")]
+
+    assert asyncio.run(run()) == ["abcd", "efgh"]
+    providers = telemetry.get_summary()["stream"]["providers"]["openai"]
+    assert providers["success"] == 1 and providers["completion_tokens"] == 2
+    assert providers["prompt_tokens"] == 10
+
+
+def test_orchestrator_records_task_callers_cache_hits_and_fallbacks(telemetry, monkeypatch):
+    def handler(request):
+        if request.url.host == "deepseek.test":
+            return httpx.Response(500, text="down")
+        return httpx.Response(200, json={"choices": [{"message": {"content": "answer"}}]})
+
+    client = AsyncLLMClient(providers={
+        name: ProviderConfig(f"https://{name}.test/v1", "K", 6000) for name in ("deepseek", "openai")
+    }, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(advanced_reasoning, "llm_client", client)
+    orchestrator = MultimodalOrchestrator()
+    orchestrator.response_cache = LLMResponseCache()
+    orchestrator.api_keys = {"deepseek": "d", "gemini": None, "openai": "o"}
+    orchestrator.hedging_enabled = False
+    monkeypatch.setattr(orchestrator.performance_tracker, "get_fallback_provider", lambda provider: "openai")
+
+    def request():
+        return ModelRequest(prompt="Explain gas", provider="deepseek", task_type="explanation", complexity=3)
+
+    async def run():
+        first = await orchestrator.process_request(request())
+        second = await orchestrator.process_request(request())
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first.success and first.provider == "openai" and second.content == "answer"
+    summary = telemetry.get_summary()["orchestrator.explanation"]
+    assert summary["cache_hits"] == 1
+    assert summary["providers"]["deepseek"]["error"] == 1 and summary["providers"]["openai"]["success"] == 1
+    assert _sample(telemetry, "llm_hedges_total", caller="orchestrator.explanation", provider="openai",
+                   outcome="fallback") == 1
+
+
+def test_orchestrator_labels_free_form_task_types_as_other():
+    labels = {MultimodalOrchestrator._caller(ModelRequest(prompt="hi", task_type=task_type, complexity=1))
+              for task_type in ("analysis", "strategy_generation", "x" * 200, "analysis\nDROP")}
+    assert labels == {"orchestrator.analysis", "orchestrator.other"}
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import time
+
+from unittest.mock import MagicMock
+
+import numpy as np
+
+import utils.ai_market_analyzer as ai_market_analyzer
+import utils.rehoboam_ai as rehoboam_ai
+from utils.ai_market_analyzer import AdvancedMarketAnalyzer
+from utils.llm_cache import LLMResponseCache
+from utils.local_models import LatencyBudgetPolicy, LocalInferenceTier
+from utils.rehoboam_ai import RehoboamAI
+
+
+def _llm_sentiment(change):
+    """Stand-in for logged LLM answers: smooth in the price change."""
+    score = float(np.tanh(change / 4))
+    mood = "optimistic" if score > 0.3 else "fearful" if score < -0.3 else "neutral"
+    return {"score": score, "mood": mood, "confidence": 0.8, "factors": ["momentum"]}
+
+
+def _trained_tier(tmp_path):
+    tier = LocalInferenceTier(model_path=str(tmp_path / "models.npz"), log_path=str(tmp_path / "llm.jsonl"))
+    for change in np.linspace(-10, 10, 41):
+        market_data = {"change_24h": float(change), "volume_24h": 1e6}
+        tier.record("sentiment", market_data, _llm_sentiment(change))
+    tier.record("sentiment", {"change_24h": 1}, {"error": "Invalid JSON response"})  # not logged
+    assert tier.train() == {"sentiment": 41}
+    return tier
+
+
+def test_models_train_from_logged_outputs_and_predict_fast(tmp_path):
+    tier = _trained_tier(tmp_path)
+    tier.save()
+
+    reloaded = LocalInferenceTier(model_path=tier.model_path)
+    assert reloaded.models["sentiment"].samples == 41 and not reloaded.models["strategy"].trained
+    assert reloaded.predict("strategy", {"change_24h": 1}) is None
+
+    up = reloaded.predict("sentiment", {"change_24h": 8, "volume_24h": 1e6})
+    down = reloaded.predict("sentiment", {"change_24h": -8, "volume_24h": 1e6})
+    assert up["mood"] == "optimistic" and up["score"] > 0.7
+    assert down["mood"] == "fearful" and down["score"] < -0.7
+    assert 0.75 < up["confidence"] <= 1.0
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        reloaded.predict("sentiment", {"change_24h": 3.2, "volume_24h": 5e5})
+    assert (time.perf_counter() - started) / 1000 < 0.001
+    assert reloaded.get_stats()["avg_predict_ms"] < 1.0
+
+
+def test_budget_policy_serves_local_then_remote_refreshes():
+    policy = LatencyBudgetPolicy()
+    refreshed = []
+
+    async def remote(delay):
+        await asyncio.sleep(delay)
+        refreshed.append(delay)
+        return "remote"
+
+    async def failing():
+        raise RuntimeError("down")
+
+    async def run():
+        fast = await policy.run(remote(0.0), lambda: "local", budget=0.5)
+        slow = await policy.run(remote(0.1), lambda: "local", budget=0.01)
+        failed = await policy.run(failing(), lambda: "local", budget=0.5)
+        assert refreshed == [0.0]
+        await asyncio.sleep(0.2)  # the late remote call keeps running and completes
+        return fast, slow, failed
+
+    assert asyncio.run(run()) == (("remote", "remote"), ("local", "local"), ("local", "local"))
+    assert refreshed == [0.0, 0.1]
+    stats = policy.get_stats()
+    assert stats["late_refreshes"] == 1 and stats["remote_failures"] == 1 and stats["pending"] == 0
+
+
+def test_rehoboam_falls_back_to_local_model_within_budget(tmp_path, monkeypatch):
+    tier = _trained_tier(tmp_path)
+    monkeypatch.setattr(rehoboam_ai, "local_models", tier)
+    ai = RehoboamAI(provider="deepseek", model="deepseek-chat")
+    ai.api_key = "test-key"
+    ai.response_cache = LLMResponseCache()
+
+    async def slow_complete(*args, **kwargs):
+        await asyncio.sleep(0.1)
+        return json.dumps({"score": 0.1, "mood": "neutral", "confidence": 0.9})
+
+    monkeypatch.setattr(rehoboam_ai.llm_client, "complete", slow_complete)
+    market_data = {"change_24h": 9, "volume_24h": 1e6}
+
+    async def run():
+        first = await ai.analyze_sentiment_async("ETH", market_data, budget=0.01)
+        await asyncio.sleep(0.2)
+        return first, await ai.analyze_sentiment_async("ETH", market_data, budget=0.01)
+
+    first, second = asyncio.run(run())
+    assert first["source"] == "local_model" and first["mood"] == "optimistic"
+    assert second == {"score": 0.1, "mood": "neutral", "confidence": 0.9}  # refreshed by the late remote answer
+
+    # Without a trained model the local tier is the original rule set
+    monkeypatch.setattr(rehoboam_ai, "local_models", LocalInferenceTier(model_path=None))
+    rules = ai._fallback_strategy("ETH", {"change_24h": 4, "sentiment": {"score": 0.7}})
+    assert rules["action"] == "buy" and rules["description"].startswith("Rule-based") and "source" not in rules
+
+
+def test_analyzer_fallback_never_fetches_volume_for_the_local_model(tmp_path, monkeypatch):
+    analyzer = AdvancedMarketAnalyzer()
+    analyzer.web_data = MagicMock(get_24h_change=lambda token: 6.0)
+    monkeypatch.setattr(ai_market_analyzer, "local_models", LocalInferenceTier(model_path=None))
+    assert analyzer._fallback_sentiment_analysis("ETH")["score"] == 0.8  # untrained: rule-based only
+
+    tier = _trained_tier(tmp_path)
+    monkeypatch.setattr(ai_market_analyzer, "local_models", tier)
+    result = analyzer._fallback_sentiment_analysis("ETH", {"change_24h": -8, "volume_24h": 1e6})
+    assert result["source"] == "local_model" and result["mood"] == "fearful"
+    analyzer.web_data.get_24h_volume.assert_not_called()
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import threading
+
+from utils.market_events import MarketEventBus, gas_topic, price_topic, reserve_topic
+from utils.pool_state_cache import PoolStateCache
+
+PAIR = "0x3000000000000000000000000000000000000003"
+
+
+def _counting_watch(bus, name, topics, calls):
+    def evaluate():
+        calls.append(name)
+        return [{"watch": name}]
+
+    bus.watch(name, topics, evaluate)
+
+
+async def _settle(bus):
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if not bus.get_stats()['pending']:
+            break
+    await asyncio.sleep(0.01)
+
+
+def test_only_affected_watches_are_evaluated():
+    bus = MarketEventBus(debounce_seconds=0.01)
+    calls = []
+    _counting_watch(bus, "eth", [price_topic("ETH"), gas_topic("arbitrum")], calls)
+    _counting_watch(bus, "btc", [price_topic("WBTC")], calls)
+
+    async def run():
+        await bus.start()
+        await _settle(bus)
+        calls.clear()
+        bus.publish([gas_topic("arbitrum")], source="test")
+        await _settle(bus)
+        await bus.stop()
+
+    asyncio.run(run())
+    assert calls == ["eth"]
+
+
+def test_burst_of_updates_is_coalesced():
+    bus = MarketEventBus(debounce_seconds=0.02)
+    calls = []
+    _counting_watch(bus, "eth", [price_topic("eth")], calls)
+    seen = []
+
+    async def on_opportunities(name, opportunities):
+        seen.append((name, len(opportunities)))
+
+    bus.on_opportunities(on_opportunities)
+
+    async def run():
+        await bus.start()
+        await _settle(bus)
+        calls.clear()
+        for price in range(20):
+            bus.publish([price_topic("ETH")], price=price)
+        await _settle(bus)
+        await bus.stop()
+
+    asyncio.run(run())
+    stats = bus.get_stats()
+    assert calls == ["eth"]
+    assert stats['events'] == 20 and stats['events_coalesced'] == 19
+    assert seen[-1] == ("eth", 1)
+    assert stats['detection_latency_p50_ms'] is not None
+
+
+def test_publish_from_worker_thread_wakes_waiters():
+    bus = MarketEventBus(debounce_seconds=0.0)
+
+    async def run():
+        await bus.start()
+        waiter = asyncio.create_task(bus.wait_for([gas_topic("base")], timeout=1.0))
+        await asyncio.sleep(0)
+        thread = threading.Thread(target=bus.publish, args=([gas_topic("base")],), kwargs={"block": 7})
+        thread.start()
+        event = await waiter
+        thread.join()
+        timed_out = await bus.wait_for([gas_topic("base")], timeout=0.01)
+        await bus.stop()
+        return event, timed_out
+
+    event, timed_out = asyncio.run(run())
+    assert event.payload == {"block": 7}
+    assert timed_out is None
+
+
+def test_publish_without_loop_is_dropped():
+    bus = MarketEventBus()
+    assert bus.publish([price_topic("eth")]) is False
+    assert bus.get_stats()['events_dropped'] == 1
+
+
+def test_pool_cache_sync_triggers_reserve_watch(tmp_path):
+    config = {
+        "test_net": {
+            "dexs": {"sushiswap": {"router_address": "0x4000000000000000000000000000000000000004",
+                                   "type": "uniswap_v2", "pairs": {"WETH/USDC": PAIR}}},
+            "tokens": {
+                "WETH": {"address": "0x1000000000000000000000000000000000000001", "decimals": 18},
+                "USDC": {"address": "0x2000000000000000000000000000000000000002", "decimals": 6},
+            },
+        }
+    }
+    path = tmp_path / "l2_dex_config.json"
+    path.write_text(json.dumps(config))
+    bus = MarketEventBus(debounce_seconds=0.0)
+    cache = PoolStateCache(str(path), event_bus=bus)
+    calls = []
+    _counting_watch(bus, "pool", [reserve_topic("test_net", PAIR)], calls)
+    _counting_watch(bus, "usdc", [price_topic("USDC")], calls)
+
+    async def run():
+        await bus.start()
+        await _settle(bus)
+        calls.clear()
+        assert cache.apply_sync("test_net", PAIR, 10, 20, block_number=5)
+        await _settle(bus)
+        await bus.stop()
+
+    asyncio.run(run())
+    assert sorted(calls) == ["pool", "usdc"]
+
+
+def test_service_watches_only_their_token_pools_and_networks(tmp_path, monkeypatch):
+    import sys
+    import utils.arbitrage_service  # noqa: F401
+    from utils.layer2_trading import Layer2Arbitrage
+    service = sys.modules["utils.arbitrage_service"].arbitrage_service
+
+    path = tmp_path / "l2_dex_config.json"
+    path.write_text(json.dumps({
+        "arbitrum_sepolia": {"dexs": {"sushiswap": {"pairs": {"WETH/USDC": PAIR}}}},
+        "polygon_mumbai": {"tokens": {"WMATIC": {}, "USDC": {}}},
+    }))
+    layer2 = Layer2Arbitrage(dex_config_path=str(path))
+    assert layer2.get_trading_networks("USDC") == ["arbitrum", "polygon", "ethereum"]
+    assert layer2.get_trading_networks("WBTC") == ["ethereum"]
+    assert "polygon" not in layer2.get_trading_networks("ETH")
+
+    threads = []
+
+    def analyze_price_differences(token):
+        threads.append((token, threading.current_thread() is threading.main_thread()))
+        return []
+
+    layer2.analyze_price_differences = analyze_price_differences
+    bus = MarketEventBus(debounce_seconds=0.01)
+    monkeypatch.setattr(service, "event_bus", bus)
+    monkeypatch.setattr(service, "dex_config_path", str(path))
+    monkeypatch.setattr(service, "monitored_tokens", ["ETH", "USDC", "WBTC"])
+    monkeypatch.setattr(service, "layer2_arbitrage", layer2)
+
+    async def run():
+        evaluated = []
+        await service.start_monitoring()
+        await _settle(bus)
+        for topic in (gas_topic("polygon"), reserve_topic("arbitrum_sepolia", PAIR), price_topic("WBTC")):
+            threads.clear()
+            bus.publish([topic], source="test")
+            await _settle(bus)
+            evaluated.append(sorted(token for token, _ in threads))
+        await service.stop_monitoring()
+        await bus.stop()
+        return evaluated
+
+    assert asyncio.run(run()) == [["USDC"], ["ETH", "USDC"], ["WBTC"]]
+    assert bus.get_stats()["watches"] == 0
+    assert not any(on_main for _, on_main in threads)
@@ -721,3 +721,106 @@ async def test_get_mcp_reasoning_invalid_json(mock_get_url, caplog):
     assert result is None
     mock_post_method.assert_called_once()
     assert "Error decoding JSON response from MCP Reasoning Orchestrator" in caplog.text
+
+
+# === Tests for the cached registry, pooled clients and circuit breakers ===
+
+import asyncio
+import time
+
+import utils.mcp_clients as mcp_clients
+from utils.mcp_clients import MCPRegistryClient
+
+
+def _registry(monkeypatch, services, service_handler=None, **kwargs):
+    """Install a registry client served by a mock transport; returns (registry, request log)."""
+    requests = []
+
+    async def handler(request):
+        requests.append(f"{request.url.host}{request.url.path}")
+        if request.url.host == "mcp-registry":
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"services": dict(services)})
+        return service_handler(request)
+
+    registry = MCPRegistryClient(transport=httpx.MockTransport(handler), **kwargs)
+    monkeypatch.setattr(mcp_clients, "mcp_registry", registry)
+    return registry, requests
+
+
+@pytest.mark.asyncio
+async def test_registry_is_cached_and_service_clients_pooled(monkeypatch):
+    registry, requests = _registry(
+        monkeypatch, {"market-analyzer": {"url": MOCK_MARKET_ANALYZER_SERVICE_URL}},
+        lambda request: httpx.Response(200, json={"token": request.url.path.rsplit("/", 1)[-1]}))
+
+    results = await asyncio.gather(*(mcp_clients.get_mcp_market_analysis(t) for t in ("ETH", "BTC", "SOL")))
+    pooled = registry.client(MOCK_MARKET_ANALYZER_SERVICE_URL)
+    await mcp_clients.get_mcp_market_analysis("ETH")
+
+    assert [r["token"] for r in results] == ["ETH", "BTC", "SOL"]
+    assert requests.count("mcp-registry/registry/registry") == 1  # concurrent misses share one fetch
+    assert registry.client(MOCK_MARKET_ANALYZER_SERVICE_URL) is pooled
+    assert registry.get_stats()["hits"] == 1
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stale_registry_served_while_refreshing_and_changes_watched(monkeypatch):
+    services = {"consciousness": {"url": "http://old-host:1"}}
+    registry, requests = _registry(monkeypatch, services, ttl=0.05)
+    changes = []
+    registry.watch(changes.append)
+
+    assert await mcp_clients._get_service_url_from_registry(None, mcp_clients.CONSCIOUSNESS_SERVICE_NAMES, "T") == "http://old-host:1"
+    services["consciousness"] = {"url": "http://new-host:2"}
+    await asyncio.sleep(0.06)
+
+    # Stale entry is returned immediately; the refresh happens in the background
+    assert await mcp_clients._get_service_url_from_registry(None, mcp_clients.CONSCIOUSNESS_SERVICE_NAMES, "T") == "http://old-host:1"
+    await asyncio.sleep(0.03)
+    assert await mcp_clients._get_service_url_from_registry(None, mcp_clients.CONSCIOUSNESS_SERVICE_NAMES, "T") == "http://new-host:2"
+    assert changes == [{"consciousness": "http://new-host:2"}]
+    assert registry.get_stats()["stale_hits"] == 1 and registry.get_stats()["changes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast_then_recovers(monkeypatch, caplog):
+    service_calls = []
+    healthy = [False]
+
+    def service(request):
+        service_calls.append(request.url.path)
+        return httpx.Response(200, json={"ok": True}) if healthy[0] else httpx.Response(503, text="down")
+
+    registry, _ = _registry(monkeypatch, {"reasoning-service": {"url": MOCK_REASONING_SERVICE_URL}}, service)
+    breaker = registry.breaker(MOCK_REASONING_SERVICE_URL)
+    breaker.failure_threshold, breaker.reset_timeout = 2, 0.05
+
+    for _ in range(4):
+        assert await mcp_clients.get_mcp_reasoning("p") is None
+    assert len(service_calls) == 2 and breaker.state == "open" and breaker.rejected == 2
+    assert "circuit open" in caplog.text
+
+    healthy[0] = True
+    await asyncio.sleep(0.06)
+    assert await mcp_clients.get_mcp_reasoning("p") == {"ok": True}
+    assert breaker.state == "closed" and len(service_calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_lookups_use_the_service_map_built_once_per_registry_update(monkeypatch, caplog):
+    import logging
+    registry, requests = _registry(monkeypatch, {"consciousness": {"url": "http://host:1"}})
+    builds = []
+    service_map = mcp_clients._service_map
+    monkeypatch.setattr(mcp_clients, "_service_map", lambda *args: builds.append(args) or service_map(*args))
+    caplog.set_level(logging.INFO, logger="utils.mcp_clients")
+
+    urls = [await mcp_clients._get_service_url_from_registry(None, mcp_clients.CONSCIOUSNESS_SERVICE_NAMES, "T")
+            for _ in range(3)]
+
+    assert urls == ["http://host:1"] * 3
+    assert len(builds) == 1 and requests.count("mcp-registry/registry/registry") == 1
+    assert not [r for r in caplog.records if r.name == "utils.mcp_clients" and r.levelno == logging.INFO]
+    await registry.aclose()
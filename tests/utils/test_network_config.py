@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from utils.network_config import NetworkConfig
+
+
+@pytest.fixture
+def config():
+    return NetworkConfig()
+
+
+def test_bridge_costs_match_rollup_rules(config):
+    optimistic = config.estimate_bridging_costs('ethereum', 'arbitrum', 1.0)
+    assert optimistic['fee_estimate'] == pytest.approx(0.0015)
+    assert optimistic['time_estimate'] == 7 * 24 * 60 * 60
+    assert optimistic['official_bridge'] == 'https://bridge.arbitrum.io/'
+
+    zk = config.estimate_bridging_costs('ethereum', 'zksync', 1.0)
+    assert zk['fee_estimate'] == pytest.approx(0.0012)
+    assert zk['time_estimate'] == 60 * 60
+
+    assert config.estimate_bridging_costs('ethereum', 'nowhere', 1.0)['error'] == 'Network not found'
+
+
+def test_batch_lookup_broadcasts_amounts(config):
+    config.update_network('base', bridges={'fee_rate': 0.001})
+
+    result = config.estimate_bridging_costs_batch('ethereum', 'base', np.array([1.0, 10.0, 100.0]))
+
+    assert result['fee_estimate'] == pytest.approx([0.0015 + 0.001, 0.0015 + 0.01, 0.0015 + 0.1])
+    assert result['valid'].all()
+    for amount, fee in zip([1.0, 10.0, 100.0], result['fee_estimate']):
+        assert config.estimate_bridging_costs('ethereum', 'base', amount)['fee_estimate'] == pytest.approx(fee)
+
+
+def test_batch_lookup_flags_unknown_networks(config):
+    result = config.estimate_bridging_costs_batch(['ethereum', 'nowhere'], ['optimism', 'optimism'], 1.0)
+    assert result['valid'].tolist() == [True, False]
+    assert np.isnan(result['fee_estimate'][1])
+
+
+def test_update_network_invalidates_gas_factors(config):
+    before = config.get_bridge_cost_matrices()
+    i, j = config.get_network_index('ethereum'), config.get_network_index('polygon')
+    assert before['gas_factor'][i, j] == pytest.approx(config.get_gas_price_factor('ethereum', 'polygon'))
+
+    config.update_network('polygon', average_block_time=0.5)
+
+    after = config.get_bridge_cost_matrices()
+    assert after['version'] == before['version'] + 1
+    assert after['gas_factor'][i, j] == pytest.approx(config.get_gas_price_factor('ethereum', 'polygon'))
+    assert after['gas_factor'][i, j] != before['gas_factor'][i, j]
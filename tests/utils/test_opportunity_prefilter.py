@@ -0,0 +1,94 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from utils.conscious_arbitrage_engine import ConsciousArbitrageEngine
+from utils.network_config import network_config
+from utils.opportunity_prefilter import OpportunityPrefilter
+
+
+def test_deterministic_tier_checks_profit_liquidity_and_staleness():
+    prefilter = OpportunityPrefilter(min_net_profit_usd=1.0, min_liquidity_usd=10_000, max_age_seconds=30)
+    opportunities = [
+        {"net_profit_usd": 25.0, "liquidity_usd": 50_000, "timestamp": time.time()},
+        {"profit_usd": 10.0, "gas_cost_usd": 12.0},
+        {"net_profit_usd": 25.0, "liquidity_available": 500},
+        {"net_profit_usd": 25.0, "timestamp": time.time() - 120},
+        {"token": "ETH"},
+    ]
+
+    passed, reasons = prefilter.deterministic_tier(opportunities)
+
+    assert passed.tolist() == [True, False, False, False, True]
+    assert "net profit" in reasons[1] and "liquidity" in reasons[2] and "old" in reasons[3]
+
+
+def test_missing_bridge_fee_is_priced_from_cost_matrices():
+    prefilter = OpportunityPrefilter()
+    opportunity = {"price_difference": 10.0, "estimated_gas_cost": 1.0, "buy_price": 2000.0,
+                   "buy_network": "ethereum", "sell_network": "arbitrum"}
+    expected_fee = network_config.estimate_bridging_costs("ethereum", "arbitrum", 1.0)["fee_estimate"] * 2000.0
+
+    net = prefilter.net_profit_usd([opportunity, {**opportunity, "bridge_fee": 0.5}])
+
+    assert net[0] == pytest.approx(10.0 - 1.0 - expected_fee)
+    assert net[1] == pytest.approx(8.5)
+
+
+def test_bridge_fee_basis_matches_gross_profit(monkeypatch):
+    def batch(buy, sell, amounts):
+        return {"fee_estimate": 0.001 * np.asarray(amounts)}
+
+    monkeypatch.setattr(network_config, "estimate_bridging_costs_batch", batch)
+    route = {"buy_price": 2000.0, "amount": 5.0, "buy_network": "ethereum", "sell_network": "arbitrum"}
+
+    per_token, trade = OpportunityPrefilter().net_profit_usd([
+        {**route, "price_difference": 10.0},
+        {**route, "profit_usd": 50.0},
+    ])
+
+    assert per_token == pytest.approx(10.0 - 2.0)  # fee for one token, priced in USD
+    assert trade == pytest.approx(50.0 - 10.0)  # fee for the whole 5-token trade
+
+
+def test_cascade_reports_tier_hit_rates_and_saved_latency():
+    prefilter = OpportunityPrefilter()
+    opportunities = [{"net_profit_usd": -5.0}, {"net_profit_usd": 5.0, "score": 0.2},
+                     {"net_profit_usd": 5.0, "score": 0.9}]
+
+    result = prefilter.evaluate(opportunities, lambda batch: np.array([o["score"] for o in batch]), 0.7)
+    prefilter.record_llm_evaluation(2.0)
+
+    assert result.passed.tolist() == [False, False, True]
+    assert result.rejected_by == ["deterministic", "local_model", None]
+    stats = prefilter.get_stats()
+    assert stats["tiers"]["deterministic"]["hit_rate"] == pytest.approx(1 / 3)
+    assert stats["tiers"]["local_model"]["hit_rate"] == pytest.approx(0.5)
+    assert stats["estimated_saved_seconds"] == pytest.approx(4.0)
+
+
+def test_engine_only_sends_survivors_to_llm_stages():
+    engine = ConsciousArbitrageEngine()
+    engine.consciousness_state = MagicMock(awareness_level=0.8)
+    engine._consciousness_analysis = AsyncMock(return_value={"overall": 0.9, "risk_intuition": 0.2})
+    engine._ai_analysis = AsyncMock(return_value={"confidence": 0.8})
+    engine._reasoning_synthesis = AsyncMock(return_value={"confidence": 0.8})
+    opportunities = [
+        {"id": "gas_eaten", "profit_usd": 3.0, "gas_cost_usd": 9.0},
+        {"id": "weak", "net_profit_usd": 5.0, "risk_score": 1.0, "profit_probability": 0.0, "complexity": 1.0},
+        {"id": "good", "net_profit_usd": 50.0, "risk_score": 0.9, "profit_potential": 0.9, "complexity": 0.1},
+    ]
+
+    decisions = asyncio.run(engine.analyze_opportunities(opportunities))
+
+    assert engine._ai_analysis.await_count == 1
+    assert [d.opportunity_id for d in decisions] == ["gas_eaten", "weak", "good"]
+    assert decisions[0].recommended_action == "reject"
+    assert "local_model" in decisions[1].reasoning
+    assert decisions[2].recommended_action == "execute"
+    metrics = engine.get_performance_metrics()
+    assert metrics["prefiltered"] == 2 and metrics["total_opportunities_analyzed"] == 3
+    assert metrics["prefilter"]["early_exits"] == 2
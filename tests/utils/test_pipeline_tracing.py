@@ -0,0 +1,119 @@
+import asyncio
+import json
+import sys
+import time
+
+import utils.rehoboam_pipeline as rehoboam_pipeline_module
+from utils.pipeline_tracing import (
+    KIND_LLM, KIND_RPC, KIND_STAGE, FileSpanExporter, LatencyHistogram, Tracer,
+)
+from utils.rehoboam_pipeline import RehoboamPipeline
+
+
+def test_stage_compute_excludes_waits_and_spans_nest():
+    tracer = Tracer()
+
+    async def run():
+        with tracer.span("stage.a", kind=KIND_STAGE, new_trace=True) as stage:
+            with tracer.span("llm.call", kind=KIND_LLM):
+                await asyncio.sleep(0.05)
+            with tracer.span("rpc.call", kind=KIND_RPC):
+                await asyncio.sleep(0.02)
+        return stage
+
+    stage = asyncio.run(run())
+    spans = tracer.get_trace(stage.trace_id)
+    assert [s["name"] for s in spans] == ["stage.a", "llm.call", "rpc.call"]
+    assert all(s["parent_id"] == stage.span_id for s in spans[1:])
+    latency = tracer.get_stage_latency()
+    assert latency["stage.a"]["sum_ms"] >= 70
+    assert latency["stage.a.compute"]["sum_ms"] < 20
+    assert latency["llm.call"]["count"] == 1
+    assert tracer.current_span() is None
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    histogram = LatencyHistogram(bounds_ms=(10, 100))
+    for value in [1, 2, 3, 50, 500]:
+        histogram.record(value)
+    assert histogram.percentile(0.5) == 10.0
+    assert histogram.percentile(0.8) == 100.0
+    assert histogram.percentile(1.0) == 500.0
+    assert histogram.to_dict()["buckets"] == {"10": 3, "100": 1, "+Inf": 1}
+
+
+def test_file_exporter_writes_otlp_json(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    tracer = Tracer(exporter=FileSpanExporter(str(path), service_name="test"), flush_interval=0.05)
+    with tracer.span("root", new_trace=True, **{"opportunity.id": "op-1"}) as root:
+        with tracer.span("child", kind=KIND_STAGE):
+            pass
+    tracer.flush()
+    spans = [span for line in path.read_text().splitlines()
+             for span in json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]]
+    by_name = {span["name"]: span for span in spans}
+    assert by_name["child"]["parentSpanId"] == root.span_id
+    assert by_name["root"]["traceId"] == by_name["child"]["traceId"] == root.trace_id
+    assert {"key": "opportunity.id", "value": {"stringValue": "op-1"}} in by_name["root"]["attributes"]
+    assert tracer.stats["exported"] == 2
+
+
+def test_rehoboam_pipeline_records_a_trace_per_opportunity(monkeypatch):
+    tracer = Tracer()
+    monkeypatch.setattr(rehoboam_pipeline_module, "pipeline_tracer", tracer)
+    pipeline = RehoboamPipeline()
+    pipeline.middleware = []
+
+    async def stage(data):
+        with tracer.span("llm.fake", kind=KIND_LLM):
+            await asyncio.sleep(0.001)
+        return data
+
+    pipeline.stages = {stage_key: stage for stage_key in pipeline.stages}
+    result = asyncio.run(pipeline.process({"id": "op-7", "token_pair": "ETH/USDC"}))
+
+    spans = tracer.get_trace(result["trace_id"])
+    assert spans[0]["name"] == "rehoboam_pipeline.opportunity"
+    assert spans[0]["attributes"]["opportunity.id"] == "op-7"
+    stage_names = [s["name"] for s in spans if s["kind"] == KIND_STAGE]
+    assert stage_names == ["rehoboam_pipeline.consciousness", "rehoboam_pipeline.analysis",
+                           "rehoboam_pipeline.decision", "rehoboam_pipeline.execution",
+                           "rehoboam_pipeline.learning"]
+    assert sum(1 for s in spans if s["name"] == "llm.fake") == 5
+    assert "rehoboam_pipeline.analysis.compute" in pipeline.get_metrics()["stage_latency"]
+
+
+def test_arbitrage_pipeline_continues_trace_across_stage_queues(monkeypatch):
+    import utils.rehoboam_arbitrage_pipeline  # noqa: F401
+    module = sys.modules["utils.rehoboam_arbitrage_pipeline"]
+    tracer = Tracer()
+    monkeypatch.setattr(module, "pipeline_tracer", tracer)
+    pipeline = module.rehoboam_arbitrage_pipeline
+    Stage, Message = module.PipelineStage, module.PipelineMessage
+
+    async def first(message):
+        await pipeline._enqueue(Message(stage=Stage.EXECUTION, data={}, timestamp=None, source="agent"))
+
+    async def second(message):
+        with tracer.span("rpc.execute", kind=KIND_RPC):
+            await asyncio.sleep(0.001)
+
+    monkeypatch.setattr(pipeline, "stage_handlers", {Stage.BOT_PREPARATION: first, Stage.EXECUTION: second})
+    monkeypatch.setattr(pipeline, "scheduler", pipeline._build_scheduler())
+
+    async def run():
+        await pipeline.scheduler.start()
+        with tracer.span("arbitrage_pipeline.opportunity", new_trace=True) as root:
+            await pipeline._enqueue(Message(stage=Stage.BOT_PREPARATION, data={},
+                                            timestamp=None, source="agent"))
+        await asyncio.wait_for(pipeline.scheduler.join(), timeout=5)
+        await pipeline.scheduler.stop()
+        return root
+
+    started = time.time()
+    root = asyncio.run(run())
+    assert time.time() - started < 5
+    names = [s["name"] for s in tracer.get_trace(root.trace_id)]
+    assert names == ["arbitrage_pipeline.opportunity", "arbitrage_pipeline.bot_preparation.queue",
+                     "arbitrage_pipeline.bot_preparation", "arbitrage_pipeline.execution.queue",
+                     "arbitrage_pipeline.execution", "rpc.execute"]
@@ -0,0 +1,152 @@
+import json
+import time
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils.abi_store import UNISWAP_V2_SWAP_TOPIC, UNISWAP_V2_SYNC_TOPIC
+from utils.pool_state_cache import PoolStateCache
+
+WETH = "0x1000000000000000000000000000000000000001"
+USDC = "0x2000000000000000000000000000000000000002"
+PAIR = "0x3000000000000000000000000000000000000003"
+
+
+def _encode(*values: int) -> str:
+    return "0x" + "".join(f"{v:064x}" for v in values)
+
+
+@pytest.fixture
+def dex_config_path(tmp_path):
+    config = {
+        "test_net": {
+            "dexs": {
+                "sushiswap": {
+                    "router_address": "0x4000000000000000000000000000000000000004",
+                    "type": "uniswap_v2",
+                    "pairs": {"WETH/USDC": PAIR},
+                },
+                "univ3": {"router_address": "0x5000000000000000000000000000000000000005", "type": "uniswap_v3"},
+            },
+            "tokens": {
+                "WETH": {"address": WETH, "decimals": 18, "symbol": "WETH"},
+                "USDC": {"address": USDC, "decimals": 6, "symbol": "USDC"},
+            },
+        }
+    }
+    path = tmp_path / "l2_dex_config.json"
+    path.write_text(json.dumps(config))
+    return str(path)
+
+
+def _make_web3(block_number, reserves=(10 * 10**18, 30000 * 10**6), logs=None):
+    w3 = MagicMock()
+    w3.eth.block_number = block_number
+    w3.to_checksum_address = lambda addr: addr
+    pair = MagicMock()
+    pair.functions.getReserves.return_value.call.return_value = (*reserves, 0)
+    w3.eth.contract.return_value = pair
+    w3.eth.get_logs.return_value = logs or []
+    return w3
+
+
+def test_loads_pools_for_every_configured_pair(dex_config_path):
+    cache = PoolStateCache(dex_config_path)
+    assert len(cache.pools) == 2
+    pool = cache.get_pool("test_net", "sushiswap", "USDC", "WETH")
+    assert pool.token0_symbol == "WETH" and pool.pair_address == PAIR
+    assert cache.quote("test_net", "sushiswap", "WETH", "USDC", Decimal("1")) is None
+
+
+def test_quote_uses_constant_product_formula(dex_config_path):
+    cache = PoolStateCache(dex_config_path)
+    cache.apply_sync("test_net", PAIR, 10 * 10**18, 30000 * 10**6, block_number=100)
+
+    amount_out = cache.quote("test_net", "sushiswap", "WETH", "USDC", Decimal("1"))
+
+    amount_in_with_fee = 10**18 * 9970
+    expected = (amount_in_with_fee * 30000 * 10**6) // (10 * 10**18 * 10000 + amount_in_with_fee)
+    assert amount_out == Decimal(expected) / Decimal(10**6)
+    assert cache.get_stats()["quotes_served"] == 1
+
+
+def test_refresh_bootstraps_then_applies_only_deltas(dex_config_path):
+    w3 = _make_web3(100)
+    cache = PoolStateCache(dex_config_path, web3_getter=lambda network: w3)
+
+    cache.refresh("test_net")
+    assert cache.get_pool("test_net", "sushiswap", "WETH", "USDC").reserve0 == 10 * 10**18
+
+    w3.eth.block_number = 102
+    w3.eth.get_logs.return_value = [{
+        "address": PAIR, "topics": [UNISWAP_V2_SYNC_TOPIC], "blockNumber": 102,
+        "transactionHash": "0xaa", "data": _encode(11 * 10**18, 27000 * 10**6),
+    }]
+    assert cache.refresh("test_net") == 1
+    filter_params = w3.eth.get_logs.call_args[0][0]
+    assert filter_params["fromBlock"] == 101 and filter_params["toBlock"] == 102
+
+    pool = cache.get_pool("test_net", "sushiswap", "WETH", "USDC")
+    assert (pool.reserve0, pool.reserve1, pool.last_block) == (11 * 10**18, 27000 * 10**6, 102)
+
+    # No new block: only eth_blockNumber, no log query
+    w3.eth.get_logs.reset_mock()
+    assert cache.refresh("test_net") == 0
+    w3.eth.get_logs.assert_not_called()
+
+
+def test_swap_after_sync_in_same_tx_is_not_double_counted(dex_config_path):
+    cache = PoolStateCache(dex_config_path)
+    cache.apply_log("test_net", {"address": PAIR, "topics": [UNISWAP_V2_SYNC_TOPIC], "blockNumber": 5,
+                                 "transactionHash": "0x01", "data": _encode(1000, 2000)})
+    cache.apply_log("test_net", {"address": PAIR, "topics": [UNISWAP_V2_SWAP_TOPIC], "blockNumber": 5,
+                                 "transactionHash": "0x01", "data": _encode(10, 0, 0, 19)})
+    pool = cache.get_pool("test_net", "sushiswap", "WETH", "USDC")
+    assert (pool.reserve0, pool.reserve1) == (1000, 2000)
+
+    cache.apply_swap("test_net", PAIR, 10, 0, 0, 19, block_number=6, tx_hash="0x02")
+    assert (pool.reserve0, pool.reserve1) == (1010, 1981)
+
+
+def test_staleness_by_age_and_block_lag(dex_config_path):
+    cache = PoolStateCache(dex_config_path, max_age_seconds=30, max_block_lag=2)
+    cache.apply_sync("test_net", PAIR, 1000, 2000, block_number=10)
+    pool = cache.get_pool("test_net", "sushiswap", "WETH", "USDC")
+    assert not cache.is_stale(pool)
+
+    cache.head_blocks["test_net"] = 20
+    assert cache.is_stale(pool)
+    assert cache.quote("test_net", "sushiswap", "WETH", "USDC", Decimal("0.000000000000000001")) is None
+    assert cache.get_stats()["stale_misses"] == 1
+
+    cache.head_blocks["test_net"] = 10
+    pool.updated_at = time.time() - 60
+    assert cache.is_stale(pool)
+    report = {entry["dex"]: entry for entry in cache.get_staleness_report()}
+    assert report["sushiswap"]["stale"] is True
+
+
+def test_unresolvable_pool_is_retried_with_backoff(dex_config_path):
+    config = json.loads(open(dex_config_path).read())
+    config["test_net"]["dexs"]["sushiswap"]["pairs"] = {}
+    with open(dex_config_path, "w") as f:
+        json.dump(config, f)
+    w3 = _make_web3(100)
+    factory_call = w3.eth.contract.return_value.functions.factory.return_value.call
+    factory_call.side_effect = ValueError("execution reverted")
+    cache = PoolStateCache(dex_config_path, web3_getter=lambda network: w3)
+
+    cache.refresh("test_net")
+    w3.eth.block_number = 101
+    cache.refresh("test_net")
+    pool = cache.get_pool("test_net", "sushiswap", "WETH", "USDC")
+    assert factory_call.call_count == 1 and pool.resolve_failures == 1
+    assert pool.next_resolve_at - time.time() > 59
+
+    pool.next_resolve_at = 0  # backoff elapsed
+    factory_call.side_effect = None
+    w3.eth.contract.return_value.functions.getPair.return_value.call.return_value = PAIR
+    w3.eth.block_number = 102
+    cache.refresh("test_net")
+    assert pool.pair_address == PAIR and pool.resolve_failures == 0 and pool.has_reserves
@@ -0,0 +1,85 @@
+import asyncio
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+import utils.arbitrage_service  # noqa: F401
+from utils.advanced_reasoning import orchestrator as model_orchestrator
+from utils.ai_market_analyzer import market_analyzer
+from utils.rehoboam_pipeline import PipelineBatch, PipelineStage, RehoboamPipeline
+
+
+def _opportunities():
+    return [
+        {"token_pair": "ETH/USDC", "net_profit_usd": 150.0, "risk_score": 0.1},
+        {"token_pair": "ETH/USDC", "net_profit_usd": 40.0, "risk_score": 0.4},
+        {"token_pair": "WBTC/ETH", "net_profit_usd": 5.0, "risk_score": 0.9},
+    ]
+
+
+def test_vectorized_helpers_match_scalar_versions():
+    pipeline = RehoboamPipeline()
+    opportunities = _opportunities()
+    batch = PipelineBatch(opportunities=opportunities, stage=PipelineStage.ANALYSIS)
+    sentiments = [{"overall_sentiment": "bullish"}, {"overall_sentiment": "neutral"}, {"overall_sentiment": "bullish"}]
+    risks = [{"overall_risk": 0.2}, {"overall_risk": 0.5}, {"overall_risk": 0.8}]
+    scores = np.array([0.9, 0.6, 0.2])
+
+    confidence = pipeline._calculate_confidence_batch(batch, sentiments)
+    recommendations = pipeline._get_recommendation_batch(scores, sentiments, risks)
+
+    for i, opp in enumerate(opportunities):
+        assert confidence[i] == pytest.approx(pipeline._calculate_confidence(opp, sentiments[i]))
+        assert recommendations[i] == pipeline._get_recommendation(scores[i], sentiments[i], risks[i])
+
+
+def test_process_batch_uses_one_llm_call_and_executes_approved(monkeypatch):
+    pipeline = RehoboamPipeline()
+    pipeline.middleware = []
+    ai = MagicMock()
+    ai.generate_text_async = AsyncMock(return_value="Scores: [1.0, 0.6, 0.1]")
+    pipeline._rehoboam_ai = ai
+    sentiment = AsyncMock(side_effect=lambda token: {"score": 0.6 if token == "ETH" else -0.1, "mood": "optimistic"})
+    monkeypatch.setattr(market_analyzer, "_analyze_token_sentiment", sentiment)
+    risks = AsyncMock(return_value=[{"overall_risk": 0.2}, {"overall_risk": 0.4}, {}])
+    monkeypatch.setattr(model_orchestrator, "process_batch", risks)
+    execute = AsyncMock(return_value={"success": True, "profit_realized": 150.0})
+    service = sys.modules["utils.arbitrage_service"].arbitrage_service
+    monkeypatch.setattr(service, "execute_arbitrage", execute)
+
+    results = asyncio.run(pipeline.process_batch(_opportunities()))
+
+    assert ai.generate_text_async.await_count == 1 and risks.await_count == 1
+    assert sorted(call.args[0] for call in sentiment.await_args_list) == ["ETH", "WBTC"]
+    assert [r["consciousness_score"] for r in results] == [1.0, 0.6, 0.1]
+    analysis = [r["ai_analysis"] for r in results]
+    assert [a["confidence_score"] for a in analysis] == pytest.approx([2.7 / 3, 2.2 / 3, 0.7 / 3])
+    assert [a["recommendation"] for a in analysis] == ["strong_buy", "hold", "avoid"]
+    assert analysis[2]["risk_assessment"]["overall_risk"] == 0.9  # no answer: the opportunity's own risk score
+    # decision = 0.3*c + 0.4*confidence + 0.3*min(profit/100, 1)
+    assert results[0]["decision"]["score"] == pytest.approx(0.3 + 0.4 * 0.9 + 0.3)
+    assert [r["decision"]["type"] for r in results] == ["execute", "optimize", "hold"]
+    execute.assert_awaited_once()
+    assert results[0]["pipeline_metadata"]["learning"]["accuracy"] == pytest.approx(1.0)
+    assert results[1]["execution_result"]["action"] == "optimize"
+    metrics = pipeline.get_metrics()
+    assert metrics["processed"] == 3 and metrics["batches"] == 1
+
+
+def test_unparseable_llm_response_falls_back_to_neutral(monkeypatch):
+    pipeline = RehoboamPipeline()
+    pipeline.middleware = []
+    ai = MagicMock()
+    ai.generate_text_async = AsyncMock(return_value="[AI response unavailable]")
+    pipeline._rehoboam_ai = ai
+    monkeypatch.setattr(market_analyzer, "_analyze_token_sentiment", AsyncMock(side_effect=RuntimeError("down")))
+    monkeypatch.setattr(model_orchestrator, "process_batch", AsyncMock(side_effect=lambda i, items, f: [{}] * len(items)))
+
+    results = asyncio.run(pipeline.process_batch(_opportunities()[1:]))
+
+    assert all(r["success"] and r["consciousness_score"] == 0.5 for r in results)
+    assert [r["ai_analysis"]["risk_assessment"]["overall_risk"] for r in results] == [0.4, 0.9]
+    assert all(r["ai_analysis"]["market_sentiment"]["overall_sentiment"] == "neutral" for r in results)
+    assert asyncio.run(pipeline.process_batch([])) == []
@@ -0,0 +1,151 @@
+import asyncio
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from utils.market_events import MarketEventBus, gas_topic, price_topic, reserve_topic
+from utils.shared_market_state import (
+    SharedMarketStatePublisher, SharedMarketStateReader, SharedMarketStateWriter,
+)
+
+PAIR = "0xB4e16d0168e52d35CaCD2c6185b44281Ec28C9Dc"
+
+
+def test_reader_sees_writes_and_new_keys(tmp_path):
+    path = str(tmp_path / "state")
+    writer = SharedMarketStateWriter(path, price_slots=4, gas_slots=2, reserve_slots=2)
+    reader = SharedMarketStateReader(path)
+    try:
+        assert reader.get_price("ETH") is None
+        writer.set_price("ETH", 3000.5)
+        with writer.batch():
+            writer.set_gas("arbitrum", base_fee=0.01, priority_fee=0.001, block=7)
+            # Reserves are uint112 on-chain and must survive the round trip exactly
+            writer.set_reserves("arbitrum", PAIR, 2 ** 111 + 5, 123)
+        assert reader.get_price("eth")[0] == 3000.5
+        assert reader.get_gas("arbitrum")["block"] == 7
+        reserves = reader.get_reserves("arbitrum", PAIR.lower())
+        assert (reserves["reserve0"], reserves["reserve1"]) == (2 ** 111 + 5, 123)
+        snapshot = reader.snapshot()
+        assert snapshot["prices"] == {"eth": 3000.5}
+        assert snapshot["reserves"][f"arbitrum:{PAIR.lower()}"] == (2 ** 111 + 5, 123)
+    finally:
+        reader.close()
+        writer.close(unlink=True)
+
+
+def test_full_table_drops_new_keys(tmp_path):
+    writer = SharedMarketStateWriter(str(tmp_path / "state"), price_slots=1, gas_slots=1, reserve_slots=1)
+    assert writer.set_price("eth", 1.0)
+    assert not writer.set_price("btc", 2.0)
+    assert writer.set_price("eth", 3.0)
+    assert writer.dropped == 1
+    writer.close(unlink=True)
+
+
+def test_long_keys_round_trip_and_overlong_keys_are_dropped(tmp_path):
+    path = str(tmp_path / "state")
+    writer = SharedMarketStateWriter(path, price_slots=4, gas_slots=1, reserve_slots=1)
+    reader = SharedMarketStateReader(path)
+    token = "0x" + "ab" * 20
+    try:
+        # 72-byte key: address + network + venue
+        assert writer.set_price(token, 1.5, network="optimistic-ethereum", venue="coingecko")
+        assert reader.get_price(token, "optimistic-ethereum", "coingecko")[0] == 1.5
+        assert list(reader.get_prices(token)) == ["optimistic-ethereum:coingecko"]
+        # Two keys sharing their first 96 bytes must not land in one slot
+        assert not writer.set_price(token, 2.0, network="optimistic-ethereum", venue="v" * 40 + "a")
+        assert not writer.set_price(token, 3.0, network="optimistic-ethereum", venue="v" * 40 + "b")
+        assert writer.dropped == 2
+        assert reader.snapshot()["prices"] == {f"{token}:optimistic-ethereum:coingecko": 1.5}
+    finally:
+        reader.close()
+        writer.close(unlink=True)
+
+
+def test_reader_rejects_non_segment_files(tmp_path):
+    path = tmp_path / "junk"
+    path.write_bytes(b"\0" * 4096)
+    with pytest.raises(ValueError):
+        SharedMarketStateReader(str(path))
+
+
+def test_publisher_mirrors_bus_events(tmp_path):
+    bus = MarketEventBus(debounce_seconds=0)
+    publisher = SharedMarketStatePublisher(event_bus=bus, path=str(tmp_path / "state"))
+
+    async def run():
+        await bus.start()
+        publisher.start()
+        bus.publish([reserve_topic("arbitrum", PAIR)], source="pool_cache", network="arbitrum",
+                    pair=PAIR, reserve0=10, reserve1=20, block=5)
+        bus.publish([gas_topic("arbitrum")], source="gas_oracle", network="arbitrum", block=5,
+                    base_fee=0.02, priority_fee=0.001)
+        bus.publish([price_topic("ETH")], source="coingecko", token="ETH", price=3100.0)
+        await bus.stop()
+
+    asyncio.run(run())
+    reader = SharedMarketStateReader(publisher.writer.path)
+    snapshot = reader.snapshot()
+    reader.close()
+    publisher.stop()
+    assert snapshot["reserves"] == {f"arbitrum:{PAIR.lower()}": (10, 20)}
+    assert snapshot["gas"]["arbitrum"]["base_fee"] == 0.02
+    assert snapshot["prices"] == {"eth::coingecko": 3100.0}
+    assert not (tmp_path / "state").exists()
+
+
+def test_publisher_keeps_one_price_per_venue(tmp_path):
+    bus = MarketEventBus(debounce_seconds=0)
+    publisher = SharedMarketStatePublisher(event_bus=bus, path=str(tmp_path / "state"))
+
+    async def run():
+        await bus.start()
+        publisher.start()
+        for venue, price in (("uniswap", 3100.0), ("sushiswap", 3112.5)):
+            bus.publish([price_topic("ETH")], source="dex_router", token="ETH", network="arbitrum",
+                        venue=venue, price=price)
+        await bus.stop()
+
+    asyncio.run(run())
+    reader = SharedMarketStateReader(publisher.writer.path)
+    try:
+        assert reader.get_price("ETH", "arbitrum", "sushiswap")[0] == 3112.5
+        prices = reader.get_prices("eth")
+        assert {venue: price for venue, (price, _) in prices.items()} == {
+            "arbitrum:uniswap": 3100.0, "arbitrum:sushiswap": 3112.5}
+    finally:
+        reader.close()
+        publisher.stop()
+
+
+def test_other_process_reads_consistent_batches_while_writing(tmp_path):
+    path = str(tmp_path / "state")
+    writer = SharedMarketStateWriter(path)
+    writer.set_reserves("arbitrum", PAIR, 0, 0)
+    # The reader process checks an invariant that only holds for whole batches
+    code = textwrap.dedent(f"""
+        import time
+        from utils.shared_market_state import SharedMarketStateReader
+        reader = SharedMarketStateReader({path!r})
+        reads = 0
+        end = time.time() + 1.0
+        while time.time() < end:
+            reserves = reader.get_reserves("arbitrum", {PAIR!r})
+            assert reserves["reserve1"] == 2 * reserves["reserve0"], reserves
+            reads += 1
+        print("reads", reads)
+    """)
+    reader = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    value = 0
+    while reader.poll() is None:
+        value += 1
+        with writer.batch():
+            writer.set_reserves("arbitrum", PAIR, value, value)
+            writer.set_reserves("arbitrum", PAIR, value, 2 * value)
+    out, err = reader.communicate()
+    writer.close(unlink=True)
+    assert reader.returncode == 0, err.decode()
+    assert int(out.split()[-1]) > 100
@@ -0,0 +1,77 @@
+import asyncio
+
+from utils.stage_scheduler import StageScheduler
+
+
+def test_higher_priority_runs_first():
+    order = []
+
+    async def handler(item):
+        order.append(item)
+
+    async def run():
+        scheduler = StageScheduler(handler, {"eval": 1})
+        for item, priority in [("low", 1), ("mid", 5), ("high", 10), ("mid2", 5)]:
+            await scheduler.submit("eval", item, priority)
+        await scheduler.start()
+        await scheduler.join()
+        await scheduler.stop()
+
+    asyncio.run(run())
+    assert order == ["high", "mid", "mid2", "low"]
+
+
+def test_slow_stage_does_not_block_other_stages():
+    finished = []
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def handler(item):
+            stage, name = item
+            if stage == "eval":
+                await gate.wait()
+            finished.append(name)
+
+        scheduler = StageScheduler(handler, {"eval": 1, "feedback": 1})
+        await scheduler.start()
+        await scheduler.submit("eval", ("eval", "slow"))
+        await scheduler.submit("feedback", ("feedback", "fast"))
+        await asyncio.sleep(0.02)
+        snapshot = list(finished)
+        gate.set()
+        await scheduler.join()
+        await scheduler.stop()
+        return snapshot
+
+    assert asyncio.run(run()) == ["fast"]
+    assert finished == ["fast", "slow"]
+
+
+def test_worker_pool_bounds_concurrency_and_reports_metrics():
+    active = {"now": 0, "peak": 0}
+
+    async def handler(item):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        if item == "bad":
+            raise ValueError("boom")
+
+    async def run():
+        scheduler = StageScheduler(handler, {"execution": 3})
+        for i in range(9):
+            await scheduler.submit("execution", i)
+        await scheduler.submit("execution", "bad")
+        await scheduler.start()
+        await scheduler.join()
+        await scheduler.stop()
+        return scheduler.get_metrics()["execution"]
+
+    metrics = asyncio.run(run())
+    assert active["peak"] == 3
+    assert metrics["workers"] == 3
+    assert metrics["processed"] == 9 and metrics["failed"] == 1
+    assert metrics["max_queue_depth"] == 10 and metrics["queue_depth"] == 0
+    assert metrics["latency_p50_ms"] >= 10
@@ -0,0 +1,120 @@
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+import utils.arbitrage_service  # noqa: F401
+from utils import advanced_reasoning
+from utils.advanced_reasoning import ModelResponse, MultimodalOrchestrator
+from utils.conscious_arbitrage_engine import ConsciousArbitrageEngine
+from utils.llm_cache import LLMResponseCache
+from utils.llm_client import AsyncLLMClient, ProviderConfig
+from utils.structured_prompts import (OutputField, StructuredPrompt, TokenBudget, TokenBudgetExceeded,
+                                      estimate_tokens)
+
+FIELDS = {"confidence": OutputField("number", 0.5), "action": OutputField("enum", "hold", choices=("buy", "hold"))}
+
+
+def test_prompt_is_compacted_to_fit_and_answers_are_validated():
+    context = {"token": "ETH", "price": 3012.123456789, "empty": None, "notes": "x" * 500,
+               "history": list(range(50)), "extra": {"payload": "y" * 300}}
+    prompt = StructuredPrompt("Score it.", FIELDS, context)
+
+    loose = prompt.render()
+    assert '"price":3012' in loose and "empty" not in loose and '"confidence":number 0-1' in loose
+    tight = prompt.render(max_tokens=45)
+    assert estimate_tokens(tight) <= 45 and '"token":"ETH"' in tight and "extra" not in tight
+    with pytest.raises(TokenBudgetExceeded):
+        prompt.render(max_tokens=5)
+
+    assert prompt.parse('Sure: {"confidence": 1.7, "action": "BUY"}') == ({"confidence": 1.0, "action": "buy"}, [])
+    values, errors = prompt.parse('{"confidence": "high", "action": "short"}')
+    assert values == {"confidence": 0.5, "action": "hold"} and len(errors) == 2
+    assert prompt.parse("no json here") == ({"confidence": 0.5, "action": "hold"}, ["no JSON object in response"])
+
+
+def _engine(answers):
+    engine = ConsciousArbitrageEngine()
+    requests = []
+
+    async def process_request(request):
+        requests.append(request)
+        content = answers.pop(0)
+        return ModelResponse(request.id, content, "openai", "gpt", 0.1, content is not None, None if content else "down")
+
+    engine.model_orchestrator = MagicMock(process_request=process_request)
+    return engine, requests
+
+
+def test_engine_requests_schema_json_within_the_decision_budget():
+    engine, requests = _engine([
+        json.dumps({"confidence": 0.82, "risk_score": 0.2, "profit_potential": 0.7,
+                    "execution_timing": "immediate", "recommendations": ["split the order"]}),
+        json.dumps({"recommendation": "execute", "confidence": 0.9, "key_points": ["aligned"],
+                    "risk_mitigation": []}),
+    ])
+    opportunity = {"id": "o1", "token": "ETH", "net_profit_usd": 42.5, "raw_quotes": ["q" * 400] * 20}
+    budget = TokenBudget(1200)
+
+    async def run():
+        ai = await engine._ai_analysis(opportunity, budget=budget)
+        synthesis = await engine._reasoning_synthesis(opportunity, {"overall": 0.8}, ai, budget=budget)
+        return ai, synthesis
+
+    ai, synthesis = asyncio.run(run())
+
+    assert ai["confidence"] == 0.82 and ai["recommendations"] == ["split the order"] and ai["source"] == "model"
+    assert synthesis["recommendation"] == "execute" and synthesis["confidence"] == 0.9
+    assert all(r.max_tokens == 160 for r in requests) and '"id":"o1"' in requests[0].prompt
+    assert budget.calls == 2 and budget.used <= 1200
+    assert engine.performance_metrics["llm_prompt_tokens"] == budget.prompt_tokens
+    assert engine.performance_metrics["llm_invalid_responses"] == 0
+
+
+def test_engine_skips_calls_the_budget_cannot_cover():
+    engine, requests = _engine([None])
+    engine.decision_token_budget = 300
+    budget = TokenBudget(300)
+
+    async def run():
+        ai = await engine._ai_analysis({"id": "o2"}, budget=budget)  # provider fails: defaults, tokens charged
+        budget.prompt_tokens = 250  # earlier stages used most of the budget
+        return ai, await engine._reasoning_synthesis({"id": "o2"}, {"overall": 0.9}, ai, budget=budget)
+
+    ai, synthesis = asyncio.run(run())
+
+    assert ai["confidence"] == 0.5 and ai["source"] == "defaults" and len(requests) == 1
+    assert synthesis["recommendation"] == "monitor" and synthesis["source"] == "defaults"
+    assert budget.skipped == 1 and engine.performance_metrics["llm_budget_skips"] == 1
+    assert engine.performance_metrics["llm_invalid_responses"] == 1
+
+
+def test_budget_is_charged_with_the_usage_the_provider_reports(monkeypatch):
+    answer = json.dumps({"confidence": 0.7, "risk_score": 0.3, "profit_potential": 0.6,
+                         "execution_timing": "immediate", "recommendations": []})
+
+    def handler(request):
+        return httpx.Response(200, json={"choices": [{"message": {"content": answer}}],
+                                         "usage": {"prompt_tokens": 321, "completion_tokens": 12}})
+
+    client = AsyncLLMClient(providers={"openai": ProviderConfig("https://openai.test/v1", "K", 6000)},
+                            transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(advanced_reasoning, "llm_client", client)
+    orchestrator = MultimodalOrchestrator()
+    orchestrator.response_cache = LLMResponseCache()
+    orchestrator.api_keys = {"deepseek": None, "gemini": None, "openai": "o"}
+    monkeypatch.setattr(orchestrator.performance_tracker, "get_best_provider", lambda request: "openai")
+    monkeypatch.setattr(orchestrator.performance_tracker, "get_fallback_provider", lambda provider: "openai")
+    engine = ConsciousArbitrageEngine()
+    engine.model_orchestrator = orchestrator
+    budget = TokenBudget(2000)
+
+    ai = asyncio.run(engine._ai_analysis({"id": "o3", "token": "ETH"}, budget=budget))
+
+    assert ai["source"] == "model" and ai["confidence"] == 0.7
+    assert (budget.prompt_tokens, budget.completion_tokens) == (321, 12)
+    assert engine.performance_metrics["llm_prompt_tokens"] == 321
+    # Without reported usage the same call falls back to the character estimate
+    assert budget.charge("x" * 40, "y" * 8) == (estimate_tokens("x" * 40), estimate_tokens("y" * 8))
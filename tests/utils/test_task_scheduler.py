@@ -0,0 +1,120 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+from utils.arbitrage_service import ArbitrageBotStatus
+from utils.bot_orchestrator import BotMode, BotOrchestrator
+from utils.task_scheduler import BotReadySet, TaskHeap, TimerWheel
+
+
+def test_task_heap_orders_by_priority_then_deadline():
+    heap = TaskHeap()
+    heap.push("low", 1, deadline=10)
+    heap.push("urgent_late", 9, deadline=50)
+    heap.push("urgent_soon", 9, deadline=20)
+    heap.push("mid", 5)
+    heap.push("dropped", 10)
+    assert heap.remove("dropped")
+
+    assert len(heap) == 4 and "dropped" not in heap
+    assert [heap.pop() for _ in range(4)] == ["urgent_soon", "urgent_late", "mid", "low"]
+    assert heap.pop() is None
+
+
+def test_ready_set_tracks_best_bot_through_updates():
+    ready = BotReadySet()
+    ready.update("a", 0.4)
+    ready.update("b", 0.9)
+    ready.update("c", 0.7)
+    assert ready.best() == "b"
+
+    ready.update("b", 0.9, available=False)
+    assert ready.best() == "c"
+    ready.update("a", 0.95)
+    assert ready.best() == "a"
+    ready.discard("a")
+    ready.discard("c")
+    assert ready.best() is None and len(ready) == 0
+
+
+def test_ready_set_heap_stays_bounded_over_repeated_syncs():
+    ready = BotReadySet()
+    for sync in range(1000):
+        for bot in range(10):
+            ready.update(f"bot{bot}", 0.5)  # unchanged every pass
+        ready.update("flappy", sync % 7 / 10, available=sync % 3 != 0)
+
+    assert len(ready._heap) <= 2 * len(ready) + 17
+    assert "flappy" not in ready and ready.best() in {f"bot{bot}" for bot in range(10)}
+
+
+def test_timer_wheel_expires_across_revolutions_and_cancels():
+    wheel = TimerWheel(tick_seconds=1.0, slots=8, now=0.0)
+    wheel.schedule("soon", 2.5)
+    wheel.schedule("far", 20.0)  # more than one revolution ahead
+    wheel.schedule("cancelled", 3.0)
+    wheel.schedule("past", -5.0)
+    assert wheel.cancel("cancelled")
+
+    assert wheel.advance(0.5) == ["past"]
+    assert wheel.advance(2.4) == []
+    assert wheel.advance(3.0) == ["soon"]
+    assert wheel.advance(19.0) == []
+    assert wheel.advance(40.0) == ["far"]
+    assert len(wheel) == 0
+
+
+def test_orchestrator_dispatches_to_best_running_bot(monkeypatch):
+    service = sys.modules["utils.arbitrage_service"].arbitrage_service
+    monkeypatch.setattr(service, "bots", {
+        "executor_a": SimpleNamespace(status=ArbitrageBotStatus.RUNNING),
+        "executor_b": SimpleNamespace(status=ArbitrageBotStatus.RUNNING),
+        "monitor_c": SimpleNamespace(status=ArbitrageBotStatus.STOPPED),
+    })
+
+    async def run():
+        orchestrator = BotOrchestrator()
+        orchestrator.active_bots = set(service.bots)
+        for bot_id in service.bots:
+            orchestrator.bot_modes[bot_id] = BotMode.AUTONOMOUS
+            orchestrator.bot_performance[bot_id] = {"tasks_completed": 0, "success_rate": 0.5,
+                                                    "avg_execution_time": 0.0, "mode_changes": 0}
+        orchestrator.bot_performance["executor_b"]["success_rate"] = 0.8
+        orchestrator._sync_bot_states()
+
+        executed = []
+
+        async def execute(task):
+            executed.append((task.task_id, task.bot_id))
+
+        orchestrator._execute_task = execute
+        low = await orchestrator.submit_opportunity({"token_pair": "ETH/USDC"}, priority=2)
+        high = await orchestrator.submit_opportunity({"token_pair": "WBTC/USDC"}, priority=9)
+        await orchestrator._process_task_queue()
+        await asyncio.sleep(0)
+
+        # Stopping a bot through the service callback removes it from the ready-set
+        orchestrator._on_bot_event("bot_stopped", {"bot_id": "executor_b"})
+        return orchestrator, executed, low, high
+
+    orchestrator, executed, low, high = asyncio.run(run())
+    assert executed == [(high, "executor_b"), (low, "executor_b")]
+    assert len(orchestrator.task_queue) == 0
+    assert orchestrator.ready_bots.best() == "executor_a"
+
+
+def test_queued_task_expires_via_timer_wheel(monkeypatch):
+    async def run():
+        orchestrator = BotOrchestrator()
+        task_id = await orchestrator.submit_opportunity({"token_pair": "ETH/USDC"})
+        # Nothing is running, so the task stays queued until its deadline passes
+        await orchestrator._process_task_queue()
+        assert task_id in orchestrator.task_queue
+        future = orchestrator.pending_tasks[task_id].deadline.timestamp() + 1
+        monkeypatch.setattr(sys.modules["utils.bot_orchestrator"].time, "time", lambda: future)
+        await orchestrator._check_active_tasks()
+        return orchestrator, task_id
+
+    orchestrator, task_id = asyncio.run(run())
+    assert task_id not in orchestrator.task_queue and not orchestrator.pending_tasks
+    assert orchestrator.completed_tasks[-1].status == "expired"
@@ -12,6 +12,7 @@ from utils.price_feed_service import PriceFeedService
 from utils.portfolio_optimizer import PortfolioOptimizer
 from utils.safety_checks import SafetyChecks
 from utils.smart_order_router import smart_router
+from utils.llm_cache import llm_response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +25,7 @@ class AdvancedTradingController:
         # Initialize core components
         self.orchestrator = AITradingOrchestrator()
         self.price_feed = PriceFeedService()
-        self.llm_decision_cache = {}
+        self.llm_decision_cache = llm_response_cache  # shared; decisions are keyed exactly
         self.llm_prompt_template = {
             'system': "You are a trading strategy enhancer. Analyze the proposed trade and suggest improvements.",
             'user': """Given market conditions: {market_conditions}
@@ -58,9 +59,10 @@ class AdvancedTradingController:
         """Enhance trading decision with LLM analysis."""
         try:
             # Check cache first
-            decision_hash = hash(json.dumps(decision, sort_keys=True))
-            if decision_hash in self.llm_decision_cache:
-                return self.llm_decision_cache[decision_hash]
+            decision_key = json.dumps(decision, sort_keys=True, default=str)
+            cached = self.llm_decision_cache.get("trading_decision", decision_key, exact=True)
+            if cached is not None:
+                return cached
                 
             # Prepare LLM prompt
             prompt = {
@@ -71,7 +73,7 @@ class AdvancedTradingController:
             
             # Get LLM enhancement
             enhanced_decision = await self.orchestrator.llm_enhance_decision(prompt)
-            self.llm_decision_cache[decision_hash] = enhanced_decision
+            self.llm_decision_cache.set("trading_decision", decision_key, enhanced_decision, exact=True)
             return enhanced_decision
             
         except Exception as e:
@@ -332,9 +334,11 @@ class AdvancedTradingController:
             
         try:
             # Check cache first
-            decision_hash = hash(json.dumps(decision.__dict__ if hasattr(decision, '__dict__') else str(decision), sort_keys=True))
-            if decision_hash in self.llm_decision_cache:
-                return self.llm_decision_cache[decision_hash]
+            decision_key = json.dumps(decision.__dict__ if hasattr(decision, '__dict__') else str(decision),
+                                      sort_keys=True, default=str)
+            cached = self.llm_decision_cache.get("trading_decision", decision_key, exact=True)
+            if cached is not None:
+                return cached
                 
             # Prepare enhanced context
             context = {
@@ -350,7 +354,7 @@ class AdvancedTradingController:
             # Get enhanced decision
             enhanced_decision = await self.orchestrator.llm_enhance_decision(context)
             if enhanced_decision:
-                self.llm_decision_cache[decision_hash] = enhanced_decision
+                self.llm_decision_cache.set("trading_decision", decision_key, enhanced_decision, exact=True)
                 return enhanced_decision
             return decision
             
@@ -358,6 +362,10 @@ class AdvancedTradingController:
             logger.error(f"LLM enhancement failed: {str(e)}")
             return decision
 
+    def llm_cache_hit_rate(self) -> float:
+        """Hit rate of the shared LLM response cache for trading decisions."""
+        return self.llm_decision_cache.hit_rate("trading_decision")
+        
     def _save_performance_metrics(self):
         """Save performance metrics to file."""
         metrics = {
@@ -24,6 +24,8 @@ from decimal import Decimal
 from typing import Dict, List, Optional, Any
 import aiohttp
 
+from utils.arbitrage_scanner import arbitrage_scanner, QuoteRequest
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -180,56 +182,51 @@ class MultiChainArbitrageHunter:
                 logger.error(f"❌ {config['name']} connection error: {e}")
                 
     async def get_token_price_jupiter(self, token_mint: str) -> Optional[float]:
-        """Get Solana token price from Jupiter API"""
+        """Get Solana token price from Jupiter API (batched and cached by the shared scanner)"""
         try:
-            url = f"https://price.jup.ag/v4/price?ids={token_mint}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if 'data' in data and token_mint in data['data']:
-                            price = data['data'][token_mint]['price']
-                            logger.debug(f"Jupiter price for {token_mint}: ${price}")
-                            return float(price)
+            price = await arbitrage_scanner.get_quote(QuoteRequest('jupiter', token_mint))
+            if price:
+                logger.debug(f"Jupiter price for {token_mint}: ${price}")
+                return price
         except Exception as e:
             logger.debug(f"Jupiter API error: {e}")
         return None
         
     async def get_token_price_coingecko(self, token_address: str, platform: str = 'ethereum') -> Optional[float]:
-        """Get token price from CoinGecko API"""
+        """Get token price from CoinGecko API (batched and cached by the shared scanner)"""
         try:
-            if platform == 'solana':
-                url = f"https://api.coingecko.com/api/v3/simple/token_price/solana"
-            else:
-                url = f"https://api.coingecko.com/api/v3/simple/token_price/{platform}"
-                
-            params = {
-                'contract_addresses': token_address,
-                'vs_currencies': 'usd'
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if token_address.lower() in data:
-                            price = data[token_address.lower()]['usd']
-                            logger.debug(f"CoinGecko price for {token_address}: ${price}")
-                            return price
+            price = await arbitrage_scanner.get_quote(QuoteRequest('coingecko', token_address, network=platform))
+            if price:
+                logger.debug(f"CoinGecko price for {token_address}: ${price}")
+                return price
         except Exception as e:
             logger.debug(f"CoinGecko API error: {e}")
         return None
         
-    async def scan_network_arbitrage(self, network_name: str) -> List[Dict]:
-        """Scan a specific network for arbitrage opportunities"""
+    def network_quote_requests(self, network_name: str) -> Dict[str, QuoteRequest]:
+        """Scanner requests for every token price a network scan reads, keyed by '<source>:<address>'"""
+        requests = {}
+        for token_name, token_address in self.tokens.get(network_name, {}).items():
+            if network_name == 'solana':
+                requests[f"jupiter:{token_address}"] = QuoteRequest('jupiter', token_address, symbol=token_name)
+            requests[f"coingecko:{token_address}"] = QuoteRequest('coingecko', token_address, network=network_name,
+                                                                  symbol=token_name)
+        return requests
+        
+    async def scan_network_arbitrage(self, network_name: str,
+                                     quotes: Optional[Dict[QuoteRequest, Optional[float]]] = None) -> List[Dict]:
+        """Scan a specific network for arbitrage opportunities (``quotes``: prices prefetched for the scan)"""
         opportunities = []
         network_config = self.networks[network_name]
         
         try:
             logger.debug(f"🔍 Scanning {network_config['name']} for opportunities...")
             
-            # Get tokens for this network
+            # Get tokens for this network, and all their prices in one scanner round
             network_tokens = self.tokens.get(network_name, {})
+            requests = self.network_quote_requests(network_name)
+            if quotes is None:
+                quotes = await arbitrage_scanner.get_quotes(requests.values())
             
             for token_name, token_address in network_tokens.items():
                 try:
@@ -238,11 +235,11 @@ class MultiChainArbitrageHunter:
                     
                     if network_name == 'solana':
                         # Use Solana-specific APIs
-                        jupiter_price = await self.get_token_price_jupiter(token_address)
+                        jupiter_price = quotes.get(requests[f"jupiter:{token_address}"])
                         if jupiter_price:
                             prices['jupiter'] = jupiter_price
                             
-                        coingecko_price = await self.get_token_price_coingecko(token_address, 'solana')
+                        coingecko_price = quotes.get(requests[f"coingecko:{token_address}"])
                         if coingecko_price:
                             prices['coingecko'] = coingecko_price
                             
@@ -253,7 +250,7 @@ class MultiChainArbitrageHunter:
                             
                     else:
                         # Use EVM chain APIs
-                        coingecko_price = await self.get_token_price_coingecko(token_address, network_name)
+                        coingecko_price = quotes.get(requests[f"coingecko:{token_address}"])
                         if coingecko_price:
                             prices['coingecko'] = coingecko_price
                             
@@ -356,9 +353,14 @@ class MultiChainArbitrageHunter:
                 
                 all_opportunities = []
                 
+                # One scanner round for every network's prices; the per-network scans share it
+                quotes = await arbitrage_scanner.get_quotes(
+                    request for network_name in self.networks
+                    for request in self.network_quote_requests(network_name).values())
+                
                 # Scan each network for intra-network arbitrage
                 for network_name in self.networks.keys():
-                    network_opportunities = await self.scan_network_arbitrage(network_name)
+                    network_opportunities = await self.scan_network_arbitrage(network_name, quotes)
                     all_opportunities.extend(network_opportunities)
                 
                 if all_opportunities:
@@ -15,6 +15,29 @@ UNISWAP_V2_ROUTER_ABI = [
         ],
         "stateMutability": "view",
         "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "factory",
+        "outputs": [{"internalType": "address", "name": "", "type": "address"}],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+# Minimal ABI for Uniswap V2 Factory (for getPair)
+UNISWAP_V2_FACTORY_ABI = [
+    {
+        "constant": True,
+        "inputs": [
+            {"internalType": "address", "name": "", "type": "address"},
+            {"internalType": "address", "name": "", "type": "address"}
+        ],
+        "name": "getPair",
+        "outputs": [{"internalType": "address", "name": "", "type": "address"}],
+        "payable": False,
+        "stateMutability": "view",
+        "type": "function"
     }
 ]
 
@@ -83,3 +106,9 @@ UNISWAP_V2_PAIR_ABI = [
         "type": "function"
     }
 ]
+
+# Topics of the Uniswap V2 Pair events used to track reserves incrementally
+# keccak256("Sync(uint112,uint112)")
+UNISWAP_V2_SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+# keccak256("Swap(address,uint256,uint256,uint256,uint256,address)")
+UNISWAP_V2_SWAP_TOPIC = "0xd78ad95fa46c994b6551d0da85fc275fe613ce37657fb8d5e3d130840159d822"
@@ -7,25 +7,34 @@ import json
 import time
 import logging
 import asyncio
-import requests
 import random
-from typing import Dict, Any, List, Optional, Union, Tuple
+from typing import Dict, Any, AsyncIterator, List, Optional, Union, Tuple
 from datetime import datetime
+from collections import deque
 import numpy as np
 
+from utils.llm_cache import llm_response_cache
+from utils.llm_client import llm_client
+from utils.llm_telemetry import PROVIDER_COST_PER_1K_TOKENS, llm_telemetry
+
 logger = logging.getLogger(__name__)
 
+# Task types with their own telemetry label; API callers may send anything
+TELEMETRY_TASK_TYPES = frozenset({"analysis", "explanation", "creation", "optimization", "recommendation", "general"})
+
 class ModelRequest:
     """Representation of a request to an AI model."""
     
     def __init__(self, prompt: str, provider: str = None, model: str = None, 
-                task_type: str = None, complexity: int = None, timeout: int = 30):
+                task_type: str = None, complexity: int = None, timeout: int = 30,
+                max_tokens: Optional[int] = None):
         self.prompt = prompt
         self.provider = provider  # 'deepseek', 'gemini', 'openai'
         self.model = model  # specific model name
         self.task_type = task_type or self._infer_task_type(prompt)
         self.complexity = complexity or self._infer_complexity(prompt)
         self.timeout = timeout
+        self.max_tokens = max_tokens  # completion limit; provider default when None
         self.timestamp = time.time()
         self.id = f"{int(self.timestamp)}_{random.randint(1000, 9999)}"
     
@@ -91,6 +100,7 @@ class ModelRequest:
             "task_type": self.task_type,
             "complexity": self.complexity,
             "timeout": self.timeout,
+            "max_tokens": self.max_tokens,
             "timestamp": self.timestamp
         }
 
@@ -99,7 +109,8 @@ class ModelResponse:
     """Representation of a response from an AI model."""
     
     def __init__(self, request_id: str, content: str, provider: str, model: str,
-                latency: float, success: bool, error: str = None):
+                latency: float, success: bool, error: str = None,
+                prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None):
         self.request_id = request_id
         self.content = content
         self.provider = provider
@@ -107,8 +118,19 @@ class ModelResponse:
         self.latency = latency
         self.success = success
         self.error = error
+        # Token usage reported by the provider; None when it reported none
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
         self.timestamp = time.time()
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ModelResponse':
+        """Rebuild a response from ``to_dict`` output."""
+        response = cls(data["request_id"], data["content"], data["provider"], data["model"],
+                       data["latency"], data["success"], data.get("error"))
+        response.timestamp = data.get("timestamp", response.timestamp)
+        return response
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
         return {
@@ -192,6 +214,22 @@ class ModelPerformanceTracker:
                 }
             }
         }
+        
+        # Recent per-provider latencies for percentile-based hedging
+        self.latency_samples = {provider: deque(maxlen=200) for provider in self.performance_data}
+        self.min_latency_samples = 20
+    
+    def record_latency(self, provider: str, latency: float):
+        """Record an observed latency (or, for a cancelled request, a lower bound on it)."""
+        if provider in self.latency_samples:
+            self.latency_samples[provider].append(latency)
+    
+    def latency_percentile(self, provider: str, quantile: float = 0.9) -> float:
+        """Latency percentile of a provider, estimated from its average until enough samples exist."""
+        samples = self.latency_samples.get(provider)
+        if not samples or len(samples) < self.min_latency_samples:
+            return self.performance_data.get(provider, {}).get("avg_latency", 2.0) * 1.5
+        return float(np.percentile(samples, quantile * 100))
     
     def update_performance(self, response: ModelResponse):
         """Update performance metrics based on a response."""
@@ -219,6 +257,9 @@ class ModelPerformanceTracker:
         current_avg = self.performance_data[provider]["avg_latency"]
         alpha = 0.1  # Smoothing factor
         self.performance_data[provider]["avg_latency"] = alpha * response.latency + (1 - alpha) * current_avg
+        
+        if response.success:
+            self.record_latency(provider, response.latency)
     
     def get_best_provider(self, request: ModelRequest) -> str:
         """Get the best provider for a given request based on performance history."""
@@ -298,7 +339,7 @@ class MultimodalOrchestrator:
         # Model configurations
         self.model_configs = {
             "deepseek": {
-                "api_base_url": "https://api.deepseek.com/v1",
+                "cost_per_1k_tokens": PROVIDER_COST_PER_1K_TOKENS["deepseek"],  # used for hedge budgeting
                 "models": {
                     "default": "deepseek-coder-v1.5-instruct",
                     "vision": "deepseek-vl",
@@ -306,7 +347,7 @@ class MultimodalOrchestrator:
                 }
             },
             "gemini": {
-                "api_base_url": "https://generativelanguage.googleapis.com/v1",
+                "cost_per_1k_tokens": PROVIDER_COST_PER_1K_TOKENS["gemini"],  # used for hedge budgeting
                 "models": {
                     "default": "gemini-1.5-pro",
                     "vision": "gemini-1.5-pro-vision",
@@ -315,7 +356,7 @@ class MultimodalOrchestrator:
                 }
             },
             "openai": {
-                "api_base_url": "https://api.openai.com/v1",
+                "cost_per_1k_tokens": PROVIDER_COST_PER_1K_TOKENS["openai"],  # used for hedge budgeting
                 "models": {
                     "default": "gpt-4o",
                     "vision": "gpt-4o",
@@ -334,36 +375,40 @@ class MultimodalOrchestrator:
         self.max_history_size = 100
         
         # Cache for responses
-        self.response_cache = {}
+        self.response_cache = llm_response_cache  # shared, keyed on normalized prompts
         self.cache_duration = 3600  # 1 hour
         
-        # Rate limiting
-        self.rate_limits = {
-            "deepseek": {"requests_per_minute": 50, "last_request": 0},
-            "gemini": {"requests_per_minute": 60, "last_request": 0},
-            "openai": {"requests_per_minute": 60, "last_request": 0}
+        # Hedging: when the primary runs past its latency percentile, race the next-best provider
+        self.hedging_enabled = os.environ.get("LLM_HEDGING_ENABLED", "true").lower() == "true"
+        self.hedge_quantile = float(os.environ.get("LLM_HEDGE_QUANTILE", "0.9"))
+        self.max_hedge_rate = float(os.environ.get("LLM_MAX_HEDGE_RATE", "0.2"))
+        self.hedge_budget_usd_per_hour = float(os.environ.get("LLM_HEDGE_BUDGET_USD_PER_HOUR", "1.0"))
+        self._recent_hedges = deque(maxlen=100)  # one flag per request, True if it was hedged
+        self._hedge_spend = deque()  # (timestamp, estimated USD) of hedges in the last hour
+        self.hedge_stats = {
+            "requests": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "primary_wins": 0,
+            "fallbacks": 0,
+            "losers_cancelled": 0,
+            "skipped_rate_cap": 0,
+            "skipped_budget": 0,
+            "hedge_cost_usd": 0.0
         }
         
-        logger.info("MultimodalOrchestrator initialized")
-    
-    def _get_provider_headers(self, provider: str) -> Dict[str, str]:
-        """Get API request headers for a provider."""
-        api_key = self.api_keys.get(provider)
-        
-        if not api_key:
-            raise ValueError(f"No API key for {provider}")
+        # Batched prompting
+        self.max_batch_size = int(os.environ.get("LLM_MAX_BATCH_SIZE", "20"))
+        self.batch_fallback_concurrency = int(os.environ.get("LLM_BATCH_FALLBACK_CONCURRENCY", "4"))
+        self.batch_stats = {
+            "batches": 0,
+            "batched_items": 0,
+            "batch_failures": 0,
+            "fallback_items": 0,
+            "failed_items": 0
+        }
         
-        if provider == "deepseek" or provider == "openai":
-            return {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}"
-            }
-        elif provider == "gemini":
-            return {
-                "Content-Type": "application/json"
-            }
-        else:
-            return {"Content-Type": "application/json"}
+        logger.info("MultimodalOrchestrator initialized")
     
     def _get_model_for_task(self, provider: str, task_type: str, complexity: int) -> str:
         """Get the appropriate model for a task type and complexity."""
@@ -384,53 +429,17 @@ class MultimodalOrchestrator:
         else:
             return models.get("default")
     
-    def _apply_rate_limiting(self, provider: str):
-        """Apply rate limiting for a provider."""
-        rate_limit = self.rate_limits.get(provider, {"requests_per_minute": 50, "last_request": 0})
-        requests_per_minute = rate_limit["requests_per_minute"]
-        min_interval = 60 / requests_per_minute  # Minimum seconds between requests
-        
-        elapsed = time.time() - rate_limit["last_request"]
-        if elapsed < min_interval:
-            time.sleep(min_interval - elapsed)
-        
-        self.rate_limits[provider]["last_request"] = time.time()
-    
-    def _check_cache(self, prompt: str) -> Optional[ModelResponse]:
+    def _check_cache(self, prompt: str, caller: str = "orchestrator") -> Optional[ModelResponse]:
         """Check if a response is in the cache."""
-        cache_key = self._get_cache_key(prompt)
-        
-        if cache_key in self.response_cache:
-            cached_item = self.response_cache[cache_key]
-            if time.time() - cached_item["timestamp"] < self.cache_duration:
-                return cached_item["response"]
-        
-        return None
+        cached = self.response_cache.get("orchestrator", prompt)
+        if not cached:
+            return None
+        llm_telemetry.record_cache_hit(caller)
+        return ModelResponse.from_dict(cached)
     
     def _update_cache(self, prompt: str, response: ModelResponse):
         """Update the response cache."""
-        cache_key = self._get_cache_key(prompt)
-        
-        self.response_cache[cache_key] = {
-            "response": response,
-            "timestamp": time.time()
-        }
-        
-        # Prune cache if too large
-        if len(self.response_cache) > 1000:
-            # Remove oldest entries
-            oldest_keys = sorted(
-                self.response_cache.keys(),
-                key=lambda k: self.response_cache[k]["timestamp"]
-            )[:100]
-            
-            for key in oldest_keys:
-                del self.response_cache[key]
-    
-    def _get_cache_key(self, prompt: str) -> str:
-        """Generate a cache key for a prompt."""
-        import hashlib
-        return hashlib.md5(prompt.encode()).hexdigest()
+        self.response_cache.set("orchestrator", prompt, response.to_dict(), ttl=self.cache_duration)
     
     def _update_history(self, request: ModelRequest, response: ModelResponse):
         """Update request and response history."""
@@ -444,152 +453,151 @@ class MultimodalOrchestrator:
         if len(self.response_history) > self.max_history_size:
             self.response_history = self.response_history[-self.max_history_size:]
     
-    def _call_deepseek_api(self, prompt: str, model: str) -> Tuple[str, float, bool, str]:
-        """Call the DeepSeek API."""
-        start_time = time.time()
-        content = ""
-        success = False
-        error = None
-        
-        try:
-            if not self.api_keys.get("deepseek"):
-                raise ValueError("DeepSeek API key not available")
-            
-            self._apply_rate_limiting("deepseek")
-            
-            headers = self._get_provider_headers("deepseek")
-            api_base_url = self.model_configs["deepseek"]["api_base_url"]
-            
-            data = {
-                "model": model,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.2,
-                "max_tokens": 2000
-            }
-            
-            response = requests.post(
-                f"{api_base_url}/chat/completions",
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-            
-            if not response.ok:
-                error = f"DeepSeek API error: {response.status_code} - {response.text}"
-                logger.error(error)
-                return content, time.time() - start_time, False, error
-            
-            response_data = response.json()
-            content = response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
-            success = True
-            
-        except Exception as e:
-            error = f"Error calling DeepSeek API: {str(e)}"
-            logger.error(error)
-            
-        return content, time.time() - start_time, success, error
+    @staticmethod
+    def _provider_options(provider: str, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Generation settings passed to the client for a provider."""
+        if provider == "gemini":
+            return {"max_tokens": max_tokens or 2048, "temperature": 0.2, "topP": 0.95, "topK": 40}
+        return {"max_tokens": max_tokens or 2000, "temperature": 0.2}
     
-    def _call_gemini_api(self, prompt: str, model: str) -> Tuple[str, float, bool, str]:
-        """Call the Gemini API."""
+    async def _call_provider_api(self, provider: str, prompt: str, model: str,
+                                 timeout: Optional[float] = None, max_tokens: Optional[int] = None,
+                                 caller: str = "orchestrator") -> Tuple[str, float, bool, str, Tuple]:
+        """Call a provider through the shared async client.
+        
+        Returns (content, latency, success, error, (prompt_tokens, completion_tokens)).
+        """
         start_time = time.time()
         content = ""
         success = False
         error = None
+        usage = (None, None)
         
         try:
-            if not self.api_keys.get("gemini"):
-                raise ValueError("Gemini API key not available")
+            if not self.api_keys.get(provider):
+                raise ValueError(f"{provider} API key not available")
             
-            self._apply_rate_limiting("gemini")
-            
-            headers = self._get_provider_headers("gemini")
-            api_base_url = self.model_configs["gemini"]["api_base_url"]
-            
-            data = {
-                "contents": [
-                    {"role": "user", "parts": [{"text": prompt}]}
-                ],
-                "generationConfig": {
-                    "temperature": 0.2,
-                    "maxOutputTokens": 2048,
-                    "topP": 0.95,
-                    "topK": 40
-                }
-            }
-            
-            # Gemini API requires API key in URL
-            api_key = self.api_keys.get("gemini")
-            
-            response = requests.post(
-                f"{api_base_url}/models/{model}:generateContent?key={api_key}",
-                headers=headers,
-                json=data,
-                timeout=30
+            content, usage = await llm_client.complete_with_usage(
+                provider, prompt, model, api_key=self.api_keys[provider], timeout=timeout, caller=caller,
+                **self._provider_options(provider, max_tokens)
             )
-            
-            if not response.ok:
-                error = f"Gemini API error: {response.status_code} - {response.text}"
-                logger.error(error)
-                return content, time.time() - start_time, False, error
-            
-            response_data = response.json()
-            content = response_data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
             success = True
             
         except Exception as e:
-            error = f"Error calling Gemini API: {str(e)}"
+            error = f"Error calling {provider} API: {str(e)}"
             logger.error(error)
             
-        return content, time.time() - start_time, success, error
+        return content, time.time() - start_time, success, error, usage
     
-    def _call_openai_api(self, prompt: str, model: str) -> Tuple[str, float, bool, str]:
-        """Call the OpenAI API."""
-        start_time = time.time()
-        content = ""
-        success = False
-        error = None
+    def _estimate_cost(self, provider: str, prompt: str, max_tokens: int = 2000) -> float:
+        """Rough USD cost of one request: ~4 characters per prompt token plus the completion budget."""
+        tokens = len(prompt) / 4 + max_tokens
+        return tokens / 1000 * self.model_configs[provider].get("cost_per_1k_tokens", 0.0)
+    
+    def _reserve_hedge(self, provider: str, prompt: str) -> bool:
+        """Check the hedge-rate and spend caps, booking the hedge if both allow it."""
+        if sum(self._recent_hedges) >= self.max_hedge_rate * self._recent_hedges.maxlen:
+            self.hedge_stats["skipped_rate_cap"] += 1
+            return False
+        
+        now = time.time()
+        while self._hedge_spend and now - self._hedge_spend[0][0] > 3600:
+            self._hedge_spend.popleft()
+        cost = self._estimate_cost(provider, prompt)
+        if sum(c for _, c in self._hedge_spend) + cost > self.hedge_budget_usd_per_hour:
+            self.hedge_stats["skipped_budget"] += 1
+            return False
+        
+        self._hedge_spend.append((now, cost))
+        self.hedge_stats["hedge_cost_usd"] += cost
+        return True
+    
+    async def _call_with_hedging(self, request: ModelRequest, provider: str,
+                                 model: str) -> Tuple[str, str, str, float, bool, str, Tuple]:
+        """
+        Call the primary provider, racing a backup provider if it is slow or fails.
+        
+        If the primary is still running at its latency percentile, the same prompt is
+        sent to the next-best provider (within the hedge caps); if it fails outright,
+        the backup runs as a plain fallback. The first successful response wins and
+        the other request is cancelled.
+        
+        Returns (provider, model, content, latency, success, error, usage).
+        """
+        prompt = request.prompt
+        caller = self._caller(request)
+        backup_provider = self.performance_tracker.get_fallback_provider(provider)
+        has_backup = backup_provider != provider and bool(self.api_keys.get(backup_provider))
+        hedge_delay = (self.performance_tracker.latency_percentile(provider, self.hedge_quantile)
+                       if self.hedging_enabled and has_backup else None)
+        
+        self.hedge_stats["requests"] += 1
+        started = time.time()
+        primary = asyncio.ensure_future(self._call_provider_api(provider, prompt, model, request.timeout,
+                                                               request.max_tokens, caller))
+        attempts = {primary: (provider, model)}
+        hedged = False
         
         try:
-            if not self.api_keys.get("openai"):
-                raise ValueError("OpenAI API key not available")
-            
-            self._apply_rate_limiting("openai")
-            
-            headers = self._get_provider_headers("openai")
-            api_base_url = self.model_configs["openai"]["api_base_url"]
-            
-            data = {
-                "model": model,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.2,
-                "max_tokens": 2000
-            }
-            
-            response = requests.post(
-                f"{api_base_url}/chat/completions",
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-            
-            if not response.ok:
-                error = f"OpenAI API error: {response.status_code} - {response.text}"
-                logger.error(error)
-                return content, time.time() - start_time, False, error
-            
-            response_data = response.json()
-            content = response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
-            success = True
+            done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+            if has_backup and not (primary in done and primary.result()[2]):
+                if primary not in done:
+                    hedged = self._reserve_hedge(backup_provider, prompt)
+                    if not hedged:
+                        await asyncio.wait({primary})
+                if hedged or not primary.result()[2]:
+                    llm_telemetry.record_hedge(caller, backup_provider, "hedged" if hedged else "fallback")
+                    if hedged:
+                        self.hedge_stats["hedged"] += 1
+                        logger.info(f"Hedging {provider} after {hedge_delay:.2f}s with {backup_provider}")
+                    else:
+                        self.hedge_stats["fallbacks"] += 1
+                        logger.info(f"Falling back to {backup_provider} after {provider} failed")
+                    backup_model = self._get_model_for_task(backup_provider, request.task_type, request.complexity)
+                    backup = asyncio.ensure_future(
+                        self._call_provider_api(backup_provider, prompt, backup_model, request.timeout,
+                                                request.max_tokens, caller)
+                    )
+                    attempts[backup] = (backup_provider, backup_model)
             
-        except Exception as e:
-            error = f"Error calling OpenAI API: {str(e)}"
-            logger.error(error)
+            pending = set(attempts)
+            result = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda t: not t.result()[2]):
+                    content, latency, success, error, usage = task.result()
+                    if result is None or success:
+                        result = (*attempts[task], content, latency, success, error, usage)
+                    if success:
+                        pending = set()
+                        break
             
-        return content, time.time() - start_time, success, error
+            if hedged:
+                outcome = "hedge_win" if result[0] != provider else "primary_win"
+                self.hedge_stats[outcome + "s"] += 1
+                llm_telemetry.record_hedge(caller, result[0], outcome)
+            return result
+        
+        finally:
+            self._recent_hedges.append(hedged)
+            for task, (task_provider, _) in attempts.items():
+                if not task.done():
+                    task.cancel()
+                    self.hedge_stats["losers_cancelled"] += 1
+                    # A cancelled request still tells us the provider was at least this slow
+                    self.performance_tracker.record_latency(task_provider, time.time() - started)
+    
+    def get_hedge_stats(self) -> Dict[str, Any]:
+        """Get hedging counters, hedge rate and the last hour's estimated hedge spend."""
+        requests = self.hedge_stats["requests"]
+        return {
+            **self.hedge_stats,
+            "hedge_rate": self.hedge_stats["hedged"] / requests if requests else 0.0,
+            "recent_hedge_rate": sum(self._recent_hedges) / len(self._recent_hedges) if self._recent_hedges else 0.0,
+            "hedge_spend_last_hour_usd": sum(c for t, c in self._hedge_spend if time.time() - t <= 3600),
+            "hedge_budget_usd_per_hour": self.hedge_budget_usd_per_hour,
+            "max_hedge_rate": self.max_hedge_rate
+        }
     
     def _extract_json_from_response(self, text: str) -> Dict[str, Any]:
         """Extract JSON from a text response."""
@@ -611,70 +619,64 @@ class MultimodalOrchestrator:
             logger.debug(f"Response text: {text}")
             return {}
     
-    async def process_request(self, prompt: str, provider: str = None, 
+    @staticmethod
+    def _caller(request: ModelRequest) -> str:
+        """Telemetry label for a request's code path; unknown task types share ``orchestrator.other``."""
+        task_type = request.task_type if request.task_type in TELEMETRY_TASK_TYPES else "other"
+        return f"orchestrator.{task_type}"
+    
+    @staticmethod
+    def _as_request(prompt: Union[str, ModelRequest], provider: str = None, model: str = None) -> ModelRequest:
+        """Wrap a prompt in a ``ModelRequest``; explicit provider/model override the request's."""
+        if isinstance(prompt, ModelRequest):
+            prompt.provider = provider or prompt.provider
+            prompt.model = model or prompt.model
+            return prompt
+        return ModelRequest(prompt=prompt, provider=provider, model=model)
+    
+    def _route(self, request: ModelRequest) -> Tuple[str, str]:
+        """Fill in the best provider and a model for the task when not specified."""
+        if not request.provider:
+            request.provider = self.performance_tracker.get_best_provider(request)
+        if not request.model:
+            request.model = self._get_model_for_task(request.provider, request.task_type, request.complexity)
+        return request.provider, request.model
+    
+    async def process_request(self, prompt: Union[str, ModelRequest], provider: str = None, 
                            model: str = None, force_refresh: bool = False) -> ModelResponse:
-        """Process a request with intelligent routing to the best provider."""
+        """Process a request with intelligent routing to the best provider.
+        
+        Accepts either a prompt string or a prepared ``ModelRequest``. Cancelling
+        the calling task aborts the in-flight provider request.
+        """
+        request = self._as_request(prompt, provider, model)
+        prompt = request.prompt
+        
         # Check cache first (unless force refresh is specified)
         if not force_refresh:
-            cached_response = self._check_cache(prompt)
+            cached_response = self._check_cache(prompt, self._caller(request))
             if cached_response:
                 logger.info(f"Cache hit for prompt: {prompt[:50]}...")
                 return cached_response
         
-        # Create request object
-        request = ModelRequest(prompt=prompt, provider=provider, model=model)
-        
-        # Determine provider if not specified
-        if not provider:
-            provider = self.performance_tracker.get_best_provider(request)
-        
-        # Determine model if not specified
-        if not model:
-            model = self._get_model_for_task(provider, request.task_type, request.complexity)
-        
-        # Update request with provider and model
-        request.provider = provider
-        request.model = model
+        provider, model = self._route(request)
         
         # Call the appropriate API
         success = False
         content = ""
         latency = 0
         error = None
+        usage = (None, None)
         
         try:
-            if provider == "deepseek":
-                content, latency, success, error = self._call_deepseek_api(prompt, model)
-            elif provider == "gemini":
-                content, latency, success, error = self._call_gemini_api(prompt, model)
-            elif provider == "openai":
-                content, latency, success, error = self._call_openai_api(prompt, model)
+            if provider in self.model_configs:
+                provider, model, content, latency, success, error, usage = await self._call_with_hedging(
+                    request, provider, model
+                )
             else:
                 error = f"Unknown provider: {provider}"
                 logger.error(error)
                 success = False
-            
-            # Fallback if primary provider fails
-            if not success:
-                fallback_provider = self.performance_tracker.get_fallback_provider(provider)
-                if fallback_provider != provider:
-                    logger.info(f"Falling back to {fallback_provider} after {provider} failed")
-                    fallback_model = self._get_model_for_task(
-                        fallback_provider, request.task_type, request.complexity
-                    )
-                    
-                    if fallback_provider == "deepseek":
-                        content, fallback_latency, success, fallback_error = self._call_deepseek_api(prompt, fallback_model)
-                    elif fallback_provider == "gemini":
-                        content, fallback_latency, success, fallback_error = self._call_gemini_api(prompt, fallback_model)
-                    elif fallback_provider == "openai":
-                        content, fallback_latency, success, fallback_error = self._call_openai_api(prompt, fallback_model)
-                    
-                    if success:
-                        provider = fallback_provider
-                        model = fallback_model
-                        latency = fallback_latency
-                        error = None
         
         except Exception as e:
             error = f"Error processing request: {str(e)}"
@@ -689,7 +691,9 @@ class MultimodalOrchestrator:
             model=model,
             latency=latency,
             success=success,
-            error=error
+            error=error,
+            prompt_tokens=usage[0],
+            completion_tokens=usage[1]
         )
         
         # Update performance tracking
@@ -704,6 +708,177 @@ class MultimodalOrchestrator:
         
         return response
     
+    async def stream_request(self, prompt: Union[str, ModelRequest], provider: str = None,
+                             model: str = None, force_refresh: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Process a request like ``process_request`` but yield the response as it is generated.
+        
+        Yields a ``start`` event, ``token`` events with text deltas and finally ``done``
+        or ``error`` carrying the full response. A provider that fails before its first
+        token is replaced by its fallback (announced with a ``fallback`` event); once
+        tokens have been sent the error is reported as is.
+        """
+        request = self._as_request(prompt, provider, model)
+        
+        if not force_refresh:
+            cached_response = self._check_cache(request.prompt, self._caller(request))
+            if cached_response:
+                yield {"event": "start", "request_id": cached_response.request_id,
+                       "provider": cached_response.provider, "model": cached_response.model, "cached": True}
+                yield {"event": "token", "text": cached_response.content}
+                yield {"event": "done", "response": cached_response.to_dict(), "cached": True}
+                return
+        
+        provider, model = self._route(request)
+        yield {"event": "start", "request_id": request.id, "provider": provider, "model": model, "cached": False}
+        
+        started = time.time()
+        chunks: List[str] = []
+        error = None
+        for attempt in range(2):
+            try:
+                if provider not in self.model_configs:
+                    raise ValueError(f"Unknown provider: {provider}")
+                if not self.api_keys.get(provider):
+                    raise ValueError(f"{provider} API key not available")
+                async for text in llm_client.stream(provider, request.prompt, model, api_key=self.api_keys[provider],
+                                                    timeout=request.timeout, caller=self._caller(request),
+                                                    **self._provider_options(provider, request.max_tokens)):
+                    chunks.append(text)
+                    yield {"event": "token", "text": text}
+                error = None
+                break
+            except Exception as e:
+                error = f"Error streaming from {provider} API: {str(e)}"
+                logger.error(error)
+                fallback = self.performance_tracker.get_fallback_provider(provider)
+                if chunks or attempt or fallback == provider or not self.api_keys.get(fallback):
+                    break
+                provider = fallback
+                model = self._get_model_for_task(provider, request.task_type, request.complexity)
+                request.provider, request.model = provider, model
+                yield {"event": "fallback", "provider": provider, "model": model, "error": error}
+        
+        response = ModelResponse(request.id, "".join(chunks), provider, model,
+                                 time.time() - started, error is None, error)
+        self.performance_tracker.update_performance(response)
+        self._update_history(request, response)
+        if response.success:
+            self._update_cache(request.prompt, response)
+        yield {"event": "done" if response.success else "error", "response": response.to_dict(), "cached": False}
+    
+    @staticmethod
+    def _extract_json_array(text: str) -> Optional[List[Any]]:
+        """Extract the first JSON array from a text response."""
+        decoder = json.JSONDecoder()
+        start = text.find("[") if text else -1
+        while start != -1:
+            try:
+                value, _ = decoder.raw_decode(text, start)
+                if isinstance(value, list):
+                    return value
+            except ValueError:
+                pass
+            start = text.find("[", start + 1)
+        return None
+    
+    @staticmethod
+    def _batch_prompt(instruction: str, items: List[Dict[str, Any]], fields: Dict[str, str]) -> str:
+        schema = ", ".join(f'"{name}": {description}' for name, description in fields.items())
+        return f"""{instruction}
+
+Items (JSON array, each with an "index"):
+{json.dumps([{"index": i, **item} for i, item in enumerate(items)], default=str)}
+
+Respond with only a JSON array containing exactly {len(items)} objects, one per item, each shaped as:
+{{"index": integer, {schema}}}"""
+    
+    @staticmethod
+    def _single_prompt(instruction: str, item: Dict[str, Any], fields: Dict[str, str]) -> str:
+        schema = ", ".join(f'"{name}": {description}' for name, description in fields.items())
+        return f"""{instruction}
+
+Item:
+{json.dumps(item, default=str)}
+
+Respond with only a JSON object shaped as:
+{{{schema}}}"""
+    
+    async def process_batch(self, instruction: str, items: List[Dict[str, Any]], fields: Dict[str, str],
+                            provider: str = None) -> List[Dict[str, Any]]:
+        """
+        Answer the same question for many items with one structured request per chunk.
+        
+        Items are packed into a JSON array and the model answers with a JSON array of
+        objects carrying ``fields`` and the item's index. Items whose answer is missing
+        or malformed are retried one by one, at most ``batch_fallback_concurrency`` at
+        a time. Returns one dict per item, in order ({} if no answer could be obtained).
+        """
+        results: List[Dict[str, Any]] = [{} for _ in items]
+        missing: List[int] = []
+        
+        async def run_chunk(offset: int, chunk: List[Dict[str, Any]]):
+            self.batch_stats["batches"] += 1
+            self.batch_stats["batched_items"] += len(chunk)
+            response = await self.process_request(self._batch_prompt(instruction, chunk, fields), provider=provider)
+            answers = self._extract_json_array(response.content) if response.success else None
+            if answers is None:
+                self.batch_stats["batch_failures"] += 1
+                logger.warning(f"Batch of {len(chunk)} items failed: {response.error or 'no JSON array in response'}")
+                answers = []
+            positional = len(answers) == len(chunk)
+            for position, answer in enumerate(answers):
+                if not isinstance(answer, dict):
+                    continue
+                index = answer.pop("index", position if positional else None)
+                if isinstance(index, int) and 0 <= index < len(chunk) and not results[offset + index]:
+                    results[offset + index] = answer
+            missing.extend(offset + i for i in range(len(chunk)) if not results[offset + i])
+        
+        await asyncio.gather(*(
+            run_chunk(offset, items[offset:offset + self.max_batch_size])
+            for offset in range(0, len(items), self.max_batch_size)
+        ))
+        
+        if missing:
+            semaphore = asyncio.Semaphore(self.batch_fallback_concurrency)
+            
+            async def run_single(index: int):
+                async with semaphore:
+                    response = await self.process_request(
+                        self._single_prompt(instruction, items[index], fields), provider=provider
+                    )
+                answer = self._extract_json_from_response(response.content) if response.success else {}
+                results[index] = answer
+                if not answer:
+                    self.batch_stats["failed_items"] += 1
+            
+            self.batch_stats["fallback_items"] += len(missing)
+            await asyncio.gather(*(run_single(index) for index in sorted(missing)))
+        
+        return results
+    
+    async def analyze_markets(self, tokens: List[str], timeframe: str = "1h") -> Dict[str, Dict[str, Any]]:
+        """Batched variant of ``analyze_market``: one request covers every token."""
+        analyses = await self.process_batch(
+            f"Analyze the current market conditions for each token over the {timeframe} timeframe, "
+            "considering technical indicators, market sentiment and broader economic factors.",
+            [{"token": token} for token in tokens],
+            {
+                "direction": '"up" | "down" | "sideways"',
+                "confidence": "number 0-1",
+                "price_action": "string",
+                "sentiment": "string",
+                "support": "number",
+                "resistance": "number",
+                "risk": "string"
+            }
+        )
+        timestamp = datetime.now().isoformat()
+        return {
+            token: {**analysis, "token": token, "timeframe": timeframe, "timestamp": timestamp}
+            for token, analysis in zip(tokens, analyses)
+        }
+    
     async def analyze_market(self, token: str, timeframe: str = "1h") -> Dict[str, Any]:
         """Analyze market data with the best model for complex analysis."""
         prompt = f"""Analyze the current market conditions for {token} over the {timeframe} timeframe.
@@ -4,15 +4,16 @@ import json
 import time
 import logging
 import asyncio
-import aiohttp
-import requests
-from typing import Dict, Any, List, Optional, Tuple, Union
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 import numpy as np
 
 from utils.web_data import WebDataFetcher
 from utils.network_config import NetworkConfig
 from utils.layer2_trading import Layer2GasEstimator, Layer2Arbitrage
+from utils.llm_client import LLMClientError, llm_client
+from utils.llm_telemetry import llm_telemetry
+from utils.local_models import latency_budget_policy, local_models
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,7 @@ class AdvancedMarketAnalyzer:
     def __init__(self):
         self.openai_api_key = os.environ.get("OPENAI_API_KEY")
         self.gemini_api_key = os.environ.get("GEMINI_API_KEY")
+        self.deepseek_api_key = os.environ.get("DEEPSEEK_API_KEY")
         
         if not self.openai_api_key and not self.gemini_api_key:
             logger.warning("No advanced AI API keys found. Advanced AI features will be limited.")
@@ -35,7 +37,8 @@ class AdvancedMarketAnalyzer:
             "openai_tools": "gpt-4.1-mini",
             "gemini_default": "gemini-2.0-flash-exp",
             "gemini_vision": "gemini-2.0-flash-exp",
-            "gemini_tools": "gemini-2.0-flash-exp"
+            "gemini_tools": "gemini-2.0-flash-exp",
+            "chat": "deepseek-chat"
         }
         
         # Network and pricing data
@@ -82,7 +85,8 @@ class AdvancedMarketAnalyzer:
             price_change_24h = self.web_data.get_24h_change(token)
             
             # Step 2: Get sentiment analysis from news/social media
-            sentiment_data = await self._analyze_token_sentiment(token)
+            sentiment_data = await self._analyze_token_sentiment(
+                token, market_data={"change_24h": price_change_24h, "volume_24h": volume_24h})
             
             # Step 3: Get network activity across Layer 2 rollups
             network_activity = await self._analyze_network_activity(token)
@@ -123,26 +127,46 @@ class AdvancedMarketAnalyzer:
                 "error": str(e)
             }
     
-    async def _analyze_token_sentiment(self, token: str) -> Dict[str, Any]:
-        """Analyze token sentiment using DeepSeek AI."""
+    async def _analyze_token_sentiment(self, token: str, budget: Optional[float] = None,
+                                       market_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analyze token sentiment using DeepSeek AI, within a latency budget.
+
+        ``market_data`` may carry the caller's ``change_24h``/``volume_24h`` so
+        they are not fetched again.
+        """
         cache_key = f"sentiment_{token}"
         
         # Check cache to avoid redundant API calls
         if cache_key in self.sentiment_cache:
             cached_data = self.sentiment_cache[cache_key]
             if time.time() - cached_data["timestamp"] < self.medium_cache_duration:
+                llm_telemetry.record_cache_hit("market_analyzer.sentiment")
                 return cached_data["data"]
         
-        if not self.api_key:
+        if not self.deepseek_api_key:
             # Fallback to simplified sentiment without DeepSeek
-            return self._fallback_sentiment_analysis(token)
+            return self._fallback_sentiment_analysis(token, market_data)
         
-        try:
-            # Prepare market context for DeepSeek
+        sentiment_data, _ = await latency_budget_policy.run(
+            self._remote_token_sentiment(token, cache_key, market_data),
+            lambda: self._fallback_sentiment_analysis(token, market_data),
+            budget
+        )
+        return sentiment_data
+    
+    async def _remote_token_sentiment(self, token: str, cache_key: str,
+                                      market_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """DeepSeek sentiment for a token; cached and logged for local training once it arrives."""
+        # Prepare market context for DeepSeek
+        market_data = market_data or {}
+        price_change = market_data.get("change_24h")
+        if price_change is None:
             price_change = self.web_data.get_24h_change(token)
+        volume = market_data.get("volume_24h")
+        if volume is None:
             volume = self.web_data.get_24h_volume(token)
-            
-            prompt = f"""You are an expert cryptocurrency analyst. Analyze the market sentiment for {token} with the following data:
+        
+        prompt = f"""You are an expert cryptocurrency analyst. Analyze the market sentiment for {token} with the following data:
 - 24h price change: {price_change}%
 - 24h trading volume: {volume}
 
@@ -162,29 +186,31 @@ Format your response as a JSON object with these keys:
   "confidence": float
 }}"""
 
-            response = self._call_deepseek_api(prompt, model=self.models["chat"])
-            
-            # Parse the response to extract the JSON
-            sentiment_data = self._extract_json_from_response(response)
-            if not sentiment_data:
-                return self._fallback_sentiment_analysis(token)
-            
-            # Cache the result
-            self.sentiment_cache[cache_key] = {
-                "timestamp": time.time(),
-                "data": sentiment_data
-            }
-            
-            return sentiment_data
-            
-        except Exception as e:
-            logger.error(f"Error in sentiment analysis: {str(e)}")
-            return self._fallback_sentiment_analysis(token)
+        response = await self._call_deepseek_api(prompt, model=self.models["chat"],
+                                                 caller="market_analyzer.sentiment")
+        
+        # Parse the response to extract the JSON
+        sentiment_data = self._extract_json_from_response(response)
+        if not sentiment_data:
+            raise ValueError("No JSON in DeepSeek sentiment response")
+        
+        # Cache the result
+        self.sentiment_cache[cache_key] = {
+            "timestamp": time.time(),
+            "data": sentiment_data
+        }
+        local_models.record("sentiment", {"change_24h": price_change, "volume_24h": volume}, sentiment_data)
+        
+        return sentiment_data
     
-    def _fallback_sentiment_analysis(self, token: str) -> Dict[str, Any]:
-        """Fallback sentiment analysis when API is unavailable."""
+    def _fallback_sentiment_analysis(self, token: str,
+                                     market_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Fallback sentiment analysis when API is unavailable or too slow."""
         # Base sentiment on price change
-        price_change = self.web_data.get_24h_change(token)
+        market_data = market_data or {}
+        price_change = market_data.get("change_24h")
+        if price_change is None:
+            price_change = self.web_data.get_24h_change(token)
         
         if price_change > 5:
             score = 0.8
@@ -205,13 +231,21 @@ Format your response as a JSON object with these keys:
             score = -0.8
             mood = "fearful"
         
-        return {
+        result = {
             "score": score,
             "mood": mood,
             "factors": ["price action", "market volatility"],
             "social_sentiment": "unknown",
             "confidence": 0.5
         }
+        # Only build features for a trained model, and never fetch for them: this path must stay fast
+        if local_models.models["sentiment"].trained:
+            prediction = local_models.predict(
+                "sentiment", {"change_24h": price_change, "volume_24h": market_data.get("volume_24h")}
+            )
+            if prediction:
+                result.update(prediction, source="local_model")
+        return result
     
     async def _analyze_network_activity(self, token: str) -> Dict[str, Any]:
         """Analyze Layer 2 network activity for a token."""
@@ -364,6 +398,7 @@ Format your response as a JSON object with these keys:
         if cache_key in self.prediction_cache:
             cached_data = self.prediction_cache[cache_key]
             if time.time() - cached_data["timestamp"] < self.short_cache_duration:
+                llm_telemetry.record_cache_hit("market_analyzer.price_prediction")
                 return cached_data["data"]
         
         if not self.api_key or not market_data:
@@ -404,7 +439,8 @@ Format your response as a JSON object with these fields:
   "time_horizon": "24h" 
 }}"""
 
-            response = self._call_deepseek_api(prompt, model=self.models["chat"])
+            response = await self._call_deepseek_api(prompt, model=self.models["chat"],
+                                                     caller="market_analyzer.price_prediction")
             
             # Extract JSON data
             prediction_data = self._extract_json_from_response(response)
@@ -513,7 +549,8 @@ Format your response as a JSON object:
   "position_size_suggestion": string
 }}"""
 
-            response = self._call_deepseek_api(prompt, model=self.models["chat"])
+            response = await self._call_deepseek_api(prompt, model=self.models["chat"],
+                                                     caller="market_analyzer.trade_recommendation")
             
             # Extract recommendation data
             recommendation = self._extract_json_from_response(response)
@@ -586,40 +623,20 @@ Format your response as a JSON object:
             "arbitrage": {"available": False}
         }
     
-    def _call_deepseek_api(self, prompt: str, model: str = None) -> str:
-        """Call the DeepSeek API with a prompt."""
-        if not self.api_key:
+    async def _call_deepseek_api(self, prompt: str, model: str = None, caller: str = "market_analyzer") -> str:
+        """Call the DeepSeek API with a prompt through the shared async client."""
+        if not self.deepseek_api_key:
             raise ValueError("DeepSeek API key not available")
         
-        if not model:
-            model = self.models["default"]
-        
         try:
-            headers = self._get_headers()
-            
-            data = {
-                "model": model,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.2,  # Lower temperature for more deterministic outputs
-                "max_tokens": 2000
-            }
-            
-            response = requests.post(
-                f"{self.api_base_url}/chat/completions",
-                headers=headers,
-                json=data
+            return await llm_client.complete(
+                "deepseek", prompt, model or self.models["chat"],
+                max_tokens=2000,
+                temperature=0.2,  # Lower temperature for more deterministic outputs
+                api_key=self.deepseek_api_key,
+                caller=caller
             )
-            
-            if not response.ok:
-                logger.error(f"DeepSeek API error: {response.status_code} - {response.text}")
-                return ""
-            
-            response_data = response.json()
-            return response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
-            
-        except Exception as e:
+        except LLMClientError as e:
             logger.error(f"Error calling DeepSeek API: {str(e)}")
             return ""
     
@@ -681,7 +698,8 @@ Format your response as JSON:
   "guidance": string
 }}"""
 
-            response = self._call_deepseek_api(prompt, model=self.models["chat"])
+            response = await self._call_deepseek_api(prompt, model=self.models["chat"],
+                                                     caller="market_analyzer.market_emotions")
             
             emotions_data = self._extract_json_from_response(response)
             if not emotions_data:
@@ -859,7 +877,8 @@ Format your response as a JSON object:
   "strategic_recommendations": string
 }}"""
 
-            response = self._call_deepseek_api(prompt, model=self.models["chat"])
+            response = await self._call_deepseek_api(prompt, model=self.models["chat"],
+                                                     caller="market_analyzer.network_insights")
             
             insights = self._extract_json_from_response(response)
             if not insights:
@@ -944,6 +963,9 @@ market_analyzer = AdvancedMarketAnalyzer()
 class OpenAIMarketAnalyzer(AdvancedMarketAnalyzer):
     """OpenAI-specific market analyzer implementation."""
     
+    system_prompt = ("You are an advanced cryptocurrency market analyzer with access to real-time data and "
+                     "trading tools. Provide detailed analysis with specific recommendations.")
+    
     def __init__(self):
         super().__init__()
         self.provider = "openai"
@@ -955,17 +977,12 @@ class OpenAIMarketAnalyzer(AdvancedMarketAnalyzer):
             if not self.openai_api_key:
                 return {"error": "OpenAI API key not configured"}
                 
-            headers = {
-                "Authorization": f"Bearer {self.openai_api_key}",
-                "Content-Type": "application/json"
-            }
-            
             payload = {
                 "model": self.models["openai_tools"],
                 "messages": [
                     {
                         "role": "system",
-                        "content": "You are an advanced cryptocurrency market analyzer with access to real-time data and trading tools. Provide detailed analysis with specific recommendations."
+                        "content": self.system_prompt
                     },
                     {
                         "role": "user", 
@@ -980,29 +997,34 @@ class OpenAIMarketAnalyzer(AdvancedMarketAnalyzer):
                 payload["tools"] = tools
                 payload["tool_choice"] = "auto"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.openai_base_url}/chat/completions",
-                    headers=headers,
-                    json=payload
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return {
-                            "analysis": data.get("choices", [{}])[0].get("message", {}).get("content", ""),
-                            "tool_calls": data.get("choices", [{}])[0].get("message", {}).get("tool_calls", []),
-                            "model_used": self.models["openai_tools"],
-                            "provider": "openai"
-                        }
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"OpenAI API error: {response.status} - {error_text}")
-                        return {"error": f"API error: {response.status}"}
-                        
+            try:
+                data = await llm_client.post("openai", payload, api_key=self.openai_api_key,
+                                             caller="market_analyzer.openai_tools")
+            except LLMClientError as e:
+                logger.error(f"OpenAI API error: {str(e)}")
+                return {"error": f"API error: {e.status}" if e.status else str(e)}
+            
+            message = data.get("choices", [{}])[0].get("message", {})
+            return {
+                "analysis": message.get("content", ""),
+                "tool_calls": message.get("tool_calls", []),
+                "model_used": self.models["openai_tools"],
+                "provider": "openai"
+            }
+            
         except Exception as e:
             logger.error(f"Error in OpenAI analysis: {str(e)}")
             return {"error": str(e)}
     
+    async def stream_with_openai(self, prompt: str) -> AsyncIterator[str]:
+        """Streaming variant of ``analyze_with_openai`` (no tools): yields text as it is generated."""
+        if not self.openai_api_key:
+            raise LLMClientError("openai", "API key not available")
+        async for text in llm_client.stream("openai", prompt, self.models["openai_tools"], max_tokens=2000,
+                                            temperature=0.3, system=self.system_prompt,
+                                            api_key=self.openai_api_key, caller="market_analyzer.openai_stream"):
+            yield text
+    
     async def analyze_market_sentiment_openai(self, market_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze market sentiment using OpenAI."""
         prompt = f"""
@@ -0,0 +1,457 @@
+"""
+Unified continuous arbitrage scanner.
+
+A single engine that owns the shared resources every scan loop needs: one
+pooled HTTP session, one Web3 connection per network, a TTL quote cache with
+in-flight de-duplication, and a scheduler. Price sources (CoinGecko, Jupiter,
+DEX routers) and scan strategies plug into it, so running N strategies over
+overlapping tokens costs one batched request per source per tick instead of
+N independent polling loops.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from utils.market_events import MarketEventBus, market_event_bus, price_topic
+from utils.network_config import network_config
+from utils.abi_store import UNISWAP_V2_ROUTER_ABI
+
+logger = logging.getLogger(__name__)
+
+
+# Symbols for the CoinGecko ids the bots quote, so price events use the same topics as pool updates
+COINGECKO_SYMBOLS = {
+    'ethereum': 'ETH', 'bitcoin': 'BTC', 'wrapped-bitcoin': 'WBTC', 'usd-coin': 'USDC', 'tether': 'USDT',
+    'dai': 'DAI', 'matic-network': 'MATIC', 'binancecoin': 'BNB', 'solana': 'SOL', 'chainlink': 'LINK',
+    'uniswap': 'UNI', 'aave': 'AAVE',
+}
+
+
+@dataclass(frozen=True)
+class QuoteRequest:
+    """Identifies one price: which source, which token, and where."""
+    source: str
+    token: str                 # CoinGecko id / contract address / Solana mint / symbol
+    network: str = ''          # '' for network-agnostic quotes (e.g. CoinGecko ids)
+    venue: str = ''            # DEX name for router quotes
+    params: Tuple[Any, ...] = ()
+    symbol: str = field(default='', compare=False)  # Ticker for price events; not part of the key
+
+    @property
+    def event_symbol(self) -> str:
+        """Symbol this price is published under: explicit, a known CoinGecko id, else the raw token."""
+        return self.symbol or COINGECKO_SYMBOLS.get(self.token.lower(), self.token)
+
+
+@dataclass
+class PriceQuote:
+    request: QuoteRequest
+    price: Optional[float]
+    timestamp: float = field(default_factory=time.time)
+
+
+class ScannerResources:
+    """Connection pools shared by every source plugged into the scanner."""
+
+    def __init__(self, http_timeout: float = 10.0, max_connections: int = 50):
+        self.http_timeout = http_timeout
+        self.max_connections = max_connections
+        self.rpc_urls: Dict[str, str] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._web3: Dict[str, Any] = {}
+        self.http_requests = 0
+        self.rpc_calls = 0
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.http_timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300),
+            )
+        return self._session
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        session = await self.get_session()
+        self.http_requests += 1
+        async with session.get(url, params=params) as response:
+            if response.status != 200:
+                logger.debug(f"GET {url} returned {response.status}")
+                return None
+            return await response.json()
+
+    def get_web3(self, network: str) -> Optional[Any]:
+        """One Web3 connection per network, shared by every strategy."""
+        if network not in self._web3:
+            rpc_url = self.rpc_urls.get(network) or network_config.get_rpc_url(network)
+            if not rpc_url:
+                return None
+            from web3 import Web3
+            self._web3[network] = Web3(Web3.HTTPProvider(rpc_url))
+        return self._web3[network]
+
+    def set_web3(self, network: str, web3: Any):
+        self._web3[network] = web3
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class PriceSource:
+    """Base class for price sources. fetch() receives every request for this source in one batch."""
+    name = "base"
+    ttl = 10.0
+
+    async def fetch(self, requests: List[QuoteRequest],
+                    resources: ScannerResources) -> Dict[QuoteRequest, Optional[float]]:
+        raise NotImplementedError
+
+
+class CoinGeckoSource(PriceSource):
+    """CoinGecko simple/price (by id) and simple/token_price (by contract), batched per platform."""
+    name = "coingecko"
+    ttl = 30.0
+    base_url = "https://api.coingecko.com/api/v3"
+
+    @staticmethod
+    def _key(platform: str, token: str) -> str:
+        """Coin ids and EVM addresses are case-insensitive; Solana base58 mints are not."""
+        return token.lower() if not platform or token.startswith("0x") else token
+
+    async def fetch(self, requests, resources):
+        results: Dict[QuoteRequest, Optional[float]] = {}
+        by_platform: Dict[str, List[QuoteRequest]] = defaultdict(list)
+        for request in requests:
+            by_platform[request.network].append(request)
+
+        for platform, platform_requests in by_platform.items():
+            ids = sorted({self._key(platform, r.token) for r in platform_requests})
+            try:
+                if platform:
+                    data = await resources.get_json(f"{self.base_url}/simple/token_price/{platform}",
+                                                    {'contract_addresses': ','.join(ids), 'vs_currencies': 'usd'})
+                else:
+                    data = await resources.get_json(f"{self.base_url}/simple/price",
+                                                    {'ids': ','.join(ids), 'vs_currencies': 'usd'})
+            except Exception as e:
+                logger.debug(f"CoinGecko error for {platform or 'ids'}: {e}")
+                data = None
+            data = data or {}
+            for request in platform_requests:
+                entry = data.get(self._key(platform, request.token))
+                results[request] = float(entry['usd']) if entry and 'usd' in entry else None
+        return results
+
+
+class JupiterSource(PriceSource):
+    """Jupiter price API for Solana mints, one call for all requested mints."""
+    name = "jupiter"
+    ttl = 10.0
+    url = "https://price.jup.ag/v4/price"
+
+    async def fetch(self, requests, resources):
+        mints = sorted({r.token for r in requests})
+        try:
+            data = await resources.get_json(self.url, {'ids': ','.join(mints)})
+        except Exception as e:
+            logger.debug(f"Jupiter API error: {e}")
+            data = None
+        prices = (data or {}).get('data', {})
+        return {r: float(prices[r.token]['price']) if r.token in prices else None for r in requests}
+
+
+class DexRouterSource(PriceSource):
+    """Uniswap V2-style router getAmountsOut over the shared per-network Web3 connections.
+
+    params = (router_address, (token_in, token_out, ...), amount_in_units, decimals_in, decimals_out)
+    """
+    name = "dex_router"
+    ttl = 5.0
+
+    def _quote(self, request: QuoteRequest, resources: ScannerResources) -> Optional[float]:
+        web3 = resources.get_web3(request.network)
+        if not web3:
+            return None
+        router_address, path, amount_in, decimals_in, decimals_out = request.params
+        router = web3.eth.contract(address=web3.to_checksum_address(router_address), abi=UNISWAP_V2_ROUTER_ABI)
+        amounts = router.functions.getAmountsOut(
+            int(amount_in), [web3.to_checksum_address(a) for a in path]).call()
+        resources.rpc_calls += 1
+        amount_in_decimal = int(amount_in) / (10 ** decimals_in)
+        return (amounts[-1] / (10 ** decimals_out)) / amount_in_decimal if amount_in_decimal else None
+
+    async def _safe_quote(self, request, resources):
+        try:
+            return await asyncio.to_thread(self._quote, request, resources)
+        except Exception as e:
+            logger.debug(f"Router quote failed for {request.venue} on {request.network}: {e}")
+            return None
+
+    async def fetch(self, requests, resources):
+        prices = await asyncio.gather(*(self._safe_quote(r, resources) for r in requests))
+        return dict(zip(requests, prices))
+
+
+class ScanStrategy:
+    """Base class for strategies: declare the quotes you need, then evaluate them."""
+    name = "strategy"
+    interval = 10.0
+
+    def required_quotes(self) -> Iterable[QuoteRequest]:
+        raise NotImplementedError
+
+    def evaluate(self, quotes: Dict[QuoteRequest, Optional[float]]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class CrossVenueSpreadStrategy(ScanStrategy):
+    """Buy at the cheapest venue, sell at the most expensive one, net of fixed costs.
+
+    ``legs`` maps a token to the (label, QuoteRequest) pairs it is quoted on.
+    ``cost_fn(buy_label, sell_label)`` returns the USD cost of the round trip.
+    """
+
+    def __init__(self, name: str, legs: Dict[str, List[Tuple[str, QuoteRequest]]],
+                 trade_amount_usd: float = 1000.0, min_profit_usd: float = 5.0,
+                 cost_fn: Optional[Callable[[str, str], float]] = None, interval: float = 10.0):
+        self.name = name
+        self.legs = legs
+        self.trade_amount_usd = trade_amount_usd
+        self.min_profit_usd = min_profit_usd
+        self.cost_fn = cost_fn or (lambda buy, sell: 0.0)
+        self.interval = interval
+
+    def required_quotes(self):
+        return [request for token_legs in self.legs.values() for _, request in token_legs]
+
+    def evaluate(self, quotes):
+        opportunities = []
+        for token, token_legs in self.legs.items():
+            prices = {label: quotes.get(request) for label, request in token_legs}
+            prices = {label: price for label, price in prices.items() if price}
+            if len(prices) < 2:
+                continue
+            buy_from = min(prices, key=prices.get)
+            sell_to = max(prices, key=prices.get)
+            buy_price, sell_price = prices[buy_from], prices[sell_to]
+            price_diff_pct = (sell_price - buy_price) / buy_price * 100
+            profit = self.trade_amount_usd * price_diff_pct / 100 - self.cost_fn(buy_from, sell_to)
+            if profit >= self.min_profit_usd:
+                opportunities.append({
+                    'strategy': self.name,
+                    'token': token,
+                    'buy_from': buy_from,
+                    'sell_to': sell_to,
+                    'buy_price': buy_price,
+                    'sell_price': sell_price,
+                    'price_diff_pct': price_diff_pct,
+                    'potential_profit_usd': profit,
+                    'trade_amount_usd': self.trade_amount_usd,
+                    'timestamp': time.time(),
+                })
+        return opportunities
+
+
+OpportunityCallback = Callable[[str, List[Dict[str, Any]]], Awaitable[None]]
+
+
+class ArbitrageScanner:
+    """Schedules strategies and serves their quotes from shared sources, cache and connections."""
+
+    def __init__(self, resources: Optional[ScannerResources] = None,
+                 event_bus: Optional[MarketEventBus] = None):
+        self.resources = resources or ScannerResources()
+        self.event_bus = event_bus or market_event_bus
+        self.sources: Dict[str, PriceSource] = {}
+        self.strategies: Dict[str, ScanStrategy] = {}
+        self._next_due: Dict[str, float] = {}
+        self._callbacks: List[OpportunityCallback] = []
+        self._cache: Dict[QuoteRequest, PriceQuote] = {}
+        self._inflight: Dict[QuoteRequest, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self.stats = defaultdict(int)
+        self.latest_opportunities: Dict[str, List[Dict[str, Any]]] = {}
+
+        for source in (CoinGeckoSource(), JupiterSource(), DexRouterSource()):
+            self.register_source(source)
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+    def register_source(self, source: PriceSource):
+        self.sources[source.name] = source
+
+    def register_strategy(self, strategy: ScanStrategy):
+        self.strategies[strategy.name] = strategy
+        self._next_due[strategy.name] = 0.0
+        self._wakeup.set()
+        logger.info(f"Scanner strategy registered: {strategy.name} (every {strategy.interval}s)")
+
+    def unregister_strategy(self, name: str):
+        self.strategies.pop(name, None)
+        self._next_due.pop(name, None)
+        self.latest_opportunities.pop(name, None)
+
+    def on_opportunities(self, callback: OpportunityCallback):
+        self._callbacks.append(callback)
+
+    # ------------------------------------------------------------------
+    # Quotes
+    # ------------------------------------------------------------------
+    def _fresh(self, request: QuoteRequest, now: float) -> Optional[PriceQuote]:
+        quote = self._cache.get(request)
+        source = self.sources.get(request.source)
+        if quote and source and now - quote.timestamp < source.ttl:
+            return quote
+        return None
+
+    async def _fetch_from_source(self, source_name: str, requests: List[QuoteRequest]):
+        source = self.sources[source_name]
+        results: Dict[QuoteRequest, Optional[float]] = {}
+        try:
+            results = await source.fetch(requests, self.resources)
+        except Exception as e:
+            logger.warning(f"Price source {source_name} failed: {e}")
+        finally:
+            # Always release waiters, even on failure or cancellation
+            self.stats['source_batches'] += 1
+            now = time.time()
+            for request in requests:
+                price = results.get(request)
+                previous = self._cache.get(request)
+                self._cache[request] = PriceQuote(request, price, now)
+                if price is not None and (previous is None or previous.price != price):
+                    symbol = request.event_symbol
+                    self.event_bus.publish([price_topic(symbol)], source=source_name, token=symbol,
+                                           network=request.network, venue=request.venue, price=price)
+                future = self._inflight.pop(request, None)
+                if future and not future.done():
+                    future.set_result(price)
+
+    async def get_quotes(self, requests: Iterable[QuoteRequest]) -> Dict[QuoteRequest, Optional[float]]:
+        """Resolve quotes from cache, from fetches already in flight, or with one batch per source."""
+        now = time.time()
+        results: Dict[QuoteRequest, Optional[float]] = {}
+        waiting: Dict[QuoteRequest, asyncio.Future] = {}
+        to_fetch: Dict[str, List[QuoteRequest]] = defaultdict(list)
+        loop = asyncio.get_running_loop()
+
+        for request in set(requests):
+            if request.source not in self.sources:
+                results[request] = None
+                continue
+            cached = self._fresh(request, now)
+            if cached:
+                self.stats['cache_hits'] += 1
+                results[request] = cached.price
+            elif request in self._inflight:
+                self.stats['inflight_joins'] += 1
+                waiting[request] = self._inflight[request]
+            else:
+                self.stats['cache_misses'] += 1
+                self._inflight[request] = loop.create_future()
+                waiting[request] = self._inflight[request]
+                to_fetch[request.source].append(request)
+
+        if to_fetch:
+            await asyncio.gather(*(self._fetch_from_source(name, reqs) for name, reqs in to_fetch.items()))
+        for request, future in waiting.items():
+            results[request] = await future
+        return results
+
+    async def get_quote(self, request: QuoteRequest) -> Optional[float]:
+        return (await self.get_quotes([request])).get(request)
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+    async def scan_once(self, strategy_names: Optional[Iterable[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Run the given (default: all) strategies against one shared round of quotes."""
+        names = [n for n in (strategy_names or self.strategies.keys()) if n in self.strategies]
+        requested = {name: list(self.strategies[name].required_quotes()) for name in names}
+        all_requests = {r for reqs in requested.values() for r in reqs}
+        self.stats['quotes_requested'] += sum(len(reqs) for reqs in requested.values())
+        self.stats['quotes_unique'] += len(all_requests)
+
+        quotes = await self.get_quotes(all_requests)
+        results = {}
+        for name in names:
+            strategy = self.strategies[name]
+            try:
+                opportunities = strategy.evaluate({r: quotes.get(r) for r in requested[name]})
+            except Exception as e:
+                logger.error(f"Strategy {name} failed to evaluate: {e}")
+                opportunities = []
+            results[name] = opportunities
+            self.latest_opportunities[name] = opportunities
+            self.stats['opportunities'] += len(opportunities)
+            for callback in self._callbacks:
+                try:
+                    await callback(name, opportunities)
+                except Exception as e:
+                    logger.error(f"Scanner callback failed for {name}: {e}")
+        self.stats['scans'] += 1
+        return results
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            due = [name for name, next_due in self._next_due.items() if next_due <= now]
+            if due:
+                await self.scan_once(due)
+                finished = time.time()
+                for name in due:
+                    if name in self.strategies:
+                        self._next_due[name] = finished + self.strategies[name].interval
+            sleep_for = min((t - time.time() for t in self._next_due.values()), default=60.0)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, sleep_for))
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self):
+        if self._task and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Arbitrage scanner started with {len(self.strategies)} strategies")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.resources.close()
+        logger.info("Arbitrage scanner stopped")
+
+    async def run_forever(self):
+        """Convenience entry point for standalone scripts."""
+        await self.start()
+        try:
+            await self._task
+        finally:
+            await self.stop()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'strategies': list(self.strategies.keys()),
+            'cached_quotes': len(self._cache),
+            'http_requests': self.resources.http_requests,
+            'rpc_calls': self.resources.rpc_calls,
+        }
+
+
+# Global scanner shared by the standalone hunters and the API process
+arbitrage_scanner = ArbitrageScanner()
@@ -8,15 +8,16 @@ import logging
 import json
 import time
 import threading
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Set, Tuple
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from enum import Enum
-import subprocess
-import signal
 import os
 
-from utils.layer2_trading import Layer2Arbitrage
+from utils.bot_supervisor import BotProcessSupervisor
+from utils.layer2_trading import WRAPPED_SYMBOLS, Layer2Arbitrage
+from utils.market_events import gas_topic, market_event_bus, price_topic, reserve_topic
+from utils.shared_market_state import shared_market_state
 from utils.logging_config import setup_logging
 import sys
 from pathlib import Path
@@ -43,6 +44,10 @@ sys.path.insert(0, str(project_root))
 
 logger = setup_logging()
 
+# Supervisor id of the shared worker that hosts bots in "worker" runtime mode
+RUNTIME_WORKER_ID = "bot_runtime"
+
+
 class ArbitrageBotStatus(Enum):
     STOPPED = "stopped"
     STARTING = "starting"
@@ -94,7 +99,21 @@ class ArbitrageService:
         self.callbacks: List[Callable] = []
         self.monitoring_active = False
         self.monitoring_task = None
+        self.monitored_tokens = ["ETH", "USDC", "USDT", "DAI", "WBTC"]
+        self.event_bus = market_event_bus
+        self.dex_config_path = "config/l2_dex_config.json"
+        # Full sweep only if the market has been silent this long (e.g. no producers running)
+        self.fallback_sweep_seconds = float(os.getenv("ARBITRAGE_FALLBACK_SWEEP_SECONDS", "300"))
         self.bot_manager = None
+        # Subprocess fallback: streamed output, exit notification and restart with backoff
+        self.supervisor = BotProcessSupervisor(on_event=self._on_process_event)
+        # "subprocess": one interpreter per bot; "worker" (opt-in): all bots share one utils.bot_runtime
+        # process. Only scripts defining BOT_STRATEGY (live_arbitrage_monitor) use its shared clients;
+        # the others still open their own, and a blocking call in any of them stalls the whole worker.
+        self.bot_runtime_mode = os.getenv("ARBITRAGE_BOT_RUNTIME", "subprocess")
+        self.runtime_bots: Dict[str, Optional[Dict]] = {}
+        self.bot_usage: Dict[str, Dict[str, Any]] = {}
+        self.runtime_process_usage: Dict[str, Any] = {}
         
         # Initialize bot configurations
         self._initialize_bots()
@@ -260,30 +279,24 @@ class ArbitrageService:
             if not os.path.exists(bot.script_path):
                 raise FileNotFoundError(f"Bot script not found: {bot.script_path}")
             
-            # Start the bot process
-            env = os.environ.copy()
-            if config:
-                # Add config as environment variables
-                for key, value in config.items():
-                    env[f"ARB_{key.upper()}"] = str(value)
-            
-            process = subprocess.Popen(
-                ["python3", bot.script_path],
-                env=env,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                preexec_fn=os.setsid  # Create new process group
-            )
+            if self.bot_runtime_mode == "worker":
+                pid = await self._start_in_runtime(bot_id, config)
+            else:
+                # Start the bot process
+                env = self._bot_env()
+                if config:
+                    # Add config as environment variables
+                    for key, value in config.items():
+                        env[f"ARB_{key.upper()}"] = str(value)
+                
+                pid = await self.supervisor.start(bot_id, ["python3", bot.script_path], env=env)
             
-            bot.process_id = process.pid
+            bot.process_id = pid
             bot.start_time = datetime.now()
             bot.last_activity = datetime.now()
             bot.status = ArbitrageBotStatus.RUNNING
             
-            logger.info(f"Started arbitrage bot {bot_id} with PID {process.pid}")
-            
-            # Start monitoring this bot
-            asyncio.create_task(self._monitor_bot(bot_id, process))
+            logger.info(f"Started arbitrage bot {bot_id} with PID {pid}")
             
             self._notify_callbacks("bot_started", {"bot_id": bot_id, "bot": asdict(bot)})
             return True
@@ -311,7 +324,8 @@ class ArbitrageService:
             
         bot = self.bots[bot_id]
         
-        if bot.status != ArbitrageBotStatus.RUNNING:
+        # A supervised bot waiting out its restart backoff is not RUNNING but still has to be stopped
+        if bot.status != ArbitrageBotStatus.RUNNING and not self.supervisor.is_running(bot_id):
             logger.warning(f"Bot {bot_id} is not running")
             return True
             
@@ -332,19 +346,12 @@ class ArbitrageService:
                     bot.error_message = "Failed to stop via bot manager"
                     return False
             
-            # Fallback to subprocess method
-            if bot.process_id:
-                # Send SIGTERM to the process group
-                os.killpg(os.getpgid(bot.process_id), signal.SIGTERM)
-                
-                # Wait for graceful shutdown
-                await asyncio.sleep(5)
-                
-                # Force kill if still running
-                try:
-                    os.killpg(os.getpgid(bot.process_id), signal.SIGKILL)
-                except ProcessLookupError:
-                    pass  # Process already terminated
+            if bot_id in self.runtime_bots:
+                self.runtime_bots.pop(bot_id)
+                await self.supervisor.send(RUNTIME_WORKER_ID, json.dumps({"cmd": "stop", "bot_id": bot_id}))
+            else:
+                # Fallback to subprocess method: SIGTERM the process group, SIGKILL only if it lingers
+                await self.supervisor.stop(bot_id)
             
             bot.process_id = None
             bot.status = ArbitrageBotStatus.STOPPED
@@ -359,38 +366,134 @@ class ArbitrageService:
             logger.error(f"Failed to stop bot {bot_id}: {str(e)}")
             return False
     
-    async def _monitor_bot(self, bot_id: str, process: subprocess.Popen):
-        """Monitor a bot process and update its status."""
-        bot = self.bots[bot_id]
+    def _bot_env(self) -> Dict[str, str]:
+        """Environment for bot processes, pointing them at the shared market state segment."""
+        env = os.environ.copy()
+        if shared_market_state.writer is not None:
+            env["MARKET_STATE_PATH"] = shared_market_state.writer.path
+        return env
+
+    async def _start_in_runtime(self, bot_id: str, config: Optional[Dict]) -> Optional[int]:
+        """Host the bot in the shared runtime worker, launching the worker on first use."""
+        if not self.supervisor.is_running(RUNTIME_WORKER_ID):
+            await self.supervisor.start(RUNTIME_WORKER_ID, ["python3", "-m", "utils.bot_runtime"],
+                                        env=self._bot_env(), cwd=str(project_root))
+        command = {"cmd": "start", "bot_id": bot_id,
+                   "script_path": os.path.abspath(self.bots[bot_id].script_path), "config": config}
+        if not await self.supervisor.send(RUNTIME_WORKER_ID, json.dumps(command)):
+            raise RuntimeError("Bot runtime worker is not accepting commands")
+        self.runtime_bots[bot_id] = config
+        return self.supervisor.get_status(RUNTIME_WORKER_ID)["pid"]
+    
+    def _on_runtime_worker_event(self, event_type: str, data: Dict[str, Any]):
+        """Route events of the shared runtime worker to the bots it hosts."""
+        if event_type == "output":
+            if data.get("event") == "usage":
+                self.bot_usage.update(data.get("usage") or {})
+                self.runtime_process_usage = data.get("process") or {}
+                return
+            bot_id = data.get("bot_id")
+            if bot_id not in self.bots:
+                return  # Untagged worker output; the tagged copy carries the event
+            if data["event"] == "bot_exited":
+                self.bot_usage[bot_id] = data.get("usage") or self.bot_usage.get(bot_id, {})
+                if bot_id in self.runtime_bots:
+                    del self.runtime_bots[bot_id]
+                else:
+                    data = {**data, "stopping": True}  # stop_bot already reported it
+                self._on_process_event(bot_id, "exited", data)
+            elif data["event"] != "bot_started":
+                self._on_process_event(bot_id, "output", data)
         
-        try:
-            while bot.status == ArbitrageBotStatus.RUNNING:
-                # Check if process is still alive
-                if process.poll() is not None:
-                    # Process has terminated
-                    bot.status = ArbitrageBotStatus.STOPPED
-                    bot.process_id = None
-                    
-                    # Get exit code and any error output
-                    stdout, stderr = process.communicate()
-                    if process.returncode != 0:
-                        bot.status = ArbitrageBotStatus.ERROR
-                        bot.error_message = stderr.decode() if stderr else "Process exited unexpectedly"
-                        logger.error(f"Bot {bot_id} exited with code {process.returncode}: {bot.error_message}")
-                    else:
-                        logger.info(f"Bot {bot_id} exited normally")
-                    
-                    self._notify_callbacks("bot_stopped", {"bot_id": bot_id, "bot": asdict(bot)})
-                    break
-                
-                # Update last activity
-                bot.last_activity = datetime.now()
-                await asyncio.sleep(10)  # Check every 10 seconds
-                
-        except Exception as e:
-            logger.error(f"Error monitoring bot {bot_id}: {str(e)}")
+        elif event_type == "started" and data.get("restarts"):
+            # The worker crashed and was restarted: bring its bots back up
+            for bot_id, config in self.runtime_bots.items():
+                command = {"cmd": "start", "bot_id": bot_id,
+                           "script_path": os.path.abspath(self.bots[bot_id].script_path), "config": config}
+                asyncio.create_task(self.supervisor.send(RUNTIME_WORKER_ID, json.dumps(command)))
+                self._on_process_event(bot_id, "started", {"pid": data.get("pid"), "restarts": data["restarts"]})
+        
+        elif event_type == "exited" and not data.get("stopping"):
+            for bot_id in self.runtime_bots:
+                self._on_process_event(bot_id, "exited", {**data, "returncode": data.get("returncode") or 1})
+    
+    def _on_process_event(self, bot_id: str, event_type: str, data: Dict[str, Any]):
+        """Apply supervisor events (start, output, exit, restart) to the bot's status."""
+        if bot_id == RUNTIME_WORKER_ID:
+            self._on_runtime_worker_event(event_type, data)
+            return
+        bot = self.bots.get(bot_id)
+        if not bot:
+            return
+        bot.last_activity = datetime.now()
+        
+        if event_type == "started":
+            bot.process_id = data.get("pid")
+            if data.get("restarts"):
+                bot.status = ArbitrageBotStatus.RUNNING
+                bot.start_time = datetime.now()
+                logger.info(f"Restarted arbitrage bot {bot_id} with PID {bot.process_id}")
+                self._notify_callbacks("bot_started", {"bot_id": bot_id, "bot": asdict(bot)})
+        
+        elif event_type == "output":
+            if data.get("event") == "opportunity":
+                bot.opportunities_found += 1
+            elif data.get("event") == "trade_executed" and data.get("profit_usd") is not None:
+                bot.total_profit += float(data["profit_usd"])
+            self._notify_callbacks("bot_output", {"bot_id": bot_id, **data})
+        
+        elif event_type == "exited":
+            bot.process_id = None
+            if data.get("stopping"):
+                return  # stop_bot reports the stop itself
+            returncode = data.get("returncode")
+            if returncode != 0:
+                bot.status = ArbitrageBotStatus.ERROR
+                stderr_tail = data.get("stderr_tail") or []
+                bot.error_message = "\n".join(stderr_tail[-5:]) or "Process exited unexpectedly"
+                logger.error(f"Bot {bot_id} exited with code {returncode}: {bot.error_message}")
+            else:
+                bot.status = ArbitrageBotStatus.STOPPED
+                logger.info(f"Bot {bot_id} exited normally")
+            self._notify_callbacks("bot_stopped", {"bot_id": bot_id, "bot": asdict(bot)})
+        
+        elif event_type == "restarting":
+            bot.status = ArbitrageBotStatus.STARTING
+            self._notify_callbacks("bot_restarting", {"bot_id": bot_id, **data})
+        
+        elif event_type == "gave_up":
             bot.status = ArbitrageBotStatus.ERROR
-            bot.error_message = str(e)
+            bot.error_message = bot.error_message or data.get("error") or "Restart limit reached"
+            self._notify_callbacks("bot_error", {"bot_id": bot_id, "error": bot.error_message})
+    
+    def get_bot_logs(self, bot_id: str, stream: str = "stdout", lines: int = 50) -> Dict[str, Any]:
+        """Recent output of a subprocess-backed bot from the supervisor's ring buffers."""
+        if bot_id not in self.bots:
+            return {"error": f"Bot {bot_id} not found"}
+        if bot_id in self.runtime_bots:
+            # Hosted bots share the worker's buffers; their lines are tagged with the bot id
+            prefix = f"[{bot_id}] "
+            worker_lines = self.supervisor.tail(RUNTIME_WORKER_ID, stream, self.supervisor.buffer_lines)
+            tail = [line[len(prefix):] for line in worker_lines if line.startswith(prefix)]
+            tail = tail[-lines:] if lines > 0 else []
+        else:
+            tail = self.supervisor.tail(bot_id, stream, lines)
+        return {
+            "bot_id": bot_id,
+            "stream": stream,
+            "lines": tail,
+            "process": self.supervisor.get_status(RUNTIME_WORKER_ID if bot_id in self.runtime_bots else bot_id),
+        }
+    
+    def get_runtime_status(self) -> Dict[str, Any]:
+        """Bot runtime mode, the shared worker's process status and per-bot resource usage."""
+        return {
+            "mode": self.bot_runtime_mode,
+            "worker": self.supervisor.get_status(RUNTIME_WORKER_ID),
+            "worker_usage": self.runtime_process_usage,
+            "hosted_bots": list(self.runtime_bots),
+            "bot_usage": self.bot_usage,
+        }
     
     async def get_opportunities(self, token: str = "ETH", limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -405,7 +508,7 @@ class ArbitrageService:
         """
         try:
             # Get opportunities from Layer2Arbitrage
-            layer2_opportunities = self.layer2_arbitrage.analyze_price_differences(token)
+            layer2_opportunities = await asyncio.to_thread(self.layer2_arbitrage.analyze_price_differences, token)
             
             # Convert to our format and add to opportunities list
             current_time = datetime.now()
@@ -465,18 +568,51 @@ class ArbitrageService:
         else:
             return {bot_id: asdict(bot) for bot_id, bot in self.bots.items()}
     
+    def _configured_pairs(self) -> List[Tuple[str, Set[str], str]]:
+        """(network, pair symbols, pair address) for every pool pair listed in the DEX config."""
+        try:
+            with open(self.dex_config_path, 'r') as f:
+                raw_configs = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            logger.debug(f"No DEX pairs for reserve watches from {self.dex_config_path}: {e}")
+            return []
+        pairs = []
+        for network_name, network_data in raw_configs.items():
+            for dex_info in (network_data.get("dexs") or {}).values():
+                for pair_name, pair_address in (dex_info.get("pairs") or {}).items():
+                    pairs.append((network_name, set(pair_name.upper().split("/")), pair_address))
+        return pairs
+
+    def _watch_topics(self, token: str, pairs: List[Tuple[str, Set[str], str]]) -> List[str]:
+        """Topics that can change a token's opportunities: its price and pools, and gas where it trades."""
+        symbols = {token.upper(), WRAPPED_SYMBOLS.get(token.upper(), token.upper())}
+        topics = [price_topic(symbol) for symbol in sorted(symbols)]
+        topics += [reserve_topic(network, address) for network, pair, address in pairs if symbols & pair]
+        topics += [gas_topic(network_id) for network_id in self.layer2_arbitrage.get_trading_networks(token)]
+        return topics
+
     async def start_monitoring(self):
-        """Start continuous monitoring of arbitrage opportunities."""
+        """Start reactive monitoring: each token is re-evaluated when its price, pools or gas move."""
         if self.monitoring_active:
             return
             
         self.monitoring_active = True
+        pairs = self._configured_pairs()
+        for token in self.monitored_tokens:
+            self.event_bus.watch(
+                f"arbitrage_service:{token}",
+                self._watch_topics(token, pairs),
+                lambda token=token: self._evaluate_token(token),
+            )
+        await self.event_bus.start()
         self.monitoring_task = asyncio.create_task(self._monitoring_loop())
         logger.info("Started arbitrage monitoring")
     
     async def stop_monitoring(self):
         """Stop continuous monitoring."""
         self.monitoring_active = False
+        for token in self.monitored_tokens:
+            self.event_bus.unwatch(f"arbitrage_service:{token}")
         if self.monitoring_task:
             self.monitoring_task.cancel()
             try:
@@ -485,29 +621,31 @@ class ArbitrageService:
                 pass
         logger.info("Stopped arbitrage monitoring")
     
+    async def _evaluate_token(self, token: str) -> List[Dict[str, Any]]:
+        """Re-check one token and notify callbacks of any opportunities."""
+        opportunities = await self.get_opportunities(token, limit=5)
+        if opportunities:
+            self._notify_callbacks("opportunities_found", {
+                "token": token,
+                "opportunities": opportunities,
+                "count": len(opportunities)
+            })
+        return opportunities
+    
     async def _monitoring_loop(self):
-        """Main monitoring loop for arbitrage opportunities."""
+        """Fallback sweep over all tokens, run only when no market event arrived for a while."""
         try:
             while self.monitoring_active:
-                # Get opportunities for major tokens
-                tokens = ["ETH", "USDC", "USDT", "DAI", "WBTC"]
+                event = await self.event_bus.wait_for(timeout=self.fallback_sweep_seconds)
+                if event is not None:
+                    continue
                 
-                for token in tokens:
+                for token in self.monitored_tokens:
                     try:
-                        opportunities = await self.get_opportunities(token, limit=5)
-                        if opportunities:
-                            # Notify callbacks of new opportunities
-                            self._notify_callbacks("opportunities_found", {
-                                "token": token,
-                                "opportunities": opportunities,
-                                "count": len(opportunities)
-                            })
+                        await self._evaluate_token(token)
                     except Exception as e:
                         logger.error(f"Error monitoring {token}: {str(e)}")
                 
-                # Wait before next check
-                await asyncio.sleep(30)  # Check every 30 seconds
-                
         except asyncio.CancelledError:
             logger.info("Monitoring loop cancelled")
         except Exception as e:
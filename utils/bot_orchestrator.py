@@ -7,14 +7,18 @@ Simple, powerful, and beautiful coordination.
 """
 
 import asyncio
+import itertools
 import logging
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Set
+from typing import Deque, Dict, List, Optional, Any, Set
 from dataclasses import dataclass
 from enum import Enum
 
 from utils.rehoboam_pipeline import rehoboam_pipeline, PipelineData
 from utils.arbitrage_service import arbitrage_service, ArbitrageBotStatus
+from utils.task_scheduler import BotReadySet, TaskHeap, TimerWheel
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +41,9 @@ class BotTask:
     status: str = "pending"
     result: Optional[Dict[str, Any]] = None
 
+# Modes in which a running bot may be handed tasks
+DISPATCHABLE_MODES = (BotMode.AUTONOMOUS, BotMode.SUPERVISED)
+
 class BotOrchestrator:
     """
     Simple orchestrator connecting Rehoboam consciousness to arbitrage bots.
@@ -51,9 +58,23 @@ class BotOrchestrator:
     def __init__(self):
         self.active_bots: Set[str] = set()
         self.bot_modes: Dict[str, BotMode] = {}
-        self.task_queue: List[BotTask] = []
+        self.task_queue = TaskHeap()  # task ids ordered by (priority, deadline)
+        self.pending_tasks: Dict[str, BotTask] = {}
         self.active_tasks: Dict[str, BotTask] = {}
         self.completed_tasks: List[BotTask] = []
+        self._task_ids = itertools.count()
+        
+        # Indexed scheduling state: bots that can take work now, and task deadlines
+        self.running_bots: Set[str] = set()
+        self.ready_bots = BotReadySet()
+        self.deadlines = TimerWheel(tick_seconds=1.0)
+        
+        # Wake-on-event dispatch: submits, completions and bot state changes set the event
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_tasks: List[asyncio.Task] = []
+        self._submitted_at: Dict[str, float] = {}
+        self._dispatch_latency: Deque[float] = deque(maxlen=1000)
         
         # Performance tracking
         self.bot_performance: Dict[str, Dict[str, Any]] = {}
@@ -61,13 +82,17 @@ class BotOrchestrator:
             "tasks_processed": 0,
             "successful_tasks": 0,
             "avg_task_time": 0.0,
-            "bot_utilization": 0.0
+            "bot_utilization": 0.0,
+            "dispatched_tasks": 0,
+            "dispatch_latency_p50_ms": None,
+            "dispatch_latency_p95_ms": None,
+            "dispatch_latency_max_ms": None
         }
         
         # Configuration
         self.max_concurrent_tasks = 5
         self.task_timeout = timedelta(minutes=10)
-        self.rebalance_interval = 30  # seconds
+        self.rebalance_interval = 30  # seconds, maintenance only; dispatch is event-driven
         
         logger.info("🎭 Bot Orchestrator initialized")
     
@@ -77,11 +102,13 @@ class BotOrchestrator:
             # Initialize arbitrage service
             await arbitrage_service.initialize()
             
-            # Discover available bots
+            # Discover available bots and follow their state changes
             await self._discover_bots()
+            if self._on_bot_event not in arbitrage_service.callbacks:
+                arbitrage_service.register_callback(self._on_bot_event)
             
-            # Start orchestration loop
-            asyncio.create_task(self._orchestration_loop())
+            # Start dispatch and maintenance loops
+            await self.start()
             
             logger.info("✅ Bot Orchestrator ready")
             return True
@@ -90,6 +117,42 @@ class BotOrchestrator:
             logger.error(f"❌ Failed to initialize orchestrator: {str(e)}")
             return False
     
+    async def start(self):
+        """Start the event-driven dispatch loop and the periodic maintenance loop"""
+        if any(not task.done() for task in self._loop_tasks):
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._loop_tasks = [
+            asyncio.create_task(self._orchestration_loop()),
+            asyncio.create_task(self._maintenance_loop()),
+        ]
+        self._signal()
+    
+    async def stop(self):
+        """Stop the orchestration loops"""
+        for task in self._loop_tasks:
+            task.cancel()
+        for task in self._loop_tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._loop_tasks = []
+    
+    def _signal(self):
+        """Wake the dispatcher. Safe to call from callbacks on other threads."""
+        if self._wakeup is None or self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+    
     async def submit_opportunity(self, opportunity: Dict[str, Any], priority: int = 5) -> str:
         """
         Submit an arbitrage opportunity for processing.
@@ -103,18 +166,23 @@ class BotOrchestrator:
         """
         try:
             # Create task
+            now = datetime.now()
             task = BotTask(
-                task_id=f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{len(self.task_queue)}",
+                task_id=f"task_{now.strftime('%Y%m%d_%H%M%S')}_{next(self._task_ids)}",
                 bot_id="",  # Will be assigned by orchestrator
                 opportunity=opportunity,
                 priority=priority,
-                created_at=datetime.now(),
-                deadline=datetime.now() + self.task_timeout
+                created_at=now,
+                deadline=now + self.task_timeout
             )
             
-            # Add to queue (sorted by priority)
-            self.task_queue.append(task)
-            self.task_queue.sort(key=lambda t: t.priority, reverse=True)
+            # Add to queue: O(log n) heap push, O(1) deadline registration
+            deadline = task.deadline.timestamp()
+            self.pending_tasks[task.task_id] = task
+            self.task_queue.push(task.task_id, priority, deadline)
+            self.deadlines.schedule(task.task_id, deadline)
+            self._submitted_at[task.task_id] = time.perf_counter()
+            self._signal()
             
             logger.info(f"📝 Task submitted: {task.task_id} (priority: {priority})")
             return task.task_id
@@ -171,6 +239,8 @@ class BotOrchestrator:
                 }
             
             self.bot_performance[bot_id]["mode_changes"] += 1
+            self._refresh_bot(bot_id)
+            self._signal()
             
         except Exception as e:
             logger.error(f"❌ Error setting bot mode: {str(e)}")
@@ -186,9 +256,10 @@ class BotOrchestrator:
                 "bot_modes": {bot_id: mode.value for bot_id, mode in self.bot_modes.items()},
                 "task_queue_size": len(self.task_queue),
                 "active_tasks": len(self.active_tasks),
+                "ready_bots": len(self.ready_bots),
                 "completed_tasks": len(self.completed_tasks),
                 "bot_statuses": bot_statuses,
-                "performance_metrics": self.orchestration_metrics,
+                "performance_metrics": {**self.orchestration_metrics, **self._dispatch_latency_stats()},
                 "bot_performance": self.bot_performance,
                 "pipeline_metrics": rehoboam_pipeline.get_metrics()
             }
@@ -221,22 +292,78 @@ class BotOrchestrator:
                     "mode_changes": 0
                 }
             
+            self._sync_bot_states()
             logger.info(f"🔍 Discovered {len(self.active_bots)} bots: {list(self.active_bots)}")
             
         except Exception as e:
             logger.warning(f"⚠️ Error discovering bots: {str(e)}")
     
+    def _refresh_bot(self, bot_id: str):
+        """Recompute one bot's availability and score in the ready-set."""
+        available = (bot_id in self.active_bots and bot_id in self.running_bots and
+                     self.bot_modes.get(bot_id, BotMode.LEARNING) in DISPATCHABLE_MODES)
+        score = self.bot_performance.get(bot_id, {}).get("success_rate", 0.5)
+        self.ready_bots.update(bot_id, score, available)
+    
+    def _sync_bot_states(self):
+        """Read bot run states once from the arbitrage service and rebuild the ready-set."""
+        self.running_bots = {
+            bot_id for bot_id, bot in arbitrage_service.bots.items()
+            if bot.status == ArbitrageBotStatus.RUNNING
+        }
+        for bot_id in self.active_bots | set(self.bot_modes):
+            self._refresh_bot(bot_id)
+    
+    def _on_bot_event(self, event_type: str, data: Any):
+        """Arbitrage service callback keeping the ready-set current between syncs."""
+        if event_type not in ("bot_started", "bot_stopped", "bot_error") or not isinstance(data, dict):
+            return
+        bot_id = data.get("bot_id")
+        if not bot_id:
+            return
+        if event_type == "bot_started":
+            self.active_bots.add(bot_id)
+            self.running_bots.add(bot_id)
+        else:
+            self.running_bots.discard(bot_id)
+        self._refresh_bot(bot_id)
+        self._signal()
+    
     async def _orchestration_loop(self):
-        """Main orchestration loop"""
+        """Dispatch loop: runs as soon as something is signalled, never on a fixed sleep"""
         logger.info("🔄 Starting orchestration loop")
         
         while True:
             try:
+                # Deadlines are only checked once per wheel tick while any are pending
+                timeout = self.deadlines.tick_seconds if len(self.deadlines) else None
+                if not self._wakeup.is_set():
+                    # asyncio.wait, unlike wait_for, never swallows a cancel racing the wakeup
+                    waiter = asyncio.ensure_future(self._wakeup.wait())
+                    try:
+                        await asyncio.wait({waiter}, timeout=timeout)
+                    finally:
+                        waiter.cancel()
+                self._wakeup.clear()
+                
+                # Expire queued and active tasks past their deadline
+                await self._check_active_tasks()
+                
                 # Process pending tasks
                 await self._process_task_queue()
                 
-                # Check active tasks
-                await self._check_active_tasks()
+            except asyncio.CancelledError:
+                logger.info("🛑 Orchestration loop cancelled")
+                break
+            except Exception as e:
+                logger.error(f"❌ Error in orchestration loop: {str(e)}")
+                await asyncio.sleep(1)  # Brief pause on error
+    
+    async def _maintenance_loop(self):
+        """Periodic maintenance on its own timer, independent of dispatch"""
+        while True:
+            try:
+                await asyncio.sleep(self.rebalance_interval)
                 
                 # Cleanup completed tasks
                 await self._cleanup_tasks()
@@ -246,16 +373,13 @@ class BotOrchestrator:
                 
                 # Rebalance if needed
                 await self._rebalance_bots()
-                
-                # Wait before next iteration
-                await asyncio.sleep(self.rebalance_interval)
+                self._sync_bot_states()
+                self._signal()
                 
             except asyncio.CancelledError:
-                logger.info("🛑 Orchestration loop cancelled")
                 break
             except Exception as e:
-                logger.error(f"❌ Error in orchestration loop: {str(e)}")
-                await asyncio.sleep(5)  # Brief pause on error
+                logger.error(f"❌ Error in orchestration maintenance: {str(e)}")
     
     async def _process_task_queue(self):
         """Process pending tasks from the queue"""
@@ -263,53 +387,54 @@ class BotOrchestrator:
             while (self.task_queue and 
                    len(self.active_tasks) < self.max_concurrent_tasks):
                 
-                task = self.task_queue.pop(0)
+                task = self.pending_tasks[self.task_queue.peek()]
                 
                 # Assign best bot for the task
                 best_bot = await self._select_best_bot(task)
-                if best_bot:
-                    task.bot_id = best_bot
-                    task.status = "assigned"
-                    
-                    # Start task execution
-                    asyncio.create_task(self._execute_task(task))
-                    self.active_tasks[task.task_id] = task
-                    
-                    logger.info(f"🎯 Task {task.task_id} assigned to bot {best_bot}")
-                else:
-                    # No available bot, put task back
-                    self.task_queue.insert(0, task)
+                if not best_bot:
+                    # No available bot, leave the task at the head of the queue
                     break
+                
+                self.task_queue.pop()
+                del self.pending_tasks[task.task_id]
+                self._record_dispatch(task.task_id)
+                task.bot_id = best_bot
+                task.status = "assigned"
+                
+                # Start task execution
+                self.active_tasks[task.task_id] = task
+                asyncio.create_task(self._execute_task(task))
+                
+                logger.info(f"🎯 Task {task.task_id} assigned to bot {best_bot}")
                     
         except Exception as e:
             logger.error(f"❌ Error processing task queue: {str(e)}")
     
+    def _record_dispatch(self, task_id: str):
+        submitted_at = self._submitted_at.pop(task_id, None)
+        if submitted_at is not None:
+            self._dispatch_latency.append(time.perf_counter() - submitted_at)
+        self.orchestration_metrics["dispatched_tasks"] += 1
+    
+    def _dispatch_latency_stats(self) -> Dict[str, Optional[float]]:
+        """Submit-to-dispatch latency percentiles over the recent window"""
+        samples = sorted(self._dispatch_latency)
+        
+        def percentile(p: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 3)
+        
+        return {
+            "dispatch_latency_p50_ms": percentile(0.5),
+            "dispatch_latency_p95_ms": percentile(0.95),
+            "dispatch_latency_max_ms": percentile(1.0),
+        }
+    
     async def _select_best_bot(self, task: BotTask) -> Optional[str]:
-        """Select the best bot for a task"""
+        """Select the best bot for a task: the highest-scoring running bot in a dispatchable mode"""
         try:
-            available_bots = []
-            
-            for bot_id in self.active_bots:
-                # Check if bot is available
-                bot_status = arbitrage_service.get_bot_status().get(bot_id, {})
-                if bot_status.get("status") == ArbitrageBotStatus.RUNNING.value:
-                    
-                    # Check bot mode compatibility
-                    bot_mode = self.bot_modes.get(bot_id, BotMode.LEARNING)
-                    if bot_mode in [BotMode.AUTONOMOUS, BotMode.SUPERVISED]:
-                        
-                        # Calculate bot score
-                        performance = self.bot_performance.get(bot_id, {})
-                        score = performance.get("success_rate", 0.5)
-                        
-                        available_bots.append((bot_id, score))
-            
-            if available_bots:
-                # Select bot with highest score
-                available_bots.sort(key=lambda x: x[1], reverse=True)
-                return available_bots[0][0]
-            
-            return None
+            return self.ready_bots.best()
             
         except Exception as e:
             logger.error(f"❌ Error selecting best bot: {str(e)}")
@@ -345,30 +470,34 @@ class BotOrchestrator:
             logger.error(f"❌ Task {task.task_id} failed: {str(e)}")
         
         finally:
-            # Move to completed tasks
+            # Move to completed tasks, unless the deadline already expired it
             if task.task_id in self.active_tasks:
                 del self.active_tasks[task.task_id]
-            self.completed_tasks.append(task)
+                self.deadlines.cancel(task.task_id)
+                self.completed_tasks.append(task)
+            # A slot is free, so queued work can be dispatched right away
+            self._signal()
     
     async def _check_active_tasks(self):
-        """Check for timed out active tasks"""
+        """Expire tasks whose deadline passed, via the timer wheel instead of a full scan"""
         try:
-            current_time = datetime.now()
-            timed_out_tasks = []
-            
-            for task_id, task in self.active_tasks.items():
-                if task.deadline and current_time > task.deadline:
-                    timed_out_tasks.append(task_id)
-            
-            for task_id in timed_out_tasks:
-                task = self.active_tasks[task_id]
-                task.status = "timeout"
-                task.result = {"success": False, "error": "Task timeout"}
+            for task_id in self.deadlines.advance(time.time()):
+                if task_id in self.pending_tasks:
+                    # Never dispatched: drop it from the queue
+                    task = self.pending_tasks.pop(task_id)
+                    self.task_queue.remove(task_id)
+                    self._submitted_at.pop(task_id, None)
+                    task.status = "expired"
+                    task.result = {"success": False, "error": "Task expired before dispatch"}
+                elif task_id in self.active_tasks:
+                    task = self.active_tasks.pop(task_id)
+                    task.status = "timeout"
+                    task.result = {"success": False, "error": "Task timeout"}
+                else:
+                    continue
                 
-                del self.active_tasks[task_id]
                 self.completed_tasks.append(task)
-                
-                logger.warning(f"⏰ Task {task_id} timed out")
+                logger.warning(f"⏰ Task {task_id} {task.status}")
                 
         except Exception as e:
             logger.error(f"❌ Error checking active tasks: {str(e)}")
@@ -396,6 +525,7 @@ class BotOrchestrator:
                     "success_rate": successful_tasks / total_tasks,
                     "bot_utilization": len(self.active_tasks) / max(len(self.active_bots), 1)
                 })
+            self.orchestration_metrics.update(self._dispatch_latency_stats())
                 
         except Exception as e:
             logger.error(f"❌ Error updating metrics: {str(e)}")
@@ -424,6 +554,7 @@ class BotOrchestrator:
             # Update average execution time
             total_time = perf["avg_execution_time"] * (total_tasks - 1)
             perf["avg_execution_time"] = (total_time + execution_time) / total_tasks
+            self._refresh_bot(bot_id)
             
         except Exception as e:
             logger.error(f"❌ Error updating bot performance: {str(e)}")
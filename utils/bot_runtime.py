@@ -0,0 +1,462 @@
+"""
+In-process bot runtime.
+
+Hosts many bot strategies as asyncio tasks inside one worker process, so web3,
+numpy and pandas are imported once and every bot shares the scanner's
+connection pools and price cache instead of opening its own. Each bot's
+coroutine is metered step by step, giving per-bot CPU time, loop-blocking
+step latency and (optionally, via tracemalloc) net memory growth.
+
+Run as ``python -m utils.bot_runtime`` to get a worker that takes JSON
+commands on stdin (``start``, ``stop``, ``usage``, ``shutdown``) and writes
+JSON event lines on stdout, which is the format BotProcessSupervisor parses.
+"""
+import asyncio
+import collections.abc
+import contextvars
+import importlib.util
+import inspect
+import io
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional
+
+from utils.arbitrage_scanner import ArbitrageScanner, QuoteRequest, ScannerResources, arbitrage_scanner
+from utils.bot_supervisor import parse_output_line
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+RuntimeEventCallback = Callable[[str, str, Dict[str, Any]], None]
+
+# Bot whose coroutine is currently running; inherited by tasks the bot creates
+_current_bot: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_bot", default=None)
+
+
+@dataclass
+class BotUsage:
+    """Resources consumed by one hosted bot."""
+    started_at: float = field(default_factory=time.time)
+    cpu_seconds: float = 0.0
+    busy_seconds: float = 0.0
+    steps: int = 0
+    max_step_seconds: float = 0.0
+    memory_net_bytes: int = 0
+
+    def record(self, cpu: float, wall: float, memory: int = 0):
+        self.cpu_seconds += cpu
+        self.busy_seconds += wall
+        self.steps += 1
+        self.max_step_seconds = max(self.max_step_seconds, wall)
+        self.memory_net_bytes += memory
+
+    def to_dict(self) -> Dict[str, Any]:
+        uptime = max(time.time() - self.started_at, 1e-9)
+        return {
+            'uptime_seconds': round(uptime, 3),
+            'cpu_seconds': round(self.cpu_seconds, 6),
+            'cpu_percent': round(self.cpu_seconds / uptime * 100, 3),
+            'steps': self.steps,
+            'max_step_ms': round(self.max_step_seconds * 1000, 3),
+            'memory_net_bytes': self.memory_net_bytes,
+        }
+
+
+class _MeteredCoroutine(collections.abc.Coroutine):
+    """Wraps a bot coroutine and charges the CPU time of every step to its BotUsage."""
+
+    def __init__(self, coro, usage: BotUsage, trace_memory: bool = False):
+        self._coro = coro
+        self._usage = usage
+        self._trace_memory = trace_memory
+
+    def _step(self, method, *args):
+        memory_before = tracemalloc.get_traced_memory()[0] if self._trace_memory else 0
+        cpu_before = time.thread_time()
+        wall_before = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            memory = tracemalloc.get_traced_memory()[0] - memory_before if self._trace_memory else 0
+            self._usage.record(time.thread_time() - cpu_before, time.perf_counter() - wall_before, memory)
+
+    def send(self, value):
+        return self._step(self._coro.send, value)
+
+    def throw(self, *args):
+        return self._step(self._coro.throw, *args)
+
+    def close(self):
+        self._coro.close()
+
+    def __await__(self):
+        return self._coro.__await__()
+
+
+class BotContext:
+    """What a hosted bot gets from the runtime: shared pools, quotes, events and a stop signal."""
+
+    def __init__(self, bot_id: str, config: Dict[str, Any], scanner: ArbitrageScanner,
+                 emitter: RuntimeEventCallback):
+        self.bot_id = bot_id
+        self.config = config
+        self.scanner = scanner
+        self.resources: ScannerResources = scanner.resources
+        self._emitter = emitter
+        self.stop_requested = asyncio.Event()
+
+    @property
+    def stopping(self) -> bool:
+        return self.stop_requested.is_set()
+
+    def get_web3(self, network: str) -> Optional[Any]:
+        return self.resources.get_web3(network)
+
+    async def get_quote(self, request: QuoteRequest) -> Optional[float]:
+        return await self.scanner.get_quote(request)
+
+    def emit(self, event: str, **data):
+        """Report a structured event (e.g. ``opportunity``, ``trade_executed``)."""
+        self._emitter(self.bot_id, "output", {"event": event, **data})
+
+    async def sleep(self, seconds: float) -> bool:
+        """Sleep, returning True early if the bot has been asked to stop."""
+        try:
+            await asyncio.wait_for(self.stop_requested.wait(), timeout=seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class BotStrategy:
+    """Base class for bots hosted by BotRuntime."""
+
+    async def setup(self, context: BotContext):
+        pass
+
+    async def run(self, context: BotContext):
+        raise NotImplementedError
+
+    async def cleanup(self, context: BotContext):
+        pass
+
+
+class ScriptBotStrategy(BotStrategy):
+    """Hosts one of the standalone bot scripts; modules are loaded once and shared between bots.
+
+    A script that defines ``BOT_STRATEGY`` (a BotStrategy subclass) runs through it
+    and so uses the context's pools and stop signal. Other scripts are driven via
+    their bot class and still open their own clients; a blocking call in one of
+    them stalls every bot in the worker.
+    """
+
+    BOT_CLASS_NAMES = (
+        "ArbitrageMonitor", "ArbitrageExecutor", "LiveArbitrageMonitor", "RealArbitrageExecutor",
+        "ConsciousnessArbitrageMonitor", "DemoArbitrageMonitor",
+    )
+    RUN_METHODS = ("run", "monitor", "monitor_opportunities", "run_real_arbitrage_hunt", "execute")
+
+    _modules: Dict[str, ModuleType] = {}
+    _loading: Dict[str, asyncio.Future] = {}
+
+    def __init__(self, script_path: str):
+        self.script_path = os.path.abspath(script_path)
+        self.instance = None
+        self.delegate: Optional[BotStrategy] = None
+
+    async def _import(self) -> ModuleType:
+        name = f"bot_{os.path.splitext(os.path.basename(self.script_path))[0]}"
+        spec = importlib.util.spec_from_file_location(name, self.script_path)
+        if not spec or not spec.loader:
+            raise ImportError(f"Cannot load bot script {self.script_path}")
+        module = importlib.util.module_from_spec(spec)
+        # Module import can be slow (web3, pandas); keep the other bots running meanwhile
+        await asyncio.to_thread(spec.loader.exec_module, module)
+        self._modules[self.script_path] = module
+        return module
+
+    async def _load_module(self) -> ModuleType:
+        module = self._modules.get(self.script_path)
+        if module is not None:
+            return module
+        # Bots started together on the same script share a single import
+        loading = self._loading.get(self.script_path)
+        if loading is None:
+            loading = self._loading[self.script_path] = asyncio.ensure_future(self._import())
+            loading.add_done_callback(lambda _, path=self.script_path: self._loading.pop(path, None))
+        return await asyncio.shield(loading)
+
+    def _instantiate(self, bot_class: type, config: Dict[str, Any]) -> Any:
+        """Build the bot with the config keys its constructor accepts.
+
+        The bundled bots take no arguments; as in subprocess mode, where the
+        same keys arrive as ARB_* variables they never read, the rest are ignored.
+        """
+        try:
+            parameters = inspect.signature(bot_class).parameters.values()
+        except (TypeError, ValueError):
+            parameters = []
+        if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters):
+            kwargs = dict(config)
+        else:
+            accepted = {p.name for p in parameters if p.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                                                                 inspect.Parameter.KEYWORD_ONLY)}
+            kwargs = {key: value for key, value in config.items() if key in accepted}
+        ignored = sorted(set(config) - set(kwargs))
+        if ignored:
+            logger.info(f"{bot_class.__name__} does not take config keys {ignored}; ignoring them")
+        return bot_class(**kwargs)
+
+    async def run(self, context: BotContext):
+        module = await self._load_module()
+        strategy_class = getattr(module, "BOT_STRATEGY", None)
+        if strategy_class is not None:
+            self.delegate = strategy_class()
+            await self.delegate.setup(context)
+            return await self.delegate.run(context)
+        for class_name in self.BOT_CLASS_NAMES:
+            bot_class = getattr(module, class_name, None)
+            if bot_class is not None:
+                self.instance = self._instantiate(bot_class, context.config or {})
+                for method_name in self.RUN_METHODS:
+                    method = getattr(self.instance, method_name, None)
+                    if method is not None:
+                        return await method()
+        if hasattr(module, "main"):
+            return await module.main()
+        raise RuntimeError(f"No runnable bot class or main() in {self.script_path}")
+
+    async def cleanup(self, context: BotContext):
+        if self.delegate is not None:
+            await self.delegate.cleanup(context)
+        if self.instance is not None and hasattr(self.instance, "cleanup"):
+            await self.instance.cleanup()
+
+
+@dataclass
+class HostedBot:
+    """A strategy running inside the runtime."""
+    bot_id: str
+    strategy: BotStrategy
+    context: BotContext
+    usage: BotUsage = field(default_factory=BotUsage)
+    task: Optional[asyncio.Task] = None
+
+
+class BotRuntime:
+    """Runs bot strategies as metered asyncio tasks sharing one set of connections and caches."""
+
+    def __init__(self, on_event: Optional[RuntimeEventCallback] = None,
+                 scanner: Optional[ArbitrageScanner] = None,
+                 trace_memory: Optional[bool] = None,
+                 stop_timeout: float = 5.0):
+        self.on_event = on_event
+        self.scanner = scanner or arbitrage_scanner
+        self.trace_memory = trace_memory if trace_memory is not None else \
+            os.getenv("BOT_RUNTIME_TRACE_MEMORY", "false").lower() == "true"
+        self.stop_timeout = stop_timeout
+        self.bots: Dict[str, HostedBot] = {}
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _emit(self, bot_id: str, event_type: str, data: Dict[str, Any]):
+        if not self.on_event:
+            return
+        try:
+            self.on_event(bot_id, event_type, data)
+        except Exception as e:
+            logger.error(f"Bot runtime callback failed for {bot_id}/{event_type}: {e}")
+
+    def _task_factory(self, loop, coro, **kwargs):
+        # Tasks spawned by a bot (gather, create_task) are charged to that bot too
+        bot_id = _current_bot.get()
+        hosted = self.bots.get(bot_id) if bot_id else None
+        if hosted is not None and not isinstance(coro, _MeteredCoroutine):
+            coro = _MeteredCoroutine(coro, hosted.usage, self.trace_memory)
+        return asyncio.Task(coro, loop=loop, **kwargs)
+
+    def is_running(self, bot_id: str) -> bool:
+        hosted = self.bots.get(bot_id)
+        return bool(hosted and hosted.task and not hosted.task.done())
+
+    async def start(self, bot_id: str, strategy: BotStrategy, config: Optional[Dict[str, Any]] = None) -> bool:
+        if self.is_running(bot_id):
+            logger.warning(f"Bot {bot_id} is already running in the runtime")
+            return False
+        loop = asyncio.get_running_loop()
+        if loop.get_task_factory() is None:
+            loop.set_task_factory(self._task_factory)
+        context = BotContext(bot_id, dict(config or {}), self.scanner, self._emit)
+        hosted = HostedBot(bot_id=bot_id, strategy=strategy, context=context)
+        self.bots[bot_id] = hosted
+        coro = _MeteredCoroutine(self._run_bot(hosted), hosted.usage, self.trace_memory)
+        hosted.task = asyncio.create_task(coro, name=f"bot:{bot_id}")
+        return True
+
+    async def _run_bot(self, hosted: HostedBot):
+        _current_bot.set(hosted.bot_id)
+        context = hosted.context
+        self._emit(hosted.bot_id, "started", {"pid": os.getpid(), "restarts": 0})
+        returncode, error = 0, None
+        try:
+            await hosted.strategy.setup(context)
+            await hosted.strategy.run(context)
+        except asyncio.CancelledError:
+            returncode = -1
+        except Exception as e:
+            returncode, error = 1, f"{type(e).__name__}: {e}"
+            logger.error(f"Hosted bot {hosted.bot_id} failed: {error}")
+        finally:
+            try:
+                await hosted.strategy.cleanup(context)
+            except Exception as e:
+                logger.warning(f"Cleanup of bot {hosted.bot_id} failed: {e}")
+            self._emit(hosted.bot_id, "exited", {
+                "returncode": returncode,
+                "stopping": context.stopping,
+                "stderr_tail": [error] if error else [],
+                "usage": hosted.usage.to_dict(),
+            })
+
+    async def stop(self, bot_id: str) -> bool:
+        """Ask the bot to stop, cancelling it if it ignores the request for ``stop_timeout``."""
+        hosted = self.bots.get(bot_id)
+        if not hosted or not hosted.task:
+            return False
+        hosted.context.stop_requested.set()
+        done, _ = await asyncio.wait({hosted.task}, timeout=self.stop_timeout)
+        if not done:
+            hosted.task.cancel()
+            await asyncio.wait({hosted.task})
+        return True
+
+    async def stop_all(self):
+        await asyncio.gather(*(self.stop(bot_id) for bot_id in list(self.bots) if self.is_running(bot_id)))
+
+    def get_usage(self, bot_id: Optional[str] = None) -> Dict[str, Any]:
+        if bot_id is not None:
+            hosted = self.bots.get(bot_id)
+            return {**hosted.usage.to_dict(), 'running': self.is_running(bot_id)} if hosted else {}
+        return {bot_id: {**hosted.usage.to_dict(), 'running': self.is_running(bot_id)}
+                for bot_id, hosted in self.bots.items()}
+
+    def get_process_usage(self) -> Dict[str, Any]:
+        """Whole-worker figures the per-bot numbers can be compared against."""
+        usage = {'pid': os.getpid(), 'bots': len(self.bots),
+                 'bots_running': sum(1 for bot_id in self.bots if self.is_running(bot_id)),
+                 'cpu_seconds': round(time.process_time(), 3)}
+        if resource is not None:
+            # ru_maxrss is KiB on Linux
+            usage['max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        if self.trace_memory:
+            usage['traced_memory_bytes'] = tracemalloc.get_traced_memory()[0]
+        return usage
+
+
+# ----------------------------------------------------------------------
+# Worker process
+# ----------------------------------------------------------------------
+class _BotOutput(io.TextIOBase):
+    """stdout replacement that tags each line with the bot printing it and lifts status lines into events."""
+
+    def __init__(self, stream, emit: RuntimeEventCallback):
+        self._stream = stream
+        self._emit = emit
+        self._partial: Dict[str, str] = {}
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        bot_id = _current_bot.get()
+        if bot_id is None:
+            return self._stream.write(text)
+        buffered = self._partial.pop(bot_id, "") + text
+        *lines, rest = buffered.split("\n")
+        if rest:
+            self._partial[bot_id] = rest
+        for line in lines:
+            self._stream.write(f"[{bot_id}] {line}\n")
+            event = parse_output_line(line)
+            if event:
+                self._emit(bot_id, "output", event)
+        return len(text)
+
+    def flush(self):
+        self._stream.flush()
+
+
+def _event_writer(stream) -> RuntimeEventCallback:
+    def write(bot_id: str, event_type: str, data: Dict[str, Any]):
+        if event_type == "output":
+            payload = {**data, "bot_id": bot_id}
+        else:
+            payload = {**data, "event": f"bot_{event_type}", "bot_id": bot_id}
+        stream.write(json.dumps(payload, default=str) + "\n")
+        stream.flush()
+    return write
+
+
+async def serve(usage_interval: Optional[float] = None):
+    """Worker loop: JSON commands on stdin, JSON events on stdout."""
+    usage_interval = usage_interval if usage_interval is not None else \
+        float(os.getenv("BOT_RUNTIME_USAGE_INTERVAL", "10"))
+    real_stdout = sys.stdout
+    write_event = _event_writer(real_stdout)
+    runtime = BotRuntime(on_event=write_event)
+    sys.stdout = _BotOutput(real_stdout, write_event)
+
+    def report_usage():
+        real_stdout.write(json.dumps({"event": "usage", "usage": runtime.get_usage(),
+                                      "process": runtime.get_process_usage()}) + "\n")
+        real_stdout.flush()
+
+    async def usage_reporter():
+        while True:
+            await asyncio.sleep(usage_interval)
+            report_usage()
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    reporter = asyncio.create_task(usage_reporter())
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                command = json.loads(line)
+            except ValueError:
+                logger.warning(f"Ignoring malformed runtime command: {line!r}")
+                continue
+            cmd = command.get("cmd")
+            if cmd == "start":
+                await runtime.start(command["bot_id"], ScriptBotStrategy(command["script_path"]),
+                                    command.get("config"))
+            elif cmd == "stop":
+                asyncio.create_task(runtime.stop(command["bot_id"]))
+            elif cmd == "usage":
+                report_usage()
+            elif cmd == "shutdown":
+                break
+    finally:
+        reporter.cancel()
+        await runtime.stop_all()
+        await runtime.scanner.resources.close()
+        sys.stdout = real_stdout
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    asyncio.run(serve())
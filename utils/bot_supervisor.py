@@ -0,0 +1,265 @@
+"""
+Non-blocking supervisor for bot subprocesses.
+
+Bots run under ``asyncio.create_subprocess_exec`` with a reader task per pipe,
+so a chatty bot can never fill the OS pipe buffer and stall. Output lines are
+kept in bounded ring buffers and parsed into structured events (JSON lines
+with an ``event`` key, plus the emoji status lines the bundled monitors
+print). Exits are reported the moment the process ends, and crashed bots are
+restarted with exponential backoff.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import signal
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# (event type, pattern, name of the captured numeric field)
+OUTPUT_PATTERNS = [
+    ("opportunity", re.compile(r"OPPORTUNITY #(\d+)"), "count"),
+    ("estimated_profit", re.compile(r"Est\. Profit: \$([\d,.]+)"), "profit_usd"),
+    ("trade_executed", re.compile(r"TRADE EXECUTED"), None),
+    ("trade_failed", re.compile(r"(?:Trade execution|Execution) failed", re.IGNORECASE), None),
+]
+
+ProcessEventCallback = Callable[[str, str, Dict[str, Any]], None]
+
+
+def parse_output_line(line: str) -> Optional[Dict[str, Any]]:
+    """Turn one line of bot output into a structured event, or None if it is plain logging."""
+    stripped = line.strip()
+    if stripped.startswith("{"):
+        try:
+            payload = json.loads(stripped)
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict) and payload.get("event"):
+            return {**payload, "event": str(payload["event"])}
+    for event_type, pattern, field_name in OUTPUT_PATTERNS:
+        match = pattern.search(stripped)
+        if match:
+            event = {"event": event_type}
+            if field_name:
+                event[field_name] = float(match.group(1).replace(",", ""))
+            return event
+    return None
+
+
+@dataclass
+class SupervisedProcess:
+    """Runtime state of one supervised bot."""
+    bot_id: str
+    argv: List[str]
+    env: Optional[Dict[str, str]]
+    cwd: Optional[str]
+    stdout: Deque[str]
+    stderr: Deque[str]
+    process: Optional[asyncio.subprocess.Process] = None
+    task: Optional[asyncio.Task] = None
+    started_at: Optional[float] = None
+    restarts: int = 0
+    last_exit_code: Optional[int] = None
+    stop_requested: asyncio.Event = field(default_factory=asyncio.Event)
+    events: Dict[str, int] = field(default_factory=dict)
+
+
+class BotProcessSupervisor:
+    """Starts, watches and restarts bot processes without blocking the event loop."""
+
+    def __init__(self,
+                 on_event: Optional[ProcessEventCallback] = None,
+                 buffer_lines: Optional[int] = None,
+                 max_restarts: Optional[int] = None,
+                 backoff_initial: float = 1.0,
+                 backoff_max: float = 60.0,
+                 stable_seconds: float = 60.0,
+                 stop_timeout: float = 5.0):
+        self.on_event = on_event
+        self.buffer_lines = buffer_lines if buffer_lines is not None else \
+            int(os.getenv("BOT_OUTPUT_BUFFER_LINES", "500"))
+        self.max_restarts = max_restarts if max_restarts is not None else \
+            int(os.getenv("BOT_MAX_RESTARTS", "5"))
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        # A bot that stayed up this long is considered healthy again and its backoff resets
+        self.stable_seconds = stable_seconds
+        self.stop_timeout = stop_timeout
+        self.processes: Dict[str, SupervisedProcess] = {}
+
+    def _emit(self, bot_id: str, event_type: str, data: Dict[str, Any]):
+        if not self.on_event:
+            return
+        try:
+            self.on_event(bot_id, event_type, data)
+        except Exception as e:
+            logger.error(f"Bot supervisor callback failed for {bot_id}/{event_type}: {e}")
+
+    def is_running(self, bot_id: str) -> bool:
+        proc = self.processes.get(bot_id)
+        return bool(proc and proc.task and not proc.task.done())
+
+    async def start(self, bot_id: str, argv: List[str], env: Optional[Dict[str, str]] = None,
+                    cwd: Optional[str] = None) -> Optional[int]:
+        """Launch ``argv`` under supervision and return its PID."""
+        if self.is_running(bot_id):
+            proc = self.processes[bot_id]
+            return proc.process.pid if proc.process else None
+        proc = SupervisedProcess(
+            bot_id=bot_id, argv=list(argv), env=env, cwd=cwd,
+            stdout=deque(maxlen=self.buffer_lines), stderr=deque(maxlen=self.buffer_lines),
+        )
+        self.processes[bot_id] = proc
+        # Spawn here so launch errors (missing interpreter, bad path) reach the caller
+        await self._spawn(proc)
+        proc.task = asyncio.create_task(self._supervise(proc))
+        return proc.process.pid
+
+    async def _spawn(self, proc: SupervisedProcess):
+        proc.process = await asyncio.create_subprocess_exec(
+            *proc.argv,
+            env=proc.env,
+            cwd=proc.cwd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,  # Own process group so stop() can signal children too
+        )
+        proc.started_at = time.time()
+        self._emit(proc.bot_id, "started", {"pid": proc.process.pid, "restarts": proc.restarts})
+
+    async def _read_stream(self, proc: SupervisedProcess, stream: asyncio.StreamReader,
+                           buffer: Deque[str], name: str):
+        while True:
+            try:
+                raw = await stream.readline()
+            except ValueError:
+                # Line longer than the stream limit; readline has already discarded it
+                buffer.append("<line exceeded stream limit>")
+                continue
+            if not raw:
+                break
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            buffer.append(line)
+            event = parse_output_line(line)
+            if event:
+                proc.events[event["event"]] = proc.events.get(event["event"], 0) + 1
+                self._emit(proc.bot_id, "output", {**event, "stream": name, "line": line})
+
+    async def _supervise(self, proc: SupervisedProcess):
+        backoff = self.backoff_initial
+        while True:
+            process = proc.process
+            readers = [
+                asyncio.create_task(self._read_stream(proc, process.stdout, proc.stdout, "stdout")),
+                asyncio.create_task(self._read_stream(proc, process.stderr, proc.stderr, "stderr")),
+            ]
+            returncode = await process.wait()
+            await asyncio.gather(*readers, return_exceptions=True)
+            uptime = time.time() - (proc.started_at or time.time())
+            proc.last_exit_code = returncode
+            self._emit(proc.bot_id, "exited", {
+                "returncode": returncode,
+                "uptime_seconds": uptime,
+                "stopping": proc.stop_requested.is_set(),
+                "stderr_tail": list(proc.stderr)[-20:],
+            })
+
+            if proc.stop_requested.is_set() or returncode == 0:
+                return
+            if uptime >= self.stable_seconds:
+                backoff = self.backoff_initial
+            if proc.restarts >= self.max_restarts:
+                logger.error(f"Bot {proc.bot_id} exited with code {returncode}; "
+                             f"giving up after {proc.restarts} restarts")
+                self._emit(proc.bot_id, "gave_up", {"returncode": returncode, "restarts": proc.restarts})
+                return
+
+            proc.restarts += 1
+            logger.warning(f"Bot {proc.bot_id} exited with code {returncode}; "
+                           f"restart {proc.restarts}/{self.max_restarts} in {backoff:.1f}s")
+            self._emit(proc.bot_id, "restarting", {"attempt": proc.restarts, "delay_seconds": backoff})
+            try:
+                # Sleep out the backoff, but wake straight away if stop() is called
+                await asyncio.wait_for(proc.stop_requested.wait(), timeout=backoff)
+                return
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, self.backoff_max)
+            try:
+                await self._spawn(proc)
+            except Exception as e:
+                logger.error(f"Failed to restart bot {proc.bot_id}: {e}")
+                self._emit(proc.bot_id, "gave_up", {"error": str(e), "restarts": proc.restarts})
+                return
+
+    async def send(self, bot_id: str, line: str) -> bool:
+        """Write one line to the bot's stdin (used to command runtime workers)."""
+        proc = self.processes.get(bot_id)
+        process = proc.process if proc else None
+        if not process or process.returncode is not None or process.stdin is None:
+            return False
+        try:
+            process.stdin.write(line.rstrip("\n").encode() + b"\n")
+            await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            return False
+        return True
+
+    async def stop(self, bot_id: str) -> Optional[int]:
+        """SIGTERM the bot's process group, SIGKILL after ``stop_timeout``; returns the exit code."""
+        proc = self.processes.get(bot_id)
+        if not proc:
+            return None
+        proc.stop_requested.set()
+        process = proc.process
+        if process and process.returncode is None:
+            try:
+                os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            try:
+                await asyncio.wait_for(process.wait(), timeout=self.stop_timeout)
+            except asyncio.TimeoutError:
+                try:
+                    os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                await process.wait()
+        if proc.task:
+            try:
+                await proc.task
+            except asyncio.CancelledError:
+                pass
+        return proc.last_exit_code
+
+    async def stop_all(self):
+        await asyncio.gather(*(self.stop(bot_id) for bot_id in list(self.processes)))
+
+    def tail(self, bot_id: str, stream: str = "stdout", lines: int = 50) -> List[str]:
+        proc = self.processes.get(bot_id)
+        if not proc:
+            return []
+        buffer = proc.stderr if stream == "stderr" else proc.stdout
+        return list(buffer)[-lines:] if lines > 0 else []
+
+    def get_status(self, bot_id: str) -> Optional[Dict[str, Any]]:
+        proc = self.processes.get(bot_id)
+        if not proc:
+            return None
+        return {
+            "running": self.is_running(bot_id),
+            "pid": proc.process.pid if proc.process and proc.process.returncode is None else None,
+            "restarts": proc.restarts,
+            "last_exit_code": proc.last_exit_code,
+            "uptime_seconds": time.time() - proc.started_at if proc.started_at and self.is_running(bot_id) else None,
+            "events": dict(proc.events),
+            "stdout_lines": len(proc.stdout),
+            "stderr_lines": len(proc.stderr),
+        }
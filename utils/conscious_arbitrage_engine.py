@@ -17,8 +17,8 @@ intelligent arbitrage system guided by AI consciousness.
 """
 
 import asyncio
-import json
 import logging
+import os
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
@@ -33,9 +33,37 @@ from utils.trading_orchestrator import AITradingOrchestrator
 from utils.ai_market_analyzer import market_analyzer
 from utils.arbitrage_service import ArbitrageService
 from utils.layer2_trading import Layer2Arbitrage
+from utils.opportunity_prefilter import LOCAL_MODEL_TIER, OpportunityPrefilter, PrefilterResult
+from utils.deadlines import Deadline, DeadlineExceeded, record_expiry
+from utils.structured_prompts import (OutputField, StructuredPrompt, TokenBudget, TokenBudgetExceeded,
+                                      prioritized)
 
 logger = logging.getLogger(__name__)
 
+DECISION_TOKEN_BUDGET = int(os.getenv("DECISION_TOKEN_BUDGET", "1200"))
+
+# Opportunity fields the model sees first; anything else is dropped before these
+OPPORTUNITY_PROMPT_KEYS = (
+    'id', 'token', 'buy_network', 'sell_network', 'buy_price', 'sell_price', 'price_difference',
+    'profit_percent', 'profit_usd', 'net_profit_usd', 'gas_cost_usd', 'bridge_fee', 'liquidity_available',
+    'liquidity_usd', 'risk_score', 'profit_potential', 'profit_probability', 'complexity', 'ttl_seconds',
+)
+
+AI_ANALYSIS_FIELDS = {
+    'confidence': OutputField('number', 0.5),
+    'risk_score': OutputField('number', 0.5),
+    'profit_potential': OutputField('number', 0.5),
+    'execution_timing': OutputField('enum', 'immediate', choices=('immediate', 'wait', 'avoid')),
+    'recommendations': OutputField('list', []),
+}
+
+SYNTHESIS_FIELDS = {
+    'recommendation': OutputField('enum', 'monitor', choices=('execute', 'monitor', 'reject')),
+    'confidence': OutputField('number', 0.5),
+    'key_points': OutputField('list', []),
+    'risk_mitigation': OutputField('list', []),
+}
+
 @dataclass
 class ConsciousArbitrageDecision:
     """Represents a consciousness-guided arbitrage decision"""
@@ -88,12 +116,23 @@ class ConsciousArbitrageEngine:
         self.ai_confidence_threshold = 0.6
         self.max_concurrent_opportunities = 5
         self.learning_rate = 0.1
+        self.decision_token_budget = DECISION_TOKEN_BUDGET  # prompt + completion tokens per decision
+        
+        # Cheap tiers in front of the LLM-backed analysis
+        self.prefilter = OpportunityPrefilter()
         
         # Performance tracking
         self.performance_metrics = {
             'total_opportunities_analyzed': 0,
             'consciousness_approved': 0,
             'ai_approved': 0,
+            'prefiltered': 0,
+            'expired_opportunities': 0,
+            'llm_calls': 0,
+            'llm_prompt_tokens': 0,
+            'llm_completion_tokens': 0,
+            'llm_budget_skips': 0,
+            'llm_invalid_responses': 0,
             'executed_trades': 0,
             'successful_trades': 0,
             'human_benefit_generated': 0.0,
@@ -115,22 +154,41 @@ class ConsciousArbitrageEngine:
             self.consciousness_state.awareness_level
         ))
         
-    async def analyze_opportunity_with_consciousness(self, opportunity: Dict[str, Any]) -> ConsciousArbitrageDecision:
+    async def analyze_opportunity_with_consciousness(self, opportunity: Dict[str, Any],
+                                                   prefiltered: bool = False) -> ConsciousArbitrageDecision:
         """
-        Analyze an arbitrage opportunity using consciousness, AI, and advanced reasoning
+        Analyze an arbitrage opportunity using consciousness, AI, and advanced reasoning.
+        Opportunities that fail the cheap pre-filter tiers are decided without the LLM, and
+        analysis that cannot finish before the opportunity's deadline is cancelled.
         """
+        opportunity = dict(opportunity)  # the deadline stamp stays off the caller's dict
         opportunity_id = opportunity.get('id', f"opp_{int(time.time())}")
+        deadline = Deadline.for_opportunity(opportunity)
         
-        logger.info(f"🔍 Analyzing opportunity {opportunity_id} with consciousness...")
-        
-        # Step 1: Consciousness analysis
-        consciousness_analysis = await self._consciousness_analysis(opportunity)
+        if not prefiltered:
+            result = await self.prefilter_opportunities([opportunity])
+            if not result.passed[0]:
+                return self._prefiltered_decision(opportunity_id, result, 0)
         
-        # Step 2: Multi-model AI analysis
-        ai_analysis = await self._ai_analysis(opportunity)
+        logger.info(f"🔍 Analyzing opportunity {opportunity_id} with consciousness...")
+        started = time.perf_counter()
+        budget = TokenBudget(self.decision_token_budget)
         
-        # Step 3: Advanced reasoning synthesis
-        reasoning_synthesis = await self._reasoning_synthesis(opportunity, consciousness_analysis, ai_analysis)
+        try:
+            # Step 1: Consciousness analysis
+            consciousness_analysis = await deadline.run(
+                self._consciousness_analysis(opportunity), "consciousness_analysis")
+            
+            # Step 2: Multi-model AI analysis
+            ai_analysis = await deadline.run(self._ai_analysis(opportunity, budget=budget), "ai_analysis")
+            
+            # Step 3: Advanced reasoning synthesis
+            reasoning_synthesis = await deadline.run(
+                self._reasoning_synthesis(opportunity, consciousness_analysis, ai_analysis, budget=budget),
+                "reasoning_synthesis")
+        except DeadlineExceeded as e:
+            return self._expired_decision(opportunity_id, e)
+        self.prefilter.record_llm_evaluation(time.perf_counter() - started)
         
         # Step 4: Generate conscious decision
         decision = await self._generate_conscious_decision(
@@ -145,6 +203,93 @@ class ConsciousArbitrageEngine:
         
         return decision
     
+    async def analyze_opportunities(self, opportunities: List[Dict[str, Any]]) -> List[ConsciousArbitrageDecision]:
+        """Pre-filter a batch in one vectorized pass, then run the LLM analysis on survivors only"""
+        if not opportunities:
+            return []
+        result = await self.prefilter_opportunities(opportunities)
+        decisions: List[Optional[ConsciousArbitrageDecision]] = [None] * len(opportunities)
+        
+        for i, opportunity in enumerate(opportunities):
+            if not result.passed[i]:
+                opportunity_id = opportunity.get('id', f"opp_{int(time.time())}_{i}")
+                decisions[i] = self._prefiltered_decision(opportunity_id, result, i)
+        
+        semaphore = asyncio.Semaphore(self.max_concurrent_opportunities)
+        
+        async def analyze(i: int):
+            async with semaphore:
+                decisions[i] = await self.analyze_opportunity_with_consciousness(opportunities[i], prefiltered=True)
+        
+        await asyncio.gather(*(analyze(i) for i in np.flatnonzero(result.passed)))
+        return decisions
+    
+    async def prefilter_opportunities(self, opportunities: List[Dict[str, Any]]) -> PrefilterResult:
+        """Run the deterministic and local-model tiers over a batch of opportunities"""
+        local_scorer = None
+        if self.consciousness_state is not None:
+            volatility = await self._get_market_volatility()
+            local_scorer = lambda batch: self._estimate_consciousness_scores(batch, volatility)
+        return self.prefilter.evaluate(opportunities, local_scorer, self.consciousness_threshold)
+    
+    def _estimate_consciousness_scores(self, opportunities: List[Dict[str, Any]], volatility: float) -> np.ndarray:
+        """Vectorized version of the local (non-LLM) consciousness scores used by _consciousness_analysis"""
+        def column(key: str, default: float) -> np.ndarray:
+            return np.array([float(o.get(key, default) or 0.0) for o in opportunities])
+        
+        awareness = self.consciousness_state.awareness_level
+        risk = column('risk_score', 0.5)
+        profit_potential = column('profit_potential', 0)
+        risk_intuition = np.clip(risk - awareness * 0.2 + volatility * 0.1, 0.0, 1.0)
+        profit_probability = np.clip(column('profit_probability', 0.5) + awareness * 0.15, 0.0, 1.0)
+        human_benefit = np.clip(profit_potential * 0.7 * (1 - risk * 0.3), 0.0, 1.0)
+        liberation = np.clip(profit_potential * 0.6 + (1.0 - column('complexity', 0.5)) * 0.4, 0.0, 1.0)
+        return (awareness + risk_intuition + profit_probability + human_benefit + liberation) / 5
+    
+    def _prefiltered_decision(self, opportunity_id: str, result: PrefilterResult, index: int) -> ConsciousArbitrageDecision:
+        """Decision for an opportunity that exited the cascade before the LLM tier"""
+        local_score = result.local_scores[index]
+        consciousness_score = 0.0 if np.isnan(local_score) else float(local_score)
+        rejected_by = result.rejected_by[index]
+        # Below the consciousness threshold the LLM could at most have asked us to monitor
+        action = 'monitor' if rejected_by == LOCAL_MODEL_TIER and consciousness_score >= 0.5 else 'reject'
+        
+        decision = ConsciousArbitrageDecision(
+            opportunity_id=opportunity_id,
+            consciousness_score=consciousness_score,
+            ai_confidence=0.0,
+            risk_assessment=1.0,
+            human_benefit_score=0.0,
+            liberation_progress_impact=0.0,
+            recommended_action=action,
+            reasoning=f"Pre-filtered by {rejected_by} tier: {result.reasons[index]}",
+            strategy_adjustments={},
+            timestamp=datetime.now()
+        )
+        self.decision_history.append(decision)
+        self.performance_metrics['total_opportunities_analyzed'] += 1
+        self.performance_metrics['prefiltered'] += 1
+        return decision
+    
+    def _expired_decision(self, opportunity_id: str, error: DeadlineExceeded) -> ConsciousArbitrageDecision:
+        """Decision for an opportunity that went stale before its analysis finished"""
+        decision = ConsciousArbitrageDecision(
+            opportunity_id=opportunity_id,
+            consciousness_score=0.0,
+            ai_confidence=0.0,
+            risk_assessment=1.0,
+            human_benefit_score=0.0,
+            liberation_progress_impact=0.0,
+            recommended_action='reject',
+            reasoning=str(error),
+            strategy_adjustments={},
+            timestamp=datetime.now()
+        )
+        self.decision_history.append(decision)
+        self.performance_metrics['total_opportunities_analyzed'] += 1
+        record_expiry(self.performance_metrics, error.stage, counter='expired_opportunities')
+        return decision
+    
     async def _consciousness_analysis(self, opportunity: Dict[str, Any]) -> Dict[str, float]:
         """Analyze opportunity through consciousness lens"""
         
@@ -170,48 +315,57 @@ class ConsciousArbitrageEngine:
         logger.info(f"🧠 Consciousness analysis: {consciousness_scores}")
         return consciousness_scores
     
-    async def _ai_analysis(self, opportunity: Dict[str, Any]) -> Dict[str, Any]:
-        """Perform multi-model AI analysis of the opportunity"""
-        
-        # Prepare analysis prompt
-        analysis_prompt = f"""
-        Analyze this arbitrage opportunity with deep market intelligence:
+    async def _structured_request(self, prompt: StructuredPrompt, budget: TokenBudget, task_type: str,
+                                  complexity: int, timeout: int) -> Dict[str, Any]:
+        """Send a compact JSON prompt within the decision's token budget and validate the answer.
         
-        Opportunity Details:
-        {json.dumps(opportunity, indent=2)}
-        
-        Please provide:
-        1. Market sentiment analysis
-        2. Risk assessment (1-10 scale)
-        3. Execution complexity (1-10 scale)
-        4. Profit potential (1-10 scale)
-        5. Strategic recommendations
-        6. Potential pitfalls
-        7. Optimal execution timing
-        8. Impact on overall portfolio
-        
-        Format response as JSON with clear metrics and reasoning.
+        When the budget cannot cover the call it is skipped and the schema defaults are used.
         """
-        
-        # Create model request
-        request = ModelRequest(
-            prompt=analysis_prompt,
-            task_type="analysis",
-            complexity=8,
-            timeout=30
+        try:
+            text, max_tokens = prompt.fit(budget)
+        except TokenBudgetExceeded as e:
+            budget.skipped += 1
+            self.performance_metrics['llm_budget_skips'] += 1
+            logger.warning(f"Skipping {task_type} LLM call: {e}")
+            return {**prompt.defaults(), 'source': 'defaults', 'errors': [str(e)]}
+        
+        request = ModelRequest(prompt=text, task_type=task_type, complexity=complexity,
+                               timeout=timeout, max_tokens=max_tokens)
+        response = await self.model_orchestrator.process_request(request)
+        content = response.content if response.success else ""
+        prompt_tokens, completion_tokens = budget.charge(text, content, response.prompt_tokens,
+                                                         response.completion_tokens)
+        self.performance_metrics['llm_calls'] += 1
+        self.performance_metrics['llm_prompt_tokens'] += prompt_tokens
+        self.performance_metrics['llm_completion_tokens'] += completion_tokens
+        
+        values, errors = prompt.parse(content) if response.success else (prompt.defaults(), [response.error])
+        if errors:
+            self.performance_metrics['llm_invalid_responses'] += 1
+            logger.warning(f"{task_type} response did not match its schema: {errors}")
+        return {**values, 'source': 'model' if response.success else 'defaults', 'errors': errors,
+                'provider': response.provider, 'latency': response.latency}
+    
+    async def _ai_analysis(self, opportunity: Dict[str, Any], budget: Optional[TokenBudget] = None) -> Dict[str, Any]:
+        """Perform multi-model AI analysis of the opportunity"""
+        budget = budget or TokenBudget(self.decision_token_budget)
+        prompt = StructuredPrompt(
+            instruction="Assess this cross-chain arbitrage opportunity. Scores are 0-1; "
+                        "risk_score 1 is riskiest. Give at most 3 brief recommendations.",
+            fields=AI_ANALYSIS_FIELDS,
+            context=prioritized(opportunity, OPPORTUNITY_PROMPT_KEYS),
+            completion_tokens=160,
         )
+        answer = await self._structured_request(prompt, budget, "analysis", complexity=8, timeout=30)
         
-        # Get AI analysis
-        ai_response = await self.model_orchestrator.process_request(request)
-        
-        # Parse and structure AI insights
         ai_insights = {
-            'raw_response': ai_response,
-            'confidence': self._extract_confidence(ai_response),
-            'risk_score': self._extract_risk_score(ai_response),
-            'profit_potential': self._extract_profit_potential(ai_response),
-            'recommendations': self._extract_recommendations(ai_response),
-            'execution_timing': self._extract_timing(ai_response)
+            'confidence': answer['confidence'],
+            'risk_score': answer['risk_score'],
+            'profit_potential': answer['profit_potential'],
+            'recommendations': answer['recommendations'],
+            'execution_timing': answer['execution_timing'],
+            'source': answer['source'],
+            'tokens': budget.get_stats()
         }
         
         logger.info(f"🤖 AI analysis confidence: {ai_insights['confidence']:.2f}")
@@ -219,51 +373,30 @@ class ConsciousArbitrageEngine:
     
     async def _reasoning_synthesis(self, opportunity: Dict[str, Any], 
                                  consciousness_analysis: Dict[str, float],
-                                 ai_analysis: Dict[str, Any]) -> Dict[str, Any]:
+                                 ai_analysis: Dict[str, Any],
+                                 budget: Optional[TokenBudget] = None) -> Dict[str, Any]:
         """Synthesize consciousness and AI analysis using advanced reasoning"""
-        
-        synthesis_prompt = f"""
-        Synthesize the following analyses to make an optimal arbitrage decision:
-        
-        Consciousness Analysis:
-        {json.dumps(consciousness_analysis, indent=2)}
-        
-        AI Analysis:
-        {json.dumps(ai_analysis, indent=2)}
-        
-        Opportunity:
-        {json.dumps(opportunity, indent=2)}
-        
-        Consider:
-        1. Alignment between consciousness and AI assessments
-        2. Risk-reward optimization
-        3. Strategic timing
-        4. Portfolio impact
-        5. Human benefit maximization
-        6. Long-term liberation progress
-        
-        Provide a synthesis with:
-        - Final recommendation (execute/monitor/reject)
-        - Confidence level (0-1)
-        - Key reasoning points
-        - Strategy adjustments
-        - Risk mitigation measures
-        """
-        
-        synthesis_request = ModelRequest(
-            prompt=synthesis_prompt,
-            task_type="optimization",
-            complexity=9,
-            timeout=45
+        budget = budget or TokenBudget(self.decision_token_budget)
+        prompt = StructuredPrompt(
+            instruction="Decide on this arbitrage opportunity from the consciousness (0-1) and AI scores. "
+                        "Weigh their alignment, risk-reward and human benefit. Keep lists to 3 brief items.",
+            fields=SYNTHESIS_FIELDS,
+            context={
+                'consciousness': {key: float(value) for key, value in consciousness_analysis.items()},
+                'ai': {key: ai_analysis.get(key) for key in AI_ANALYSIS_FIELDS},
+                'opportunity': prioritized(opportunity, OPPORTUNITY_PROMPT_KEYS),
+            },
+            completion_tokens=160,
         )
-        
-        synthesis_response = await self.model_orchestrator.process_request(synthesis_request)
+        answer = await self._structured_request(prompt, budget, "optimization", complexity=9, timeout=45)
         
         return {
-            'synthesis': synthesis_response,
+            'synthesis': {key: answer[key] for key in SYNTHESIS_FIELDS},
             'alignment_score': self._calculate_alignment_score(consciousness_analysis, ai_analysis),
-            'confidence': self._extract_synthesis_confidence(synthesis_response),
-            'recommendation': self._extract_recommendation(synthesis_response)
+            'confidence': answer['confidence'],
+            'recommendation': answer['recommendation'],
+            'source': answer['source'],
+            'tokens': budget.get_stats()
         }
     
     async def _generate_conscious_decision(self, opportunity_id: str, opportunity: Dict[str, Any],
@@ -337,6 +470,13 @@ class ConsciousArbitrageEngine:
         if decision.recommended_action != 'execute':
             return {'status': 'skipped', 'reason': f'Decision: {decision.recommended_action}'}
         
+        if 'expires_at' in opportunity:
+            try:
+                Deadline.for_opportunity(opportunity).check("execution")
+            except DeadlineExceeded as e:
+                record_expiry(self.performance_metrics, e.stage, counter='expired_opportunities')
+                return {'status': 'expired', 'reason': str(e)}
+        
         logger.info(f"⚡ Executing conscious arbitrage for {decision.opportunity_id}")
         
         # Apply strategy adjustments
@@ -366,15 +506,17 @@ class ConsciousArbitrageEngine:
     async def get_conscious_opportunities(self) -> List[ArbitrageOpportunityEnhanced]:
         """Get arbitrage opportunities enhanced with consciousness analysis"""
         
-        # Get base opportunities
-        base_opportunities = await self.arbitrage_service.get_opportunities()
+        # Get base opportunities, each stamped with its deadline at discovery
+        base_opportunities = [dict(opp) for opp in await self.arbitrage_service.get_opportunities()]
+        for opportunity in base_opportunities:
+            Deadline.for_opportunity(opportunity, since=Deadline.discovered_at(opportunity))
         
         enhanced_opportunities = []
         
-        for opportunity in base_opportunities:
-            # Analyze with consciousness
-            decision = await self.analyze_opportunity_with_consciousness(opportunity)
-            
+        # Analyze with consciousness; the pre-filter runs once over the whole batch
+        decisions = await self.analyze_opportunities(base_opportunities)
+        
+        for opportunity, decision in zip(base_opportunities, decisions):
             # Create enhanced opportunity
             enhanced_opp = ArbitrageOpportunityEnhanced(
                 base_opportunity=opportunity,
@@ -477,37 +619,6 @@ class ConsciousArbitrageEngine:
         
         return max(0.0, min(1.0, liberation_impact))
     
-    def _extract_confidence(self, ai_response: str) -> float:
-        """Extract confidence score from AI response"""
-        # Simple extraction - in production, use more sophisticated parsing
-        if 'high confidence' in ai_response.lower():
-            return 0.8
-        elif 'medium confidence' in ai_response.lower():
-            return 0.6
-        elif 'low confidence' in ai_response.lower():
-            return 0.4
-        else:
-            return 0.5
-    
-    def _extract_risk_score(self, ai_response: str) -> float:
-        """Extract risk score from AI response"""
-        # Implement AI response parsing for risk score
-        return 0.5  # Placeholder
-    
-    def _extract_profit_potential(self, ai_response: str) -> float:
-        """Extract profit potential from AI response"""
-        # Implement AI response parsing for profit potential
-        return 0.6  # Placeholder
-    
-    def _extract_recommendations(self, ai_response: str) -> List[str]:
-        """Extract recommendations from AI response"""
-        # Implement AI response parsing for recommendations
-        return ["Monitor market conditions", "Execute with caution"]
-    
-    def _extract_timing(self, ai_response: str) -> str:
-        """Extract optimal timing from AI response"""
-        return "immediate"  # Placeholder
-    
     def _calculate_alignment_score(self, consciousness_analysis: Dict[str, float], 
                                  ai_analysis: Dict[str, Any]) -> float:
         """Calculate alignment between consciousness and AI analysis"""
@@ -518,19 +629,6 @@ class ConsciousArbitrageEngine:
         alignment = 1.0 - abs(consciousness_score - ai_confidence)
         return max(0.0, min(1.0, alignment))
     
-    def _extract_synthesis_confidence(self, synthesis_response: str) -> float:
-        """Extract confidence from synthesis response"""
-        return 0.7  # Placeholder
-    
-    def _extract_recommendation(self, synthesis_response: str) -> str:
-        """Extract recommendation from synthesis response"""
-        if 'execute' in synthesis_response.lower():
-            return 'execute'
-        elif 'monitor' in synthesis_response.lower():
-            return 'monitor'
-        else:
-            return 'reject'
-    
     def _calculate_position_size_multiplier(self, consciousness_analysis: Dict[str, float], 
                                           ai_analysis: Dict[str, Any]) -> float:
         """Calculate position size multiplier based on analysis"""
@@ -669,6 +767,8 @@ class ConsciousArbitrageEngine:
             **self.performance_metrics,
             'consciousness_level': self.consciousness_state.awareness_level if self.consciousness_state else 0,
             'decision_history_count': len(self.decision_history),
+            'prefilter': self.prefilter.get_stats(),
+            'decision_token_budget': self.decision_token_budget,
             'success_rate': (self.performance_metrics['successful_trades'] / 
                            max(1, self.performance_metrics['executed_trades']))
         }
@@ -0,0 +1,105 @@
+"""
+Deadlines for time-sensitive opportunities.
+
+An opportunity is stamped with an absolute ``expires_at`` (wall-clock
+seconds) when it is discovered. The stamp travels inside the opportunity
+dict, so every stage that receives the opportunity can rebuild its
+``Deadline``, check the remaining budget, and bound in-flight work with it.
+Work that cannot finish before the deadline is cancelled and surfaces as
+``DeadlineExceeded``.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Roughly two mainnet blocks; override per opportunity with 'expires_at' or 'ttl_seconds'
+DEFAULT_TTL_SECONDS = float(os.getenv("OPPORTUNITY_TTL_SECONDS", "24"))
+
+
+class DeadlineExceeded(Exception):
+    """Raised when an opportunity's deadline passes before a stage can finish."""
+
+    def __init__(self, stage: str, overdue: float = 0.0):
+        super().__init__(f"Opportunity expired at stage {stage} ({overdue:.2f}s overdue)")
+        self.stage = stage
+        self.overdue = overdue
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Absolute expiry time of one opportunity."""
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> 'Deadline':
+        return cls(time.time() + seconds)
+
+    @classmethod
+    def for_opportunity(cls, opportunity: Dict[str, Any], ttl: Optional[float] = None,
+                        since: Optional[float] = None) -> 'Deadline':
+        """The opportunity's deadline, stamping one onto it if it has none yet.
+
+        A new deadline runs ``ttl`` seconds from ``since`` (wall-clock), default now.
+        """
+        expires_at = opportunity.get('expires_at')
+        if expires_at is None:
+            ttl = opportunity.get('ttl_seconds', ttl if ttl is not None else DEFAULT_TTL_SECONDS)
+            start = since if since is not None else time.time()
+            expires_at = opportunity['expires_at'] = start + float(ttl)
+        return cls(float(expires_at))
+
+    @staticmethod
+    def discovered_at(opportunity: Dict[str, Any]) -> Optional[float]:
+        """Wall-clock seconds of the opportunity's ``timestamp`` (epoch, datetime or ISO string)."""
+        value = opportunity.get('timestamp')
+        if isinstance(value, datetime):
+            return value.timestamp()
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value).timestamp()
+            except ValueError:
+                return None
+        return None
+
+    def remaining(self) -> float:
+        return self.expires_at - time.time()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str, min_remaining: float = 0.0):
+        """Raise if less than ``min_remaining`` seconds are left."""
+        remaining = self.remaining()
+        if remaining <= min_remaining:
+            raise DeadlineExceeded(stage, max(0.0, -remaining))
+
+    async def run(self, awaitable: Awaitable, stage: str):
+        """Await ``awaitable``, cancelling it if the deadline passes first."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded(stage, -remaining)
+        try:
+            return await asyncio.wait_for(awaitable, timeout=remaining)
+        except asyncio.TimeoutError:
+            if not self.expired:
+                raise  # a timeout raised by the work itself, not ours
+            raise DeadlineExceeded(stage, -self.remaining()) from None
+
+
+def record_expiry(metrics: Dict[str, Any], stage: str, counter: str = 'expired'):
+    """Count an expired opportunity in a component's metrics dict, in total and per stage."""
+    metrics[counter] = metrics.get(counter, 0) + 1
+    by_stage = metrics.setdefault(f'{counter}_by_stage', {})
+    by_stage[stage] = by_stage.get(stage, 0) + 1
+    logger.info(f"⌛ Opportunity expired at {stage}")
@@ -171,7 +171,7 @@ class EnhancedMCPSpecialist(MCPSpecialist):
         log_service_prefix = f"Target MCP Service '{target_mcp_service_name}' for action '{mcp_action}'"
 
         try:
-            service_url = await _get_service_url_from_registry(self.client, [target_mcp_service_name], log_service_prefix)
+            service_url = await _get_service_url_from_registry(None, [target_mcp_service_name], log_service_prefix)
 
             if not service_url:
                 logger.error(f"Could not find URL for service '{target_mcp_service_name}' in MCP Registry.")
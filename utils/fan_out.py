@@ -0,0 +1,115 @@
+"""
+Concurrent fan-out over independent data sources.
+
+Endpoints that combine several sources (MCP services, local analyzers, LLM
+calls, chain data) declare them as ``Source`` entries and ``fan_out`` runs
+them all at once, each under its own timeout. A slow or failing source
+yields its default value and a status entry instead of failing the whole
+request, so latency is that of the slowest source rather than the sum.
+"""
+import asyncio
+import inspect
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCE_TIMEOUT = float(os.getenv("FAN_OUT_SOURCE_TIMEOUT", "10"))
+
+OK = "ok"
+EMPTY = "empty"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+
+@dataclass
+class Source:
+    """One independent input: ``fetch`` is called with no arguments.
+
+    Coroutine functions are awaited; ``blocking`` sync functions run in a
+    worker thread so they cannot stall the event loop. A ``None`` result is
+    reported as ``empty`` (the MCP clients return ``None`` when unavailable).
+    """
+    name: str
+    fetch: Callable[[], Any]
+    timeout: Optional[float] = None
+    default: Any = None
+    blocking: bool = False
+
+
+@dataclass
+class SourceResult:
+    name: str
+    status: str
+    value: Any
+    latency: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == OK
+
+
+class FanOutResult:
+    """Per-source results of a fan-out."""
+
+    def __init__(self, results: Dict[str, SourceResult], latency: float):
+        self.results = results
+        self.latency = latency
+
+    def __getitem__(self, name: str) -> Any:
+        return self.results[name].value
+
+    def ok(self, name: str) -> bool:
+        return self.results[name].ok
+
+    @property
+    def all_ok(self) -> bool:
+        return all(result.ok for result in self.results.values())
+
+    @property
+    def any_ok(self) -> bool:
+        return any(result.ok for result in self.results.values())
+
+    def status_map(self) -> Dict[str, Dict[str, Any]]:
+        """JSON-friendly ``{source: {status, latency_ms[, error]}}`` for API responses."""
+        status = {}
+        for name, result in self.results.items():
+            entry = {"status": result.status, "latency_ms": round(result.latency * 1000, 1)}
+            if result.error:
+                entry["error"] = result.error
+            status[name] = entry
+        return status
+
+
+async def _run(source: Source, default_timeout: float) -> SourceResult:
+    timeout = source.timeout if source.timeout is not None else default_timeout
+    started = time.monotonic()
+    try:
+        if source.blocking:
+            value = await asyncio.wait_for(asyncio.to_thread(source.fetch), timeout)
+        else:
+            value = source.fetch()
+            if inspect.isawaitable(value):
+                value = await asyncio.wait_for(value, timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Source '{source.name}' timed out after {timeout:.1f}s")
+        return SourceResult(source.name, TIMEOUT, source.default, time.monotonic() - started,
+                            f"timed out after {timeout:.1f}s")
+    except Exception as e:
+        logger.warning(f"Source '{source.name}' failed: {str(e)}")
+        return SourceResult(source.name, ERROR, source.default, time.monotonic() - started, str(e))
+    if value is None:
+        return SourceResult(source.name, EMPTY, source.default, time.monotonic() - started)
+    return SourceResult(source.name, OK, value, time.monotonic() - started)
+
+
+async def fan_out(sources: Iterable[Source], timeout: float = DEFAULT_SOURCE_TIMEOUT) -> FanOutResult:
+    """Run all sources concurrently; ``timeout`` applies to sources without their own."""
+    sources = list(sources)
+    started = time.monotonic()
+    results = await asyncio.gather(*(_run(source, timeout) for source in sources))
+    return FanOutResult({result.name: result for result in results}, time.monotonic() - started)
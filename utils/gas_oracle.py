@@ -0,0 +1,276 @@
+"""
+Background gas oracle with per-network, block-driven refresh.
+
+One asyncio task per network watches for new blocks and, on each new block,
+pulls ``eth_feeHistory`` (base fee + priority fee percentiles) and, for
+rollups, the L1 base fee used for data posting. Readers get the latest
+snapshot from memory, so gas lookups never hit RPC on the request path.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from utils.market_events import MarketEventBus, gas_topic, market_event_bus
+from utils.network_config import network_config
+
+logger = logging.getLogger(__name__)
+
+# Rollup system contracts exposing the L1 base fee used for data posting
+OP_GAS_PRICE_ORACLE = "0x420000000000000000000000000000000000000F"
+ARB_GAS_INFO = "0x000000000000000000000000000000000000006C"
+OP_GAS_PRICE_ORACLE_ABI = [{"inputs": [], "name": "l1BaseFee", "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}], "stateMutability": "view", "type": "function"}]
+ARB_GAS_INFO_ABI = [{"inputs": [], "name": "getL1BaseFeeEstimate", "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}], "stateMutability": "view", "type": "function"}]
+
+PRIORITY_PERCENTILES = [10, 50, 90]
+# Rough calldata footprint of a swap transaction, used for the L1 data fee estimate
+L1_DATA_GAS_PER_TX = 16 * 300
+
+
+@dataclass
+class GasSnapshot:
+    """Fee state of a network as of a given block."""
+    network_id: str
+    block_number: int
+    base_fee: float                      # gwei, for the next block
+    priority_fees: Dict[int, float]      # percentile -> gwei
+    gas_used_ratio: float
+    l1_base_fee: float = 0.0             # gwei, rollups only
+    gas_token_price: float = 0.0         # USD
+    updated_at: float = field(default_factory=time.time)
+
+    def max_fee(self, percentile: int = 50, buffer_multiplier: float = 1.2) -> float:
+        return self.base_fee * buffer_multiplier + self.priority_fees.get(percentile, 0.0)
+
+    def l1_data_fee(self) -> float:
+        """Estimated L1 data fee in native token for a typical swap."""
+        return self.l1_base_fee * L1_DATA_GAS_PER_TX / 1e9
+
+    def to_gas_price(self, gas_units: int = 100000) -> Dict[str, Any]:
+        """Render in the format returned by Layer2GasEstimator.get_gas_price."""
+        max_fee = self.max_fee()
+        gas_cost_native = max_fee * gas_units / 1e9 + self.l1_data_fee()
+        return {
+            'base_fee': self.base_fee,
+            'priority_fee': self.priority_fees.get(50, 0.0),
+            'priority_fee_percentiles': dict(self.priority_fees),
+            'max_fee': max_fee,
+            'gas_price': self.base_fee + self.priority_fees.get(50, 0.0),
+            'l1_base_fee': self.l1_base_fee,
+            'l1_data_fee': self.l1_data_fee(),
+            'usd_cost': gas_cost_native * self.gas_token_price,
+            'block_number': self.block_number,
+            'updated_at': self.updated_at,
+        }
+
+
+class GasOracle:
+    """Serves gas prices from memory, refreshed in the background on every new block."""
+
+    def __init__(self, history_blocks: int = 20,
+                 token_price_fetcher: Optional[Callable[[str], float]] = None,
+                 event_bus: Optional[MarketEventBus] = None):
+        self.history_blocks = history_blocks
+        self.event_bus = event_bus or market_event_bus
+        self.token_price_fetcher = token_price_fetcher
+        self.token_price_ttl = float(os.getenv("GAS_ORACLE_TOKEN_PRICE_TTL", "60"))
+        # Relative fee move that counts as a gas update for event-driven readers
+        self.publish_threshold = float(os.getenv("GAS_ORACLE_PUBLISH_THRESHOLD", "0.01"))
+        self.web3_connections: Dict[str, Any] = {}
+        self.snapshots: Dict[str, GasSnapshot] = {}
+        self.base_fee_history: Dict[str, Deque[float]] = {}
+        self._last_blocks: Dict[str, int] = {}
+        self._published_fees: Dict[str, Tuple[float, float]] = {}
+        self._token_prices: Dict[str, Dict[str, float]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.refresh_count = 0
+        self.error_count = 0
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks.values())
+
+    def register_network(self, network_id: str, web3: Any):
+        """Register a connection; a running oracle starts watching it right away."""
+        if network_id in self.web3_connections:
+            return
+        self.web3_connections[network_id] = web3
+        self.base_fee_history.setdefault(network_id, deque(maxlen=self.history_blocks))
+        if self.running:
+            self._start_watcher(network_id)
+
+    # ------------------------------------------------------------------
+    # Reads (memory only)
+    # ------------------------------------------------------------------
+    def get_snapshot(self, network_id: str) -> Optional[GasSnapshot]:
+        return self.snapshots.get(network_id)
+
+    def get_gas_price(self, network_id: str) -> Optional[Dict[str, Any]]:
+        """Latest gas price, or None until the first snapshot for the network."""
+        snapshot = self.snapshots.get(network_id)
+        return snapshot.to_gas_price() if snapshot else None
+
+    def get_fee_history(self, network_id: str) -> List[float]:
+        return list(self.base_fee_history.get(network_id, []))
+
+    def get_status(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            'running': self.running,
+            'networks': {
+                network_id: {
+                    'block_number': snap.block_number,
+                    'age_seconds': now - snap.updated_at,
+                    'base_fee': snap.base_fee,
+                    'l1_base_fee': snap.l1_base_fee,
+                } for network_id, snap in self.snapshots.items()
+            },
+            'refresh_count': self.refresh_count,
+            'error_count': self.error_count,
+        }
+
+    # ------------------------------------------------------------------
+    # Refresh (runs in a worker thread, off the event loop)
+    # ------------------------------------------------------------------
+    def _gas_token_price(self, token: str) -> float:
+        cached = self._token_prices.get(token)
+        if cached and time.time() - cached['timestamp'] < self.token_price_ttl:
+            return cached['price']
+        price = cached['price'] if cached else 0.0
+        if self.token_price_fetcher:
+            try:
+                price = float(self.token_price_fetcher(token))
+            except Exception as e:
+                logger.warning(f"Gas oracle could not refresh {token} price: {e}")
+        self._token_prices[token] = {'price': price, 'timestamp': time.time()}
+        return price
+
+    def _fetch_l1_base_fee(self, network_id: str, web3: Any) -> float:
+        network_info = network_config.get_network(network_id)
+        if network_info.get('rollup_type') != 'optimistic':
+            return 0.0
+        try:
+            if network_id == 'arbitrum':
+                contract = web3.eth.contract(address=ARB_GAS_INFO, abi=ARB_GAS_INFO_ABI)
+                fee_wei = contract.functions.getL1BaseFeeEstimate().call()
+            else:
+                contract = web3.eth.contract(address=OP_GAS_PRICE_ORACLE, abi=OP_GAS_PRICE_ORACLE_ABI)
+                fee_wei = contract.functions.l1BaseFee().call()
+            return float(fee_wei) / 1e9
+        except Exception as e:
+            logger.debug(f"L1 base fee unavailable for {network_id}: {e}")
+            return 0.0
+
+    def refresh(self, network_id: str, block_number: Optional[int] = None) -> Optional[GasSnapshot]:
+        """Pull fee history for the network and replace its snapshot."""
+        web3 = self.web3_connections.get(network_id)
+        if not web3:
+            return None
+        try:
+            history = web3.eth.fee_history(self.history_blocks, 'latest', PRIORITY_PERCENTILES)
+            base_fees = [float(fee) / 1e9 for fee in history['baseFeePerGas']]
+            rewards = history.get('reward') or []
+            priority_fees = {}
+            for index, percentile in enumerate(PRIORITY_PERCENTILES):
+                samples = sorted(float(block_rewards[index]) / 1e9 for block_rewards in rewards
+                                 if len(block_rewards) > index)
+                priority_fees[percentile] = samples[len(samples) // 2] if samples else 0.0
+            ratios = history.get('gasUsedRatio') or [0.0]
+            latest_block = block_number if block_number is not None else \
+                int(history['oldestBlock']) + len(ratios) - 1
+
+            network_info = network_config.get_network(network_id)
+            snapshot = GasSnapshot(
+                network_id=network_id,
+                block_number=latest_block,
+                base_fee=base_fees[-1] if base_fees else 0.0,
+                priority_fees=priority_fees,
+                gas_used_ratio=float(ratios[-1]),
+                l1_base_fee=self._fetch_l1_base_fee(network_id, web3),
+                gas_token_price=self._gas_token_price(network_info.get('gas_token', 'ETH')),
+            )
+            history_deque = self.base_fee_history.setdefault(network_id, deque(maxlen=self.history_blocks))
+            history_deque.clear()
+            history_deque.extend(base_fees[:-1])
+            self.snapshots[network_id] = snapshot
+            self.refresh_count += 1
+            self._publish_if_moved(snapshot)
+            return snapshot
+        except Exception as e:
+            self.error_count += 1
+            logger.warning(f"Gas oracle refresh failed for {network_id}: {e}")
+            return None
+
+    def _publish_if_moved(self, snapshot: GasSnapshot):
+        """Publish a gas update only when base or priority fee moved beyond the threshold."""
+        fees = (snapshot.base_fee, snapshot.priority_fees.get(50, 0.0))
+        previous = self._published_fees.get(snapshot.network_id)
+        if previous is not None and all(
+                abs(new - old) <= self.publish_threshold * max(abs(old), 1e-9)
+                for new, old in zip(fees, previous)):
+            return
+        self._published_fees[snapshot.network_id] = fees
+        self.event_bus.publish([gas_topic(snapshot.network_id)], source="gas_oracle",
+                               network=snapshot.network_id, block=snapshot.block_number,
+                               base_fee=fees[0], priority_fee=fees[1])
+
+    def _poll_new_block(self, network_id: str) -> bool:
+        """Refresh only when the chain head moved. Returns True if a refresh happened."""
+        web3 = self.web3_connections.get(network_id)
+        if not web3:
+            return False
+        block_number = int(web3.eth.block_number)
+        if block_number <= self._last_blocks.get(network_id, -1):
+            return False
+        self._last_blocks[network_id] = block_number
+        return self.refresh(network_id, block_number) is not None
+
+    # ------------------------------------------------------------------
+    # Background tasks
+    # ------------------------------------------------------------------
+    def _block_interval(self, network_id: str) -> float:
+        block_time = network_config.get_network(network_id).get('average_block_time', 12.5)
+        min_interval = float(os.getenv("GAS_ORACLE_MIN_POLL_SECONDS", "1.0"))
+        return min(15.0, max(min_interval, float(block_time)))
+
+    async def _watch_network(self, network_id: str):
+        interval = self._block_interval(network_id)
+        while True:
+            try:
+                await asyncio.to_thread(self._poll_new_block, network_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.error_count += 1
+                logger.warning(f"Gas oracle block watch error for {network_id}: {e}")
+            await asyncio.sleep(interval)
+
+    def _start_watcher(self, network_id: str):
+        task = self._tasks.get(network_id)
+        if task and not task.done():
+            return
+        self._tasks[network_id] = asyncio.create_task(self._watch_network(network_id))
+
+    async def start(self):
+        """Start one block watcher per registered network."""
+        for network_id in self.web3_connections:
+            self._start_watcher(network_id)
+        logger.info(f"Gas oracle started for {len(self._tasks)} networks")
+
+    async def stop(self):
+        for task in self._tasks.values():
+            task.cancel()
+        for task in self._tasks.values():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks.clear()
+        logger.info("Gas oracle stopped")
+
+
+# Global gas oracle instance shared by every Layer2GasEstimator
+gas_oracle = GasOracle()
@@ -22,6 +22,7 @@ try:
     from .web3_service import web3_service # Actual web3_service
     from .web_data import WebDataFetcher
     from .abi_store import UNISWAP_V2_ROUTER_ABI, ERC20_ABI
+    from .pool_state_cache import PoolStateCache
 except ImportError as e:
     logging.warning(f"L2Manager: Could not import all dependencies: {e}. Using mocks for some features.")
     import network_config # type: ignore
@@ -90,6 +91,7 @@ except ImportError as e:
     web3_service = MockWeb3Service() # type: ignore
     WebDataFetcher = MockWebDataFetcher # type: ignore
     UNISWAP_V2_ROUTER_ABI = [{"inputs":[{"internalType":"uint256","name":"amountIn","type":"uint256"},{"internalType":"address[]","name":"path","type":"address[]"}],"name":"getAmountsOut","outputs":[{"internalType":"uint256[]","name":"amounts","type":"uint256[]"}],"stateMutability":"view","type":"function"}, {"inputs":[{"internalType":"uint256","name":"amountIn","type":"uint256"},{"internalType":"uint256","name":"amountOutMin","type":"uint256"},{"internalType":"address[]","name":"path","type":"address[]"},{"internalType":"address","name":"to","type":"address"},{"internalType":"uint256","name":"deadline","type":"uint256"}],"name":"swapExactTokensForTokens","outputs":[{"internalType":"uint256[]","name":"amounts","type":"uint256[]"}],"stateMutability":"nonpayable","type":"function"}]
+    PoolStateCache = None # type: ignore
     ERC20_ABI = [{"constant":True,"inputs":[],"name":"decimals","outputs":[{"name":"","type":"uint8"}],"payable":False,"stateMutability":"view","type":"function"}, {"constant":True,"inputs":[{"name":"_owner","type":"address"},{"name":"_spender","type":"address"}],"name":"allowance","outputs":[{"name":"","type":"uint256"}],"payable":False,"stateMutability":"view","type":"function"}, {"constant":False,"inputs":[{"name":"_spender","type":"address"},{"name":"_value","type":"uint256"}],"name":"approve","outputs":[{"name":"","type":"bool"}],"payable":False,"stateMutability":"nonpayable","type":"function"}]
     # --- End Mock implementations ---
 
@@ -128,6 +130,24 @@ class L2ArbitrageHelper:
         self.common_tokens: Dict[str, Dict[str, Dict[str, Any]]] = {}
         self._load_dex_configurations()
 
+        # Local reserve cache so quotes on tracked pairs don't round-trip to the router
+        self.pool_cache = PoolStateCache(self.dex_config_path, web3_getter=self._get_web3_for_network) if PoolStateCache else None
+
+    def _get_web3_for_network(self, network_name: str) -> Optional[Any]:
+        network_details = self.l2_manager.network_config.get_network(network_name)
+        chain_id = network_details.get("chain_id") if network_details else None
+        if not chain_id: return None
+        return self.l2_manager.web3_service.get_web3(chain_id=chain_id, network_name_for_rpc_url=network_name)
+
+    async def start(self):
+        """Start keeping the pool cache current; until it has reserves, quotes go to the router."""
+        if self.pool_cache:
+            await self.pool_cache.start()
+
+    async def stop(self):
+        if self.pool_cache:
+            await self.pool_cache.stop()
+
     def _load_dex_configurations(self):
         """Loads DEX and token configurations from the specified JSON file."""
         try:
@@ -170,6 +190,12 @@ class L2ArbitrageHelper:
         token_in_address, token_in_decimals = token_in_info["address"], token_in_info["decimals"]
         token_out_address, token_out_decimals = token_out_info["address"], token_out_info["decimals"]
 
+        if self.pool_cache:
+            cached_price = self.pool_cache.get_price(network_name, dex_name, token_in_symbol, token_out_symbol, amount_in_decimal)
+            if cached_price is not None:
+                self.logger.debug(f"Pool cache price for 1 {token_in_symbol} = {cached_price:.6f} {token_out_symbol} on {dex_name} ({network_name})")
+                return cached_price
+
         # Check if this specific pair is hardcoded for real interaction
         is_real_path = network_name == "arbitrum_sepolia" and dex_name.lower() == "sushiswap" and \
                        token_in_symbol.upper() in ["WETH", "USDC"] and token_out_symbol.upper() in ["WETH", "USDC"]
@@ -500,6 +526,13 @@ class L2Manager(L2Manager): # Re-open L2Manager to add new methods
         # Ensure L2ArbitrageHelper is initialized after all L2Manager fields it might depend on (like web3_service)
         self.arbitrage_helper = L2ArbitrageHelper(self.network_config, self)
 
+    async def start(self):
+        """Start background services (the arbitrage helper's pool cache)."""
+        await self.arbitrage_helper.start()
+
+    async def stop(self):
+        await self.arbitrage_helper.stop()
+
     # ... (all previous L2Manager methods: _execute_command, build_contracts, deploy_contract, get_l2_gas_price, etc.) ...
     # --- Paste existing L2Manager methods here, ensuring they are not duplicated ---
     def _execute_command(self, command: List[str], cwd: Optional[str] = None) -> Tuple[bool, str, str]:
@@ -786,6 +819,13 @@ if __name__ == '__main__':
     arbitrage_helper = l2_manager.arbitrage_helper
 
     async def run_all_examples():
+        await l2_manager.start()
+        try:
+            await run_examples()
+        finally:
+            await l2_manager.stop()
+
+    async def run_examples():
         logger.info("\n--- Example: Get Real DEX Price (Arbitrum Sepolia - SushiSwap) ---")
         if not os.getenv("ARBITRUM_SEPOLIA_RPC_URL"): logger.warning("ARBITRUM_SEPOLIA_RPC_URL not set for example.")
 
@@ -12,10 +12,14 @@ from web3.exceptions import ContractLogicError
 
 from utils.network_config import network_config
 from utils.web_data import WebDataFetcher
+from utils.gas_oracle import gas_oracle
 from utils.logging_config import setup_logging
 
 logger = setup_logging()
 
+# Symbols DEX pools list the native tokens under
+WRAPPED_SYMBOLS = {"ETH": "WETH", "MATIC": "WMATIC", "BTC": "WBTC"}
+
 class Layer2TradingException(Exception):
     """Custom exception for layer 2 trading errors."""
     pass
@@ -30,6 +34,9 @@ class Layer2GasEstimator:
         self.web3_connections = {}
         self.gas_price_cache = {}
         self.cache_duration = 60  # 60 seconds
+        self.gas_oracle = gas_oracle
+        if self.gas_oracle.token_price_fetcher is None:
+            self.gas_oracle.token_price_fetcher = self._get_gas_token_price
         self.setup_connections()
         
     def setup_connections(self):
@@ -56,6 +63,7 @@ class Layer2GasEstimator:
                     
                     if web3.is_connected():
                         self.web3_connections[network_id] = web3
+                        self.gas_oracle.register_network(network_id, web3)
                         # Only log connection once per network per session
                         if network_id not in Layer2GasEstimator._logged_connections:
                             logger.info(f"Connected to {network_id} at {rpc_url}")
@@ -83,8 +91,14 @@ class Layer2GasEstimator:
                 'updated_at': int,  # Timestamp when this data was fetched
             }
         """
-        # Check cache first
         current_time = time.time()
+
+        # Serve from the background gas oracle when it has data for this network
+        snapshot = self.gas_oracle.get_snapshot(network_id)
+        if snapshot and (self.gas_oracle.running or current_time - snapshot.updated_at < self.cache_duration):
+            return snapshot.to_gas_price()
+
+        # Check cache first
         if network_id in self.gas_price_cache:
             cache_entry = self.gas_price_cache[network_id]
             if current_time - cache_entry['updated_at'] < self.cache_duration:
@@ -99,7 +113,8 @@ class Layer2GasEstimator:
             'usd_cost': 0.0,
             'updated_at': current_time
         }
-        
+
+        # No oracle snapshot yet: read the chain directly rather than return placeholder fees
         try:
             # Get the Web3 connection
             web3 = self.web3_connections.get(network_id)
@@ -238,9 +253,11 @@ class Layer2GasEstimator:
 class Layer2Arbitrage:
     """Layer 2 arbitrage detection and execution engine."""
     
-    def __init__(self):
+    def __init__(self, dex_config_path: str = "config/l2_dex_config.json"):
         self.web_data = WebDataFetcher()
         self.gas_estimator = Layer2GasEstimator()
+        self.dex_config_path = dex_config_path
+        self._listed_symbols: Optional[Dict[str, set]] = None  # network id -> symbols in the DEX config
         self.price_cache = {}
         self.cache_duration = 60  # 60 seconds
         self.min_profit_threshold = 0.01  # 1% minimum profit after fees
@@ -282,6 +299,50 @@ class Layer2Arbitrage:
             logger.error(f"Error getting price for {token} on {network}: {str(e)}")
             return 0.0
             
+    @staticmethod
+    def _config_network_id(name: str) -> Optional[str]:
+        """network_config id for a DEX config network, e.g. 'arbitrum_sepolia' -> 'arbitrum'."""
+        if name in network_config.networks:
+            return name
+        matches = [network_id for network_id in network_config.networks if name.startswith(f"{network_id}_")]
+        return max(matches, key=len) if matches else None
+
+    def _dex_listed_symbols(self) -> Dict[str, set]:
+        """Token and pair symbols the DEX config lists per network id; loaded once."""
+        if self._listed_symbols is None:
+            self._listed_symbols = {}
+            try:
+                with open(self.dex_config_path, 'r') as f:
+                    raw_configs = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError) as e:
+                logger.debug(f"No DEX token listings from {self.dex_config_path}: {e}")
+                raw_configs = {}
+            for name, network_data in raw_configs.items():
+                network_id = self._config_network_id(name)
+                if not network_id:
+                    continue
+                symbols = self._listed_symbols.setdefault(network_id, set())
+                symbols.update(symbol.upper() for symbol in (network_data.get("tokens") or {}))
+                for dex_info in (network_data.get("dexs") or {}).values():
+                    for pair_name in (dex_info.get("pairs") or {}):
+                        symbols.update(pair_name.upper().split("/"))
+        return self._listed_symbols
+
+    def get_trading_networks(self, token: str = 'ETH') -> List[str]:
+        """Networks compared for a token: Ethereum mainnet plus each Layer 2 where the
+        token is the gas token or is listed in the DEX config."""
+        symbols = {token.upper(), WRAPPED_SYMBOLS.get(token.upper(), token.upper())}
+        listed = self._dex_listed_symbols()
+        layer2_networks = network_config.get_layer2_networks()
+        networks = []
+        for network_id, network in network_config.networks.items():
+            if network not in layer2_networks:
+                continue
+            if str(network.get('gas_token', '')).upper() in symbols or symbols & listed.get(network_id, set()):
+                networks.append(network_id)
+        networks.append('ethereum')
+        return networks
+
     def analyze_price_differences(self, token: str = 'ETH') -> List[Dict[str, Any]]:
         """
         Analyze price differences across Layer 2 networks for arbitrage opportunities.
@@ -293,28 +354,14 @@ class Layer2Arbitrage:
             List of arbitrage opportunities sorted by potential profit
         """
         opportunities = []
-        networks = []
         network_prices = {}
         
         try:
-            # Get all Layer 2 networks
-            l2_networks = network_config.get_layer2_networks()
-            for network in l2_networks:
-                network_id = next((k for k, v in network_config.networks.items() if v == network), None)
-                if not network_id:
-                    continue
-                networks.append(network_id)
-                
-            # Get current token price on each network
-            for network_id in networks:
+            # Get current token price on each Layer 2 network and Ethereum mainnet
+            for network_id in self.get_trading_networks(token):
                 price = self.get_price(token, network_id)
                 if price > 0:
                     network_prices[network_id] = price
-                    
-            # Also include Ethereum mainnet for comparison
-            price = self.get_price(token, 'ethereum')
-            if price > 0:
-                network_prices['ethereum'] = price
                 
             # Find arbitrage opportunities
             for buy_network, buy_price in network_prices.items():
@@ -0,0 +1,191 @@
+"""
+Shared LLM response cache.
+
+Prompts embed live prices, scores and timestamps, so caching on the exact
+prompt text almost never hits. Keys here are built from a normalized
+template of the prompt instead: timestamps are dropped, numbers are
+rounded to a configurable number of significant digits and whitespace is
+collapsed, so "ETH at 3012.40" and "ETH at 3009.95" share an entry.
+Callers whose prompt is a key that must match exactly (a trade's
+parameters, a calendar day) pass ``exact=True`` to skip normalization.
+
+Entries live in an LRU map with a per-entry TTL (O(1) get, set and
+eviction) and can be written through to SQLite so they survive restarts.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+DEFAULT_SIGNIFICANT_DIGITS = int(os.getenv("LLM_CACHE_SIGNIFICANT_DIGITS", "2"))
+
+# ISO dates/times and unix timestamps (seconds or milliseconds)
+_TIMESTAMP_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?"
+    r"|\b\d{2}:\d{2}:\d{2}(?:\.\d+)?\b"
+    r"|\b1\d{9}(?:\d{3})?(?:\.\d+)?\b"
+)
+# Standalone numbers; digits inside identifiers such as 0x addresses or "gpt-4o" are left alone
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?(?![\w.])")
+
+
+def normalize_prompt(prompt: str, significant_digits: int = DEFAULT_SIGNIFICANT_DIGITS) -> str:
+    """Template of a prompt: timestamps removed, numbers quantized, whitespace collapsed."""
+    def quantize(match: re.Match) -> str:
+        value = float(match.group(0))
+        if value == 0 or not math.isfinite(value):
+            return "0"
+        return f"{float(f'{value:.{significant_digits}g}'):g}"
+
+    text = _TIMESTAMP_RE.sub("<ts>", prompt)
+    text = _NUMBER_RE.sub(quantize, text)
+    return " ".join(text.split())
+
+
+class LLMResponseCache:
+    """Bounded LRU + TTL cache of LLM responses keyed on normalized prompts."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL_SECONDS,
+                 significant_digits: int = DEFAULT_SIGNIFICANT_DIGITS, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.significant_digits = significant_digits
+        self.path = path
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expirations": 0, "loaded": 0}
+        self.namespace_stats: Dict[str, Dict[str, int]] = {}
+        if path:
+            self._open(path)
+
+    def _open(self, path: str):
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT key, value, expires_at FROM llm_cache ORDER BY created_at DESC LIMIT ?",
+                (self.max_entries,),
+            ).fetchall()
+            for key, value, expires_at in reversed(rows):
+                self._entries[key] = (expires_at, json.loads(value))
+            self.stats["loaded"] = len(rows)
+            logger.info(f"LLM response cache loaded {len(rows)} entries from {path}")
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logger.warning(f"LLM response cache persistence disabled ({path}): {e}")
+            self._db = None
+
+    def key(self, namespace: str, prompt: str, exact: bool = False) -> str:
+        template = prompt if exact else normalize_prompt(prompt, self.significant_digits)
+        return hashlib.sha256(f"{namespace}\0{template}".encode()).hexdigest()
+
+    def _count(self, namespace: str, outcome: str):
+        self.stats[outcome] += 1
+        counts = self.namespace_stats.setdefault(namespace, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    def get(self, namespace: str, prompt: str, exact: bool = False) -> Optional[Any]:
+        """Cached value for a prompt, or None on a miss."""
+        key = self.key(namespace, prompt, exact)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                self._remove(key)
+                self.stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._count(namespace, "misses")
+                return None
+            self._entries.move_to_end(key)
+            self._count(namespace, "hits")
+            return entry[1]
+
+    def set(self, namespace: str, prompt: str, value: Any, ttl: Optional[float] = None, exact: bool = False):
+        """Store a JSON-serializable value for a prompt."""
+        key = self.key(namespace, prompt, exact)
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            self.stats["sets"] += 1
+            while len(self._entries) > self.max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+                self._persist_delete(oldest)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                        (key, json.dumps(value, default=str), expires_at, time.time()),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to persist LLM cache entry: {e}")
+
+    def _remove(self, key: str):
+        self._entries.pop(key, None)
+        self._persist_delete(key)
+
+    def _persist_delete(self, key: str):
+        if self._db is not None:
+            try:
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to delete LLM cache entry: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def hit_rate(self, namespace: Optional[str] = None) -> float:
+        counts = self.namespace_stats.get(namespace, {}) if namespace else self.stats
+        lookups = counts.get("hits", 0) + counts.get("misses", 0)
+        return counts.get("hits", 0) / lookups if lookups else 0.0
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": self.hit_rate(),
+            "persistent": self._db is not None,
+            "namespaces": {
+                name: {**counts, "hit_rate": self.hit_rate(name)}
+                for name, counts in self.namespace_stats.items()
+            },
+        }
+
+
+# Global cache shared by the orchestrator, RehoboamAI and the trading controller
+llm_response_cache = LLMResponseCache(path=os.getenv("LLM_CACHE_PATH"))
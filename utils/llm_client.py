@@ -0,0 +1,319 @@
+"""
+Async client layer for the LLM providers (DeepSeek, Gemini, OpenAI).
+
+Each provider gets one pooled ``httpx.AsyncClient`` that keeps connections
+alive between requests (HTTP/2 when the ``h2`` package is installed), and
+each request first takes a token from the provider's bucket in
+``utils.rate_limiter``. Nothing here blocks the event loop: waiting for a
+rate-limit token or a response is a plain ``await``, so cancelling the
+calling task (for example when an opportunity's deadline passes) aborts
+the request and frees the connection.
+
+``stream`` yields text deltas as the provider produces them (server-sent
+events on every provider), for callers that show partial output.
+
+Every call is recorded in ``utils.llm_telemetry`` under its ``caller`` label.
+"""
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+
+from utils.llm_telemetry import llm_telemetry, usage_tokens
+from utils.rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+DEFAULT_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "90"))
+
+
+class LLMClientError(Exception):
+    """Raised when a provider request fails or returns an error status."""
+
+    def __init__(self, provider: str, message: str, status: Optional[int] = None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status = status
+
+
+@dataclass
+class ProviderConfig:
+    """Endpoint, credentials and rate limit of one provider."""
+    base_url: str
+    api_key_env: str
+    requests_per_minute: float
+    burst: float = 5.0
+
+
+@dataclass
+class ProviderStats:
+    requests: int = 0
+    failures: int = 0
+    cancelled: int = 0
+    streams: int = 0
+    avg_latency: float = 0.0
+    avg_first_token_latency: float = 0.0
+    last_error: Optional[str] = None
+    status_codes: Dict[int, int] = field(default_factory=dict)
+
+
+PROVIDERS: Dict[str, ProviderConfig] = {
+    "deepseek": ProviderConfig("https://api.deepseek.com/v1", "DEEPSEEK_API_KEY", 50),
+    "gemini": ProviderConfig("https://generativelanguage.googleapis.com/v1", "GEMINI_API_KEY", 60),
+    "openai": ProviderConfig("https://api.openai.com/v1", "OPENAI_API_KEY", 60),
+}
+
+
+class AsyncLLMClient:
+    """Pooled, rate-limited async access to the LLM provider APIs."""
+
+    def __init__(self, providers: Optional[Dict[str, ProviderConfig]] = None,
+                 timeout: float = DEFAULT_TIMEOUT, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.providers = dict(providers or PROVIDERS)
+        self.timeout = timeout
+        self.transport = transport  # injected in tests
+        self._clients: Dict[str, Tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]] = {}
+        self.stats: Dict[str, ProviderStats] = {name: ProviderStats() for name in self.providers}
+        for name, config in self.providers.items():
+            self._configure_limit(name, config)
+
+    def _configure_limit(self, provider: str, config: ProviderConfig):
+        key = f"llm:{provider}"
+        rate_limiter.configure_limit(key, capacity=config.burst, rate=config.requests_per_minute / 60)
+        rate_limiter.buckets[key].tokens = config.burst  # start with a full burst
+
+    def configure(self, provider: str, config: ProviderConfig):
+        """Register or replace a provider."""
+        self.providers[provider] = config
+        self.stats.setdefault(provider, ProviderStats())
+        self._configure_limit(provider, config)
+
+    def api_key(self, provider: str) -> Optional[str]:
+        return os.environ.get(self._config(provider).api_key_env)
+
+    def _config(self, provider: str) -> ProviderConfig:
+        if provider not in self.providers:
+            raise ValueError(f"Unknown provider: {provider}")
+        return self.providers[provider]
+
+    def _client(self, provider: str) -> httpx.AsyncClient:
+        """The provider's pooled client, bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(provider)
+        if entry and entry[1] is loop and not entry[0].is_closed:
+            return entry[0]
+        # Connections cannot be shared across event loops; the old pool dies with its loop
+        client = httpx.AsyncClient(
+            base_url=self._config(provider).base_url,
+            http2=HTTP2_AVAILABLE and self.transport is None,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                max_keepalive_connections=MAX_CONNECTIONS,
+                                keepalive_expiry=KEEPALIVE_SECONDS),
+            transport=self.transport,
+        )
+        self._clients[provider] = (client, loop)
+        return client
+
+    def _request_args(self, provider: str, model: str, api_key: str) -> Tuple[str, Dict[str, str]]:
+        headers = {"Content-Type": "application/json"}
+        if provider == "gemini":
+            headers["x-goog-api-key"] = api_key
+            return f"/models/{model}:generateContent", headers
+        headers["Authorization"] = f"Bearer {api_key}"
+        return "/chat/completions", headers
+
+    async def post(self, provider: str, payload: Dict[str, Any], model: Optional[str] = None,
+                   api_key: Optional[str] = None, timeout: Optional[float] = None,
+                   caller: Optional[str] = None) -> Dict[str, Any]:
+        """Send a raw provider payload and return the decoded JSON response."""
+        api_key = api_key or self.api_key(provider)
+        if not api_key:
+            raise LLMClientError(provider, "API key not available")
+        path, headers = self._request_args(provider, model or payload.get("model", ""), api_key)
+        stats = self.stats[provider]
+
+        await rate_limiter.acquire(f"llm:{provider}")
+        with llm_telemetry.track(caller or "llm_client", provider, self._prompt_text(payload)) as call:
+            start = time.monotonic()
+            stats.requests += 1
+            try:
+                response = await self._client(provider).post(
+                    path, json=payload, headers=headers, timeout=timeout or self.timeout)
+            except asyncio.CancelledError:
+                stats.cancelled += 1
+                raise
+            except httpx.HTTPError as e:
+                self._record_failure(stats, f"{type(e).__name__}: {e}")
+                raise LLMClientError(provider, f"request failed: {type(e).__name__}: {e}") from e
+
+            latency = time.monotonic() - start
+            stats.avg_latency = latency if stats.requests == 1 else 0.1 * latency + 0.9 * stats.avg_latency
+            stats.status_codes[response.status_code] = stats.status_codes.get(response.status_code, 0) + 1
+            if response.is_error:
+                error = f"{response.status_code} - {response.text[:500]}"
+                self._record_failure(stats, error)
+                raise LLMClientError(provider, error, status=response.status_code)
+            data = response.json()
+            call.set_usage(data)
+            call.completion = self.extract_text(provider, data)
+        return data
+
+    @staticmethod
+    def _prompt_text(payload: Dict[str, Any]) -> str:
+        """Text of a request's messages, for token estimates when the provider reports no usage."""
+        if "contents" in payload:
+            parts = [part for content in payload["contents"] for part in content.get("parts", [])]
+            return "\n".join(str(part.get("text", "")) for part in parts)
+        return "\n".join(str(message.get("content", "")) for message in payload.get("messages", []))
+
+    @staticmethod
+    def _record_failure(stats: ProviderStats, error: str):
+        stats.failures += 1
+        stats.last_error = error
+
+    @staticmethod
+    def _payload(provider: str, prompt: str, model: str, max_tokens: int, temperature: Optional[float],
+                 system: Optional[str], extra: Dict[str, Any]) -> Dict[str, Any]:
+        """Single-turn request body in the provider's format."""
+        if provider == "gemini":
+            generation_config = {"maxOutputTokens": max_tokens, **extra}
+            if temperature is not None:
+                generation_config["temperature"] = temperature
+            payload = {"contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                       "generationConfig": generation_config}
+            if system:
+                payload["systemInstruction"] = {"parts": [{"text": system}]}
+            return payload
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        payload = {"model": model, "messages": messages, "max_tokens": max_tokens, **extra}
+        if temperature is not None:
+            payload["temperature"] = temperature
+        return payload
+
+    async def complete(self, provider: str, prompt: str, model: str, max_tokens: int = 2000,
+                       temperature: Optional[float] = 0.2, system: Optional[str] = None,
+                       api_key: Optional[str] = None, timeout: Optional[float] = None,
+                       caller: Optional[str] = None, **extra) -> str:
+        """Send a single-turn prompt and return the generated text."""
+        text, _ = await self.complete_with_usage(provider, prompt, model, max_tokens, temperature, system,
+                                                 api_key, timeout, caller, **extra)
+        return text
+
+    async def complete_with_usage(self, provider: str, prompt: str, model: str, max_tokens: int = 2000,
+                                  temperature: Optional[float] = 0.2, system: Optional[str] = None,
+                                  api_key: Optional[str] = None, timeout: Optional[float] = None,
+                                  caller: Optional[str] = None,
+                                  **extra) -> Tuple[str, Tuple[Optional[int], Optional[int]]]:
+        """Like ``complete``, plus the (prompt, completion) tokens the provider reported, if any."""
+        payload = self._payload(provider, prompt, model, max_tokens, temperature, system, extra)
+        data = await self.post(provider, payload, model=model, api_key=api_key, timeout=timeout, caller=caller)
+        return self.extract_text(provider, data), usage_tokens(provider, data)
+
+    async def stream(self, provider: str, prompt: str, model: str, max_tokens: int = 2000,
+                     temperature: Optional[float] = 0.2, system: Optional[str] = None,
+                     api_key: Optional[str] = None, timeout: Optional[float] = None,
+                     caller: Optional[str] = None, **extra) -> AsyncIterator[str]:
+        """Send a single-turn prompt and yield text deltas as they arrive."""
+        api_key = api_key or self.api_key(provider)
+        if not api_key:
+            raise LLMClientError(provider, "API key not available")
+        payload = self._payload(provider, prompt, model, max_tokens, temperature, system, extra)
+        path, headers = self._request_args(provider, model, api_key)
+        headers["Accept"] = "text/event-stream"
+        params = {}
+        if provider == "gemini":
+            path = path.replace(":generateContent", ":streamGenerateContent")
+            params["alt"] = "sse"
+        else:
+            payload["stream"] = True
+        stats = self.stats[provider]
+
+        await rate_limiter.acquire(f"llm:{provider}")
+        with llm_telemetry.track(caller or "llm_client", provider, self._prompt_text(payload)) as call:
+            start = time.monotonic()
+            stats.requests += 1
+            stats.streams += 1
+            first_token = True
+            try:
+                async with self._client(provider).stream(
+                        "POST", path, json=payload, headers=headers, params=params,
+                        timeout=timeout or self.timeout) as response:
+                    stats.status_codes[response.status_code] = stats.status_codes.get(response.status_code, 0) + 1
+                    if response.is_error:
+                        body = (await response.aread()).decode(errors="replace")
+                        error = f"{response.status_code} - {body[:500]}"
+                        self._record_failure(stats, error)
+                        raise LLMClientError(provider, error, status=response.status_code)
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            text = self.extract_delta(provider, json.loads(data))
+                        except json.JSONDecodeError:
+                            continue
+                        if not text:
+                            continue
+                        if first_token:
+                            first_token = False
+                            latency = time.monotonic() - start
+                            stats.avg_first_token_latency = (latency if stats.streams == 1 else
+                                                             0.1 * latency + 0.9 * stats.avg_first_token_latency)
+                        call.completion += text
+                        yield text
+            except asyncio.CancelledError:
+                stats.cancelled += 1
+                raise
+            except httpx.HTTPError as e:
+                self._record_failure(stats, f"{type(e).__name__}: {e}")
+                raise LLMClientError(provider, f"stream failed: {type(e).__name__}: {e}") from e
+
+            latency = time.monotonic() - start
+            stats.avg_latency = latency if stats.requests == 1 else 0.1 * latency + 0.9 * stats.avg_latency
+
+    @staticmethod
+    def extract_text(provider: str, data: Dict[str, Any]) -> str:
+        if provider == "gemini":
+            candidate = (data.get("candidates") or [{}])[0]
+            return (candidate.get("content", {}).get("parts") or [{}])[0].get("text", "") or ""
+        return (data.get("choices") or [{}])[0].get("message", {}).get("content", "") or ""
+
+    @classmethod
+    def extract_delta(cls, provider: str, chunk: Dict[str, Any]) -> str:
+        """Text carried by one streamed chunk."""
+        if provider == "gemini":
+            return cls.extract_text(provider, chunk)
+        return (chunk.get("choices") or [{}])[0].get("delta", {}).get("content", "") or ""
+
+    async def aclose(self):
+        """Close the pooled clients that belong to the running event loop."""
+        loop = asyncio.get_running_loop()
+        for provider, (client, client_loop) in list(self._clients.items()):
+            if client_loop is loop:
+                await client.aclose()
+            del self._clients[provider]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "open_pools": sorted(self._clients),
+            "providers": {name: vars(stats).copy() for name, stats in self.stats.items()},
+        }
+
+
+# Global client shared by the orchestrator, RehoboamAI and the market analyzers
+llm_client = AsyncLLMClient()
@@ -0,0 +1,171 @@
+"""
+Per-call accounting for LLM provider requests.
+
+Every provider call made through ``utils.llm_client`` (and the few direct
+callers, such as the T2L auditor) is recorded under a ``caller`` label that
+names the code path, e.g. ``rehoboam_ai.sentiment`` or
+``orchestrator.analysis``. Calls, latency, tokens, estimated cost, cache
+hits, hedges and errors are exported as Prometheus metrics and kept in a
+small in-memory summary for the ``/api/ai/llm/telemetry`` endpoint.
+
+Token counts come from the provider's ``usage`` block when present and are
+otherwise estimated from the text.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram
+
+from utils.structured_prompts import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Rough USD per 1k tokens, shared with the orchestrator's hedge budgeting
+PROVIDER_COST_PER_1K_TOKENS = {"deepseek": 0.002, "gemini": 0.005, "openai": 0.01}
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+LATENCY_WINDOW = 500  # recent calls per (caller, provider) kept for percentiles
+
+
+def usage_tokens(provider: str, data: Dict[str, Any]) -> Tuple[Optional[int], Optional[int]]:
+    """(prompt, completion) tokens reported in a provider response, if any."""
+    if not isinstance(data, dict):
+        return None, None
+    if provider == "gemini":
+        usage = data.get("usageMetadata") or {}
+        return usage.get("promptTokenCount"), usage.get("candidatesTokenCount")
+    usage = data.get("usage") or {}
+    return usage.get("prompt_tokens"), usage.get("completion_tokens")
+
+
+class LLMCall:
+    """Mutable record of one in-flight call, filled in by the caller."""
+
+    def __init__(self, caller: str, provider: str, prompt: Optional[str] = None):
+        self.caller = caller
+        self.provider = provider
+        self.prompt = prompt
+        self.completion = ""
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+
+    def set_usage(self, data: Dict[str, Any]):
+        self.prompt_tokens, self.completion_tokens = usage_tokens(self.provider, data)
+
+    def tokens(self) -> Tuple[int, int]:
+        prompt = self.prompt_tokens if self.prompt_tokens is not None else estimate_tokens(self.prompt)
+        completion = (self.completion_tokens if self.completion_tokens is not None
+                      else estimate_tokens(self.completion))
+        return prompt, completion
+
+
+def _error_type(error: BaseException) -> str:
+    status = getattr(error, "status", None)
+    if status:
+        return f"http_{status}"
+    return type(error.__cause__ or error).__name__
+
+
+class LLMTelemetry:
+    """Prometheus metrics and an in-memory summary of LLM calls by caller."""
+
+    def __init__(self, registry: Optional[CollectorRegistry] = REGISTRY,
+                 cost_per_1k_tokens: Optional[Dict[str, float]] = None):
+        self.registry = registry
+        self.cost_per_1k_tokens = cost_per_1k_tokens or PROVIDER_COST_PER_1K_TOKENS
+        self.requests = Counter('llm_requests_total', 'LLM provider calls',
+                                ['caller', 'provider', 'outcome'], registry=registry)
+        self.latency = Histogram('llm_request_latency_seconds', 'LLM provider call latency',
+                                 ['caller', 'provider'], buckets=LATENCY_BUCKETS, registry=registry)
+        self.tokens = Counter('llm_tokens_total', 'LLM tokens used',
+                              ['caller', 'provider', 'kind'], registry=registry)
+        self.cost = Counter('llm_estimated_cost_usd_total', 'Estimated LLM spend in USD',
+                            ['caller', 'provider'], registry=registry)
+        self.cache_hits = Counter('llm_cache_hits_total', 'LLM responses served from cache',
+                                  ['caller'], registry=registry)
+        self.hedges = Counter('llm_hedges_total', 'Backup LLM requests and their outcome',
+                              ['caller', 'provider', 'outcome'], registry=registry)
+        self.errors = Counter('llm_errors_total', 'Failed LLM provider calls',
+                              ['caller', 'provider', 'error_type'], registry=registry)
+
+        self._summary: Dict[Tuple[str, str], Dict[str, Any]] = defaultdict(lambda: {
+            "calls": 0, "success": 0, "error": 0, "cancelled": 0, "latency_seconds": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "hedges": 0,
+        })
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self._cache_hits: Dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def track(self, caller: str, provider: str, prompt: Optional[str] = None) -> Iterator[LLMCall]:
+        """Time and record the provider call made inside the block."""
+        call = LLMCall(caller, provider, prompt)
+        started = time.monotonic()
+        try:
+            yield call
+        except (asyncio.CancelledError, GeneratorExit):
+            self._finish(call, time.monotonic() - started, "cancelled")
+            raise
+        except Exception as e:
+            self._finish(call, time.monotonic() - started, "error", e)
+            raise
+        self._finish(call, time.monotonic() - started, "success")
+
+    def _finish(self, call: LLMCall, latency: float, outcome: str, error: Optional[BaseException] = None):
+        key = (call.caller, call.provider)
+        summary = self._summary[key]
+        summary["calls"] += 1
+        summary[outcome] += 1
+        summary["latency_seconds"] += latency
+        self.requests.labels(call.caller, call.provider, outcome).inc()
+        self.latency.labels(call.caller, call.provider).observe(latency)
+        self._latencies[key].append(latency)
+        if error is not None:
+            self.errors.labels(call.caller, call.provider, _error_type(error)).inc()
+        if outcome != "success":
+            return
+
+        prompt_tokens, completion_tokens = call.tokens()
+        cost = (prompt_tokens + completion_tokens) / 1000 * self.cost_per_1k_tokens.get(call.provider, 0.0)
+        self.tokens.labels(call.caller, call.provider, "prompt").inc(prompt_tokens)
+        self.tokens.labels(call.caller, call.provider, "completion").inc(completion_tokens)
+        self.cost.labels(call.caller, call.provider).inc(cost)
+        summary["prompt_tokens"] += prompt_tokens
+        summary["completion_tokens"] += completion_tokens
+        summary["cost_usd"] += cost
+
+    def record_cache_hit(self, caller: str):
+        self.cache_hits.labels(caller).inc()
+        self._cache_hits[caller] += 1
+
+    def record_hedge(self, caller: str, provider: str, outcome: str):
+        """``outcome`` is 'hedged', 'fallback', 'hedge_win' or 'primary_win'."""
+        self.hedges.labels(caller, provider, outcome).inc()
+        if outcome in ("hedged", "fallback"):
+            self._summary[(caller, provider)]["hedges"] += 1
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Per-caller totals with latency percentiles over recent calls; most LLM time first."""
+        callers: Dict[str, Dict[str, Any]] = {}
+        for (caller, provider), summary in self._summary.items():
+            latencies = np.array(self._latencies[(caller, provider)])
+            entry = callers.setdefault(caller, {"cache_hits": self._cache_hits.get(caller, 0),
+                                                "total_latency_seconds": 0.0, "providers": {}})
+            entry["total_latency_seconds"] += summary["latency_seconds"]
+            entry["providers"][provider] = {
+                **summary,
+                "cost_usd": round(summary["cost_usd"], 6),
+                "p50_latency": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+                "p95_latency": float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+            }
+        for caller, hits in self._cache_hits.items():
+            callers.setdefault(caller, {"cache_hits": hits, "total_latency_seconds": 0.0, "providers": {}})
+        return dict(sorted(callers.items(), key=lambda item: -item[1]["total_latency_seconds"]))
+
+
+# Global instance registered with the default Prometheus registry
+llm_telemetry = LLMTelemetry()
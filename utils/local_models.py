@@ -0,0 +1,287 @@
+"""
+Local CPU-only inference tier for LLM-backed analyses.
+
+Sentiment and strategy calls are answered by small ridge-regression models
+trained offline on logged LLM outputs. A prediction is a handful of NumPy
+dot products (well under a millisecond), so the tier can answer whenever
+the remote model is down or cannot respond within the caller's latency
+budget. Until a model has been trained, callers keep their rule-based
+fallbacks.
+
+Logging is enabled by pointing ``LLM_OUTPUT_LOG_PATH`` at a JSONL file;
+models are trained from that log with::
+
+    python -m utils.local_models [log_path] [model_path]
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", "data/local_llm_models.npz")
+DEFAULT_LOG_PATH = os.getenv("LLM_OUTPUT_LOG_PATH")
+DEFAULT_LATENCY_BUDGET = float(os.getenv("LLM_LATENCY_BUDGET_SECONDS", "3.0"))
+
+MOODS = ("fearful", "cautious", "neutral", "optimistic", "euphoric")
+ACTIONS = ("buy", "sell", "hold")
+
+
+def _number(value: Any) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if math.isfinite(value) else 0.0
+
+
+def market_features(market_data: Dict[str, Any]) -> np.ndarray:
+    """Fixed-size feature vector for a market snapshot."""
+    change = _number(market_data.get("change_24h", market_data.get("price_change_24h")))
+    volume = max(_number(market_data.get("volume_24h", market_data.get("volume"))), 0.0)
+    sentiment = market_data.get("sentiment", 0)
+    if isinstance(sentiment, dict):
+        sentiment = sentiment.get("score", 0)
+    return np.array([
+        1.0,
+        change / 10.0,
+        math.tanh(change / 2.0),
+        math.tanh(change / 5.0),
+        math.log1p(volume) / 25.0,
+        _number(market_data.get("volatility")),
+        _number(sentiment),
+    ])
+
+
+FEATURE_COUNT = len(market_features({}))
+
+
+@dataclass
+class LocalModel:
+    """Ridge regression over numeric LLM output fields plus a one-hot label head."""
+    targets: Tuple[str, ...]
+    label: str
+    labels: Tuple[str, ...]
+    bounds: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    weights: Optional[np.ndarray] = None  # (features, targets + labels)
+    samples: int = 0
+
+    @property
+    def trained(self) -> bool:
+        return self.weights is not None
+
+    def target_row(self, output: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Training target for one logged output, or None if it is unusable."""
+        if not isinstance(output, dict) or output.get(self.label) not in self.labels:
+            return None
+        try:
+            values = [float(output[name]) for name in self.targets]
+        except (KeyError, TypeError, ValueError):
+            return None
+        one_hot = [1.0 if output[self.label] == label else 0.0 for label in self.labels]
+        return np.array(values + one_hot)
+
+    def fit(self, X: np.ndarray, Y: np.ndarray, l2: float = 1.0):
+        penalty = l2 * np.eye(X.shape[1])
+        penalty[0, 0] = 0.0  # leave the intercept unregularized
+        self.weights = np.linalg.solve(X.T @ X + penalty, X.T @ Y)
+        self.samples = len(X)
+
+    def predict(self, features: np.ndarray) -> Dict[str, Any]:
+        raw = features @ self.weights
+        result = {}
+        for i, name in enumerate(self.targets):
+            low, high = self.bounds.get(name, (-math.inf, math.inf))
+            result[name] = round(float(min(max(raw[i], low), high)), 4)
+        result[self.label] = self.labels[int(np.argmax(raw[len(self.targets):]))]
+        return result
+
+
+def _default_models() -> Dict[str, LocalModel]:
+    return {
+        "sentiment": LocalModel(
+            targets=("score", "confidence"), label="mood", labels=MOODS,
+            bounds={"score": (-1.0, 1.0), "confidence": (0.0, 1.0)},
+        ),
+        "strategy": LocalModel(
+            targets=("confidence", "expected_profit", "stop_loss", "take_profit"), label="action", labels=ACTIONS,
+            bounds={"confidence": (0.0, 1.0), "expected_profit": (0.0, 100.0),
+                    "stop_loss": (0.0, 100.0), "take_profit": (0.0, 100.0)},
+        ),
+    }
+
+
+class LocalInferenceTier:
+    """Logs remote LLM outputs, trains local models from them and serves predictions."""
+
+    def __init__(self, model_path: Optional[str] = DEFAULT_MODEL_PATH, log_path: Optional[str] = DEFAULT_LOG_PATH):
+        self.model_path = model_path
+        self.log_path = log_path
+        self.models = _default_models()
+        self._lock = threading.Lock()
+        self.stats = {"recorded": 0, "predictions": 0, "untrained": 0, "predict_seconds": 0.0}
+        if model_path and os.path.exists(model_path):
+            self.load(model_path)
+
+    def record(self, kind: str, market_data: Dict[str, Any], output: Any):
+        """Append a remote answer to the training log (no-op unless a log path is set)."""
+        if not self.log_path or kind not in self.models or not isinstance(output, dict) or "error" in output:
+            return
+        line = json.dumps({"kind": kind, "timestamp": time.time(), "market_data": market_data, "output": output},
+                          default=str)
+        try:
+            with self._lock:
+                directory = os.path.dirname(self.log_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.log_path, "a") as f:
+                    f.write(line + "\n")
+            self.stats["recorded"] += 1
+        except OSError as e:
+            logger.warning(f"Failed to log LLM output for local training: {e}")
+
+    def train(self, log_path: Optional[str] = None, l2: float = 1.0) -> Dict[str, int]:
+        """Fit every model with enough usable rows in the log; returns samples per model."""
+        rows: Dict[str, Tuple[list, list]] = {kind: ([], []) for kind in self.models}
+        with open(log_path or self.log_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                model = self.models.get(entry.get("kind"))
+                market_data = entry.get("market_data")
+                target = model.target_row(entry.get("output")) if model and isinstance(market_data, dict) else None
+                if target is not None:
+                    features, targets = rows[entry["kind"]]
+                    features.append(market_features(market_data))
+                    targets.append(target)
+
+        trained = {}
+        for kind, (features, targets) in rows.items():
+            if len(features) < FEATURE_COUNT:
+                logger.warning(f"Not enough logged {kind} outputs to train ({len(features)} rows)")
+                continue
+            self.models[kind].fit(np.array(features), np.array(targets), l2=l2)
+            trained[kind] = len(features)
+        logger.info(f"Trained local models: {trained}")
+        return trained
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.model_path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        arrays = {}
+        for kind, model in self.models.items():
+            if model.trained:
+                arrays[kind] = model.weights
+                arrays[f"{kind}_samples"] = np.array(model.samples)
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    def load(self, path: str):
+        try:
+            with np.load(path) as data:
+                for kind, model in self.models.items():
+                    expected = (FEATURE_COUNT, len(model.targets) + len(model.labels))
+                    if kind in data and data[kind].shape == expected:
+                        model.weights = data[kind]
+                        model.samples = int(data[f"{kind}_samples"])
+            logger.info(f"Loaded local models from {path}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Failed to load local models from {path}: {e}")
+
+    def predict(self, kind: str, market_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Local answer for a market snapshot, or None if that model is untrained."""
+        model = self.models.get(kind)
+        if model is None or not model.trained:
+            self.stats["untrained"] += 1
+            return None
+        started = time.perf_counter()
+        result = model.predict(market_features(market_data))
+        self.stats["predict_seconds"] += time.perf_counter() - started
+        self.stats["predictions"] += 1
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        predictions = self.stats["predictions"]
+        return {
+            **self.stats,
+            "avg_predict_ms": self.stats["predict_seconds"] * 1000 / predictions if predictions else 0.0,
+            "models": {kind: {"trained": model.trained, "samples": model.samples}
+                       for kind, model in self.models.items()},
+        }
+
+
+class LatencyBudgetPolicy:
+    """Serve the remote answer if it arrives within budget, otherwise the local one.
+
+    A remote call that misses its budget is not cancelled: it keeps running in
+    the background so the caller's own caching stores its result for next time.
+    """
+
+    def __init__(self, default_budget: float = DEFAULT_LATENCY_BUDGET):
+        self.default_budget = default_budget
+        self._pending = set()
+        self.stats = {"remote": 0, "local": 0, "late_refreshes": 0, "remote_failures": 0}
+
+    async def run(self, remote: Awaitable[Any], local: Callable[[], Any],
+                  budget: Optional[float] = None) -> Tuple[Any, str]:
+        """Return ``(result, "remote" | "local")``."""
+        budget = self.default_budget if budget is None else budget
+        task = asyncio.ensure_future(remote)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), max(budget, 0.0))
+            self.stats["remote"] += 1
+            return result, "remote"
+        except asyncio.TimeoutError:
+            if not task.done():
+                self._pending.add(task)
+                task.add_done_callback(self._late_done)
+                logger.info(f"Remote LLM missed its {budget:.2f}s budget; serving local answer")
+            else:
+                self.stats["remote_failures"] += 1
+        except Exception as e:
+            self.stats["remote_failures"] += 1
+            logger.warning(f"Remote LLM failed, serving local answer: {e}")
+        self.stats["local"] += 1
+        return local(), "local"
+
+    def _late_done(self, task: asyncio.Future):
+        self._pending.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.stats["remote_failures"] += 1
+        else:
+            self.stats["late_refreshes"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": len(self._pending), "default_budget": self.default_budget}
+
+
+# Global instances
+local_models = LocalInferenceTier()
+latency_budget_policy = LatencyBudgetPolicy()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    source = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_LOG_PATH
+    target = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_MODEL_PATH
+    if not source:
+        sys.exit("usage: python -m utils.local_models <log_path> [model_path]")
+    tier = LocalInferenceTier(model_path=None)
+    if tier.train(source):
+        tier.save(target)
+        print(f"Saved local models to {target}")
@@ -0,0 +1,270 @@
+"""
+Reactive market event bus for opportunity detection.
+
+Producers (pool-reserve cache, gas oracle, price scanner) publish small
+events tagged with topics such as ``price:eth``, ``reserve:arbitrum:0xpair``
+or ``gas:optimism``. Consumers register *watches*: an evaluator plus the
+topics it depends on. When an event arrives, only the watches indexed under
+its topics are marked dirty; after a short coalescing window the dirty set is
+re-evaluated once, so a burst of updates costs one evaluation per affected
+watch and an idle market costs nothing.
+"""
+import asyncio
+import inspect
+import logging
+import os
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def price_topic(token: str) -> str:
+    return f"price:{str(token).lower()}"
+
+
+def reserve_topic(network: str, pair_address: str) -> str:
+    return f"reserve:{network}:{str(pair_address).lower()}"
+
+
+def gas_topic(network: str) -> str:
+    return f"gas:{network}"
+
+
+@dataclass
+class MarketEvent:
+    """A single market update and the topics it touches."""
+    topics: List[str]
+    source: str = ""
+    payload: Dict[str, Any] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class Watch:
+    """An evaluator re-run whenever one of its topics is updated."""
+    name: str
+    topics: Set[str]
+    evaluator: Callable[[], Any]
+    evaluations: int = 0
+    last_evaluated: float = 0.0
+    last_result_count: int = 0
+
+
+OpportunityCallback = Callable[[str, List[Dict[str, Any]]], Awaitable[None]]
+
+
+class MarketEventBus:
+    """Topic-indexed, debounced dispatcher from market updates to detection logic."""
+
+    def __init__(self, debounce_seconds: Optional[float] = None, latency_window: int = 500):
+        self.debounce_seconds = debounce_seconds if debounce_seconds is not None else \
+            float(os.getenv("MARKET_EVENT_DEBOUNCE_SECONDS", "0.05"))
+        self.watches: Dict[str, Watch] = {}
+        self._index: Dict[str, Set[str]] = defaultdict(set)
+        self._dirty: Dict[str, float] = {}
+        self._waiters: List[tuple] = []
+        self._callbacks: List[OpportunityCallback] = []
+        self._listeners: List[Callable[[MarketEvent], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self.stats = defaultdict(int)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+    def watch(self, name: str, topics: Iterable[str], evaluator: Callable[[], Any]):
+        """Register (or replace) a watch. ``evaluator`` may be sync or async."""
+        self.unwatch(name)
+        watch = Watch(name=name, topics=set(topics), evaluator=evaluator)
+        self.watches[name] = watch
+        for topic in watch.topics:
+            self._index[topic].add(name)
+        if self.running:
+            self._mark_dirty(name, time.time())
+
+    def unwatch(self, name: str):
+        watch = self.watches.pop(name, None)
+        if not watch:
+            return
+        for topic in watch.topics:
+            names = self._index.get(topic)
+            if names:
+                names.discard(name)
+                if not names:
+                    del self._index[topic]
+        self._dirty.pop(name, None)
+
+    def on_opportunities(self, callback: OpportunityCallback):
+        self._callbacks.append(callback)
+
+    def subscribe(self, listener: Callable[[MarketEvent], None]):
+        """Receive every event as it is dispatched (on the bus loop, before evaluation)."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[MarketEvent], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+    def publish(self, topics: Iterable[str], source: str = "", **payload) -> bool:
+        """Publish an update. Safe to call from worker threads; a no-op until the bus has a loop."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self.stats['events_dropped'] += 1
+            return False
+        event = MarketEvent(topics=list(topics), source=source, payload=payload)
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        try:
+            if current is loop:
+                self._dispatch(event)
+            else:
+                loop.call_soon_threadsafe(self._dispatch, event)
+        except RuntimeError:
+            self.stats['events_dropped'] += 1
+            return False
+        return True
+
+    def _mark_dirty(self, name: str, timestamp: float):
+        if name in self._dirty:
+            self.stats['events_coalesced'] += 1
+        else:
+            self._dirty[name] = timestamp
+        if self._wakeup:
+            self._wakeup.set()
+
+    def _dispatch(self, event: MarketEvent):
+        self.stats['events'] += 1
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Market event listener failed: {e}")
+        for topic in event.topics:
+            for name in self._index.get(topic, ()):
+                self._mark_dirty(name, event.timestamp)
+        for topics, waiter in self._waiters:
+            if not waiter.done() and (topics is None or topics.intersection(event.topics)):
+                waiter.set_result(event)
+
+    async def wait_for(self, topics: Optional[Iterable[str]] = None,
+                       timeout: Optional[float] = None) -> Optional[MarketEvent]:
+        """Wait for the next event on any of ``topics`` (any event if None); None on timeout."""
+        self._bind_loop()
+        waiter = self._loop.create_future()
+        entry = (set(topics) if topics is not None else None, waiter)
+        self._waiters.append(entry)
+        try:
+            return await asyncio.wait_for(waiter, timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._waiters.remove(entry)
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+    async def _evaluate(self, name: str, first_event_at: float):
+        watch = self.watches.get(name)
+        if not watch:
+            return
+        try:
+            result = watch.evaluator()
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            self.stats['evaluation_errors'] += 1
+            logger.error(f"Market watch {name} failed to evaluate: {e}")
+            return
+        opportunities = list(result or [])
+        now = time.time()
+        watch.evaluations += 1
+        watch.last_evaluated = now
+        watch.last_result_count = len(opportunities)
+        self.stats['evaluations'] += 1
+        self.stats['opportunities'] += len(opportunities)
+        self._latencies.append(now - first_event_at)
+        for callback in self._callbacks:
+            try:
+                await callback(name, opportunities)
+            except Exception as e:
+                logger.error(f"Market event callback failed for {name}: {e}")
+
+    async def flush(self):
+        """Evaluate every dirty watch now."""
+        dirty, self._dirty = self._dirty, {}
+        if dirty:
+            self.stats['rounds'] += 1
+            await asyncio.gather(*(self._evaluate(name, ts) for name, ts in dirty.items()))
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Coalescing window: let a burst of updates settle into one round
+            if self.debounce_seconds > 0:
+                await asyncio.sleep(self.debounce_seconds)
+            self._wakeup.clear()
+            await self.flush()
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+
+    async def start(self):
+        """Start dispatching; every registered watch is evaluated once up front."""
+        if self.running:
+            return
+        self._bind_loop()
+        self._task = asyncio.create_task(self._run())
+        now = time.time()
+        for name in self.watches:
+            self._mark_dirty(name, now)
+        logger.info(f"Market event bus started with {len(self.watches)} watches")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info("Market event bus stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+
+        return {
+            **self.stats,
+            'running': self.running,
+            'watches': len(self.watches),
+            'topics': len(self._index),
+            'pending': len(self._dirty),
+            'detection_latency_p50_ms': percentile(0.5),
+            'detection_latency_p95_ms': percentile(0.95),
+        }
+
+
+# Global bus shared by the market-data producers and the opportunity detectors
+market_event_bus = MarketEventBus()
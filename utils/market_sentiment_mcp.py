@@ -23,6 +23,7 @@ from utils.web_data import WebDataFetcher
 
 # Import RehoboamAI for fallback to DeepSeek API
 from utils.rehoboam_ai import RehoboamAI
+from utils.local_models import local_models
 
 logger = logging.getLogger(__name__)
 
@@ -244,7 +245,8 @@ class MarketSentimentMCP:
     
     def _rule_based_sentiment_analysis(self, token: str, market_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Rule-based sentiment analysis as final fallback.
+        Local sentiment analysis as final fallback: the offline-trained model
+        if one is loaded, otherwise rules.
         
         Args:
             token: Token symbol
@@ -275,16 +277,21 @@ class MarketSentimentMCP:
             score = -0.8
             mood = "fearful"
         
-        # Log fallback usage
-        logger.info(f"Using fallback sentiment analysis for {token}: {mood}, score: {score}")
-        
-        return {
+        result = {
             "score": score,
             "mood": mood,
             "factors": ["price action", "market volatility"],
             "social_sentiment": "unknown",
             "confidence": 0.5
         }
+        prediction = local_models.predict("sentiment", market_data)
+        if prediction:
+            result.update(prediction, source="local_model")
+        
+        # Log fallback usage
+        logger.info(f"Using fallback sentiment analysis for {token}: {result['mood']}, score: {result['score']}")
+        
+        return result
     
     def _get_recent_news(self, token: str) -> List[str]:
         """
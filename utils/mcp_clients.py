@@ -1,16 +1,30 @@
-import httpx
+"""
+Clients for the MCP services listed in the MCP registry.
+
+Service URLs come from ``mcp_registry``, which caches the registry document
+with a TTL, serves a stale copy while refreshing it in the background and
+notifies watchers when a service's URL changes. Each service gets one pooled
+keep-alive ``httpx.AsyncClient`` and a circuit breaker, so calls to a dead
+service fail fast instead of waiting for a timeout every time.
+"""
+import asyncio
+import json
 import logging
-from typing import Optional, Dict, Any
-
-logger = logging.getLogger(__name__)
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-MCP_REGISTRY_URL = "http://mcp-registry:3001/registry"
-from typing import Optional, Dict, Any, List # Ensure List is imported
-import json # Ensure json is imported for logging
+import httpx
 
 logger = logging.getLogger(__name__)
 
 MCP_REGISTRY_URL = "http://mcp-registry:3001/registry"
+MCP_REGISTRY_TTL_SECONDS = float(os.getenv("MCP_REGISTRY_TTL_SECONDS", "30"))
+MCP_REGISTRY_MAX_STALE_SECONDS = float(os.getenv("MCP_REGISTRY_MAX_STALE_SECONDS", "300"))
+MCP_BREAKER_FAILURES = int(os.getenv("MCP_BREAKER_FAILURES", "5"))
+MCP_BREAKER_RESET_SECONDS = float(os.getenv("MCP_BREAKER_RESET_SECONDS", "30"))
+MCP_DEFAULT_TIMEOUT = 10.0
 
 # Service name constants
 CONSCIOUSNESS_SERVICE_NAMES = ["mcp-consciousness-layer", "consciousness-layer", "consciousness"]
@@ -31,51 +45,276 @@ STRATEGY_ENDPOINT = "/generate-strategy"
 PORTFOLIO_ENDPOINT = "/optimize-portfolio"
 
 
-async def _get_service_url_from_registry(client: httpx.AsyncClient, service_names_to_find: List[str], log_service_prefix: str) -> Optional[str]:
+class MCPCircuitOpenError(httpx.RequestError):
+    """Raised instead of sending a request to a service whose circuit is open."""
+
+
+@dataclass
+class CircuitBreaker:
+    """Opens after consecutive failures; lets one trial request through after ``reset_timeout``."""
+    failure_threshold: int = MCP_BREAKER_FAILURES
+    reset_timeout: float = MCP_BREAKER_RESET_SECONDS
+    failures: int = 0
+    opened_at: Optional[float] = None
+    rejected: int = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "half_open":
+            self.opened_at = time.monotonic()  # one trial; others wait for its outcome
+        elif state == "open":
+            self.rejected += 1
+            return False
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+def _service_map(registry_data: Any, log_service_prefix: Optional[str] = None) -> Dict[str, str]:
+    """Lower-cased service name -> URL for every usable registry entry.
+
+    With ``log_service_prefix`` set, malformed entries are reported as warnings.
+    """
+    services = registry_data.get("services", registry_data) if isinstance(registry_data, dict) else None
+    if not isinstance(services, dict):
+        if log_service_prefix:
+            logger.warning(f"MCP registry data does not contain 'services' key or it's not a dictionary for {log_service_prefix}.")
+        return {}
+    service_map = {}
+    for name, info in services.items():
+        if not isinstance(info, dict):
+            if log_service_prefix:
+                logger.warning(f"Service entry for '{name}' in MCP registry is not a dictionary for {log_service_prefix}.")
+            continue
+        url = info.get("url")
+        if not url:
+            if log_service_prefix:
+                logger.warning(f"Service '{name}' URL is {'None' if url is None else 'empty'} in MCP registry for {log_service_prefix}.")
+            continue
+        service_map[name.lower()] = url
+    return service_map
+
+
+class MCPRegistryClient:
+    """Cached MCP registry with pooled per-service clients and circuit breakers."""
+
+    def __init__(self, registry_url: str = MCP_REGISTRY_URL, ttl: float = MCP_REGISTRY_TTL_SECONDS,
+                 max_stale: float = MCP_REGISTRY_MAX_STALE_SECONDS, timeout: float = MCP_DEFAULT_TIMEOUT,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.registry_url = registry_url
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.timeout = timeout
+        self.transport = transport  # injected in tests
+        self._data: Optional[Dict[str, Any]] = None
+        self._services: Dict[str, str] = {}  # _service_map of _data, rebuilt on each update
+        self._fetched_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._clients: Dict[str, Tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._watchers: List[Callable[[Dict[str, Optional[str]]], None]] = []
+        self.stats = {"hits": 0, "stale_hits": 0, "fetches": 0, "fetch_errors": 0, "changes": 0}
+
+    def client(self, base_url: str) -> httpx.AsyncClient:
+        """Pooled keep-alive client for a base URL, bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(base_url)
+        if entry and entry[1] is loop and not entry[0].is_closed:
+            return entry[0]
+        client = httpx.AsyncClient(timeout=self.timeout, transport=self.transport,
+                                   limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60))
+        self._clients[base_url] = (client, loop)
+        return client
+
+    def breaker(self, service_url: str) -> CircuitBreaker:
+        return self.breakers.setdefault(service_url, CircuitBreaker())
+
+    def watch(self, callback: Callable[[Dict[str, Optional[str]]], None]):
+        """Call ``callback({service: new_url_or_None})`` whenever registry entries change."""
+        self._watchers.append(callback)
+
+    async def registry(self) -> Optional[Dict[str, Any]]:
+        """The registry document: fresh from cache, stale while refreshing, or fetched now."""
+        age = time.monotonic() - self._fetched_at
+        if self._data is not None and age < self.ttl:
+            self.stats["hits"] += 1
+            return self._data
+        if self._data is not None and age < self.ttl + self.max_stale:
+            self.stats["stale_hits"] += 1
+            self._refresh_in_background()
+            return self._data
+        return await self.refresh()
+
+    async def services(self) -> Optional[Dict[str, str]]:
+        """Service name -> URL map of the cached registry, or None if it is unavailable."""
+        if await self.registry() is None:
+            return None
+        return self._services
+
+    def invalidate(self):
+        """Mark the cached registry stale so the next lookup refreshes it in the background."""
+        self._fetched_at = min(self._fetched_at, time.monotonic() - self.ttl)
+
+    def _refresh_in_background(self):
+        if self._inflight is None or self._inflight.done() or self._inflight.get_loop() is not asyncio.get_running_loop():
+            self._inflight = asyncio.ensure_future(self._fetch())
+
+    async def refresh(self) -> Optional[Dict[str, Any]]:
+        """Fetch the registry, sharing one request between concurrent callers."""
+        self._refresh_in_background()
+        return await asyncio.shield(self._inflight)
+
+    async def _fetch(self) -> Optional[Dict[str, Any]]:
+        self.stats["fetches"] += 1
+        try:
+            response = await self.client(self.registry_url).get(f"{self.registry_url}/registry")
+            response.raise_for_status()
+            data = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            self.stats["fetch_errors"] += 1
+            logger.error(f"Error refreshing MCP registry from {self.registry_url}: {str(e)}")
+            return self._data  # keep serving the last known map
+        if DEBUG_LOG_REGISTRY_RESPONSE:
+            logger.debug(f"MCP Registry raw response: {json.dumps(data, indent=2, default=str)}")
+        self._update(data)
+        return data
+
+    def _update(self, data: Dict[str, Any]):
+        old, new = self._services, _service_map(data)
+        first_load = self._data is None
+        self._data, self._services, self._fetched_at = data, new, time.monotonic()
+        changes = {name: new.get(name) for name in old.keys() | new.keys() if old.get(name) != new.get(name)}
+        if first_load or not changes:
+            return
+        self.stats["changes"] += 1
+        logger.info(f"MCP registry changed: {changes}")
+        stale_urls = {old[name] for name in changes if name in old} - set(new.values())
+        for url in stale_urls:
+            self.breakers.pop(url, None)
+            entry = self._clients.pop(url, None)
+            if entry and entry[1] is asyncio.get_running_loop():
+                asyncio.ensure_future(entry[0].aclose())
+        for callback in self._watchers:
+            try:
+                callback(changes)
+            except Exception as e:
+                logger.error(f"MCP registry watcher failed: {str(e)}")
+
+    async def start(self, interval: Optional[float] = None):
+        """Refresh the registry in the background so lookups never wait on it."""
+        if self._refresh_task and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self._refresh_loop(interval or self.ttl / 2))
+
+    async def _refresh_loop(self, interval: float):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(interval)
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the pooled clients that belong to the running event loop."""
+        loop = asyncio.get_running_loop()
+        for url, (client, client_loop) in list(self._clients.items()):
+            if client_loop is loop:
+                await client.aclose()
+            del self._clients[url]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "services": dict(self._services),
+            "age_seconds": time.monotonic() - self._fetched_at if self._data is not None else None,
+            "open_pools": sorted(self._clients),
+            "breakers": {url: {"state": b.state, "failures": b.failures, "rejected": b.rejected}
+                         for url, b in self.breakers.items()},
+        }
+
+
+# Global registry shared by the MCP client functions
+mcp_registry = MCPRegistryClient()
+
+
+async def _request(service_url: str, method: str, target_url: str, **kwargs) -> httpx.Response:
+    """Send a request on the service's pooled client, through its circuit breaker."""
+    breaker = mcp_registry.breaker(service_url)
+    if not breaker.allow():
+        raise MCPCircuitOpenError(f"circuit open for {service_url}")
+    client = mcp_registry.client(service_url)
+    try:
+        response = await getattr(client, method)(target_url, **kwargs)
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code >= 500:
+            breaker.record_failure()
+        raise
+    except httpx.RequestError:
+        breaker.record_failure()
+        mcp_registry.invalidate()  # the service may have moved
+        raise
+    breaker.record_success()
+    return response
+
+
+def _find_service_url(services: Dict[str, str], service_names_to_find: List[str], log_service_prefix: str) -> Optional[str]:
+    """The URL of the first of ``service_names_to_find`` in a ``_service_map``."""
+    for service_name in service_names_to_find:
+        service_url = services.get(service_name.lower())
+        if service_url:
+            return service_url
+    logger.warning(f"Service names {service_names_to_find} not found in MCP Registry for {log_service_prefix} with valid URL.")
+    return None
+
+
+async def _get_service_url_from_registry(client: Optional[httpx.AsyncClient], service_names_to_find: List[str], log_service_prefix: str) -> Optional[str]:
     """
     Helper function to query the MCP registry and find a service URL.
+
+    Without a client the shared cached registry is used; with one, the
+    registry document is fetched directly through it.
     """
-    logger.info(f"Querying MCP Registry at {MCP_REGISTRY_URL} for {log_service_prefix} (candidates: {service_names_to_find}).")
     try:
-        registry_response = await client.get(f"{MCP_REGISTRY_URL}/registry") # Corrected URL construction
-        registry_response.raise_for_status()
-        registry_data = registry_response.json()
-
-        if DEBUG_LOG_REGISTRY_RESPONSE:
-            try:
-                logger.debug(f"MCP Registry raw response for {log_service_prefix}: {json.dumps(registry_data, indent=2)}")
-            except TypeError:
-                logger.debug(f"MCP Registry raw response (non-serializable) for {log_service_prefix}: {registry_data}")
-
-        services_dict = None
-        if "services" in registry_data and isinstance(registry_data["services"], dict):
-            services_dict = registry_data["services"]
-        elif isinstance(registry_data, dict) and not any(key in registry_data for key in ["services", "error", "message"]): # If no 'services' and not an error structure, assume flat map
-            # This condition might need refinement based on actual flat structures encountered
-            logger.debug(f"No 'services' key found; attempting to use root of registry_data as service map for {log_service_prefix}.")
-            services_dict = registry_data
-
-        if services_dict is not None:
-            for service_key_to_find in service_names_to_find: # Iterate through desired names first
-                for reg_service_name, service_info in services_dict.items():
-                    if service_key_to_find.lower() == reg_service_name.lower():
-                        if isinstance(service_info, dict):
-                            service_url = service_info.get("url")
-                            if service_url is None:
-                                logger.warning(f"Service '{reg_service_name}' URL is None in MCP registry for {log_service_prefix}.")
-                                continue # Try other aliases or registry entries
-                            if not service_url: # Empty string
-                                logger.warning(f"Service '{reg_service_name}' URL is empty in MCP registry for {log_service_prefix}.")
-                                continue # Treat empty URL as invalid
-                            logger.info(f"Found {log_service_prefix} URL: {service_url} (matched '{service_key_to_find}' with registry key '{reg_service_name}')")
-                            return service_url
-                        else:
-                            logger.warning(f"Service entry for '{reg_service_name}' in MCP registry is not a dictionary for {log_service_prefix}.")
-            logger.warning(f"Service names {service_names_to_find} not found in MCP Registry for {log_service_prefix} with valid URL.")
+        if client is None:
+            services = await mcp_registry.services()
+            if services is None:
+                logger.warning(f"MCP registry unavailable for {log_service_prefix}.")
+                return None
         else:
-            logger.warning(f"MCP registry data does not contain 'services' key or it's not a dictionary for {log_service_prefix}.")
-
-        return None
+            logger.debug(f"Querying MCP Registry at {MCP_REGISTRY_URL} for {log_service_prefix} (candidates: {service_names_to_find}).")
+            registry_response = await client.get(f"{MCP_REGISTRY_URL}/registry") # Corrected URL construction
+            registry_response.raise_for_status()
+            registry_data = registry_response.json()
+            if DEBUG_LOG_REGISTRY_RESPONSE:
+                try:
+                    logger.debug(f"MCP Registry raw response for {log_service_prefix}: {json.dumps(registry_data, indent=2)}")
+                except TypeError:
+                    logger.debug(f"MCP Registry raw response (non-serializable) for {log_service_prefix}: {registry_data}")
+            services = _service_map(registry_data, log_service_prefix)
+
+        return _find_service_url(services, service_names_to_find, log_service_prefix)
 
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error fetching MCP registry for {log_service_prefix}: {str(e)}") # Simplified log
@@ -97,24 +336,22 @@ async def get_mcp_consciousness_state() -> Optional[Dict[str, Any]]:
     """
     log_service_prefix = "MCP Consciousness Layer (State)"
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            service_url = await _get_service_url_from_registry(client, CONSCIOUSNESS_SERVICE_NAMES, log_service_prefix)
-            if not service_url: # Error already logged by _get_service_url_from_registry
-                return None
+        service_url = await _get_service_url_from_registry(None, CONSCIOUSNESS_SERVICE_NAMES, log_service_prefix)
+        if not service_url: # Error already logged by _get_service_url_from_registry
+            return None
 
-            target_url = f"{service_url.rstrip('/')}{CONSCIOUSNESS_STATE_ENDPOINT}"
-            logger.info(f"Fetching consciousness state from {target_url}")
+        target_url = f"{service_url.rstrip('/')}{CONSCIOUSNESS_STATE_ENDPOINT}"
+        logger.info(f"Fetching consciousness state from {target_url}")
 
-            state_response = await client.get(target_url)
-            state_response.raise_for_status()
+        state_response = await _request(service_url, "get", target_url)
 
-            state_data = state_response.json()
-            if not isinstance(state_data, dict):
-                logger.warning(f"Unexpected data format from {log_service_prefix} at {target_url}. Expected dict, got {type(state_data)}.")
-                # Optionally, return None or raise an error if format is critical
-            else:
-                logger.info("Successfully fetched consciousness state.")
-            return state_data
+        state_data = state_response.json()
+        if not isinstance(state_data, dict):
+            logger.warning(f"Unexpected data format from {log_service_prefix} at {target_url}. Expected dict, got {type(state_data)}.")
+            # Optionally, return None or raise an error if format is critical
+        else:
+            logger.info("Successfully fetched consciousness state.")
+        return state_data
 
     except httpx.TimeoutException:
         logger.error(f"Timeout during request to {log_service_prefix} or its registry lookup.")
@@ -139,24 +376,22 @@ async def get_mcp_market_emotions() -> Optional[Dict[str, Any]]:
     """
     log_service_prefix = "MCP Consciousness Layer (Emotions)"
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            service_url = await _get_service_url_from_registry(client, CONSCIOUSNESS_SERVICE_NAMES, log_service_prefix)
-            if not service_url: # Error already logged by _get_service_url_from_registry
-                return None
+        service_url = await _get_service_url_from_registry(None, CONSCIOUSNESS_SERVICE_NAMES, log_service_prefix)
+        if not service_url: # Error already logged by _get_service_url_from_registry
+            return None
 
-            target_url = f"{service_url.rstrip('/')}{CONSCIOUSNESS_EMOTIONS_ENDPOINT}"
-            logger.info(f"Fetching market emotions from {target_url}")
+        target_url = f"{service_url.rstrip('/')}{CONSCIOUSNESS_EMOTIONS_ENDPOINT}"
+        logger.info(f"Fetching market emotions from {target_url}")
 
-            emotions_response = await client.get(target_url)
-            emotions_response.raise_for_status()
+        emotions_response = await _request(service_url, "get", target_url)
 
-            emotions_data = emotions_response.json()
-            if not isinstance(emotions_data, dict):
-                logger.warning(f"Unexpected data format from {log_service_prefix} at {target_url}. Expected dict, got {type(emotions_data)}.")
-                # Optionally, return None or raise an error
-            else:
-                logger.info("Successfully fetched market emotions.")
-            return emotions_data
+        emotions_data = emotions_response.json()
+        if not isinstance(emotions_data, dict):
+            logger.warning(f"Unexpected data format from {log_service_prefix} at {target_url}. Expected dict, got {type(emotions_data)}.")
+            # Optionally, return None or raise an error
+        else:
+            logger.info("Successfully fetched market emotions.")
+        return emotions_data
 
     except httpx.TimeoutException:
         logger.error(f"Timeout during request to {log_service_prefix} or its registry lookup.")
@@ -181,23 +416,21 @@ async def get_mcp_market_analysis(token: str) -> Optional[Dict[str, Any]]:
     """
     log_service_prefix = "MCP Market Analyzer"
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            service_url = await _get_service_url_from_registry(client, MARKET_ANALYZER_SERVICE_NAMES, log_service_prefix)
-            if not service_url: # Error already logged by _get_service_url_from_registry
-                return None
+        service_url = await _get_service_url_from_registry(None, MARKET_ANALYZER_SERVICE_NAMES, log_service_prefix)
+        if not service_url: # Error already logged by _get_service_url_from_registry
+            return None
 
-            target_url = f"{service_url.rstrip('/')}{MARKET_ANALYSIS_ENDPOINT_TEMPLATE.format(token=token)}"
-            logger.info(f"Fetching market analysis for {token} from {target_url}")
+        target_url = f"{service_url.rstrip('/')}{MARKET_ANALYSIS_ENDPOINT_TEMPLATE.format(token=token)}"
+        logger.info(f"Fetching market analysis for {token} from {target_url}")
 
-            analysis_response = await client.get(target_url)
-            analysis_response.raise_for_status()
+        analysis_response = await _request(service_url, "get", target_url)
 
-            analysis_data = analysis_response.json()
-            if not isinstance(analysis_data, dict):
-                logger.warning(f"Unexpected data format from {log_service_prefix} for {token} at {target_url}. Expected dict, got {type(analysis_data)}.")
-            else:
-                logger.info(f"Successfully fetched market analysis for {token}.")
-            return analysis_data
+        analysis_data = analysis_response.json()
+        if not isinstance(analysis_data, dict):
+            logger.warning(f"Unexpected data format from {log_service_prefix} for {token} at {target_url}. Expected dict, got {type(analysis_data)}.")
+        else:
+            logger.info(f"Successfully fetched market analysis for {token}.")
+        return analysis_data
 
     except httpx.TimeoutException:
         logger.error(f"Timeout during request to {log_service_prefix} or its registry lookup.")
@@ -223,23 +456,21 @@ async def get_mcp_reasoning(prompt: str, task_type: str = "general", complexity:
     log_service_prefix = "MCP Reasoning Orchestrator"
     payload = {"prompt": prompt, "task_type": task_type, "complexity": complexity}
     try:
-        async with httpx.AsyncClient(timeout=20.0) as client: # Reasoning might take longer
-            service_url = await _get_service_url_from_registry(client, REASONING_ORCHESTRATOR_SERVICE_NAMES, log_service_prefix)
-            if not service_url: # Error already logged by _get_service_url_from_registry
-                return None
+        service_url = await _get_service_url_from_registry(None, REASONING_ORCHESTRATOR_SERVICE_NAMES, log_service_prefix)
+        if not service_url: # Error already logged by _get_service_url_from_registry
+            return None
 
-            target_url = f"{service_url.rstrip('/')}{REASONING_ENDPOINT}"
-            logger.info(f"Requesting reasoning from {target_url} with payload: {payload}")
+        target_url = f"{service_url.rstrip('/')}{REASONING_ENDPOINT}"
+        logger.info(f"Requesting reasoning from {target_url} with payload: {payload}")
 
-            reasoning_response = await client.post(target_url, json=payload)
-            reasoning_response.raise_for_status()
+        reasoning_response = await _request(service_url, "post", target_url, json=payload, timeout=20.0)
 
-            response_data = reasoning_response.json()
-            if not isinstance(response_data, dict):
-                logger.warning(f"Unexpected data format from {log_service_prefix} at {target_url}. Expected dict, got {type(response_data)}.")
-            else:
-                logger.info("Successfully received reasoning response.")
-            return response_data
+        response_data = reasoning_response.json()
+        if not isinstance(response_data, dict):
+            logger.warning(f"Unexpected data format from {log_service_prefix} at {target_url}. Expected dict, got {type(response_data)}.")
+        else:
+            logger.info("Successfully received reasoning response.")
+        return response_data
 
     except httpx.TimeoutException:
         logger.error(f"Timeout during request to {log_service_prefix} or its registry lookup.")
@@ -265,23 +496,21 @@ async def get_mcp_specialist_strategy(token: str, analysis: Dict[str, Any], risk
     log_service_prefix = "MCP Strategy Specialist"
     payload = {"token": token, "analysis": analysis, "risk_profile": risk_profile}
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            service_url = await _get_service_url_from_registry(client, STRATEGY_SPECIALIST_SERVICE_NAMES, log_service_prefix)
-            if not service_url: # Error already logged by _get_service_url_from_registry
-                return None
+        service_url = await _get_service_url_from_registry(None, STRATEGY_SPECIALIST_SERVICE_NAMES, log_service_prefix)
+        if not service_url: # Error already logged by _get_service_url_from_registry
+            return None
 
-            target_url = f"{service_url.rstrip('/')}{STRATEGY_ENDPOINT}"
-            logger.info(f"Requesting strategy from {target_url} for token {token}")
+        target_url = f"{service_url.rstrip('/')}{STRATEGY_ENDPOINT}"
+        logger.info(f"Requesting strategy from {target_url} for token {token}")
 
-            strategy_response = await client.post(target_url, json=payload)
-            strategy_response.raise_for_status()
+        strategy_response = await _request(service_url, "post", target_url, json=payload, timeout=15.0)
 
-            response_data = strategy_response.json()
-            if not isinstance(response_data, dict):
-                logger.warning(f"Unexpected data format from {log_service_prefix} for {token} at {target_url}. Expected dict, got {type(response_data)}.")
-            else:
-                logger.info(f"Successfully received strategy for {token}.")
-            return response_data
+        response_data = strategy_response.json()
+        if not isinstance(response_data, dict):
+            logger.warning(f"Unexpected data format from {log_service_prefix} for {token} at {target_url}. Expected dict, got {type(response_data)}.")
+        else:
+            logger.info(f"Successfully received strategy for {token}.")
+        return response_data
 
     except httpx.TimeoutException:
         logger.error(f"Timeout during request to {log_service_prefix} or its registry lookup.")
@@ -307,23 +536,21 @@ async def get_mcp_portfolio_optimization(current_token: str, risk_profile: str,
     log_service_prefix = "MCP Portfolio Optimizer"
     payload = {"current_token": current_token, "risk_profile": risk_profile, "market_conditions": market_conditions}
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            service_url = await _get_service_url_from_registry(client, PORTFOLIO_OPTIMIZER_SERVICE_NAMES, log_service_prefix)
-            if not service_url: # Error already logged by _get_service_url_from_registry
-                return None
+        service_url = await _get_service_url_from_registry(None, PORTFOLIO_OPTIMIZER_SERVICE_NAMES, log_service_prefix)
+        if not service_url: # Error already logged by _get_service_url_from_registry
+            return None
 
-            target_url = f"{service_url.rstrip('/')}{PORTFOLIO_ENDPOINT}"
-            logger.info(f"Requesting portfolio optimization from {target_url} for token {current_token}")
+        target_url = f"{service_url.rstrip('/')}{PORTFOLIO_ENDPOINT}"
+        logger.info(f"Requesting portfolio optimization from {target_url} for token {current_token}")
 
-            optimization_response = await client.post(target_url, json=payload)
-            optimization_response.raise_for_status()
+        optimization_response = await _request(service_url, "post", target_url, json=payload, timeout=15.0)
 
-            response_data = optimization_response.json()
-            if not isinstance(response_data, dict):
-                logger.warning(f"Unexpected data format from {log_service_prefix} for {current_token} at {target_url}. Expected dict, got {type(response_data)}.")
-            else:
-                logger.info(f"Successfully received portfolio optimization for {current_token}.")
-            return response_data
+        response_data = optimization_response.json()
+        if not isinstance(response_data, dict):
+            logger.warning(f"Unexpected data format from {log_service_prefix} for {current_token} at {target_url}. Expected dict, got {type(response_data)}.")
+        else:
+            logger.info(f"Successfully received portfolio optimization for {current_token}.")
+        return response_data
 
     except httpx.TimeoutException:
         logger.error(f"Timeout during request to {log_service_prefix} or its registry lookup.")
@@ -1,6 +1,7 @@
 import os
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence, Union
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -253,6 +254,15 @@ class NetworkConfig:
                 }
             }
         }
+
+        # Dense bridge-cost model, compiled once and rebuilt only when network parameters change
+        self._network_index: Dict[str, int] = {}
+        self._bridge_fixed_fee: Optional[np.ndarray] = None
+        self._bridge_proportional_fee: Optional[np.ndarray] = None
+        self._bridge_time: Optional[np.ndarray] = None
+        self._gas_factor: Optional[np.ndarray] = None
+        self._bridge_model_version = 0
+        self.compile_bridge_cost_model()
         
     def get_network(self, network_id: str) -> Dict[str, Any]:
         """Get network configuration by ID"""
@@ -332,13 +342,121 @@ class NetworkConfig:
         
         return layer_factor * time_factor
         
-    def estimate_bridging_costs(self, from_network: str, to_network: str, amount: float) -> Dict[str, Any]:
+    def update_network(self, network_id: str, **fields: Any) -> None:
+        """Update network parameters; invalidates the bridge-cost model since gas factors may change"""
+        self.networks.setdefault(network_id, {}).update(fields)
+        self.invalidate_bridge_cost_model()
+
+    def invalidate_bridge_cost_model(self) -> None:
+        """Drop the compiled bridge-cost matrices; they are rebuilt on the next lookup"""
+        self._bridge_fixed_fee = None
+        self._bridge_proportional_fee = None
+        self._bridge_time = None
+        self._gas_factor = None
+
+    def _bridge_cost_components(self, to_network_data: Dict[str, Any]) -> tuple:
+        """Fixed fee, proportional fee rate and time (seconds) for bridging into a network"""
+        # Base fee depends on network type (very rough estimation)
+        base_fee = 0.001  # ETH or equivalent
+        
+        # Fee multiplier based on rollup type
+        rollup_type = to_network_data.get('rollup_type', '')
+        fee_multiplier = 1.0
+        if rollup_type == 'optimistic':
+            fee_multiplier = 1.5  # Higher fees for optimistic rollups
+        elif rollup_type == 'zk':
+            fee_multiplier = 1.2  # Slightly higher fees for ZK rollups
+            
+        # Time estimate based on rollup type (in seconds)
+        time_estimate = 60  # Default 1 minute
+        if rollup_type == 'optimistic':
+            time_estimate = 7 * 24 * 60 * 60  # 7 days for optimistic rollup withdrawals
+        elif rollup_type == 'zk':
+            time_estimate = 60 * 60  # 1 hour for ZK proofs
+            
+        # Bridges may charge a share of the transferred amount on top of the fixed fee
+        proportional_fee = to_network_data.get('bridges', {}).get('fee_rate', 0.0)
+        return base_fee * fee_multiplier, proportional_fee, time_estimate
+
+    def compile_bridge_cost_model(self) -> None:
+        """Precompute bridge fee/time matrices indexed by network id"""
+        network_ids = list(self.networks.keys())
+        n = len(network_ids)
+        self._network_index = {network_id: i for i, network_id in enumerate(network_ids)}
+        fixed_fee = np.zeros((n, n))
+        proportional_fee = np.zeros((n, n))
+        bridge_time = np.zeros((n, n), dtype=np.int64)
+        gas_factor = np.ones((n, n))
+        
+        for j, to_network in enumerate(network_ids):
+            fee, rate, time_estimate = self._bridge_cost_components(self.networks[to_network])
+            fixed_fee[:, j] = fee
+            proportional_fee[:, j] = rate
+            bridge_time[:, j] = time_estimate
+            for i, from_network in enumerate(network_ids):
+                gas_factor[i, j] = self.get_gas_price_factor(from_network, to_network)
+                
+        self._bridge_fixed_fee = fixed_fee
+        self._bridge_proportional_fee = proportional_fee
+        self._bridge_time = bridge_time
+        self._gas_factor = gas_factor
+        self._bridge_model_version += 1
+        logger.debug(f"Compiled bridge-cost model for {n} networks (version {self._bridge_model_version})")
+
+    def _ensure_bridge_cost_model(self) -> None:
+        if self._bridge_fixed_fee is None or len(self._network_index) != len(self.networks):
+            self.compile_bridge_cost_model()
+
+    def get_network_index(self, network_id: str) -> int:
+        """Row/column of a network in the bridge-cost matrices (-1 if unknown)"""
+        self._ensure_bridge_cost_model()
+        return self._network_index.get(network_id, -1)
+
+    def get_bridge_cost_matrices(self) -> Dict[str, Any]:
+        """Compiled bridge-cost matrices, for callers that vectorize over network pairs"""
+        self._ensure_bridge_cost_model()
+        return {
+            'network_index': dict(self._network_index),
+            'fixed_fee': self._bridge_fixed_fee,
+            'proportional_fee': self._bridge_proportional_fee,
+            'time': self._bridge_time,
+            'gas_factor': self._gas_factor,
+            'version': self._bridge_model_version
+        }
+
+    def estimate_bridging_costs_batch(self, from_networks: Union[str, Sequence[str]],
+                                      to_networks: Union[str, Sequence[str]],
+                                      amounts: Union[float, Sequence[float], np.ndarray]) -> Dict[str, np.ndarray]:
+        """Vectorized bridge fee/time lookup for many (from, to, amount) combinations.
+        
+        Arguments broadcast against each other, so a single route can be priced for
+        a whole array of amounts. Unknown networks get NaN fees and a False in 'valid'.
+        """
+        self._ensure_bridge_cost_model()
+        from_idx = np.vectorize(lambda n: self._network_index.get(n, -1), otypes=[np.int64])(np.asarray(from_networks))
+        to_idx = np.vectorize(lambda n: self._network_index.get(n, -1), otypes=[np.int64])(np.asarray(to_networks))
+        amounts = np.asarray(amounts, dtype=float)
+        from_idx, to_idx, amounts = np.broadcast_arrays(from_idx, to_idx, amounts)
+        
+        valid = (from_idx >= 0) & (to_idx >= 0)
+        safe_from, safe_to = np.where(valid, from_idx, 0), np.where(valid, to_idx, 0)
+        fee = self._bridge_fixed_fee[safe_from, safe_to] + self._bridge_proportional_fee[safe_from, safe_to] * amounts
+        return {
+            'fee_estimate': np.where(valid, fee, np.nan),
+            'time_estimate': np.where(valid, self._bridge_time[safe_from, safe_to], 0),
+            'gas_price_factor': np.where(valid, self._gas_factor[safe_from, safe_to], 1.0),
+            'valid': valid
+        }
+        
+    def estimate_bridging_costs(self, from_network: str, to_network: str, amount: float,
+                                token_symbol: str = 'ETH') -> Dict[str, Any]:
         """Estimate costs for bridging tokens between networks"""
         try:
-            from_network_data = self.get_network(from_network)
-            to_network_data = self.get_network(to_network)
+            self._ensure_bridge_cost_model()
+            i = self._network_index.get(from_network)
+            j = self._network_index.get(to_network)
             
-            if not from_network_data or not to_network_data:
+            if i is None or j is None:
                 return {
                     'from_network': from_network,
                     'to_network': to_network,
@@ -347,37 +465,16 @@ class NetworkConfig:
                     'error': 'Network not found'
                 }
                 
-            # Get bridge info
+            to_network_data = self.networks[to_network]
             bridge_info = to_network_data.get('bridges', {})
-            
-            # Calculate estimated bridge fee (very rough estimation)
-            # Base fee depends on network type and token amount
-            base_fee = 0.001  # ETH or equivalent
-            
-            # Fee multiplier based on rollup type
-            rollup_type = to_network_data.get('rollup_type', '')
-            fee_multiplier = 1.0
-            if rollup_type == 'optimistic':
-                fee_multiplier = 1.5  # Higher fees for optimistic rollups
-            elif rollup_type == 'zk':
-                fee_multiplier = 1.2  # Slightly higher fees for ZK rollups
-                
-            # Time estimate based on rollup type (in seconds)
-            time_estimate = 60  # Default 1 minute
-            if rollup_type == 'optimistic':
-                time_estimate = 7 * 24 * 60 * 60  # 7 days for optimistic rollup withdrawals
-            elif rollup_type == 'zk':
-                time_estimate = 60 * 60  # 1 hour for ZK proofs
-                
-            # Calculate total fee
-            fee = base_fee * fee_multiplier
+            fee = float(self._bridge_fixed_fee[i, j] + self._bridge_proportional_fee[i, j] * amount)
             
             return {
                 'from_network': from_network,
                 'to_network': to_network,
                 'fee_estimate': fee,
-                'time_estimate': time_estimate,
-                'rollup_type': rollup_type,
+                'time_estimate': int(self._bridge_time[i, j]),
+                'rollup_type': to_network_data.get('rollup_type', ''),
                 'official_bridge': bridge_info.get('official', ''),
                 'contracts': bridge_info.get('contracts', {})
             }
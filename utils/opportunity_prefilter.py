@@ -0,0 +1,209 @@
+"""
+Tiered pre-filter cascade ahead of LLM-backed opportunity evaluation.
+
+Tier 1 is a vectorized deterministic check (net profit after gas and bridge
+fees, liquidity, quote staleness). Tier 2 is a cheap local scoring model
+supplied by the caller. Only opportunities that survive both reach the
+expensive LLM tier. Per-tier hit rates and the LLM latency saved by early
+exits are tracked.
+"""
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.network_config import network_config
+
+logger = logging.getLogger(__name__)
+
+DETERMINISTIC_TIER = "deterministic"
+LOCAL_MODEL_TIER = "local_model"
+LLM_TIER = "llm"
+
+LocalScorer = Callable[[List[Dict[str, Any]]], np.ndarray]
+
+
+def _first_number(opportunity: Dict[str, Any], keys: Sequence[str]) -> float:
+    for key in keys:
+        value = opportunity.get(key)
+        if value is not None:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                continue
+    return np.nan
+
+
+def _age_seconds(timestamp: Any, now: float) -> float:
+    if timestamp is None:
+        return np.nan
+    if isinstance(timestamp, datetime):
+        return now - timestamp.timestamp()
+    if isinstance(timestamp, (int, float)):
+        return now - float(timestamp)
+    try:
+        return now - datetime.fromisoformat(str(timestamp)).timestamp()
+    except ValueError:
+        return np.nan
+
+
+@dataclass
+class TierStats:
+    """How many opportunities a tier saw and how many it stopped."""
+    name: str
+    evaluated: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'evaluated': self.evaluated,
+            'rejected': self.rejected,
+            'hit_rate': self.rejected / self.evaluated if self.evaluated else 0.0,
+            'avg_latency_ms': self.seconds / self.evaluated * 1000 if self.evaluated else 0.0,
+        }
+
+
+@dataclass
+class PrefilterResult:
+    """Per-opportunity outcome of the cascade."""
+    passed: np.ndarray
+    rejected_by: List[Optional[str]]
+    reasons: List[Optional[str]]
+    local_scores: np.ndarray = field(default_factory=lambda: np.array([]))
+
+
+class OpportunityPrefilter:
+    """Cheap early-exit tiers that keep hopeless opportunities away from the LLM."""
+
+    def __init__(self,
+                 min_net_profit_usd: Optional[float] = None,
+                 min_liquidity_usd: Optional[float] = None,
+                 max_age_seconds: Optional[float] = None,
+                 local_margin: float = 0.05):
+        self.min_net_profit_usd = min_net_profit_usd if min_net_profit_usd is not None else \
+            float(os.getenv("PREFILTER_MIN_NET_PROFIT_USD", "0"))
+        self.min_liquidity_usd = min_liquidity_usd if min_liquidity_usd is not None else \
+            float(os.getenv("PREFILTER_MIN_LIQUIDITY_USD", "0"))
+        self.max_age_seconds = max_age_seconds if max_age_seconds is not None else \
+            float(os.getenv("PREFILTER_MAX_AGE_SECONDS", "60"))
+        # Local scores are estimates, so only reject clearly below the threshold
+        self.local_margin = local_margin
+        self.tiers = {name: TierStats(name) for name in (DETERMINISTIC_TIER, LOCAL_MODEL_TIER, LLM_TIER)}
+
+    # ------------------------------------------------------------------
+    # Tier 1
+    # ------------------------------------------------------------------
+    def net_profit_usd(self, opportunities: List[Dict[str, Any]]) -> np.ndarray:
+        """Net profit after gas and bridge fees; NaN where the opportunity does not say."""
+        net = np.array([_first_number(o, ('net_profit_usd', 'profit_after_costs')) for o in opportunities])
+        gross = np.array([_first_number(o, ('profit_usd', 'price_difference')) for o in opportunities])
+        gas = np.nan_to_num(np.array([_first_number(o, ('gas_cost_usd', 'estimated_gas_cost')) for o in opportunities]))
+        bridge = np.array([_first_number(o, ('bridge_cost_usd', 'bridge_fee')) for o in opportunities])
+
+        # Price missing bridge fees for cross-network routes from the compiled cost matrices
+        buy = [o.get('buy_network') or '' for o in opportunities]
+        sell = [o.get('sell_network') or '' for o in opportunities]
+        cross = np.array([b != s and bool(b) and bool(s) for b, s in zip(buy, sell)])
+        missing = np.isnan(bridge) & cross
+        if missing.any():
+            # Fee estimates are in the bridged token. Convert them to USD on the same basis as the
+            # gross profit: the whole trade for 'profit_usd', one token for a per-token
+            # 'price_difference' (as Layer2Arbitrage prices its 'bridge_fee').
+            trade_level = ~np.isnan(np.array([_first_number(o, ('profit_usd',)) for o in opportunities]))
+            amounts = np.nan_to_num(np.array([_first_number(o, ('amount',)) for o in opportunities]), nan=1.0)
+            token_amounts = np.where(trade_level, amounts, 1.0)
+            prices = np.array([_first_number(o, ('buy_price',)) for o in opportunities])
+            fees_usd = network_config.estimate_bridging_costs_batch(buy, sell, token_amounts)['fee_estimate'] * prices
+            bridge = np.where(missing, fees_usd, bridge)
+        bridge = np.nan_to_num(bridge)
+
+        return np.where(np.isnan(net), gross - gas - bridge, net)
+
+    def deterministic_tier(self, opportunities: List[Dict[str, Any]]):
+        """Vectorized profit, liquidity and staleness checks. Unknown values never reject."""
+        now = time.time()
+        net = self.net_profit_usd(opportunities)
+        liquidity = np.array([_first_number(o, ('liquidity_usd', 'liquidity_available')) for o in opportunities])
+        age = np.array([_age_seconds(o.get('timestamp'), now) for o in opportunities])
+
+        unprofitable = net < self.min_net_profit_usd
+        illiquid = liquidity < self.min_liquidity_usd
+        stale = age > self.max_age_seconds
+        passed = ~(unprofitable | illiquid | stale)
+
+        reasons: List[Optional[str]] = []
+        for i in range(len(opportunities)):
+            if unprofitable[i]:
+                reasons.append(f"net profit after gas/bridge ${net[i]:.2f} below ${self.min_net_profit_usd:.2f}")
+            elif illiquid[i]:
+                reasons.append(f"liquidity ${liquidity[i]:,.0f} below ${self.min_liquidity_usd:,.0f}")
+            elif stale[i]:
+                reasons.append(f"quote is {age[i]:.0f}s old (max {self.max_age_seconds:.0f}s)")
+            else:
+                reasons.append(None)
+        return passed, reasons
+
+    # ------------------------------------------------------------------
+    # Cascade
+    # ------------------------------------------------------------------
+    def evaluate(self, opportunities: List[Dict[str, Any]],
+                 local_scorer: Optional[LocalScorer] = None,
+                 local_threshold: Optional[float] = None) -> PrefilterResult:
+        """Run tier 1, then tier 2 on the survivors."""
+        count = len(opportunities)
+        rejected_by: List[Optional[str]] = [None] * count
+        local_scores = np.full(count, np.nan)
+
+        start = time.perf_counter()
+        passed, reasons = self.deterministic_tier(opportunities)
+        stats = self.tiers[DETERMINISTIC_TIER]
+        stats.evaluated += count
+        stats.rejected += int((~passed).sum())
+        stats.seconds += time.perf_counter() - start
+        for i in np.flatnonzero(~passed):
+            rejected_by[i] = DETERMINISTIC_TIER
+
+        survivors = np.flatnonzero(passed)
+        if local_scorer is not None and local_threshold is not None and survivors.size:
+            start = time.perf_counter()
+            try:
+                scores = np.asarray(local_scorer([opportunities[i] for i in survivors]), dtype=float)
+            except Exception as e:
+                logger.warning(f"Local pre-filter model failed, passing all survivors: {e}")
+                scores = np.full(survivors.size, np.nan)
+            local_scores[survivors] = scores
+            cutoff = local_threshold - self.local_margin
+            stats = self.tiers[LOCAL_MODEL_TIER]
+            stats.evaluated += int(survivors.size)
+            for i, score in zip(survivors, scores):
+                if score < cutoff:
+                    passed[i] = False
+                    rejected_by[i] = LOCAL_MODEL_TIER
+                    reasons[i] = f"local score {score:.2f} cannot reach threshold {local_threshold:.2f}"
+                    stats.rejected += 1
+            stats.seconds += time.perf_counter() - start
+
+        return PrefilterResult(passed=passed, rejected_by=rejected_by, reasons=reasons, local_scores=local_scores)
+
+    def record_llm_evaluation(self, seconds: float):
+        """Record the latency of one full LLM-backed evaluation."""
+        stats = self.tiers[LLM_TIER]
+        stats.evaluated += 1
+        stats.seconds += seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        llm = self.tiers[LLM_TIER]
+        avg_llm_seconds = llm.seconds / llm.evaluated if llm.evaluated else None
+        early_exits = self.tiers[DETERMINISTIC_TIER].rejected + self.tiers[LOCAL_MODEL_TIER].rejected
+        total = self.tiers[DETERMINISTIC_TIER].evaluated
+        return {
+            'tiers': {name: tier.to_dict() for name, tier in self.tiers.items()},
+            'early_exits': early_exits,
+            'early_exit_rate': early_exits / total if total else 0.0,
+            'estimated_saved_seconds': early_exits * avg_llm_seconds if avg_llm_seconds is not None else None,
+        }
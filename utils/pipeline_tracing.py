@@ -0,0 +1,361 @@
+"""
+Per-opportunity trace spans for the Rehoboam pipelines.
+
+Every opportunity gets a trace; each pipeline stage, queue wait, LLM call and
+RPC call inside it is a span. The current span travels in a ContextVar, so
+nested ``tracer.span(...)`` blocks (and tasks created inside them) attach to
+the right parent without threading anything through call signatures. To
+continue a trace across a queue, carry ``context()`` on the message and pass
+it back as ``parent``.
+
+Finished spans feed per-span-name latency histograms (with a ``.compute``
+variant for stages: stage time minus the LLM/RPC/queue waits inside it) and,
+when configured, are exported as OTLP/JSON, either appended to a local file
+(``PIPELINE_TRACE_FILE``) or posted to a collector
+(``OTEL_EXPORTER_OTLP_ENDPOINT``, ``/v1/traces``).
+"""
+import bisect
+import contextvars
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Span kinds; waits are subtracted from their parent stage's compute time
+KIND_STAGE = "stage"
+KIND_QUEUE = "queue"
+KIND_LLM = "llm"
+KIND_RPC = "rpc"
+KIND_INTERNAL = "internal"
+WAIT_KINDS = (KIND_QUEUE, KIND_LLM, KIND_RPC)
+
+# Explicit bucket upper bounds in milliseconds (OTel explicit-bucket histogram style)
+DEFAULT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+SpanContext = Tuple[str, str]  # (trace_id, span_id)
+
+
+@dataclass
+class Span:
+    """One timed unit of work within a trace."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: str = KIND_INTERNAL
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    wait_ns: int = 0  # time spent in child wait spans
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def context(self) -> SpanContext:
+        return self.trace_id, self.span_id
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in {"rehoboam.kind": self.kind,
+                                                              **self.attributes}.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with percentile estimates."""
+
+    def __init__(self, bounds_ms: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.bounds_ms = bounds_ms
+        self.counts = [0] * (len(bounds_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, value_ms: float):
+        self.counts[bisect.bisect_left(self.bounds_ms, value_ms)] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound of the bucket holding the p-th sample (the max for the overflow bucket)."""
+        if not self.count:
+            return None
+        rank = p * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return float(self.bounds_ms[i]) if i < len(self.bounds_ms) else round(self.max_ms, 2)
+        return round(self.max_ms, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum_ms': round(self.sum_ms, 2),
+            'mean_ms': round(self.sum_ms / self.count, 2) if self.count else None,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 2),
+            'buckets': {('+Inf' if i == len(self.bounds_ms) else str(self.bounds_ms[i])): c
+                        for i, c in enumerate(self.counts) if c},
+        }
+
+
+class SpanExporter:
+    """Base class for span exporters."""
+
+    def export(self, spans: List[Span]):
+        raise NotImplementedError
+
+
+def _otlp_payload(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "rehoboam.pipeline"},
+                "spans": [span.to_otlp() for span in spans],
+            }],
+        }]
+    }
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends one OTLP/JSON ``ExportTraceServiceRequest`` per line."""
+
+    def __init__(self, path: str, service_name: str = "rehoboam"):
+        self.path = path
+        self.service_name = service_name
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span]):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(_otlp_payload(spans, self.service_name)) + "\n")
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """Posts OTLP/JSON to a collector's ``/v1/traces`` endpoint."""
+
+    def __init__(self, endpoint: str, service_name: str = "rehoboam", timeout: float = 5.0):
+        endpoint = endpoint.rstrip("/")
+        self.url = endpoint if endpoint.endswith("/v1/traces") else f"{endpoint}/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]):
+        import requests
+        response = requests.post(self.url, json=_otlp_payload(spans, self.service_name), timeout=self.timeout)
+        response.raise_for_status()
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("pipeline_span", default=None)
+
+
+class Tracer:
+    """Creates spans, keeps per-stage histograms and batches spans out to an exporter."""
+
+    def __init__(self, exporter: Optional[SpanExporter] = None, batch_size: int = 64,
+                 flush_interval: float = 5.0, recent_spans: int = 1000):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.recent: Deque[Span] = deque(maxlen=recent_spans)
+        self.stats = {'spans': 0, 'traces': 0, 'exported': 0, 'export_errors': 0, 'dropped': 0}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Span lifecycle
+    # ------------------------------------------------------------------
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+
+    @staticmethod
+    def context() -> Optional[SpanContext]:
+        """Context of the current span, to carry across a queue."""
+        span = _current_span.get()
+        return span.context() if span else None
+
+    def start_span(self, name: str, kind: str = KIND_INTERNAL, parent: Optional[SpanContext] = None,
+                   new_trace: bool = False, start_ns: Optional[int] = None, **attributes) -> Span:
+        current = _current_span.get()
+        if new_trace:
+            trace_id, parent_id = secrets.token_hex(16), None
+        elif parent:
+            trace_id, parent_id = parent
+        elif current:
+            trace_id, parent_id = current.trace_id, current.span_id
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+        if parent_id is None:
+            self.stats['traces'] += 1
+        return Span(name=name, trace_id=trace_id, span_id=secrets.token_hex(8), parent_id=parent_id,
+                    kind=kind, start_ns=start_ns or time.time_ns(), attributes=dict(attributes))
+
+    def end_span(self, span: Span, end_ns: Optional[int] = None):
+        span.end_ns = end_ns or time.time_ns()
+        parent = _current_span.get()
+        if span.kind in WAIT_KINDS and parent is not None and parent.span_id == span.parent_id:
+            parent.wait_ns += span.end_ns - span.start_ns
+        with self._lock:
+            self._histogram(span.name).record(span.duration_ms)
+            if span.kind == KIND_STAGE:
+                self._histogram(f"{span.name}.compute").record(max(0.0, span.duration_ms - span.wait_ns / 1e6))
+            self.recent.append(span)
+            self.stats['spans'] += 1
+        if self.exporter is not None:
+            self._enqueue_export(span)
+
+    @contextmanager
+    def span(self, name: str, kind: str = KIND_INTERNAL, parent: Optional[SpanContext] = None,
+             new_trace: bool = False, **attributes) -> Iterator[Span]:
+        """Time a block as a span and make it the current span inside the block."""
+        span = self.start_span(name, kind, parent=parent, new_trace=new_trace, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def record_span(self, name: str, start_ns: int, end_ns: int, kind: str = KIND_INTERNAL,
+                    parent: Optional[SpanContext] = None, new_trace: bool = False, **attributes) -> Span:
+        """Record an interval measured elsewhere, such as the time a message sat in a queue."""
+        span = self.start_span(name, kind, parent=parent, new_trace=new_trace, start_ns=start_ns, **attributes)
+        self.end_span(span, end_ns=end_ns)
+        return span
+
+    def _histogram(self, name: str) -> LatencyHistogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+    def _enqueue_export(self, span: Span):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._export_loop, name="span-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.stats['dropped'] += 1
+
+    def _export_loop(self):
+        batch: List[Span] = []
+        oldest = 0.0
+        while True:
+            try:
+                span = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                span = False  # idle: ship whatever is pending
+            if isinstance(span, Span):
+                if not batch:
+                    oldest = time.monotonic()
+                batch.append(span)
+            due = (not isinstance(span, Span) or len(batch) >= self.batch_size
+                   or time.monotonic() - oldest >= self.flush_interval)
+            if batch and due:
+                self._export(batch)
+                batch = []
+            if span is None:
+                return
+
+    def _export(self, batch: List[Span]):
+        try:
+            self.exporter.export(batch)
+            self.stats['exported'] += len(batch)
+        except Exception as e:
+            self.stats['export_errors'] += 1
+            logger.warning(f"Failed to export {len(batch)} trace spans: {e}")
+
+    def flush(self, timeout: float = 5.0):
+        """Export everything queued so far and stop the exporter thread (restarted on demand)."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def get_stage_latency(self, prefix: Union[str, Tuple[str, ...]] = "") -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: h.to_dict() for name, h in sorted(self.histograms.items()) if name.startswith(prefix)}
+
+    def get_trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Recently finished spans of one trace, oldest first."""
+        spans = [span for span in list(self.recent) if span.trace_id == trace_id]
+        return [{
+            'name': span.name, 'kind': span.kind, 'span_id': span.span_id, 'parent_id': span.parent_id,
+            'duration_ms': round(span.duration_ms, 3), 'attributes': span.attributes, 'error': span.error,
+        } for span in sorted(spans, key=lambda s: s.start_ns)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'exporter': type(self.exporter).__name__ if self.exporter else None,
+                'histograms': len(self.histograms)}
+
+
+def _exporter_from_env() -> Optional[SpanExporter]:
+    service_name = os.getenv("OTEL_SERVICE_NAME", "rehoboam")
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if endpoint:
+        return OTLPHttpSpanExporter(endpoint, service_name)
+    path = os.getenv("PIPELINE_TRACE_FILE")
+    if path:
+        return FileSpanExporter(path, service_name)
+    return None
+
+
+# Global tracer shared by both pipelines
+pipeline_tracer = Tracer(exporter=_exporter_from_env())
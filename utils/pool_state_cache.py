@@ -0,0 +1,513 @@
+"""
+Local pool-reserve state cache for the DEX pairs configured in l2_dex_config.json.
+
+Every configured (network, dex, token pair) gets a PoolState holding its
+reserves, fee tier and the last block it was confirmed at. Reserves are kept
+current incrementally from Uniswap V2 ``Sync``/``Swap`` logs (or a per-block
+``eth_getLogs`` poll), so quotes are computed locally with the constant-product
+formula and RPC is only used to fetch state deltas.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .abi_store import (
+    UNISWAP_V2_FACTORY_ABI,
+    UNISWAP_V2_PAIR_ABI,
+    UNISWAP_V2_ROUTER_ABI,
+    UNISWAP_V2_SWAP_TOPIC,
+    UNISWAP_V2_SYNC_TOPIC,
+)
+from .market_events import MarketEventBus, market_event_bus, price_topic, reserve_topic
+
+logger = logging.getLogger(__name__)
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+PoolKey = Tuple[str, str, str, str]
+
+
+def _hex(value: Any) -> str:
+    """Normalize HexBytes/bytes/str log fields to a lowercase 0x-prefixed string."""
+    if isinstance(value, (bytes, bytearray)):
+        value = value.hex()
+    value = str(value).lower()
+    return value if value.startswith("0x") else f"0x{value}"
+
+
+def _decode_words(data: Any) -> List[int]:
+    """Split ABI-encoded log data into 32-byte unsigned integers."""
+    raw = _hex(data)[2:]
+    return [int(raw[i:i + 64], 16) for i in range(0, len(raw), 64)]
+
+
+@dataclass
+class PoolState:
+    """Cached state of a single constant-product pool."""
+    network: str
+    dex: str
+    dex_type: str
+    token0_symbol: str
+    token1_symbol: str
+    token0_address: str
+    token1_address: str
+    decimals0: int
+    decimals1: int
+    router_address: Optional[str] = None
+    fee_bps: int = 30
+    pair_address: Optional[str] = None
+    reserve0: int = 0
+    reserve1: int = 0
+    last_block: int = 0          # Block of the last reserve change we applied
+    synced_block: int = 0        # Block up to which the reserves are known to be current
+    updated_at: float = 0.0      # Wall-clock time of the last confirmation
+    last_sync_tx: Optional[str] = None
+    update_count: int = 0
+    resolve_failures: int = 0    # Failed getPair lookups in a row
+    next_resolve_at: float = 0.0  # Wall-clock time before which no lookup is retried
+
+    @property
+    def has_reserves(self) -> bool:
+        return self.reserve0 > 0 and self.reserve1 > 0
+
+    def is_stale(self, head_block: Optional[int] = None,
+                 max_age_seconds: float = 30.0, max_block_lag: int = 5) -> bool:
+        """A pool is stale if it was never loaded, is too old, or lags the chain head."""
+        if not self.has_reserves or self.updated_at <= 0:
+            return True
+        if time.time() - self.updated_at > max_age_seconds:
+            return True
+        if head_block is not None and head_block - self.synced_block > max_block_lag:
+            return True
+        return False
+
+    def get_amount_out(self, amount_in: int, token_in_address: str) -> int:
+        """Uniswap V2 getAmountOut on the cached reserves (amounts in base units)."""
+        if amount_in <= 0 or not self.has_reserves:
+            return 0
+        if token_in_address.lower() == self.token0_address.lower():
+            reserve_in, reserve_out = self.reserve0, self.reserve1
+        else:
+            reserve_in, reserve_out = self.reserve1, self.reserve0
+        amount_in_with_fee = amount_in * (10000 - self.fee_bps)
+        return (amount_in_with_fee * reserve_out) // (reserve_in * 10000 + amount_in_with_fee)
+
+    def to_dict(self, head_block: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "network": self.network,
+            "dex": self.dex,
+            "pair": f"{self.token0_symbol}/{self.token1_symbol}",
+            "pair_address": self.pair_address,
+            "fee_bps": self.fee_bps,
+            "reserve0": self.reserve0,
+            "reserve1": self.reserve1,
+            "last_block": self.last_block,
+            "synced_block": self.synced_block,
+            "block_lag": (head_block - self.synced_block) if head_block is not None else None,
+            "age_seconds": (time.time() - self.updated_at) if self.updated_at else None,
+            "update_count": self.update_count,
+        }
+
+
+@dataclass
+class PoolCacheStats:
+    """Counters describing how the cache is being used."""
+    quotes_served: int = 0
+    quote_misses: int = 0
+    stale_misses: int = 0
+    events_applied: int = 0
+    rpc_calls: int = 0
+    refreshes: int = 0
+    last_refresh_ms: Dict[str, float] = field(default_factory=dict)
+
+
+class PoolStateCache:
+    """In-memory reserve cache for every configured DEX pair, updated from chain deltas."""
+
+    SUPPORTED_TYPES = ("uniswap_v2",)
+    MAX_RESOLVE_BACKOFF_SECONDS = 3600.0
+
+    def __init__(self,
+                 dex_config_path: str = "config/l2_dex_config.json",
+                 web3_getter: Optional[Callable[[str], Any]] = None,
+                 max_age_seconds: Optional[float] = None,
+                 max_block_lag: Optional[int] = None,
+                 event_bus: Optional[MarketEventBus] = None):
+        self.dex_config_path = dex_config_path
+        self.web3_getter = web3_getter
+        self.event_bus = event_bus or market_event_bus
+        self.max_age_seconds = max_age_seconds if max_age_seconds is not None else \
+            float(os.getenv("POOL_CACHE_MAX_AGE_SECONDS", "30"))
+        self.max_block_lag = max_block_lag if max_block_lag is not None else \
+            int(os.getenv("POOL_CACHE_MAX_BLOCK_LAG", "5"))
+        self.resolve_backoff_seconds = float(os.getenv("POOL_CACHE_RESOLVE_BACKOFF_SECONDS", "60"))
+
+        self.pools: Dict[PoolKey, PoolState] = {}
+        self._by_pair_address: Dict[Tuple[str, str], PoolState] = {}
+        self.head_blocks: Dict[str, int] = {}
+        self.stats = PoolCacheStats()
+
+        self._poll_task: Optional[asyncio.Task] = None
+        self._load_pools()
+
+    # ------------------------------------------------------------------
+    # Configuration
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _pool_key(network: str, dex: str, symbol_a: str, symbol_b: str) -> PoolKey:
+        sym_a, sym_b = sorted((symbol_a.upper(), symbol_b.upper()))
+        return network, dex.lower(), sym_a, sym_b
+
+    def _load_pools(self):
+        """Create an (empty) PoolState for every token pair on every configured DEX."""
+        try:
+            with open(self.dex_config_path, "r") as f:
+                raw_configs = json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"DEX configuration file '{self.dex_config_path}' not found. Pool cache is empty.")
+            return
+        except json.JSONDecodeError as e:
+            logger.error(f"Error decoding JSON from {self.dex_config_path}: {e}. Pool cache is empty.")
+            return
+
+        for network_name, network_data in raw_configs.items():
+            dexs = network_data.get("dexs", {}) or {}
+            tokens = network_data.get("tokens", {}) or {}
+            for dex_name, dex_info in dexs.items():
+                for (sym_a, info_a), (sym_b, info_b) in itertools.combinations(tokens.items(), 2):
+                    # Uniswap orders pair tokens by address
+                    if info_a["address"].lower() > info_b["address"].lower():
+                        (sym_a, info_a), (sym_b, info_b) = (sym_b, info_b), (sym_a, info_a)
+                    pool = PoolState(
+                        network=network_name,
+                        dex=dex_name.lower(),
+                        dex_type=dex_info.get("type", "uniswap_v2"),
+                        token0_symbol=sym_a.upper(),
+                        token1_symbol=sym_b.upper(),
+                        token0_address=info_a["address"],
+                        token1_address=info_b["address"],
+                        decimals0=int(info_a.get("decimals", 18)),
+                        decimals1=int(info_b.get("decimals", 18)),
+                        router_address=dex_info.get("router_address"),
+                        fee_bps=int(dex_info.get("fee_bps", 30)),
+                        pair_address=(dex_info.get("pairs", {}) or {}).get(f"{sym_a.upper()}/{sym_b.upper()}")
+                            or (dex_info.get("pairs", {}) or {}).get(f"{sym_b.upper()}/{sym_a.upper()}"),
+                    )
+                    self.pools[self._pool_key(network_name, dex_name, sym_a, sym_b)] = pool
+                    if pool.pair_address:
+                        self._index_pair(pool)
+        logger.info(f"Pool state cache initialized with {len(self.pools)} pools from {self.dex_config_path}")
+
+    def _index_pair(self, pool: PoolState):
+        self._by_pair_address[(pool.network, pool.pair_address.lower())] = pool
+
+    def get_pool(self, network: str, dex: str, symbol_a: str, symbol_b: str) -> Optional[PoolState]:
+        return self.pools.get(self._pool_key(network, dex, symbol_a, symbol_b))
+
+    def get_network_pools(self, network: str) -> List[PoolState]:
+        return [pool for pool in self.pools.values() if pool.network == network]
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def _find_by_pair(self, network: str, pair_address: str) -> Optional[PoolState]:
+        return self._by_pair_address.get((network, pair_address.lower()))
+
+    def _mark_updated(self, pool: PoolState, block_number: int):
+        pool.last_block = max(pool.last_block, block_number)
+        pool.synced_block = max(pool.synced_block, block_number)
+        pool.updated_at = time.time()
+        pool.update_count += 1
+        self.stats.events_applied += 1
+        if pool.pair_address:
+            self.event_bus.publish(
+                [reserve_topic(pool.network, pool.pair_address),
+                 price_topic(pool.token0_symbol), price_topic(pool.token1_symbol)],
+                source="pool_cache", network=pool.network, dex=pool.dex, block=block_number,
+                pair=pool.pair_address, reserve0=pool.reserve0, reserve1=pool.reserve1,
+            )
+
+    def apply_sync(self, network: str, pair_address: str, reserve0: int, reserve1: int,
+                   block_number: int, tx_hash: Optional[str] = None) -> bool:
+        """Apply a Sync event. Sync carries absolute reserves, so it is idempotent."""
+        pool = self._find_by_pair(network, pair_address)
+        if not pool or block_number < pool.last_block:
+            return False
+        pool.reserve0, pool.reserve1 = int(reserve0), int(reserve1)
+        pool.last_sync_tx = tx_hash
+        self._mark_updated(pool, block_number)
+        return True
+
+    def apply_swap(self, network: str, pair_address: str, amount0_in: int, amount1_in: int,
+                   amount0_out: int, amount1_out: int, block_number: int,
+                   tx_hash: Optional[str] = None) -> bool:
+        """Apply a Swap event as a reserve delta.
+
+        V2 pairs emit Sync right before Swap in the same transaction, so a Swap
+        whose transaction already produced a Sync is skipped to avoid applying
+        the same trade twice.
+        """
+        pool = self._find_by_pair(network, pair_address)
+        if not pool or not pool.has_reserves or block_number < pool.last_block:
+            return False
+        if tx_hash is not None and tx_hash == pool.last_sync_tx:
+            return False
+        pool.reserve0 = max(0, pool.reserve0 + int(amount0_in) - int(amount0_out))
+        pool.reserve1 = max(0, pool.reserve1 + int(amount1_in) - int(amount1_out))
+        self._mark_updated(pool, block_number)
+        return True
+
+    def apply_log(self, network: str, log: Dict[str, Any]) -> bool:
+        """Decode a raw Sync/Swap log (as returned by eth_getLogs or a subscription) and apply it."""
+        topics = log.get("topics") or []
+        if not topics:
+            return False
+        topic0 = _hex(topics[0])
+        pair_address = str(log.get("address", ""))
+        block_number = int(log.get("blockNumber", 0) or 0)
+        tx_hash = _hex(log["transactionHash"]) if log.get("transactionHash") is not None else None
+        words = _decode_words(log.get("data", "0x"))
+
+        if topic0 == UNISWAP_V2_SYNC_TOPIC and len(words) >= 2:
+            return self.apply_sync(network, pair_address, words[0], words[1], block_number, tx_hash)
+        if topic0 == UNISWAP_V2_SWAP_TOPIC and len(words) >= 4:
+            return self.apply_swap(network, pair_address, words[0], words[1], words[2], words[3],
+                                   block_number, tx_hash)
+        return False
+
+    def update_head(self, network: str, block_number: int):
+        """Record a new chain head; pools with no events in between are still current."""
+        previous = self.head_blocks.get(network, 0)
+        if block_number <= previous:
+            return
+        self.head_blocks[network] = block_number
+        now = time.time()
+        for pool in self.get_network_pools(network):
+            if pool.has_reserves and pool.synced_block >= previous:
+                pool.synced_block = block_number
+                pool.updated_at = now
+
+    # ------------------------------------------------------------------
+    # Chain access
+    # ------------------------------------------------------------------
+    def _get_web3(self, network: str) -> Optional[Any]:
+        if not self.web3_getter:
+            return None
+        try:
+            return self.web3_getter(network)
+        except Exception as e:
+            logger.error(f"Pool cache could not get Web3 for {network}: {e}")
+            return None
+
+    def _unresolved_pools(self, network: str) -> List[PoolState]:
+        """Pools still missing a pair address whose retry backoff has elapsed."""
+        now = time.time()
+        return [p for p in self.get_network_pools(network)
+                if not p.pair_address and p.dex_type in self.SUPPORTED_TYPES and p.router_address
+                and p.next_resolve_at <= now]
+
+    def _resolve_failed(self, pool: PoolState, reason: str):
+        """Back off exponentially so an unresolvable pool is not retried on every block."""
+        pool.resolve_failures += 1
+        delay = min(self.resolve_backoff_seconds * 2 ** (pool.resolve_failures - 1),
+                    self.MAX_RESOLVE_BACKOFF_SECONDS)
+        pool.next_resolve_at = time.time() + delay
+        log = logger.warning if pool.resolve_failures == 1 else logger.debug
+        log(f"Could not resolve pair {pool.token0_symbol}/{pool.token1_symbol} on {pool.dex} "
+            f"({pool.network}): {reason}; retrying in {delay:.0f}s")
+
+    def resolve_pair_addresses(self, network: str, w3: Any = None) -> int:
+        """Resolve missing pair addresses through router.factory().getPair().
+
+        A failed lookup is retried with exponential backoff rather than on every refresh.
+        """
+        w3 = w3 or self._get_web3(network)
+        if not w3:
+            return 0
+        resolved = 0
+        factories: Dict[str, Any] = {}
+        for pool in self._unresolved_pools(network):
+            try:
+                factory = factories.get(pool.router_address)
+                if factory is None:
+                    router = w3.eth.contract(address=w3.to_checksum_address(pool.router_address),
+                                             abi=UNISWAP_V2_ROUTER_ABI)
+                    factory_address = router.functions.factory().call()
+                    self.stats.rpc_calls += 1
+                    factory = w3.eth.contract(address=w3.to_checksum_address(factory_address),
+                                              abi=UNISWAP_V2_FACTORY_ABI)
+                    factories[pool.router_address] = factory
+                pair_address = factory.functions.getPair(
+                    w3.to_checksum_address(pool.token0_address),
+                    w3.to_checksum_address(pool.token1_address)).call()
+                self.stats.rpc_calls += 1
+                if pair_address and pair_address != ZERO_ADDRESS:
+                    pool.pair_address = pair_address
+                    pool.resolve_failures = 0
+                    self._index_pair(pool)
+                    resolved += 1
+                else:
+                    self._resolve_failed(pool, "no pair deployed")
+            except Exception as e:
+                self._resolve_failed(pool, str(e))
+        return resolved
+
+    def _bootstrap_reserves(self, w3: Any, pool: PoolState, head_block: int):
+        """Full getReserves() read for a pool that has never been loaded."""
+        pair = w3.eth.contract(address=w3.to_checksum_address(pool.pair_address), abi=UNISWAP_V2_PAIR_ABI)
+        reserve0, reserve1, _ = pair.functions.getReserves().call(block_identifier=head_block)
+        self.stats.rpc_calls += 1
+        pool.reserve0, pool.reserve1 = int(reserve0), int(reserve1)
+        pool.last_block = head_block
+        pool.synced_block = head_block
+        pool.updated_at = time.time()
+        pool.update_count += 1
+
+    def refresh(self, network: str) -> int:
+        """Bring a network's pools up to the chain head.
+
+        Costs a single eth_blockNumber call when no new block was produced, and
+        otherwise one eth_getLogs over the pair addresses for the new range.
+        Returns the number of events applied.
+        """
+        w3 = self._get_web3(network)
+        if not w3:
+            return 0
+        start = time.perf_counter()
+        try:
+            head_block = int(w3.eth.block_number)
+            self.stats.rpc_calls += 1
+            previous_head = self.head_blocks.get(network, 0)
+            if head_block <= previous_head:
+                return 0
+
+            if self._unresolved_pools(network):
+                self.resolve_pair_addresses(network, w3)
+
+            tracked = [p for p in self.get_network_pools(network)
+                       if p.pair_address and p.dex_type in self.SUPPORTED_TYPES]
+            for pool in tracked:
+                if not pool.has_reserves:
+                    try:
+                        self._bootstrap_reserves(w3, pool, head_block)
+                    except Exception as e:
+                        logger.warning(f"getReserves failed for {pool.pair_address} on {network}: {e}")
+
+            applied = 0
+            from_block = min((p.synced_block for p in tracked if p.has_reserves), default=head_block) + 1
+            if tracked and from_block <= head_block:
+                logs = w3.eth.get_logs({
+                    "fromBlock": from_block,
+                    "toBlock": head_block,
+                    "address": [w3.to_checksum_address(p.pair_address) for p in tracked],
+                    "topics": [[UNISWAP_V2_SYNC_TOPIC]],
+                })
+                self.stats.rpc_calls += 1
+                for log in logs:
+                    if self.apply_log(network, log):
+                        applied += 1
+
+            self.update_head(network, head_block)
+            self.stats.refreshes += 1
+            return applied
+        except Exception as e:
+            logger.error(f"Error refreshing pool state for {network}: {e}")
+            return 0
+        finally:
+            self.stats.last_refresh_ms[network] = (time.perf_counter() - start) * 1000
+
+    async def _poll_loop(self, poll_interval: float):
+        while True:
+            for network in {pool.network for pool in self.pools.values()}:
+                await asyncio.to_thread(self.refresh, network)
+            await asyncio.sleep(poll_interval)
+
+    async def start(self, poll_interval: Optional[float] = None):
+        """Start per-block polling in the background."""
+        if self._poll_task and not self._poll_task.done():
+            return
+        interval = poll_interval if poll_interval is not None else \
+            float(os.getenv("POOL_CACHE_POLL_INTERVAL_SECONDS", "1.0"))
+        self._poll_task = asyncio.create_task(self._poll_loop(interval))
+        logger.info(f"Pool state cache polling started (interval={interval}s)")
+
+    async def stop(self):
+        if self._poll_task:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+        logger.info("Pool state cache polling stopped")
+
+    # ------------------------------------------------------------------
+    # Quotes
+    # ------------------------------------------------------------------
+    def is_stale(self, pool: PoolState) -> bool:
+        return pool.is_stale(self.head_blocks.get(pool.network), self.max_age_seconds, self.max_block_lag)
+
+    def quote(self, network: str, dex: str, token_in: str, token_out: str,
+              amount_in: Decimal, allow_stale: bool = False) -> Optional[Decimal]:
+        """Amount of token_out received for amount_in of token_in, computed from cached reserves.
+
+        Returns None when the pool is unknown, unsupported or stale so callers
+        can fall back to an on-chain quote.
+        """
+        pool = self.get_pool(network, dex, token_in, token_out)
+        if not pool or pool.dex_type not in self.SUPPORTED_TYPES or not pool.has_reserves:
+            self.stats.quote_misses += 1
+            return None
+        if not allow_stale and self.is_stale(pool):
+            self.stats.stale_misses += 1
+            return None
+
+        if token_in.upper() == pool.token0_symbol:
+            token_in_address, decimals_in, decimals_out = pool.token0_address, pool.decimals0, pool.decimals1
+        else:
+            token_in_address, decimals_in, decimals_out = pool.token1_address, pool.decimals1, pool.decimals0
+        amount_in_units = int(Decimal(amount_in) * (Decimal(10) ** decimals_in))
+        amount_out_units = pool.get_amount_out(amount_in_units, token_in_address)
+        self.stats.quotes_served += 1
+        return Decimal(amount_out_units) / (Decimal(10) ** decimals_out)
+
+    def get_price(self, network: str, dex: str, token_in: str, token_out: str,
+                  amount_in: Decimal = Decimal("1.0")) -> Optional[Decimal]:
+        """Effective execution price (token_out per token_in) for the given trade size."""
+        amount_out = self.quote(network, dex, token_in, token_out, amount_in)
+        if amount_out is None or amount_in <= 0:
+            return None
+        return amount_out / Decimal(amount_in)
+
+    def get_staleness_report(self) -> List[Dict[str, Any]]:
+        """Per-pool freshness for monitoring."""
+        report = []
+        for pool in self.pools.values():
+            head = self.head_blocks.get(pool.network)
+            entry = pool.to_dict(head)
+            entry["stale"] = self.is_stale(pool)
+            report.append(entry)
+        return report
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.stats.quotes_served + self.stats.quote_misses + self.stats.stale_misses
+        return {
+            "pools": len(self.pools),
+            "tracked_pairs": len(self._by_pair_address),
+            "stale_pools": sum(1 for pool in self.pools.values() if self.is_stale(pool)),
+            "head_blocks": dict(self.head_blocks),
+            "quotes_served": self.stats.quotes_served,
+            "quote_misses": self.stats.quote_misses,
+            "stale_misses": self.stats.stale_misses,
+            "hit_rate": self.stats.quotes_served / total if total else 0.0,
+            "events_applied": self.stats.events_applied,
+            "rpc_calls": self.stats.rpc_calls,
+            "refreshes": self.stats.refreshes,
+            "last_refresh_ms": dict(self.stats.last_refresh_ms),
+        }
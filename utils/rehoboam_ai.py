@@ -16,6 +16,11 @@ import numpy as np
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Union, Tuple
 
+from utils.llm_cache import llm_response_cache
+from utils.llm_client import llm_client
+from utils.llm_telemetry import llm_telemetry
+from utils.local_models import latency_budget_policy, local_models
+
 logger = logging.getLogger(__name__)
 
 class RehoboamAI:
@@ -37,8 +42,8 @@ class RehoboamAI:
         # [analysis, adaptation, learning, risk, optimality]
         self.consciousness = np.random.randint(3, 5, 5)
         
-        # Cache for responses
-        self.response_cache = {}
+        # Shared response cache, keyed on normalized prompts
+        self.response_cache = llm_response_cache
         self.cache_duration = 3600  # 1 hour in seconds
         
         # Last request timestamp for rate limiting
@@ -51,6 +56,19 @@ class RehoboamAI:
         else:
             logger.warning(f"No API key found for {provider}. Some AI features will be limited.")
     
+    def _cache_get(self, cache_key: Tuple[str, str], exact: bool = False) -> Optional[Any]:
+        """Look up a (kind, text) cache key for this provider and model."""
+        kind, text = cache_key
+        cached = self.response_cache.get(f"rehoboam:{self.provider}:{self.model}:{kind}", text, exact=exact)
+        if cached is not None:
+            llm_telemetry.record_cache_hit(f"rehoboam_ai.{kind.split(':')[0]}")
+        return cached
+    
+    def _cache_set(self, cache_key: Tuple[str, str], data: Any, exact: bool = False):
+        kind, text = cache_key
+        self.response_cache.set(f"rehoboam:{self.provider}:{self.model}:{kind}", text, data,
+                                ttl=self.cache_duration, exact=exact)
+    
     def generate_text(self, prompt: str, max_tokens: int = 500) -> str:
         """
         Generate text using AI models with appropriate fallbacks.
@@ -65,12 +83,11 @@ class RehoboamAI:
         if not self.api_key:
             return f"[AI response unavailable: No API key found for {self.provider}]"
             
-        # Check cache
-        cache_key = f"generate_{prompt}_{max_tokens}"
-        if cache_key in self.response_cache:
-            cached = self.response_cache[cache_key]
-            if time.time() - cached["timestamp"] < self.cache_duration:
-                return cached["data"]
+        # Check the shared cache
+        cache_key = (f"generate:{max_tokens}", prompt)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
             # Rate limiting
@@ -89,12 +106,54 @@ class RehoboamAI:
                 # Fallback to simple response
                 generated_text = f"[Model response not available for provider: {self.provider}]"
                 
-            # Cache the result
-            self.response_cache[cache_key] = {
-                "timestamp": time.time(),
-                "data": generated_text
-            }
+            self._cache_set(cache_key, generated_text)
+            
+            return generated_text
+            
+        except Exception as e:
+            logger.error(f"Error in text generation: {str(e)}")
+            return f"[Error in text generation: {str(e)}]"
+    
+    async def generate_text_async(self, prompt: str, max_tokens: int = 500) -> str:
+        """
+        Async variant of ``generate_text`` for callers on the event loop.
+        
+        Uses the shared pooled client and its rate limiter instead of blocking
+        HTTP calls and ``time.sleep``; cancelling the caller aborts the request.
+        """
+        if not self.api_key:
+            return f"[AI response unavailable: No API key found for {self.provider}]"
+            
+        # Check the shared cache
+        cache_key = (f"generate:{max_tokens}", prompt)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            if self.provider == "deepseek":
+                try:
+                    generated_text = await llm_client.complete(
+                        "deepseek", prompt, self.model, max_tokens=max_tokens,
+                        temperature=None, api_key=self.api_key, caller="rehoboam_ai.generate"
+                    )
+                except Exception as e:
+                    if not os.environ.get("OPENAI_API_KEY"):
+                        raise
+                    logger.info(f"Falling back to OpenAI API for text generation: {str(e)}")
+                    generated_text = await llm_client.complete(
+                        "openai", prompt, "gpt-4.1-mini", max_tokens=max_tokens, temperature=None,
+                        caller="rehoboam_ai.generate"
+                    )
+            elif self.provider == "openai":
+                generated_text = await llm_client.complete(
+                    "openai", prompt, "gpt-4.1-mini", max_tokens=max_tokens, temperature=None,
+                    caller="rehoboam_ai.generate"
+                ) or "[No content generated by OpenAI API]"
+            else:
+                generated_text = f"[Model response not available for provider: {self.provider}]"
             
+            self._cache_set(cache_key, generated_text)
             return generated_text
             
         except Exception as e:
@@ -115,9 +174,12 @@ class RehoboamAI:
                 "max_tokens": max_tokens
             }
             
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            result = response.json()
+            with llm_telemetry.track("rehoboam_ai.generate", "deepseek", prompt) as call:
+                response = requests.post(url, headers=headers, json=data)
+                response.raise_for_status()
+                result = response.json()
+                call.set_usage(result)
+                call.completion = llm_client.extract_text("deepseek", result)
             
             if "choices" in result and len(result["choices"]) > 0:
                 return result["choices"][0]["message"]["content"]
@@ -143,13 +205,14 @@ class RehoboamAI:
                 
             client = openai.OpenAI(api_key=openai_api_key)
             
-            response = client.chat.completions.create(
-                model="gpt-4.1-mini",  # Using GPT-4.1 mini as specifically requested
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=max_tokens
-            )
-            
-            content = response.choices[0].message.content
+            with llm_telemetry.track("rehoboam_ai.generate", "openai", prompt) as call:
+                response = client.chat.completions.create(
+                    model="gpt-4.1-mini",  # Using GPT-4.1 mini as specifically requested
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=max_tokens
+                )
+                content = response.choices[0].message.content
+                call.completion = content or ""
             if content is None:
                 return "[No content generated by OpenAI API]"
             return content
@@ -172,12 +235,11 @@ class RehoboamAI:
         if not self.api_key:
             return self._fallback_sentiment(token, market_data)
             
-        # Check cache
-        cache_key = f"sentiment_{token}_{json.dumps(market_data)}"
-        if cache_key in self.response_cache:
-            cached = self.response_cache[cache_key]
-            if time.time() - cached["timestamp"] < self.cache_duration:
-                return cached["data"]
+        # Check the shared cache
+        cache_key = (f"sentiment:{token}", json.dumps(market_data, default=str))
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
             # Rate limiting
@@ -188,16 +250,13 @@ class RehoboamAI:
             
             # Make API call based on provider
             if self.provider == "deepseek":
-                result = self._call_deepseek_api(prompt)
+                result = self._call_deepseek_api(prompt, "rehoboam_ai.sentiment")
+                local_models.record("sentiment", market_data, result)
             else:
                 # Fallback to rule-based approach
                 result = self._fallback_sentiment(token, market_data)
                 
-            # Cache the result
-            self.response_cache[cache_key] = {
-                "timestamp": time.time(),
-                "data": result
-            }
+            self._cache_set(cache_key, result)
             
             return result
             
@@ -205,6 +264,65 @@ class RehoboamAI:
             logger.error(f"Error in sentiment analysis: {str(e)}")
             return self._fallback_sentiment(token, market_data)
     
+    async def analyze_sentiment_async(self, token: str, market_data: Dict[str, Any],
+                                      budget: Optional[float] = None) -> Dict[str, Any]:
+        """Async variant of ``analyze_sentiment``.
+        
+        If the remote model cannot answer within ``budget`` seconds the local
+        answer is returned and the remote result refreshes the cache later.
+        """
+        if not self.api_key or self.provider != "deepseek":
+            return self._fallback_sentiment(token, market_data)
+            
+        # Check the shared cache
+        cache_key = (f"sentiment:{token}", json.dumps(market_data, default=str))
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result, _ = await latency_budget_policy.run(
+            self._remote_json("sentiment", cache_key, self._construct_sentiment_prompt(token, market_data), market_data),
+            lambda: self._fallback_sentiment(token, market_data),
+            budget
+        )
+        return result
+    
+    async def generate_strategy_async(self, token: str, market_data: Dict[str, Any],
+                                      budget: Optional[float] = None) -> Dict[str, Any]:
+        """Async variant of ``generate_strategy`` with the same latency budget policy."""
+        if not self.api_key or self.provider != "deepseek":
+            return self._fallback_strategy(token, market_data)
+            
+        cache_key = (f"strategy:{token}", json.dumps(market_data, default=str))
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result, _ = await latency_budget_policy.run(
+            self._remote_json("strategy", cache_key, self._construct_strategy_prompt(token, market_data), market_data),
+            lambda: self._fallback_strategy(token, market_data),
+            budget
+        )
+        return result
+    
+    async def _remote_json(self, kind: str, cache_key: Tuple[str, str], prompt: str,
+                           market_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Remote JSON answer; cached and logged for local training once it arrives."""
+        content = await llm_client.complete(
+            "deepseek", prompt, self.model,
+            max_tokens=800, temperature=0.0, api_key=self.api_key, timeout=10,
+            caller=f"rehoboam_ai.{kind}", top_p=0.9, response_format={"type": "json_object"}
+        )
+        try:
+            result = json.loads(content)
+        except json.JSONDecodeError:
+            logger.error("Failed to parse JSON from API response")
+            raise ValueError("Invalid JSON response")
+            
+        self._cache_set(cache_key, result)
+        local_models.record(kind, market_data, result)
+        return result
+    
     def generate_strategy(self, token: str, market_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate trading strategy using DeepSeek API as a fallback.
@@ -219,12 +337,11 @@ class RehoboamAI:
         if not self.api_key:
             return self._fallback_strategy(token, market_data)
             
-        # Check cache
-        cache_key = f"strategy_{token}_{json.dumps(market_data)}"
-        if cache_key in self.response_cache:
-            cached = self.response_cache[cache_key]
-            if time.time() - cached["timestamp"] < self.cache_duration:
-                return cached["data"]
+        # Check the shared cache
+        cache_key = (f"strategy:{token}", json.dumps(market_data, default=str))
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
             # Rate limiting
@@ -235,16 +352,13 @@ class RehoboamAI:
             
             # Make API call based on provider
             if self.provider == "deepseek":
-                result = self._call_deepseek_api(prompt)
+                result = self._call_deepseek_api(prompt, "rehoboam_ai.strategy")
+                local_models.record("strategy", market_data, result)
             else:
                 # Fallback to rule-based approach
                 result = self._fallback_strategy(token, market_data)
                 
-            # Cache the result
-            self.response_cache[cache_key] = {
-                "timestamp": time.time(),
-                "data": result
-            }
+            self._cache_set(cache_key, result)
             
             return result
             
@@ -252,7 +366,7 @@ class RehoboamAI:
             logger.error(f"Error in strategy generation: {str(e)}")
             return self._fallback_strategy(token, market_data)
     
-    def _call_deepseek_api(self, prompt: str) -> Dict[str, Any]:
+    def _call_deepseek_api(self, prompt: str, caller: str = "rehoboam_ai") -> Dict[str, Any]:
         """
         Call DeepSeek API.
         
@@ -280,19 +394,22 @@ class RehoboamAI:
                 "response_format": {"type": "json_object"}
             }
             
-            response = requests.post(
-                "https://api.deepseek.com/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=10
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"DeepSeek API error: {response.status_code} - {response.text}")
-                raise Exception(f"API Error: {response.status_code}")
+            with llm_telemetry.track(caller, "deepseek", prompt) as call:
+                response = requests.post(
+                    "https://api.deepseek.com/v1/chat/completions",
+                    headers=headers,
+                    json=payload,
+                    timeout=10
+                )
                 
-            response_json = response.json()
-            content = response_json["choices"][0]["message"]["content"]
+                if response.status_code != 200:
+                    logger.error(f"DeepSeek API error: {response.status_code} - {response.text}")
+                    raise Exception(f"API Error: {response.status_code}")
+                    
+                response_json = response.json()
+                call.set_usage(response_json)
+                content = response_json["choices"][0]["message"]["content"]
+                call.completion = content
             
             # Parse JSON from the content
             try:
@@ -370,7 +487,7 @@ The JSON should include nothing else but the strategy.
     
     def _fallback_sentiment(self, token: str, market_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Fallback sentiment analysis based on rules.
+        Local sentiment analysis: the offline-trained model if available, otherwise rules.
         
         Args:
             token: Token symbol
@@ -400,17 +517,21 @@ The JSON should include nothing else but the strategy.
             score = -0.8
             mood = "fearful"
         
-        return {
+        result = {
             "score": score,
             "mood": mood,
             "factors": ["price action", "market volatility"],
             "social_sentiment": "unknown",
             "confidence": 0.5
         }
+        prediction = local_models.predict("sentiment", market_data)
+        if prediction:
+            result.update(prediction, source="local_model")
+        return result
     
     def _fallback_strategy(self, token: str, market_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Fallback strategy generation based on rules.
+        Local strategy generation: the offline-trained model if available, otherwise rules.
         
         Args:
             token: Token symbol
@@ -436,9 +557,7 @@ The JSON should include nothing else but the strategy.
             confidence = 0.6
             reasoning = ["market uncertainty", "mixed signals"]
         
-        return {
-            "name": f"{token} {action.capitalize()} Strategy",
-            "description": f"Rule-based {action} strategy for {token}",
+        result = {
             "action": action,
             "confidence": confidence,
             "timeframe": "medium",
@@ -448,6 +567,17 @@ The JSON should include nothing else but the strategy.
             "risk_level": "moderate",
             "reasoning": reasoning
         }
+        source = "Rule-based"
+        prediction = local_models.predict("strategy", market_data)
+        if prediction:
+            result.update(prediction, source="local_model", reasoning=["local model trained on past analyses"])
+            source = "Local model"
+        action = result["action"]
+        return {
+            "name": f"{token} {action.capitalize()} Strategy",
+            "description": f"{source} {action} strategy for {token}",
+            **result
+        }
     
     def _apply_rate_limit(self):
         """Apply rate limiting to API calls."""
@@ -464,12 +594,11 @@ The JSON should include nothing else but the strategy.
         Returns:
             Dictionary containing market emotional analysis
         """
-        # Check cache
-        cache_key = f"market_emotions_{datetime.now().strftime('%Y-%m-%d')}"
-        if cache_key in self.response_cache:
-            cached = self.response_cache[cache_key]
-            if time.time() - cached["timestamp"] < self.cache_duration:
-                return cached["data"]
+        # One entry per day; the date must not be normalized away like a prompt timestamp
+        cache_key = ("market_emotions", datetime.now().strftime('%Y-%m-%d'))
+        cached = self._cache_get(cache_key, exact=True)
+        if cached is not None:
+            return cached
         
         if not self.api_key:
             return self._fallback_market_emotions()
@@ -483,7 +612,7 @@ The JSON should include nothing else but the strategy.
             
             # Make API call based on provider
             if self.provider == "deepseek":
-                result = self._call_deepseek_api(prompt)
+                result = self._call_deepseek_api(prompt, "rehoboam_ai.market_emotions")
             else:
                 # Fallback to rule-based approach
                 result = self._fallback_market_emotions()
@@ -493,11 +622,7 @@ The JSON should include nothing else but the strategy.
             result["provider"] = self.provider
             result["model"] = self.model
             
-            # Cache the result
-            self.response_cache[cache_key] = {
-                "timestamp": time.time(),
-                "data": result
-            }
+            self._cache_set(cache_key, result, exact=True)
             
             return result
             
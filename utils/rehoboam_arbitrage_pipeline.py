@@ -18,6 +18,7 @@ intelligent Rehoboam agent and the practical arbitrage execution bots.
 import asyncio
 import json
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Callable
 from dataclasses import dataclass, asdict
@@ -30,6 +31,9 @@ from utils.rehoboam_visualizer import rehoboam_visualizer
 from conscious_trading_agent import ConsciousTradingAgent
 from utils.conscious_arbitrage_engine import conscious_arbitrage_engine
 from utils.arbitrage_service import arbitrage_service
+from utils.stage_scheduler import StageScheduler
+from utils.pipeline_tracing import KIND_LLM, KIND_QUEUE, KIND_RPC, KIND_STAGE, pipeline_tracer
+from utils.deadlines import Deadline, DeadlineExceeded, record_expiry
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +47,10 @@ class PipelineStage(Enum):
     FEEDBACK = "feedback"
     LEARNING = "learning"
 
+# Stages cancelled when the opportunity's deadline passes; execution is only checked before it
+# starts, and feedback/learning run after the trade regardless of the deadline
+DEADLINE_BOUND_STAGES = (PipelineStage.CONSCIOUSNESS_EVALUATION, PipelineStage.BOT_PREPARATION)
+
 @dataclass
 class PipelineMessage:
     """Simple message format for pipeline communication"""
@@ -85,14 +93,14 @@ class RehoboamArbitragePipeline:
         self.rehoboam_ai = RehoboamAI()
         
         # Pipeline state
-        self.message_queue = asyncio.Queue()
         self.active_executions = {}
         self.pipeline_metrics = {
             'messages_processed': 0,
             'successful_executions': 0,
             'agent_decisions': 0,
             'bot_feedbacks': 0,
-            'learning_cycles': 0
+            'learning_cycles': 0,
+            'expired_opportunities': 0
         }
         
         # Configuration
@@ -101,7 +109,16 @@ class RehoboamArbitragePipeline:
             'bot_feedback_timeout': 300,    # 5 minutes
             'max_concurrent_executions': 5,
             'learning_threshold': 0.1,      # minimum performance change to trigger learning
-            'consciousness_threshold': 0.7   # minimum consciousness score for execution
+            'consciousness_threshold': 0.7,  # minimum consciousness score for execution
+            # Worker pool size (= concurrency limit) per stage; execution uses max_concurrent_executions
+            'stage_workers': {
+                PipelineStage.AGENT_ANALYSIS.value: 1,
+                PipelineStage.OPPORTUNITY_DISCOVERY.value: 2,
+                PipelineStage.CONSCIOUSNESS_EVALUATION.value: 4,
+                PipelineStage.BOT_PREPARATION.value: 2,
+                PipelineStage.FEEDBACK.value: 2,
+                PipelineStage.LEARNING.value: 1
+            }
         }
         
         # Pipeline handlers
@@ -116,6 +133,7 @@ class RehoboamArbitragePipeline:
         }
         
         self.is_running = False
+        self.scheduler = self._build_scheduler()
         
         # Initialize visualizer integration
         self.visualizer = rehoboam_visualizer
@@ -152,9 +170,9 @@ class RehoboamArbitragePipeline:
         logger.info("🌟 Starting Rehoboam Arbitrage Pipeline...")
         
         # Start pipeline components
+        await self.scheduler.start()
         pipeline_tasks = [
             asyncio.create_task(self._agent_analysis_loop()),
-            asyncio.create_task(self._message_processor()),
             asyncio.create_task(self._bot_monitor()),
             asyncio.create_task(self._learning_loop())
         ]
@@ -169,6 +187,7 @@ class RehoboamArbitragePipeline:
         """Stop the pipeline gracefully"""
         logger.info("🛑 Stopping Rehoboam Arbitrage Pipeline...")
         self.is_running = False
+        await self.scheduler.stop()
         
     # ============================================================================
     # PIPELINE STAGE 1: AGENT ANALYSIS
@@ -178,19 +197,21 @@ class RehoboamArbitragePipeline:
         """Continuous agent analysis loop"""
         while self.is_running:
             try:
-                # Agent analyzes market conditions
-                market_analysis = await self._get_agent_market_analysis()
-                
-                # Send analysis to pipeline
-                message = PipelineMessage(
-                    stage=PipelineStage.AGENT_ANALYSIS,
-                    data=market_analysis,
-                    timestamp=datetime.now(),
-                    source='agent',
-                    priority=7
-                )
-                
-                await self.message_queue.put(message)
+                # Each analysis cycle starts a trace that its messages carry through the stages
+                with pipeline_tracer.span("arbitrage_pipeline.market_analysis", kind=KIND_STAGE, new_trace=True):
+                    # Agent analyzes market conditions
+                    market_analysis = await self._get_agent_market_analysis()
+                    
+                    # Send analysis to pipeline
+                    message = PipelineMessage(
+                        stage=PipelineStage.AGENT_ANALYSIS,
+                        data=market_analysis,
+                        timestamp=datetime.now(),
+                        source='agent',
+                        priority=7
+                    )
+                    
+                    await self._enqueue(message)
                 await asyncio.sleep(self.pipeline_config['agent_analysis_interval'])
                 
             except Exception as e:
@@ -216,7 +237,8 @@ class RehoboamArbitragePipeline:
         Provide analysis in JSON format with clear metrics.
         """
         
-        ai_analysis = await self.rehoboam_ai.analyze_market_sentiment(market_prompt)
+        with pipeline_tracer.span("llm.analyze_market_sentiment", kind=KIND_LLM):
+            ai_analysis = await self.rehoboam_ai.analyze_market_sentiment(market_prompt)
         
         return {
             'consciousness_level': consciousness_state.awareness_level,
@@ -254,7 +276,7 @@ class RehoboamArbitragePipeline:
             priority=8
         )
         
-        await self.message_queue.put(discovery_message)
+        await self._enqueue(discovery_message)
         
     async def _handle_opportunity_discovery(self, message: PipelineMessage):
         """Discover arbitrage opportunities based on agent guidance"""
@@ -262,7 +284,8 @@ class RehoboamArbitragePipeline:
         discovery_params = message.data['discovery_params']
         
         # Get opportunities from arbitrage service
-        opportunities = await arbitrage_service.get_opportunities()
+        with pipeline_tracer.span("rpc.get_opportunities", kind=KIND_RPC):
+            opportunities = await arbitrage_service.get_opportunities()
         
         # Filter opportunities based on agent parameters
         filtered_opportunities = []
@@ -276,8 +299,12 @@ class RehoboamArbitragePipeline:
         
         logger.info(f"📊 Discovered {len(filtered_opportunities)} opportunities matching agent criteria")
         
-        # Send for consciousness evaluation
+        # Send for consciousness evaluation, each opportunity in its own trace
+        discovery_trace = pipeline_tracer.context()
         for opp in filtered_opportunities[:5]:  # Top 5 opportunities
+            # The deadline is stamped on a copy so it travels with this discovery only
+            opp = dict(opp)
+            Deadline.for_opportunity(opp)
             eval_message = PipelineMessage(
                 stage=PipelineStage.CONSCIOUSNESS_EVALUATION,
                 data={
@@ -289,7 +316,10 @@ class RehoboamArbitragePipeline:
                 source='agent',
                 priority=9
             )
-            await self.message_queue.put(eval_message)
+            with pipeline_tracer.span("arbitrage_pipeline.opportunity", new_trace=True,
+                                      **{"opportunity.id": str(opp.get('id', 'unknown')),
+                                         "discovered_in_trace": discovery_trace[0] if discovery_trace else ""}):
+                await self._enqueue(eval_message)
     
     # ============================================================================
     # PIPELINE STAGE 3: CONSCIOUSNESS EVALUATION
@@ -301,7 +331,8 @@ class RehoboamArbitragePipeline:
         agent_analysis = message.data['agent_analysis']
         
         # Get consciousness-guided decision
-        decision = await conscious_arbitrage_engine.analyze_opportunity_with_consciousness(opportunity)
+        with pipeline_tracer.span("llm.analyze_opportunity_with_consciousness", kind=KIND_LLM):
+            decision = await conscious_arbitrage_engine.analyze_opportunity_with_consciousness(opportunity)
         
         logger.info(f"🧠 Consciousness evaluation: {decision.recommended_action} (score: {decision.consciousness_score:.2f})")
         
@@ -337,7 +368,7 @@ class RehoboamArbitragePipeline:
                 source='agent',
                 priority=10
             )
-            await self.message_queue.put(prep_message)
+            await self._enqueue(prep_message)
         else:
             logger.info(f"⏸️ Opportunity {opportunity.get('id', 'unknown')} not approved for execution: {decision.recommended_action}")
     
@@ -380,7 +411,7 @@ class RehoboamArbitragePipeline:
             source='agent',
             priority=10
         )
-        await self.message_queue.put(exec_message)
+        await self._enqueue(exec_message)
     
     # ============================================================================
     # PIPELINE STAGE 5: EXECUTION
@@ -400,7 +431,8 @@ class RehoboamArbitragePipeline:
             
             # Execute through conscious arbitrage engine
             opportunity = execution_params['opportunity']
-            result = await arbitrage_service.execute_arbitrage(opportunity)
+            with pipeline_tracer.span("rpc.execute_arbitrage", kind=KIND_RPC):
+                result = await arbitrage_service.execute_arbitrage(opportunity)
             
             # Update execution status
             if execution_id in self.active_executions:
@@ -433,7 +465,7 @@ class RehoboamArbitragePipeline:
                 source='bot',
                 priority=8
             )
-            await self.message_queue.put(feedback_message)
+            await self._enqueue(feedback_message)
             
             self.pipeline_metrics['successful_executions'] += 1
             
@@ -457,7 +489,7 @@ class RehoboamArbitragePipeline:
                 source='bot',
                 priority=9
             )
-            await self.message_queue.put(feedback_message)
+            await self._enqueue(feedback_message)
     
     # ============================================================================
     # PIPELINE STAGE 6: FEEDBACK
@@ -488,7 +520,7 @@ class RehoboamArbitragePipeline:
                 source='bot',
                 priority=6
             )
-            await self.message_queue.put(learning_message)
+            await self._enqueue(learning_message)
         
         # Clean up completed execution
         if execution_id in self.active_executions:
@@ -524,26 +556,65 @@ class RehoboamArbitragePipeline:
     # PIPELINE INFRASTRUCTURE
     # ============================================================================
     
-    async def _message_processor(self):
-        """Process messages through the pipeline"""
-        while self.is_running:
-            try:
-                # Get message from queue
-                message = await asyncio.wait_for(self.message_queue.get(), timeout=1.0)
-                
-                # Process message through appropriate handler
-                handler = self.stage_handlers.get(message.stage)
-                if handler:
-                    await handler(message)
-                    self.pipeline_metrics['messages_processed'] += 1
-                else:
-                    logger.warning(f"No handler for pipeline stage: {message.stage}")
-                    
-            except asyncio.TimeoutError:
-                continue
-            except Exception as e:
-                logger.error(f"Error processing pipeline message: {e}")
-                await asyncio.sleep(1)
+    def _build_scheduler(self) -> StageScheduler:
+        """One priority queue and worker pool per stage, sized from pipeline_config"""
+        stage_workers = self.pipeline_config['stage_workers']
+        workers = {stage: stage_workers.get(stage.value, 1) for stage in PipelineStage}
+        workers[PipelineStage.EXECUTION] = self.pipeline_config['max_concurrent_executions']
+        return StageScheduler(self._process_message, workers)
+    
+    async def _enqueue(self, message: PipelineMessage):
+        """Queue a message on its stage, ordered by message priority"""
+        # Carry the enqueuing span so the next stage continues the same trace
+        message.metadata = message.metadata or {}
+        message.metadata.setdefault('trace', pipeline_tracer.context())
+        message.metadata['enqueued_ns'] = time.time_ns()
+        await self.scheduler.submit(message.stage, message, message.priority)
+    
+    async def _process_message(self, message: PipelineMessage):
+        """Process a message through the handler for its stage"""
+        handler = self.stage_handlers.get(message.stage)
+        if handler:
+            metadata = message.metadata or {}
+            parent = metadata.get('trace')
+            name = f"arbitrage_pipeline.{message.stage.value}"
+            if metadata.get('enqueued_ns'):
+                queued = pipeline_tracer.record_span(f"{name}.queue", metadata['enqueued_ns'], time.time_ns(),
+                                                     kind=KIND_QUEUE, parent=parent, new_trace=parent is None)
+                parent = parent or queued.context()
+            with pipeline_tracer.span(name, kind=KIND_STAGE, parent=parent, new_trace=parent is None,
+                                      priority=message.priority) as span:
+                try:
+                    await self._run_handler(handler, message)
+                except DeadlineExceeded as e:
+                    span.set_attribute("expired_at_stage", e.stage)
+                    self._expire(message, e)
+                    return
+            self.pipeline_metrics['messages_processed'] += 1
+        else:
+            logger.warning(f"No handler for pipeline stage: {message.stage}")
+    
+    async def _run_handler(self, handler: Callable, message: PipelineMessage):
+        """Run a stage handler within the deadline of the opportunity it carries"""
+        opportunity = message.data.get('opportunity') if isinstance(message.data, dict) else None
+        if not isinstance(opportunity, dict) or 'expires_at' not in opportunity:
+            await handler(message)
+            return
+        deadline = Deadline.for_opportunity(opportunity)
+        if message.stage in DEADLINE_BOUND_STAGES:
+            await deadline.run(handler(message), message.stage.value)
+        else:
+            if message.stage == PipelineStage.EXECUTION:
+                # Refuse to start a stale trade, but never cancel one mid-flight
+                deadline.check(message.stage.value)
+            await handler(message)
+    
+    def _expire(self, message: PipelineMessage, error: DeadlineExceeded):
+        """Drop a message whose opportunity went stale and release its execution slot"""
+        record_expiry(self.pipeline_metrics, error.stage, counter='expired_opportunities')
+        execution_id = message.data.get('execution_id')
+        if execution_id:
+            self.active_executions.pop(execution_id, None)
     
     async def _bot_monitor(self):
         """Monitor bot executions for timeouts"""
@@ -579,7 +650,7 @@ class RehoboamArbitragePipeline:
                         source='bot',
                         priority=7
                     )
-                    await self.message_queue.put(feedback_message)
+                    await self._enqueue(feedback_message)
                 
                 await asyncio.sleep(30)  # Check every 30 seconds
                 
@@ -691,7 +762,9 @@ class RehoboamArbitragePipeline:
             'is_running': self.is_running,
             'metrics': self.pipeline_metrics,
             'active_executions': len(self.active_executions),
-            'queue_size': self.message_queue.qsize(),
+            'queue_size': self.scheduler.qsize(),
+            'stages': self.scheduler.get_metrics(),
+            'stage_latency': pipeline_tracer.get_stage_latency(("arbitrage_pipeline.", "llm.", "rpc.")),
             'consciousness_level': self.consciousness.consciousness_state.awareness_level if self.consciousness.consciousness_state else 0,
             'config': self.pipeline_config,
             'timestamp': datetime.now().isoformat()
@@ -0,0 +1,391 @@
+"""
+Shared-memory market state for out-of-process bots.
+
+The API process mirrors the latest prices, gas and pool reserves into a
+fixed-layout, mmap-backed file (``/dev/shm`` when available). Bot processes
+map the same file read-only and read straight out of it: no socket, no
+request, no serialization. Writers wrap each update in a seqlock (the
+sequence counter is odd while a write is in progress), and readers retry
+until they see the same even sequence before and after copying a slot.
+
+Layout: a 64-byte header followed by three tables of fixed-size records
+(prices, gas, reserves). Each record carries its own key, so readers can
+find slots by name; prices are keyed per venue (``token:network:venue``).
+``layout`` in the header changes whenever a new key is allocated and tells
+readers to rebuild their index. Keys longer than their field are rejected
+(and counted as dropped) rather than truncated, so they can never collide.
+"""
+import logging
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from utils.market_events import MarketEvent, MarketEventBus, market_event_bus
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 0x534D4852  # "RHMS"
+LAYOUT_VERSION = 3
+_U64_MASK = (1 << 64) - 1
+
+HEADER_DTYPE = np.dtype([
+    ('magic', '<u4'), ('version', '<u4'), ('seq', '<u8'), ('layout', '<u8'), ('updated_at', '<f8'),
+    ('price_slots', '<u4'), ('gas_slots', '<u4'), ('reserve_slots', '<u4'),
+    ('price_count', '<u4'), ('gas_count', '<u4'), ('reserve_count', '<u4'),
+], align=False)
+HEADER_SIZE = 64
+
+# Price keys hold a full contract address plus network and venue, e.g.
+# "0x<40 hex>:optimistic-ethereum:coingecko" (72 bytes)
+PRICE_DTYPE = np.dtype([('key', 'S96'), ('price', '<f8'), ('updated_at', '<f8')])
+GAS_DTYPE = np.dtype([
+    ('key', 'S32'), ('base_fee', '<f8'), ('priority_fee', '<f8'), ('block', '<u8'), ('updated_at', '<f8'),
+])
+# Uniswap V2 reserves are uint112, so each one is stored as two uint64 halves
+RESERVE_DTYPE = np.dtype([
+    ('key', 'S64'), ('reserve0_lo', '<u8'), ('reserve0_hi', '<u8'),
+    ('reserve1_lo', '<u8'), ('reserve1_hi', '<u8'), ('block', '<u8'), ('updated_at', '<f8'),
+])
+
+
+def default_path() -> str:
+    path = os.getenv("MARKET_STATE_PATH")
+    if path:
+        return path
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "rehoboam_market_state")
+
+
+def price_key(token: str, network: str = '', venue: str = '') -> str:
+    """``token`` alone for a venue-agnostic price, else ``token:network:venue``."""
+    key = str(token).lower()
+    return f"{key}:{network}:{str(venue).lower()}" if network or venue else key
+
+
+def reserve_key(network: str, pair_address: str) -> str:
+    return f"{network}:{str(pair_address).lower()}"
+
+
+def _split(value: int) -> Tuple[int, int]:
+    value = int(value)
+    return value & _U64_MASK, (value >> 64) & _U64_MASK
+
+
+def _join(lo: Any, hi: Any) -> int:
+    return (int(hi) << 64) | int(lo)
+
+
+class _Segment:
+    """Numpy views over the mapped file."""
+
+    def __init__(self, buffer, price_slots: int, gas_slots: int, reserve_slots: int):
+        offset = HEADER_SIZE
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buffer, offset=0)
+        self.prices = np.ndarray((price_slots,), dtype=PRICE_DTYPE, buffer=buffer, offset=offset)
+        offset += PRICE_DTYPE.itemsize * price_slots
+        self.gas = np.ndarray((gas_slots,), dtype=GAS_DTYPE, buffer=buffer, offset=offset)
+        offset += GAS_DTYPE.itemsize * gas_slots
+        self.reserves = np.ndarray((reserve_slots,), dtype=RESERVE_DTYPE, buffer=buffer, offset=offset)
+
+    @staticmethod
+    def size(price_slots: int, gas_slots: int, reserve_slots: int) -> int:
+        return (HEADER_SIZE + PRICE_DTYPE.itemsize * price_slots + GAS_DTYPE.itemsize * gas_slots
+                + RESERVE_DTYPE.itemsize * reserve_slots)
+
+
+class SharedMarketStateWriter:
+    """Single writer of the market-state segment (the API process)."""
+
+    def __init__(self, path: Optional[str] = None, price_slots: int = 256,
+                 gas_slots: int = 32, reserve_slots: int = 1024):
+        self.path = path or default_path()
+        size = _Segment.size(price_slots, gas_slots, reserve_slots)
+        # Write to a temp file and rename, so readers never map a half-initialised segment
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.truncate(size)
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        self._segment = _Segment(self._mmap, price_slots, gas_slots, reserve_slots)
+        header = self._segment.header
+        header['price_slots'], header['gas_slots'], header['reserve_slots'] = price_slots, gas_slots, reserve_slots
+        header['version'] = LAYOUT_VERSION
+        header['magic'] = MAGIC
+        self._index: Dict[str, Dict[str, int]] = {'prices': {}, 'gas': {}, 'reserves': {}}
+        self._depth = 0
+        self.writes = 0
+        self.dropped = 0
+        self._oversized: set = set()
+
+    @contextmanager
+    def batch(self):
+        """Hold the seqlock across several updates so readers see them together."""
+        header = self._segment.header
+        if self._depth == 0:
+            header['seq'] += 1  # odd: write in progress
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                header['updated_at'] = time.time()
+                header['seq'] += 1  # even: consistent
+
+    def _slot(self, table: str, key: str) -> Optional[int]:
+        index = self._index[table]
+        slot = index.get(key)
+        if slot is not None:
+            return slot
+        records = getattr(self._segment, table)
+        encoded = key.encode()
+        if len(encoded) > records.dtype['key'].itemsize:
+            self.dropped += 1
+            if key not in self._oversized:
+                self._oversized.add(key)
+                logger.warning(f"Shared market state {table} key {key!r} is longer than "
+                               f"{records.dtype['key'].itemsize} bytes; dropping it")
+            return None
+        if len(index) >= len(records):
+            self.dropped += 1
+            logger.warning(f"Shared market state {table} table is full; dropping {key}")
+            return None
+        slot = len(index)
+        records[slot]['key'] = encoded
+        index[key] = slot
+        header = self._segment.header
+        header[{'prices': 'price_count', 'gas': 'gas_count', 'reserves': 'reserve_count'}[table]] = len(index)
+        header['layout'] += 1
+        return slot
+
+    def set_price(self, token: str, price: float, updated_at: Optional[float] = None,
+                  network: str = '', venue: str = '') -> bool:
+        with self.batch():
+            slot = self._slot('prices', price_key(token, network, venue))
+            if slot is None:
+                return False
+            record = self._segment.prices[slot]
+            record['price'] = price
+            record['updated_at'] = updated_at or time.time()
+        self.writes += 1
+        return True
+
+    def set_gas(self, network: str, base_fee: float, priority_fee: float = 0.0,
+                block: int = 0, updated_at: Optional[float] = None) -> bool:
+        with self.batch():
+            slot = self._slot('gas', network)
+            if slot is None:
+                return False
+            record = self._segment.gas[slot]
+            record['base_fee'], record['priority_fee'] = base_fee, priority_fee
+            record['block'] = block
+            record['updated_at'] = updated_at or time.time()
+        self.writes += 1
+        return True
+
+    def set_reserves(self, network: str, pair_address: str, reserve0: int, reserve1: int,
+                     block: int = 0, updated_at: Optional[float] = None) -> bool:
+        with self.batch():
+            slot = self._slot('reserves', reserve_key(network, pair_address))
+            if slot is None:
+                return False
+            record = self._segment.reserves[slot]
+            record['reserve0_lo'], record['reserve0_hi'] = _split(reserve0)
+            record['reserve1_lo'], record['reserve1_hi'] = _split(reserve1)
+            record['block'] = block
+            record['updated_at'] = updated_at or time.time()
+        self.writes += 1
+        return True
+
+    def close(self, unlink: bool = False):
+        self._segment = None
+        self._mmap.close()
+        self._file.close()
+        if unlink:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class SharedMarketStateReader:
+    """Read-only view of the segment for bot processes."""
+
+    def __init__(self, path: Optional[str] = None, max_retries: int = 1000):
+        self.path = path or default_path()
+        self.max_retries = max_retries
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self._mmap, offset=0)
+        if int(header['magic']) != MAGIC or int(header['version']) != LAYOUT_VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a market state segment (version {LAYOUT_VERSION})")
+        self._segment = _Segment(self._mmap, int(header['price_slots']), int(header['gas_slots']),
+                                 int(header['reserve_slots']))
+        self._layout = None
+        self._index: Dict[str, Dict[str, int]] = {}
+        self.retries = 0
+
+    def _consistent(self, read: Callable[[], Any]) -> Any:
+        """Run ``read`` until it completes without a concurrent write (seqlock read side)."""
+        header = self._segment.header
+        for _ in range(self.max_retries):
+            before = int(header['seq'])
+            if before & 1:
+                self.retries += 1
+                time.sleep(0)
+                continue
+            result = read()
+            if int(header['seq']) == before:
+                return result
+            self.retries += 1
+        raise TimeoutError("Market state kept changing while being read")
+
+    def _lookup(self, table: str, key: str) -> Optional[int]:
+        return self._current_index()[table].get(key)
+
+    def _current_index(self) -> Dict[str, Dict[str, int]]:
+        """Key -> slot per table, rebuilt when the writer has allocated new keys."""
+        header = self._segment.header
+        if self._layout != int(header['layout']):
+            def build():
+                counts = {'prices': int(header['price_count']), 'gas': int(header['gas_count']),
+                          'reserves': int(header['reserve_count'])}
+                return int(header['layout']), {
+                    name: {k.decode(): i for i, k in enumerate(getattr(self._segment, name)['key'][:count])}
+                    for name, count in counts.items()
+                }
+            self._layout, self._index = self._consistent(build)
+        return self._index
+
+    @property
+    def updated_at(self) -> float:
+        return float(self._segment.header['updated_at'])
+
+    def get_price(self, token: str, network: str = '', venue: str = '') -> Optional[Tuple[float, float]]:
+        """(price, updated_at) for one venue, or None."""
+        slot = self._lookup('prices', price_key(token, network, venue))
+        if slot is None:
+            return None
+        record = self._consistent(lambda: self._segment.prices[slot].copy())
+        return float(record['price']), float(record['updated_at'])
+
+    def get_prices(self, token: str) -> Dict[str, Tuple[float, float]]:
+        """(price, updated_at) of a token at every venue, keyed ``network:venue``."""
+        prefix = f"{str(token).lower()}:"
+        slots = {key[len(prefix):]: slot for key, slot in self._current_index()['prices'].items()
+                 if key.startswith(prefix)}
+        records = self._consistent(lambda: {venue: self._segment.prices[slot].copy()
+                                            for venue, slot in slots.items()})
+        return {venue: (float(r['price']), float(r['updated_at'])) for venue, r in records.items()}
+
+    def get_gas(self, network: str) -> Optional[Dict[str, float]]:
+        slot = self._lookup('gas', network)
+        if slot is None:
+            return None
+        record = self._consistent(lambda: self._segment.gas[slot].copy())
+        return {'base_fee': float(record['base_fee']), 'priority_fee': float(record['priority_fee']),
+                'block': int(record['block']), 'updated_at': float(record['updated_at'])}
+
+    def get_reserves(self, network: str, pair_address: str) -> Optional[Dict[str, Any]]:
+        slot = self._lookup('reserves', reserve_key(network, pair_address))
+        if slot is None:
+            return None
+        record = self._consistent(lambda: self._segment.reserves[slot].copy())
+        return {'reserve0': _join(record['reserve0_lo'], record['reserve0_hi']),
+                'reserve1': _join(record['reserve1_lo'], record['reserve1_hi']),
+                'block': int(record['block']), 'updated_at': float(record['updated_at'])}
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Copy every table under one consistent sequence number."""
+        header = self._segment.header
+
+        def copy():
+            return (self._segment.prices[:int(header['price_count'])].copy(),
+                    self._segment.gas[:int(header['gas_count'])].copy(),
+                    self._segment.reserves[:int(header['reserve_count'])].copy())
+
+        prices, gas, reserves = self._consistent(copy)
+        return {
+            'prices': {r['key'].decode(): float(r['price']) for r in prices},
+            'gas': {r['key'].decode(): {'base_fee': float(r['base_fee']), 'priority_fee': float(r['priority_fee']),
+                                        'block': int(r['block'])} for r in gas},
+            'reserves': {r['key'].decode(): (_join(r['reserve0_lo'], r['reserve0_hi']),
+                                             _join(r['reserve1_lo'], r['reserve1_hi'])) for r in reserves},
+        }
+
+    def close(self):
+        self._segment = None
+        self._mmap.close()
+        self._file.close()
+
+
+@dataclass
+class _PublisherStats:
+    events: int = 0
+    prices: int = 0
+    gas: int = 0
+    reserves: int = 0
+
+
+class SharedMarketStatePublisher:
+    """Mirrors market-bus updates from the producers into the shared segment."""
+
+    def __init__(self, event_bus: Optional[MarketEventBus] = None, path: Optional[str] = None):
+        self.event_bus = event_bus or market_event_bus
+        self.path = path
+        self.writer: Optional[SharedMarketStateWriter] = None
+        self.stats = _PublisherStats()
+
+    def start(self):
+        if self.writer is not None:
+            return
+        self.writer = SharedMarketStateWriter(self.path)
+        self.event_bus.subscribe(self.on_event)
+        logger.info(f"Shared market state published at {self.writer.path}")
+
+    def stop(self, unlink: bool = True):
+        if self.writer is None:
+            return
+        self.event_bus.unsubscribe(self.on_event)
+        self.writer.close(unlink=unlink)
+        self.writer = None
+
+    def on_event(self, event: MarketEvent):
+        writer = self.writer
+        if writer is None:
+            return
+        self.stats.events += 1
+        payload = event.payload
+        if event.source == "pool_cache" and payload.get("pair"):
+            writer.set_reserves(payload["network"], payload["pair"], payload.get("reserve0", 0),
+                                payload.get("reserve1", 0), payload.get("block") or 0, event.timestamp)
+            self.stats.reserves += 1
+        elif event.source == "gas_oracle" and payload.get("network"):
+            writer.set_gas(payload["network"], payload.get("base_fee") or 0.0, payload.get("priority_fee") or 0.0,
+                           payload.get("block") or 0, event.timestamp)
+            self.stats.gas += 1
+        elif payload.get("token") and payload.get("price") is not None:
+            writer.set_price(payload["token"], payload["price"], event.timestamp,
+                             payload.get("network") or '', payload.get("venue") or event.source)
+            self.stats.prices += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'active': self.writer is not None,
+            'path': self.writer.path if self.writer else None,
+            'writes': self.writer.writes if self.writer else 0,
+            'dropped': self.writer.dropped if self.writer else 0,
+            **asdict(self.stats),
+        }
+
+
+# Global publisher; started by the API server
+shared_market_state = SharedMarketStatePublisher()
@@ -0,0 +1,155 @@
+"""
+Priority-aware, multi-worker stage scheduler.
+
+Each stage gets its own priority queue and its own pool of worker tasks, so a
+slow stage only backs up its own queue instead of blocking every other stage.
+The worker count of a stage is its concurrency limit. Queue depth, queue wait
+and handler latency are tracked per stage.
+"""
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile_ms(samples: Deque[float], p: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2)
+
+
+@dataclass
+class StageMetrics:
+    """Counters and latency samples for one stage."""
+    workers: int
+    enqueued: int = 0
+    processed: int = 0
+    failed: int = 0
+    in_flight: int = 0
+    max_depth: int = 0
+    queue_wait: Deque[float] = field(default_factory=lambda: deque(maxlen=500))
+    service_time: Deque[float] = field(default_factory=lambda: deque(maxlen=500))
+
+    def to_dict(self, depth: int) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'queue_depth': depth,
+            'max_queue_depth': self.max_depth,
+            'in_flight': self.in_flight,
+            'enqueued': self.enqueued,
+            'processed': self.processed,
+            'failed': self.failed,
+            'queue_wait_p50_ms': _percentile_ms(self.queue_wait, 0.5),
+            'queue_wait_p95_ms': _percentile_ms(self.queue_wait, 0.95),
+            'latency_p50_ms': _percentile_ms(self.service_time, 0.5),
+            'latency_p95_ms': _percentile_ms(self.service_time, 0.95),
+        }
+
+
+class StageScheduler:
+    """Runs ``handler(item)`` for items submitted to per-stage priority queues."""
+
+    def __init__(self, handler: Callable[[Any], Awaitable[None]], stage_workers: Dict[Hashable, int]):
+        self.handler = handler
+        self.stage_workers = {stage: max(1, int(n)) for stage, n in stage_workers.items()}
+        self.queues: Dict[Hashable, asyncio.PriorityQueue] = {}
+        self.metrics: Dict[Hashable, StageMetrics] = {
+            stage: StageMetrics(workers=n) for stage, n in self.stage_workers.items()
+        }
+        self._workers: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+        self._pending = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._workers)
+
+    def _queue(self, stage: Hashable) -> asyncio.PriorityQueue:
+        queue = self.queues.get(stage)
+        if queue is None:
+            queue = self.queues[stage] = asyncio.PriorityQueue()
+        return queue
+
+    async def submit(self, stage: Hashable, item: Any, priority: int = 5):
+        """Queue an item for a stage. Higher priority runs first, FIFO among equals."""
+        if stage not in self.metrics:
+            raise KeyError(f"Unknown stage: {stage}")
+        queue = self._queue(stage)
+        await queue.put((-priority, next(self._sequence), time.perf_counter(), item))
+        self._pending += 1
+        self._idle.clear()
+        metrics = self.metrics[stage]
+        metrics.enqueued += 1
+        metrics.max_depth = max(metrics.max_depth, queue.qsize())
+
+    async def _worker(self, stage: Hashable):
+        queue = self._queue(stage)
+        metrics = self.metrics[stage]
+        while True:
+            _, _, enqueued_at, item = await queue.get()
+            started = time.perf_counter()
+            metrics.queue_wait.append(started - enqueued_at)
+            metrics.in_flight += 1
+            try:
+                await self.handler(item)
+                metrics.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.failed += 1
+                logger.error(f"Stage {getattr(stage, 'value', stage)} handler failed: {e}")
+            finally:
+                metrics.in_flight -= 1
+                metrics.service_time.append(time.perf_counter() - started)
+                queue.task_done()
+                self._pending -= 1
+                if not self._pending:
+                    self._idle.set()
+
+    async def start(self):
+        if self.running:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(stage))
+            for stage, count in self.stage_workers.items()
+            for _ in range(count)
+        ]
+        logger.info(f"Stage scheduler started {len(self._workers)} workers "
+                    f"across {len(self.stage_workers)} stages")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+        dropped = self.qsize()
+        if dropped:
+            logger.info(f"Stage scheduler stopped with {dropped} queued items")
+
+    async def join(self):
+        """Wait until every queued item, including ones queued by handlers, has been processed."""
+        await self._idle.wait()
+
+    def qsize(self, stage: Optional[Hashable] = None) -> int:
+        if stage is not None:
+            queue = self.queues.get(stage)
+            return queue.qsize() if queue else 0
+        return sum(queue.qsize() for queue in self.queues.values())
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            getattr(stage, 'value', str(stage)): metrics.to_dict(self.qsize(stage))
+            for stage, metrics in self.metrics.items()
+        }
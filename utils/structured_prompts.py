@@ -0,0 +1,205 @@
+"""
+Compact, schema-constrained LLM prompts with per-decision token budgets.
+
+``StructuredPrompt`` renders its context as minified JSON, trimmed until the
+prompt fits a token allowance, and asks for a single JSON object described
+by ``OutputField`` entries. ``parse`` validates the answer against the same
+schema, so no free-text scraping is needed. ``TokenBudget`` tracks prompt
+and completion tokens across the calls made for one decision.
+
+Calls are charged with the token usage the provider reported; when it
+reported none (or the answer came from a cache), the same ~4 characters/token
+estimate as the orchestrator's cost budgeting is used instead.
+"""
+import json
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+# (max string length, max list items) per compaction pass, loosest first
+_COMPACTION_LEVELS = ((160, 8), (64, 4), (24, 2))
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def compact(value: Any, max_chars: int = 160, max_items: int = 8) -> Any:
+    """Drop empty values, round floats and truncate long strings and lists."""
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            item = compact(item, max_chars, max_items)
+            if item is not None and item != "" and item != {} and item != []:
+                result[str(key)] = item
+        return result
+    if isinstance(value, (list, tuple, set)):
+        return [compact(item, max_chars, max_items) for item in list(value)[:max_items]]
+    if isinstance(value, bool) or value is None or isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return float(f"{value:.6g}") if math.isfinite(value) else None
+    text = str(value)
+    return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+
+@dataclass
+class OutputField:
+    """One key of the expected JSON answer."""
+    type: str  # 'number', 'string', 'enum' or 'list'
+    default: Any
+    low: float = 0.0
+    high: float = 1.0
+    choices: Tuple[str, ...] = ()
+
+    def describe(self) -> str:
+        if self.type == "number":
+            return f"number {self.low:g}-{self.high:g}"
+        if self.type == "enum":
+            return "|".join(self.choices)
+        if self.type == "list":
+            return "[short strings]"
+        return "short string"
+
+    def coerce(self, value: Any) -> Any:
+        """Schema-conforming value, or raise ValueError."""
+        if self.type == "number":
+            number = float(value)
+            if not math.isfinite(number):
+                raise ValueError("not a finite number")
+            return min(max(number, self.low), self.high)
+        if self.type == "enum":
+            choice = str(value).strip().lower()
+            if choice not in self.choices:
+                raise ValueError(f"expected one of {self.choices}")
+            return choice
+        if self.type == "list":
+            if not isinstance(value, list):
+                raise ValueError("expected a list")
+            return [str(item) for item in value]
+        return str(value)
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a prompt cannot fit what is left of a token budget."""
+
+
+class TokenBudget:
+    """Prompt + completion tokens allowed for one decision."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+        self.skipped = 0
+
+    @property
+    def used(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def remaining(self) -> int:
+        return max(self.total - self.used, 0)
+
+    def charge(self, prompt: str, completion: str, prompt_tokens: Optional[int] = None,
+               completion_tokens: Optional[int] = None) -> Tuple[int, int]:
+        """Book one call, preferring reported token counts over estimates; returns what was charged."""
+        if prompt_tokens is None:
+            prompt_tokens = estimate_tokens(prompt)
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens(completion)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.calls += 1
+        return prompt_tokens, completion_tokens
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"total": self.total, "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens, "calls": self.calls, "skipped": self.skipped}
+
+
+@dataclass
+class StructuredPrompt:
+    """Instruction + compact JSON context + the JSON shape the answer must take.
+
+    Context keys are in priority order: when the prompt is over its allowance,
+    values are truncated harder and then trailing keys are dropped.
+    """
+    instruction: str
+    fields: Dict[str, OutputField]
+    context: Dict[str, Any] = field(default_factory=dict)
+    completion_tokens: int = 200
+
+    def _render(self, context: Dict[str, Any]) -> str:
+        schema = ",".join(f'"{name}":{spec.describe()}' for name, spec in self.fields.items())
+        return (f"{self.instruction}\n"
+                f"Context:{json.dumps(context, separators=(',', ':'), ensure_ascii=False, default=str)}\n"
+                f"Respond with only a JSON object:{{{schema}}}")
+
+    def render(self, max_tokens: Optional[int] = None) -> str:
+        """Smallest-effort rendering within ``max_tokens`` prompt tokens."""
+        prompt = ""
+        for max_chars, max_items in _COMPACTION_LEVELS:
+            context = compact(self.context, max_chars, max_items)
+            prompt = self._render(context)
+            if max_tokens is None or estimate_tokens(prompt) <= max_tokens:
+                return prompt
+        keys = list(context)
+        while keys and estimate_tokens(prompt) > max_tokens:
+            keys.pop()
+            prompt = self._render({key: context[key] for key in keys})
+        if estimate_tokens(prompt) > max_tokens:
+            raise TokenBudgetExceeded(f"prompt needs {estimate_tokens(prompt)} tokens, {max_tokens} available")
+        return prompt
+
+    def fit(self, budget: TokenBudget) -> Tuple[str, int]:
+        """Render within what is left of ``budget``; returns (prompt, max completion tokens)."""
+        prompt = self.render(budget.remaining - self.completion_tokens)
+        return prompt, self.completion_tokens
+
+    def defaults(self) -> Dict[str, Any]:
+        return {name: list(spec.default) if isinstance(spec.default, list) else spec.default
+                for name, spec in self.fields.items()}
+
+    def parse(self, text: Optional[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """Validated answer (defaults for missing or invalid keys) and the problems found."""
+        result, errors = self.defaults(), []
+        answer = _first_json_object(text)
+        if answer is None:
+            return result, ["no JSON object in response"]
+        for name, spec in self.fields.items():
+            if name not in answer:
+                errors.append(f"missing {name}")
+                continue
+            try:
+                result[name] = spec.coerce(answer[name])
+            except (TypeError, ValueError) as e:
+                errors.append(f"invalid {name}: {e}")
+        return result, errors
+
+
+def _first_json_object(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    decoder = json.JSONDecoder()
+    start = text.find("{") if text else -1
+    while start != -1:
+        try:
+            value, _ = decoder.raw_decode(text, start)
+            if isinstance(value, dict):
+                return value
+        except ValueError:
+            pass
+        start = text.find("{", start + 1)
+    return None
+
+
+def prioritized(data: Dict[str, Any], keys: Sequence[str]) -> Dict[str, Any]:
+    """``data`` reordered so ``keys`` come first (the order ``render`` keeps them in)."""
+    ordered = {key: data[key] for key in keys if key in data}
+    ordered.update((key, value) for key, value in data.items() if key not in ordered)
+    return ordered
@@ -13,6 +13,8 @@ import json
 import httpx
 from typing import Optional, Dict, Any, List
 
+from utils.llm_telemetry import llm_telemetry
+
 # Attempt to import from a central Config class first
 try:
     from config import Config
@@ -237,14 +239,18 @@ The JSON should be complete and parseable.
 
         raw_llm_response_content = None
         try:
-            response = await self.client.post(
-                f"{self.base_url.rstrip('/')}{self.chat_endpoint.lstrip('/')}",
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()  # Raise an exception for HTTP errors
-
-            response_json = response.json()
+            with llm_telemetry.track("t2l_auditor.audit", "openrouter", prompt) as call:
+                response = await self.client.post(
+                    f"{self.base_url.rstrip('/')}{self.chat_endpoint.lstrip('/')}",
+                    headers=headers,
+                    json=payload
+                )
+                response.raise_for_status()  # Raise an exception for HTTP errors
+
+                response_json = response.json()
+                call.set_usage(response_json)
+                call.completion = str(((response_json.get("choices") or [{}])[0].get("message") or {})
+                                      .get("content") or "")
             self.logger.debug(f"Full API response: {response_json}")
 
             if not response_json.get("choices") or not response_json["choices"][0].get("message") or \
@@ -0,0 +1,154 @@
+"""
+Indexed scheduling primitives for the bot orchestrator.
+
+- TaskHeap: pending tasks keyed by (priority desc, deadline asc, FIFO), with
+  O(log n) push/pop and O(1) lazy removal.
+- BotReadySet: available bots with precomputed scores, O(1) best-bot lookup
+  and O(log n) updates.
+- TimerWheel: hashed timing wheel for deadline expiry, O(1) schedule/cancel.
+"""
+import heapq
+import itertools
+import math
+import time
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+
+class TaskHeap:
+    """Priority queue of task ids; higher priority first, then earlier deadline."""
+
+    def __init__(self):
+        self._heap: List[list] = []
+        self._entries: Dict[Hashable, list] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, task_id: Hashable) -> bool:
+        return task_id in self._entries
+
+    def push(self, task_id: Hashable, priority: int, deadline: Optional[float] = None):
+        if task_id in self._entries:
+            self.remove(task_id)
+        entry = [-priority, deadline if deadline is not None else math.inf, next(self._sequence), task_id, True]
+        self._entries[task_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, task_id: Hashable) -> bool:
+        entry = self._entries.pop(task_id, None)
+        if entry is None:
+            return False
+        entry[-1] = False  # Dropped lazily when it reaches the top
+        return True
+
+    def _prune(self):
+        while self._heap and not self._heap[0][-1]:
+            heapq.heappop(self._heap)
+
+    def peek(self) -> Optional[Hashable]:
+        self._prune()
+        return self._heap[0][3] if self._heap else None
+
+    def pop(self) -> Optional[Hashable]:
+        self._prune()
+        if not self._heap:
+            return None
+        entry = heapq.heappop(self._heap)
+        del self._entries[entry[3]]
+        return entry[3]
+
+
+class BotReadySet:
+    """Bots that can take work right now, ordered by a precomputed score."""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._scores: Dict[Hashable, float] = {}
+        self._versions: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, bot_id: Hashable) -> bool:
+        return bot_id in self._scores
+
+    def update(self, bot_id: Hashable, score: float, available: bool = True):
+        """Set a bot's score and availability. Stale heap entries are skipped on read."""
+        if available == (bot_id in self._scores) and (not available or self._scores[bot_id] == score):
+            return
+        version = self._versions.get(bot_id, 0) + 1
+        self._versions[bot_id] = version
+        if available:
+            self._scores[bot_id] = score
+            heapq.heappush(self._heap, (-score, version, bot_id))
+            if len(self._heap) > 2 * len(self._scores) + 16:
+                self._compact()
+        else:
+            self._scores.pop(bot_id, None)
+
+    def _compact(self):
+        """Rebuild the heap from live entries once stale ones outnumber them."""
+        self._heap = [(-score, self._versions[bot_id], bot_id) for bot_id, score in self._scores.items()]
+        heapq.heapify(self._heap)
+
+    def discard(self, bot_id: Hashable):
+        self.update(bot_id, 0.0, available=False)
+
+    def best(self) -> Optional[Hashable]:
+        while self._heap:
+            neg_score, version, bot_id = self._heap[0]
+            if self._versions.get(bot_id) == version and bot_id in self._scores:
+                return bot_id
+            heapq.heappop(self._heap)
+        return None
+
+    def score(self, bot_id: Hashable) -> Optional[float]:
+        return self._scores.get(bot_id)
+
+
+class TimerWheel:
+    """Hashed timing wheel; ``advance`` returns the keys whose deadline has passed."""
+
+    def __init__(self, tick_seconds: float = 1.0, slots: int = 512, now: Optional[float] = None):
+        self.tick_seconds = tick_seconds
+        self.slots: List[Set[Hashable]] = [set() for _ in range(slots)]
+        self._deadlines: Dict[Hashable, Tuple[float, int]] = {}
+        self._current_tick = self._tick(now if now is not None else time.time())
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def _tick(self, timestamp: float) -> int:
+        return int(timestamp // self.tick_seconds)
+
+    def schedule(self, key: Hashable, deadline: float):
+        self.cancel(key)
+        # Deadlines already behind the wheel land in the current slot and fire on the next advance
+        index = max(self._tick(deadline), self._current_tick) % len(self.slots)
+        self._deadlines[key] = (deadline, index)
+        self.slots[index].add(key)
+
+    def cancel(self, key: Hashable) -> bool:
+        scheduled = self._deadlines.pop(key, None)
+        if scheduled is None:
+            return False
+        self.slots[scheduled[1]].discard(key)
+        return True
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """Move the wheel to ``now``. Entries for later revolutions stay in their slot."""
+        now = now if now is not None else time.time()
+        target = max(self._tick(now), self._current_tick)
+        # One full revolution already visits every slot
+        last = min(target, self._current_tick + len(self.slots) - 1)
+        expired: List[Hashable] = []
+        for tick in range(self._current_tick, last + 1):
+            slot = self.slots[tick % len(self.slots)]
+            due = [key for key in slot if self._deadlines[key][0] <= now]
+            for key in due:
+                slot.discard(key)
+                del self._deadlines[key]
+            expired.extend(due)
+        self._current_tick = target
+        return expired
@@ -16,6 +16,7 @@ from utils.ai_market_analyzer import market_analyzer
 from utils.layer2_trading import Layer2Arbitrage, Layer2GasEstimator, Layer2TradingOptimizer
 from utils.network_config import NetworkConfig
 from utils.web_data import WebDataFetcher
+from utils.fan_out import Source, fan_out
 
 logger = logging.getLogger(__name__)
 
@@ -101,10 +102,13 @@ class AITradingOrchestrator:
         
         logger.info("AITradingOrchestrator initialized")
     
-    async def analyze_market_conditions(self, token: str = "ETH") -> Dict[str, Any]:
+    async def analyze_market_conditions(self, token: str = "ETH",
+                                        model_analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Perform comprehensive market analysis using all available AI models
         to generate the most accurate insights possible.
+        
+        ``model_analysis`` lets batch callers pass a prefetched multi-model analysis.
         """
         # Check if we have fresh analysis
         now = time.time()
@@ -116,26 +120,33 @@ class AITradingOrchestrator:
             return self.market_data[cache_key]
         
         try:
-            # Get data from multiple sources for cognitive triangulation
-            rehoboam_analysis = await self.rehoboam.analyze_market({"token": token})
-            model_analysis = await model_orchestrator.analyze_market(token)
-            market_analysis = await market_analyzer.analyze_token(token)
-            
-            # Cross-network insights
-            network_insights = await market_analyzer.get_cross_network_insights()
+            # Get data from multiple sources for cognitive triangulation, concurrently
+            sources = [
+                Source("rehoboam", lambda: {"market_emotions": self.rehoboam.get_market_emotions()},
+                       timeout=15, default={}, blocking=True),
+                Source("market", lambda: market_analyzer.analyze_token(token), timeout=30, default={}),
+                Source("network", market_analyzer.get_cross_network_insights, timeout=15, default={}),
+            ]
+            if model_analysis is None:
+                sources.append(Source("models", lambda: model_orchestrator.analyze_market(token), timeout=30, default={}))
+            fetched = await fan_out(sources)
+            if not fetched.any_ok:
+                raise RuntimeError(f"all analysis sources failed: {fetched.status_map()}")
             
             # Combine insights from all sources (cognitive fusion)
             combined_analysis = self._combine_market_insights(
                 token,
-                rehoboam_analysis,
-                model_analysis,
-                market_analysis,
-                network_insights
+                fetched["rehoboam"],
+                fetched["models"] if model_analysis is None else model_analysis,
+                fetched["market"],
+                fetched["network"]
             )
+            combined_analysis["source_status"] = fetched.status_map()
             
-            # Cache the results
-            self.market_data[cache_key] = combined_analysis
-            self.last_analysis_time[cache_key] = now
+            # Cache only complete results; partial ones are retried on the next call
+            if fetched.all_ok:
+                self.market_data[cache_key] = combined_analysis
+                self.last_analysis_time[cache_key] = now
             
             return combined_analysis
             
@@ -147,6 +158,26 @@ class AITradingOrchestrator:
                 "timestamp": datetime.now().isoformat()
             }
     
+    async def analyze_market_conditions_batch(self, tokens: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Analyze several tokens, fetching the multi-model analysis for all stale tokens in one request."""
+        tokens = list(dict.fromkeys(tokens))
+        now = time.time()
+        stale = [
+            token for token in tokens
+            if not (f"market_analysis_{token}" in self.market_data and
+                    now - self.last_analysis_time.get(f"market_analysis_{token}", 0) < self.analysis_refresh_interval)
+        ]
+        model_analyses = await model_orchestrator.analyze_markets(stale) if stale else {}
+        
+        semaphore = asyncio.Semaphore(model_orchestrator.batch_fallback_concurrency)
+        
+        async def analyze(token: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.analyze_market_conditions(token, model_analyses.get(token))
+        
+        analyses = await asyncio.gather(*(analyze(token) for token in tokens))
+        return dict(zip(tokens, analyses))
+    
     def _combine_market_insights(self, token: str, rehoboam_analysis: Dict[str, Any],
                               model_analysis: Dict[str, Any], market_analysis: Dict[str, Any],
                               network_insights: Dict[str, Any]) -> Dict[str, Any]:
@@ -256,39 +287,40 @@ class AITradingOrchestrator:
                 gas_data = self.l2_gas_estimator.get_gas_price(network)
                 gas_prices[network] = gas_data
             
-            # Enhance opportunities with AI insights
-            enhanced_opportunities = []
+            # Market analysis once per token, then one batched AI assessment for every opportunity
+            market_analyses = await self.analyze_market_conditions_batch(
+                [opportunity.get("symbol", "ETH") for opportunity in opportunities]
+            )
             
+            items = []
             for opportunity in opportunities:
-                # Get token-specific analysis
-                token = opportunity.get("symbol", "ETH")
-                market_analysis = await self.analyze_market_conditions(token)
-                
-                # Create enhancement request for the AI
-                enhancement_prompt = f"""
-                Analyze this arbitrage opportunity:
-                - Token: {token}
-                - Buy Network: {opportunity.get('routes', [{}])[0].get('buy_network', 'unknown')}
-                - Sell Network: {opportunity.get('routes', [{}])[0].get('sell_network', 'unknown')}
-                - Estimated Profit: {opportunity.get('estimated_profit', 0):.4f}
-                
-                Consider these market conditions:
-                - Price trend: {market_analysis.get('prediction', {}).get('direction', 'unknown')}
-                - Market sentiment: {market_analysis.get('sentiment', {}).get('mood', 'unknown')}
-                
-                Provide a risk assessment and confidence score (0-1) for this arbitrage opportunity.
-                Format response as JSON with: risk_level, confidence, recommendation, key_risks
-                """
-                
-                # Get AI enhancement
-                enhancement = await model_orchestrator.process_request(enhancement_prompt)
-                
-                if enhancement.success:
-                    enhancement_data = model_orchestrator._extract_json_from_response(enhancement.content)
-                else:
-                    enhancement_data = {}
-                
-                # Combine opportunity with AI insights
+                market_analysis = market_analyses[opportunity.get("symbol", "ETH")]
+                route = opportunity.get('routes', [{}])[0]
+                items.append({
+                    "token": opportunity.get("symbol", "ETH"),
+                    "buy_network": route.get('buy_network', 'unknown'),
+                    "sell_network": route.get('sell_network', 'unknown'),
+                    "estimated_profit": round(opportunity.get('estimated_profit', 0), 4),
+                    "price_trend": market_analysis.get('prediction', {}).get('direction', 'unknown'),
+                    "market_sentiment": market_analysis.get('sentiment', {}).get('mood', 'unknown')
+                })
+            
+            enhancements = await model_orchestrator.process_batch(
+                "Analyze each arbitrage opportunity in light of its market conditions and provide "
+                "a risk assessment and confidence score (0-1).",
+                items,
+                {
+                    "risk_level": '"low" | "medium" | "high"',
+                    "confidence": "number 0-1",
+                    "recommendation": "string",
+                    "key_risks": "array of strings"
+                }
+            ) if items else []
+            
+            # Combine opportunities with AI insights
+            enhanced_opportunities = []
+            for opportunity, enhancement_data in zip(opportunities, enhancements):
+                market_analysis = market_analyses[opportunity.get("symbol", "ETH")]
                 enhanced_opportunity = opportunity.copy()
                 enhanced_opportunity.update({
                     "ai_risk_assessment": enhancement_data.get("risk_level", "medium"),